@@ -8,6 +8,7 @@ import os
 import sys
 import streamlit as st
 from pathlib import Path
+from typing import NamedTuple
 from dotenv import load_dotenv
 
 # Charge les variables d'environnement
@@ -21,8 +22,15 @@ else:
 # Ajoute src au path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
-from chat_handler import create_chat_handler
-from dataiku_connector import get_connector
+from chat_handler import ChatHandler, create_chat_handler
+from dataset_browser import PAGE_SIZE as DATASETS_PAGE_SIZE, DatasetBrowser
+from resources import ResourceRegistry
+from session_store import SessionStore
+from src.api.singleflight import single_flight_stats
+from src.api.throttle import get_throttle
+
+# Messages affichés par page (« Afficher les messages précédents » pour remonter)
+PAGE_SIZE = int(os.getenv("CHATBOT_PAGE_SIZE", "20"))
 
 
 # Configuration de la page
@@ -60,26 +68,96 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-def init_session_state():
-    """Initialise l'état de session Streamlit"""
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
+class ProjectResources(NamedTuple):
+    """Ressources partagées d'un projet, créées et évincées ensemble"""
+    handler: ChatHandler
+    browser: DatasetBrowser
 
-    if "chat_handler" not in st.session_state:
-        project_key = os.getenv("DSS_PROJECT_KEY", "TEST_WORKFLOW")
-        try:
-            st.session_state.chat_handler = create_chat_handler(project_key)
-            st.session_state.project_key = project_key
-        except Exception as e:
-            st.error(f"Erreur d'initialisation : {e}")
-            st.stop()
 
-    if "connector" not in st.session_state:
-        try:
-            st.session_state.connector = get_connector(st.session_state.project_key)
-        except Exception as e:
-            st.error(f"Erreur de connexion Dataiku : {e}")
-            st.stop()
+def create_project_resources(project_key: str) -> ProjectResources:
+    """ChatHandler du projet et navigateur de datasets sur le même connecteur"""
+    handler = create_chat_handler(project_key)
+    return ProjectResources(handler, DatasetBrowser(handler.connector))
+
+
+@st.cache_resource
+def get_registry() -> ResourceRegistry:
+    """Registre des ressources par projet partagé par toutes les sessions du processus"""
+    return ResourceRegistry(
+        factory=create_project_resources,
+        max_projects=int(os.getenv("CHATBOT_MAX_PROJECTS", "8")),
+        idle_ttl=float(os.getenv("CHATBOT_PROJECT_IDLE_TTL", "1800"))
+    )
+
+
+@st.cache_resource
+def get_store() -> SessionStore:
+    """Conversations persistées (SQLite), partagées par toutes les sessions du processus"""
+    return SessionStore()
+
+
+def get_dataset_browser(project_key: str) -> DatasetBrowser:
+    """Navigateur de datasets du projet (liste et schémas en cache, partagés)"""
+    return get_registry().get(project_key).browser
+
+
+def get_chat_handler() -> ChatHandler:
+    """Retourne le ChatHandler partagé du projet de la session"""
+    return get_registry().get(st.session_state.project_key).handler
+
+
+def current_user():
+    """
+    Utilisateur connecté : compte Streamlit (st.user) ou en-tête posé par le
+    proxy d'authentification (CHATBOT_USER_HEADER) ; None si anonyme
+    """
+    user = getattr(st, "user", None)
+    if user is not None and getattr(user, "is_logged_in", False):
+        return user.get("email") or user.get("sub")
+    header = os.getenv("CHATBOT_USER_HEADER")
+    context = getattr(st, "context", None)
+    if header and context is not None:
+        return context.headers.get(header) or None
+    return None
+
+
+def new_conversation():
+    """Démarre une conversation vide (enregistrée au premier message)"""
+    st.session_state.session_id = None
+    st.session_state.visible = PAGE_SIZE
+    st.query_params.pop("session", None)
+
+
+def start_session() -> str:
+    """Enregistre la conversation au premier message (identifiant repris dans l'URL)"""
+    session_id = get_store().create_session(st.session_state.project_key, st.session_state.owner)
+    st.session_state.session_id = session_id
+    st.query_params["session"] = session_id
+    return session_id
+
+
+def init_session_state():
+    """Initialise l'état de session Streamlit (identifiant de conversation uniquement)"""
+    if "project_key" not in st.session_state:
+        st.session_state.project_key = os.getenv("DSS_PROJECT_KEY", "TEST_WORKFLOW")
+
+    if "session_id" not in st.session_state:
+        st.session_state.owner = current_user()
+        # Rechargement de la page ou redémarrage : reprend la conversation de
+        # l'URL si elle appartient au même utilisateur
+        session_id = st.query_params.get("session")
+        if session_id and get_store().session_exists(session_id, st.session_state.owner):
+            st.session_state.session_id = session_id
+            st.session_state.visible = PAGE_SIZE
+        else:
+            new_conversation()
+
+    # Le premier onglet d'un projet crée ses ressources ; les suivants les réutilisent
+    try:
+        get_chat_handler()
+    except Exception as e:
+        st.error(f"Erreur d'initialisation : {e}")
+        st.stop()
 
 
 def render_sidebar():
@@ -90,31 +168,14 @@ def render_sidebar():
         # Informations du projet
         st.info(f"**Projet:** {st.session_state.project_key}")
 
-        # Bouton pour voir les datasets
-        if st.button("📊 Voir les datasets disponibles", use_container_width=True):
-            with st.spinner("Chargement des datasets..."):
-                datasets = st.session_state.connector.get_available_datasets()
-
-            st.markdown("---")
-            st.markdown(f"### 📂 Datasets ({len(datasets)})")
-
-            for ds in datasets:
-                try:
-                    info = st.session_state.connector.get_dataset_info(ds)
-                    with st.expander(f"📄 {ds}"):
-                        st.markdown(f"**{info['nb_columns']} colonnes:**")
-                        for col in info['columns'][:10]:
-                            st.text(f"  • {col['name']} ({col['type']})")
-                        if len(info['columns']) > 10:
-                            st.text(f"  ... +{len(info['columns']) - 10} colonnes")
-                except Exception as e:
-                    st.error(f"Erreur: {e}")
+        # Datasets : liste en cache, schémas à la demande
+        render_dataset_browser()
 
         st.markdown("---")
 
         # Bouton pour réinitialiser la conversation
         if st.button("🗑️ Nouvelle conversation", use_container_width=True):
-            st.session_state.messages = []
+            new_conversation()
             st.rerun()
 
         st.markdown("---")
@@ -127,7 +188,31 @@ def render_sidebar():
         # Statistiques de la conversation
         st.markdown("---")
         st.markdown("### 📊 Statistiques")
-        st.metric("Messages", len(st.session_state.messages))
+        session_id = st.session_state.session_id
+        st.metric("Messages", get_store().display_count(session_id) if session_id else 0)
+
+        # Latence et tokens par route de modèle (tous les onglets du projet)
+        for route, stats in get_chat_handler().route_metrics.summary().items():
+            st.caption(
+                f"{route} : {stats['calls']} appel(s), p50 {stats['p50_ms']:.0f} ms, "
+                f"~{stats['avg_input_tokens']:.0f} tokens entrée"
+            )
+
+        saved = sum(s["saved_tokens"] for s in get_chat_handler().encoding_stats.summary().values())
+        if saved:
+            st.caption(f"Résultats d'outils compactés : ~{saved} tokens économisés")
+
+        # Limiteur des appels DSS (partagé par toutes les conversations du processus)
+        dss = get_throttle().stats()
+        if dss["requests"]:
+            st.caption(
+                f"DSS : {dss['requests']} requête(s), concurrence {dss['concurrency_limit']}, "
+                f"attente débit {dss['throttle_wait_s']:.1f} s, file {dss['queue_wait_s']:.1f} s, "
+                f"{dss['retries']} nouvel(s) essai(s)"
+            )
+        deduplicated = sum(s["saved"] for s in single_flight_stats().values())
+        if deduplicated:
+            st.caption(f"Lectures DSS identiques regroupées : {deduplicated} requête(s) évitée(s)")
 
         # Guide d'utilisation
         st.markdown("---")
@@ -143,6 +228,98 @@ def render_sidebar():
         """)
 
 
+def _schema_expander(name: str):
+    """Expander d'un dataset ; .open indique s'il est ouvert (None sur Streamlit ancien)"""
+    try:
+        return st.expander(f"📄 {name}", key=f"ds_open_{name}", on_change="rerun")
+    except TypeError:
+        return st.expander(f"📄 {name}")
+
+
+def _rerun_browser():
+    """Relance le seul navigateur de datasets quand Streamlit gère les fragments"""
+    if hasattr(st, "fragment"):
+        st.rerun(scope="fragment")
+    st.rerun()
+
+
+def _reset_dataset_page():
+    st.session_state.ds_page = 0
+
+
+def render_schema(browser: DatasetBrowser, name: str, opened):
+    """Colonnes d'un dataset ; lues dans DSS seulement si l'expander est ouvert"""
+    info = browser.cached_info(name)
+    if info is None:
+        if opened is False:
+            return
+        # Streamlit sans état d'expander : lecture sur demande explicite
+        if opened is None and not st.button("Afficher le schéma", key=f"ds_load_{name}"):
+            return
+        try:
+            info = browser.info(name)
+        except Exception as e:
+            st.error(f"Erreur: {e}")
+            return
+
+    st.markdown(f"**{info['nb_columns']} colonnes:**")
+    for col in info['columns'][:10]:
+        st.text(f"  • {col['name']} ({col['type']})")
+    if len(info['columns']) > 10:
+        st.text(f"  ... +{len(info['columns']) - 10} colonnes")
+
+
+@getattr(st, "fragment", lambda func: func)
+def render_dataset_browser():
+    """Datasets du projet : filtre, pagination, schéma lu à l'ouverture (fragment)"""
+    browser = get_dataset_browser(st.session_state.project_key)
+    st.markdown("### 📂 Datasets")
+
+    query = st.text_input(
+        "Filtrer", key="ds_filter", placeholder="Nom du dataset...",
+        on_change=_reset_dataset_page, label_visibility="collapsed"
+    )
+    try:
+        page = browser.page(query, st.session_state.get("ds_page", 0), DATASETS_PAGE_SIZE)
+    except Exception as e:
+        st.error(f"Erreur: {e}")
+        return
+
+    # Schémas de cette page et de la suivante lus en arrière-plan
+    following = browser.page(query, page.page + 1, DATASETS_PAGE_SIZE)
+    browser.warm(page.names + (following.names if following.page != page.page else []))
+
+    st.caption(f"{page.total} dataset(s)")
+    for name in page.names:
+        expander = _schema_expander(name)
+        with expander:
+            render_schema(browser, name, getattr(expander, "open", None))
+
+    if page.pages > 1:
+        previous, position, following_col = st.columns([1, 2, 1])
+        if previous.button("◀", key="ds_prev", disabled=page.page == 0):
+            st.session_state.ds_page = page.page - 1
+            _rerun_browser()
+        position.caption(f"Page {page.page + 1} / {page.pages}")
+        if following_col.button("▶", key="ds_next", disabled=page.page >= page.pages - 1):
+            st.session_state.ds_page = page.page + 1
+            _rerun_browser()
+
+    if st.button("🔄 Rafraîchir la liste", key="ds_refresh", use_container_width=True):
+        browser.names(refresh=True)
+        _rerun_browser()
+
+
+def render_progress(area, event: dict):
+    """Affiche le dernier événement de progression d'un outil long (build)"""
+    if event.get("type") == "job":
+        icon = {"DONE": "✅", "FAILED": "❌", "ABORTED": "⛔"}.get(event["state"], "⚙️")
+        area.info(
+            f"{icon} Build {event['dataset']} : {event['state']} "
+            f"({event['done']}/{event['total']} activités, {event['elapsed_s']}s)"
+        )
+
+
 def render_chat():
     """Affiche l'interface de chat"""
     # En-tête
@@ -151,27 +328,21 @@ def render_chat():
 
     st.markdown("---")
 
-    # Affiche l'historique des messages
-    for message in st.session_state.messages:
-        role = message["role"]
-        content = message["content"]
-
-        # Extrait le texte du contenu
-        if isinstance(content, list):
-            # Claude API format (avec blocks)
-            text = ""
-            for block in content:
-                if hasattr(block, "text"):
-                    text += block.text
-                elif isinstance(block, dict) and "text" in block:
-                    text += block["text"]
-            content = text
-
-        with st.chat_message(role):
-            st.markdown(content)
+    # Affiche les derniers messages (texte seul, les échanges d'outils sont masqués)
+    store = get_store()
+    session_id = st.session_state.session_id
+    total = store.display_count(session_id) if session_id else 0
+    if total > st.session_state.visible:
+        if st.button(f"⬆️ Afficher les messages précédents ({total - st.session_state.visible})"):
+            st.session_state.visible += PAGE_SIZE
+            st.rerun()
+
+    for message in store.page(session_id, limit=st.session_state.visible) if session_id else []:
+        with st.chat_message(message.role):
+            st.markdown(message.text)
 
     # Message d'accueil initial
-    if len(st.session_state.messages) == 0:
+    if total == 0:
         with st.chat_message("assistant"):
             st.markdown("""
             👋 Bonjour ! Je suis votre assistant pour créer des workflows Dataiku.
@@ -192,21 +363,26 @@ def render_chat():
     # Input utilisateur
     if prompt := st.chat_input("Décrivez le workflow que vous souhaitez créer..."):
         # Affiche le message utilisateur
-        st.session_state.messages.append({"role": "user", "content": prompt})
         with st.chat_message("user"):
             st.markdown(prompt)
 
         # Génère et affiche la réponse
         with st.chat_message("assistant"):
+            progress_area = st.empty()
             with st.spinner("Claude réfléchit..."):
                 try:
-                    response_text, updated_history = st.session_state.chat_handler.process_message(
+                    session_id = session_id or start_session()
+                    # Historique complet relu seulement pour l'envoyer à Claude
+                    history = store.load_history(session_id)
+                    response_text, updated_history = get_chat_handler().process_message(
                         prompt,
-                        st.session_state.messages
+                        history,
+                        on_progress=lambda event: render_progress(progress_area, event)
                     )
+                    progress_area.empty()
 
-                    # Met à jour l'historique
-                    st.session_state.messages = updated_history
+                    # Enregistre les messages du tour (question, outils, réponse)
+                    store.append_messages(session_id, updated_history[len(history):])
 
                     # Affiche la réponse
                     st.markdown(response_text)
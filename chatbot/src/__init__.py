@@ -1,13 +1,17 @@
 """Chatbot Dataiku - Modules principaux"""
 
 from .chat_handler import ChatHandler, create_chat_handler
-from .dataiku_connector import DataikuConnector, get_connector
+from .async_chat_handler import AsyncChatHandler, create_async_chat_handler
+from .dataiku_connector import DataikuConnector, AsyncDataikuConnector, get_connector
 from .workflow_builder import WorkflowBuilder
 
 __all__ = [
     "ChatHandler",
     "create_chat_handler",
+    "AsyncChatHandler",
+    "create_async_chat_handler",
     "DataikuConnector",
+    "AsyncDataikuConnector",
     "get_connector",
     "WorkflowBuilder"
 ]
@@ -0,0 +1,448 @@
+"""
+api_server.py - API HTTP asynchrone du chatbot (sans Streamlit)
+
+Expose les conversations à d'autres clients que l'interface Streamlit :
+
+    POST   /sessions                    {"project_key"?} -> {"session_id", ...}
+    GET    /sessions/{id}               état de la session
+    DELETE /sessions/{id}
+    POST   /sessions/{id}/messages      {"content"} -> flux Server-Sent Events
+    GET    /health                      état du processus et limiteur DSS
+
+La réponse d'un message est un flux SSE : fragments de texte de Claude
+("text"), appels d'outils ("tool_use" / "tool_result"), progression des
+builds ("progress"), puis "done" (réponse complète) ou "error".
+
+Un seul AsyncChatHandler par projet est partagé par toutes les sessions
+(connecteur DSS, pool de threads, client Claude et prompt système). Chaque
+session traite un message à la fois et sa file d'événements est bornée : un
+client qui lit lentement ralentit son propre tour sans pénaliser les autres.
+
+La mémoire reste bornée : les sessions inactives depuis
+CHAT_API_SESSION_TTL secondes expirent et les plus anciennes sont évincées
+au-delà de CHAT_API_MAX_SESSIONS ; au-delà de CHAT_API_MAX_PROJECTS, le
+handler du projet le moins récemment utilisé (sans tour en cours) est fermé.
+
+Lancement :
+    python chatbot/src/api_server.py --port 8000
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import asyncio
+import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from async_chat_handler import AsyncChatHandler, create_async_chat_handler
+from src.api.singleflight import single_flight_stats
+from src.api.throttle import get_throttle
+
+# Avant les réglages CHAT_API_* ci-dessous, lus à l'import
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Événements en attente d'envoi par session avant que le tour ne patiente
+EVENT_QUEUE_SIZE = 64
+
+# Tours traités simultanément par le processus (au-delà : 503)
+MAX_ACTIVE_TURNS = int(os.getenv("CHAT_API_MAX_ACTIVE_TURNS", "200"))
+
+# Intervalle des commentaires SSE de maintien de connexion (secondes)
+KEEPALIVE_S = 15.0
+
+# Sessions gardées en mémoire et durée d'inactivité avant expiration (secondes)
+MAX_SESSIONS = int(os.getenv("CHAT_API_MAX_SESSIONS", "10000"))
+SESSION_TTL_S = float(os.getenv("CHAT_API_SESSION_TTL", "3600"))
+
+# Handlers (un pool de threads DSS chacun) gardés ouverts au plus
+MAX_PROJECTS = int(os.getenv("CHAT_API_MAX_PROJECTS", "16"))
+
+# Clé de projet DSS acceptée d'un client
+PROJECT_KEY_PATTERN = re.compile(r"[A-Za-z0-9_]{1,64}")
+
+HandlerFactory = Callable[[Optional[str]], Awaitable[AsyncChatHandler]]
+
+
+class HandlerPool:
+    """Un AsyncChatHandler par projet, créé au premier usage et partagé."""
+
+    def __init__(
+        self,
+        factory: HandlerFactory = create_async_chat_handler,
+        max_handlers: int = MAX_PROJECTS
+    ):
+        """
+        Initialise le pool.
+
+        Args:
+            factory: Coroutine créant le handler d'un projet (clé .env si None)
+            max_handlers: Handlers gardés ouverts au plus (LRU, hors tours en cours)
+        """
+        self.factory = factory
+        self.max_handlers = max_handlers
+        # projet -> handler, du moins au plus récemment utilisé
+        self._handlers: OrderedDict[Optional[str], AsyncChatHandler] = OrderedDict()
+        self._creating: Dict[Optional[str], asyncio.Future] = {}
+        self._in_use: Dict[Optional[str], int] = {}
+
+    async def get(self, project_key: Optional[str] = None) -> AsyncChatHandler:
+        """
+        Handler du projet ; les demandes simultanées partagent une seule création.
+
+        Args:
+            project_key: Clé du projet Dataiku
+
+        Returns:
+            AsyncChatHandler du projet
+        """
+        if project_key in self._handlers:
+            self._handlers.move_to_end(project_key)
+            return self._handlers[project_key]
+        future = self._creating.get(project_key)
+        if future is None:
+            future = asyncio.ensure_future(self.factory(project_key))
+            self._creating[project_key] = future
+            future.add_done_callback(lambda f: self._created(project_key, f))
+        # shield : l'annulation d'un tour n'interrompt pas la création partagée
+        return await asyncio.shield(future)
+
+    def _created(self, project_key: Optional[str], future: asyncio.Future) -> None:
+        """Enregistre le handler créé (un échec sera retenté au prochain appel)."""
+        del self._creating[project_key]
+        if not future.cancelled() and future.exception() is None:
+            self._handlers[project_key] = future.result()
+            logger.info(f"Handler créé pour le projet {future.result().connector.project_key}")
+            self._evict()
+
+    @asynccontextmanager
+    async def use(self, project_key: Optional[str] = None) -> AsyncIterator[AsyncChatHandler]:
+        """
+        Handler du projet, protégé de l'éviction pendant le bloc (un tour).
+
+        Args:
+            project_key: Clé du projet Dataiku
+
+        Yields:
+            AsyncChatHandler du projet
+        """
+        self._in_use[project_key] = self._in_use.get(project_key, 0) + 1
+        try:
+            yield await self.get(project_key)
+        finally:
+            self._in_use[project_key] -= 1
+            if not self._in_use[project_key]:
+                del self._in_use[project_key]
+            self._evict()
+
+    def _evict(self) -> None:
+        """Ferme les handlers les moins récemment utilisés au-delà de max_handlers."""
+        idle = [key for key in self._handlers if key not in self._in_use]
+        for key in idle[:max(0, len(self._handlers) - self.max_handlers)]:
+            handler = self._handlers.pop(key)
+            logger.info(f"Handler du projet {handler.connector.project_key} fermé (LRU)")
+            asyncio.ensure_future(handler.aclose())
+
+    async def aclose(self) -> None:
+        """Ferme tous les handlers (clients Claude et pools DSS)."""
+        for handler in self._handlers.values():
+            await handler.aclose()
+        self._handlers.clear()
+
+
+class Session:
+    """Conversation d'un client : historique et tour en cours."""
+
+    def __init__(self, session_id: str, project_key: Optional[str]):
+        self.session_id = session_id
+        self.project_key = project_key
+        self.history: List[Dict[str, Any]] = []
+        self.busy = False
+        self.last_used = time.monotonic()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.session_id,
+            "project_key": self.project_key,
+            "messages": len(self.history),
+            "busy": self.busy,
+        }
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """Formate un événement Server-Sent Events."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+async def _json_object(request: Request) -> Tuple[Dict[str, Any], Optional[Response]]:
+    """
+    Corps JSON d'une requête (vide = {}).
+
+    Returns:
+        Tuple (objet, None), ou ({}, réponse 400) si le corps n'est pas un objet JSON
+    """
+    raw = await request.body()
+    if not raw:
+        return {}, None
+    try:
+        body = json.loads(raw)
+    except ValueError:
+        return {}, JSONResponse({"error": "Corps JSON invalide"}, status_code=400)
+    if not isinstance(body, dict):
+        return {}, JSONResponse({"error": "Objet JSON attendu"}, status_code=400)
+    return body, None
+
+
+class _TurnResponse(StreamingResponse):
+    """Flux SSE d'un tour : release est appelé à la fin de la réponse, quelle qu'en soit l'issue."""
+
+    def __init__(self, content: Any, release: Callable[[], None], **kwargs):
+        super().__init__(content, **kwargs)
+        self._release = release
+
+    async def __call__(self, scope, receive, send) -> None:
+        # Le générateur peut ne jamais démarrer (client déconnecté) : son
+        # finally ne suffit pas à libérer la session et le créneau
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._release()
+
+
+class ChatAPI:
+    """Sessions en mémoire et exécution des tours en flux SSE."""
+
+    def __init__(
+        self,
+        pool: HandlerPool,
+        max_active_turns: int = MAX_ACTIVE_TURNS,
+        queue_size: int = EVENT_QUEUE_SIZE,
+        max_sessions: int = MAX_SESSIONS,
+        session_ttl: float = SESSION_TTL_S
+    ):
+        """
+        Initialise l'API.
+
+        Args:
+            pool: Handlers partagés par projet
+            max_active_turns: Tours simultanés au plus (au-delà : 503)
+            queue_size: Événements en attente par session avant que le tour
+                ne patiente (contre-pression)
+            max_sessions: Sessions gardées au plus (les moins récentes sont évincées)
+            session_ttl: Inactivité en secondes avant expiration d'une session
+        """
+        self.pool = pool
+        # id -> session, de la moins à la plus récemment utilisée
+        self.sessions: OrderedDict[str, Session] = OrderedDict()
+        self.max_active_turns = max_active_turns
+        self.queue_size = queue_size
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        self.active_turns = 0
+
+    def _session(self, session_id: str) -> Optional[Session]:
+        """Session active (None si inconnue ou expirée), marquée utilisée."""
+        session = self.sessions.get(session_id)
+        if session is None:
+            return None
+        now = time.monotonic()
+        if not session.busy and now - session.last_used >= self.session_ttl:
+            del self.sessions[session_id]
+            return None
+        session.last_used = now
+        self.sessions.move_to_end(session_id)
+        return session
+
+    def _evict_sessions(self) -> None:
+        """Retire les sessions expirées puis les plus anciennes, pour faire place à une nouvelle."""
+        now = time.monotonic()
+        idle = [s for s in self.sessions.values() if not s.busy]
+        excess = len(self.sessions) + 1 - self.max_sessions
+        for session in idle:
+            if now - session.last_used >= self.session_ttl:
+                del self.sessions[session.session_id]
+                excess -= 1
+            elif excess > 0:
+                del self.sessions[session.session_id]
+                excess -= 1
+
+    async def stream_turn(self, session: Session, content: str):
+        """
+        Exécute un tour et produit ses événements SSE.
+
+        Le tour tourne dans une tâche séparée qui écrit dans une file bornée ;
+        la déconnexion du client annule la tâche et l'historique reste inchangé.
+
+        Yields:
+            Événements SSE formatés
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+
+        def on_progress(event: Dict[str, Any]) -> None:
+            # Appelé depuis un thread DSS : progression abandonnée si la file est pleine
+            def put() -> None:
+                if not queue.full():
+                    queue.put_nowait(("progress", event))
+            loop.call_soon_threadsafe(put)
+
+        async def on_event(event: Dict[str, Any]) -> None:
+            await queue.put((event.pop("type"), event))
+
+        async def run() -> None:
+            try:
+                async with self.pool.use(session.project_key) as handler:
+                    text, history = await handler.aprocess_message(
+                        content, session.history, on_progress=on_progress, on_event=on_event
+                    )
+                session.history = history
+                await queue.put(("done", {"text": text, "messages": len(history)}))
+            except Exception as e:
+                logger.error(f"Session {session.session_id} : tour en erreur ({e})")
+                await queue.put(("error", {"error": str(e) or type(e).__name__}))
+
+        task = asyncio.create_task(run())
+        try:
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_S)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield _sse(event, data)
+                if event in ("done", "error"):
+                    break
+        finally:
+            task.cancel()
+
+    async def create_session(self, request: Request) -> Response:
+        body, error = await _json_object(request)
+        if error is not None:
+            return error
+        project_key = body.get("project_key")
+        if project_key is not None and not (
+            isinstance(project_key, str) and PROJECT_KEY_PATTERN.fullmatch(project_key)
+        ):
+            return JSONResponse({"error": "\"project_key\" invalide"}, status_code=400)
+        self._evict_sessions()
+        if len(self.sessions) >= self.max_sessions:
+            return JSONResponse(
+                {"error": "Trop de sessions actives"}, status_code=503, headers={"Retry-After": "1"}
+            )
+        session = Session(uuid.uuid4().hex, project_key)
+        self.sessions[session.session_id] = session
+        return JSONResponse(session.to_dict(), status_code=201)
+
+    async def get_session(self, request: Request) -> Response:
+        session = self._session(request.path_params["session_id"])
+        if session is None:
+            return JSONResponse({"error": "Session inconnue"}, status_code=404)
+        return JSONResponse(session.to_dict())
+
+    async def delete_session(self, request: Request) -> Response:
+        if self.sessions.pop(request.path_params["session_id"], None) is None:
+            return JSONResponse({"error": "Session inconnue"}, status_code=404)
+        return Response(status_code=204)
+
+    async def post_message(self, request: Request) -> Response:
+        session = self._session(request.path_params["session_id"])
+        if session is None:
+            return JSONResponse({"error": "Session inconnue"}, status_code=404)
+        body, error = await _json_object(request)
+        if error is not None:
+            return error
+        content = body.get("content")
+        if not isinstance(content, str) or not content.strip():
+            return JSONResponse({"error": "\"content\" attendu"}, status_code=400)
+        if session.busy:
+            return JSONResponse(
+                {"error": "Un message est déjà en cours pour cette session"}, status_code=409
+            )
+        if self.active_turns >= self.max_active_turns:
+            return JSONResponse(
+                {"error": "Serveur saturé"}, status_code=503, headers={"Retry-After": "1"}
+            )
+
+        # Réservés avant la réponse : libérés quand elle se termine (voir _TurnResponse)
+        session.busy = True
+        self.active_turns += 1
+
+        def release() -> None:
+            session.busy = False
+            session.last_used = time.monotonic()
+            self.active_turns -= 1
+
+        return _TurnResponse(
+            self.stream_turn(session, content),
+            release,
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    async def health(self, request: Request) -> Response:
+        return JSONResponse({
+            "status": "ok",
+            "sessions": len(self.sessions),
+            "active_turns": self.active_turns,
+            "dss": get_throttle().stats(),
+            "dss_deduplicated": {name: stats["saved"] for name, stats in single_flight_stats().items()},
+        })
+
+
+def create_app(
+    pool: Optional[HandlerPool] = None,
+    **kwargs
+) -> Starlette:
+    """
+    Construit l'application ASGI.
+
+    Args:
+        pool: Handlers par projet (créés depuis .env si None)
+        **kwargs: Options transmises à ChatAPI
+
+    Returns:
+        Application Starlette (attribut state.api : ChatAPI)
+    """
+    api = ChatAPI(pool or HandlerPool(), **kwargs)
+
+    @asynccontextmanager
+    async def lifespan(app: Starlette):
+        yield
+        await api.pool.aclose()
+
+    app = Starlette(
+        routes=[
+            Route("/health", api.health, methods=["GET"]),
+            Route("/sessions", api.create_session, methods=["POST"]),
+            Route("/sessions/{session_id}", api.get_session, methods=["GET"]),
+            Route("/sessions/{session_id}", api.delete_session, methods=["DELETE"]),
+            Route("/sessions/{session_id}/messages", api.post_message, methods=["POST"]),
+        ],
+        lifespan=lifespan,
+    )
+    app.state.api = api
+    return app
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import uvicorn
+
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+    parser = argparse.ArgumentParser(description="API HTTP du chatbot Dataiku")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    uvicorn.run(create_app(), host=args.host, port=args.port)
@@ -0,0 +1,317 @@
+"""
+async_chat_handler.py - Gestionnaire de conversations asyncio avec Claude API
+
+Variante non bloquante de ChatHandler : les appels Claude passent par
+AsyncAnthropic et les appels DSS par un pool de threads borné, ce qui permet
+à un seul processus de servir de nombreuses conversations simultanées.
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+from typing import Awaitable, Callable, List, Dict, Any, Optional
+
+from anthropic import AsyncAnthropic
+
+from chat_handler import ChatHandler
+from dataiku_connector import DataikuConnector, AsyncDataikuConnector
+from job_monitor import ProgressCallback
+from routing import RoutingPolicy
+
+logger = logging.getLogger(__name__)
+
+# Événement de tour : {"type": "text" | "tool_use" | "tool_result", ...}
+EventCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class AsyncChatHandler(ChatHandler):
+    """Gestionnaire de chat asyncio (AsyncAnthropic + connecteur DSS asynchrone)"""
+
+    def __init__(
+        self,
+        project_key: Optional[str] = None,
+        connector: Optional[DataikuConnector] = None,
+        client: Optional[Any] = None,
+        routing_policy: Optional[RoutingPolicy] = None,
+        turn_timeout: Optional[float] = None,
+        request_timeout: Optional[float] = None,
+        dss_timeout: Optional[float] = None,
+        max_dss_workers: int = 16
+    ):
+        """
+        Initialise le gestionnaire asynchrone.
+
+        L'initialisation effectue des appels DSS bloquants : depuis une boucle
+        asyncio, utiliser create_async_chat_handler().
+
+        Args:
+            project_key: Clé du projet Dataiku
+            connector: Connecteur existant à réutiliser (créé si None)
+            client: Client Claude asynchrone (créé depuis .env si None)
+            routing_policy: Choix du modèle par appel (heuristique si None)
+            turn_timeout: Durée maximum d'un tour complet en secondes
+            request_timeout: Timeout HTTP de chaque appel Claude en secondes
+            dss_timeout: Timeout de chaque appel DSS en secondes
+            max_dss_workers: Nombre maximum d'appels DSS simultanés
+        """
+        if request_timeout is None:
+            request_timeout = float(os.getenv("CLAUDE_TIMEOUT", "120"))
+        self.request_timeout = request_timeout
+        super().__init__(
+            project_key,
+            connector=connector,
+            client=client,
+            routing_policy=routing_policy
+        )
+
+        if turn_timeout is None:
+            turn_timeout = float(os.getenv("CHAT_TURN_TIMEOUT", "300"))
+        self.turn_timeout = turn_timeout
+        self.async_connector = AsyncDataikuConnector(
+            self.connector,
+            max_workers=max_dss_workers,
+            timeout=dss_timeout
+        )
+
+    def _create_client(self) -> AsyncAnthropic:
+        """
+        Crée le client Claude asynchrone.
+
+        Returns:
+            Client AsyncAnthropic
+        """
+        return AsyncAnthropic(api_key=self.api_key, timeout=self.request_timeout)
+
+    def process_message(self, *args, **kwargs):
+        """
+        Non disponible : le client Claude est asynchrone.
+
+        Raises:
+            TypeError: Toujours ; utiliser aprocess_message
+        """
+        raise TypeError("AsyncChatHandler est asynchrone : utiliser « await aprocess_message(...) »")
+
+    async def execute_tool_async(
+        self,
+        tool_name: str,
+        tool_input: Dict[str, Any],
+        on_progress: Optional[ProgressCallback] = None,
+        deadline: Optional[float] = None,
+        running: Optional[Dict[int, str]] = None
+    ) -> Any:
+        """
+        Exécute un outil dans le pool DSS sans bloquer la boucle d'événements.
+
+        dataikuapi ne sait pas interrompre une requête : après un timeout ou
+        une annulation, un outil déjà lancé continue dans son thread et une
+        écriture (recette, build) peut encore aboutir dans DSS. Un outil qui
+        n'a pas encore quitté la file du pool à l'échéance n'est pas lancé.
+
+        Args:
+            tool_name: Nom de l'outil
+            tool_input: Paramètres de l'outil
+            on_progress: Callback de progression (appelé depuis un thread du pool)
+            deadline: Instant time.monotonic() après lequel l'outil n'est plus lancé
+            running: Outils en cours dans le pool, tenu à jour par le thread
+                ({identifiant: nom}, voir aprocess_message)
+
+        Returns:
+            Résultat de l'exécution ({"error": ...} si l'appel DSS dépasse
+            le timeout du connecteur)
+        """
+        def call() -> Any:
+            if deadline is not None and time.monotonic() >= deadline:
+                return {"error": f"Délai du tour dépassé : {tool_name} n'a pas été lancé"}
+            key = threading.get_ident()
+            if running is not None:
+                running[key] = tool_name
+            try:
+                return self.execute_tool(tool_name, tool_input, on_progress)
+            finally:
+                if running is not None:
+                    running.pop(key, None)
+
+        try:
+            return await self.async_connector.run(call)
+        except asyncio.TimeoutError:
+            logger.warning(f"Outil {tool_name} sans réponse après {self.async_connector.timeout}s")
+            return {"error": (
+                f"Pas de réponse de DSS après {self.async_connector.timeout}s : "
+                f"{tool_name} continue en arrière-plan et peut encore aboutir, "
+                "vérifier le projet avant de relancer"
+            )}
+
+    async def aprocess_message(
+        self,
+        user_message: str,
+        conversation_history: List[Dict[str, Any]],
+        on_progress: Optional[ProgressCallback] = None,
+        on_event: Optional[EventCallback] = None
+    ) -> tuple[str, List[Dict[str, Any]]]:
+        """
+        Traite un message utilisateur et retourne la réponse de Claude.
+
+        Le tour complet est borné par turn_timeout ; l'annulation de la tâche
+        appelante interrompt l'appel Claude ou l'attente DSS en cours. Les
+        outils déjà lancés continuent dans leur thread (voir
+        execute_tool_async) et sont nommés dans l'erreur de timeout.
+
+        Args:
+            user_message: Message de l'utilisateur
+            conversation_history: Historique de la conversation
+            on_progress: Callback de progression des outils longs (appelé
+                depuis un thread du pool DSS)
+            on_event: Coroutine appelée pour chaque fragment de texte (réponse
+                de Claude en streaming) et chaque appel d'outil ; le tour
+                attend qu'elle rende la main
+
+        Returns:
+            Tuple (réponse, historique_mis_à_jour)
+
+        Raises:
+            asyncio.TimeoutError: Si le tour dépasse turn_timeout
+        """
+        running: Dict[int, str] = {}
+        deadline = time.monotonic() + self.turn_timeout
+        try:
+            return await asyncio.wait_for(
+                self._run_turn(user_message, conversation_history, on_progress, on_event,
+                               deadline, running),
+                timeout=self.turn_timeout
+            )
+        except asyncio.TimeoutError:
+            message = f"Tour interrompu après {self.turn_timeout}s"
+            tools = sorted(running.values())
+            if tools:
+                message += (f" ; toujours en cours dans DSS, peuvent encore aboutir : "
+                            f"{', '.join(tools)}")
+            logger.error(message)
+            raise asyncio.TimeoutError(message) from None
+        except asyncio.CancelledError:
+            tools = sorted(running.values())
+            logger.info("Tour annulé par l'appelant"
+                        + (f" (toujours en cours dans DSS : {', '.join(tools)})" if tools else ""))
+            raise
+
+    async def _run_turn(
+        self,
+        user_message: str,
+        conversation_history: List[Dict[str, Any]],
+        on_progress: Optional[ProgressCallback] = None,
+        on_event: Optional[EventCallback] = None,
+        deadline: Optional[float] = None,
+        running: Optional[Dict[int, str]] = None
+    ) -> tuple[str, List[Dict[str, Any]]]:
+        """Boucle messages.create / tool_use d'un tour (voir aprocess_message)."""
+        messages = conversation_history + [
+            {"role": "user", "content": user_message}
+        ]
+
+        while True:
+            decision = self.router.route(user_message, messages)
+            start = time.perf_counter()
+            response = await self._create_message(
+                self._request_params(messages, decision), on_event
+            )
+            self._record_call(decision, start, response)
+
+            if response.stop_reason == "end_turn":
+                messages.append({
+                    "role": "assistant",
+                    "content": response.content
+                })
+                return self._extract_text(response), messages
+
+            elif response.stop_reason == "tool_use":
+                assistant_content = [
+                    block for block in response.content
+                    if block.type in ("text", "tool_use")
+                ]
+                tool_blocks = [
+                    block for block in response.content if block.type == "tool_use"
+                ]
+
+                # Les outils d'une même réponse sont indépendants : exécution concurrente
+                results = await asyncio.gather(*(
+                    self._run_tool(block, on_progress, on_event, deadline, running)
+                    for block in tool_blocks
+                ))
+
+                messages.append({
+                    "role": "assistant",
+                    "content": assistant_content
+                })
+                messages.append({
+                    "role": "user",
+                    "content": [
+                        self._tool_result_block(block, result)
+                        for block, result in zip(tool_blocks, results)
+                    ]
+                })
+
+            else:
+                return f"Réponse inattendue : {response.stop_reason}", messages
+
+    async def _create_message(
+        self,
+        params: Dict[str, Any],
+        on_event: Optional[EventCallback]
+    ) -> Any:
+        """Appel Claude ; en streaming si on_event attend les fragments de texte."""
+        if on_event is None:
+            return await self.client.messages.create(**params)
+        async with self.client.messages.stream(**params) as stream:
+            async for text in stream.text_stream:
+                await on_event({"type": "text", "text": text})
+            return await stream.get_final_message()
+
+    async def _run_tool(
+        self,
+        block: Any,
+        on_progress: Optional[ProgressCallback],
+        on_event: Optional[EventCallback],
+        deadline: Optional[float] = None,
+        running: Optional[Dict[int, str]] = None
+    ) -> Any:
+        """Exécute un bloc tool_use en signalant son début et sa fin."""
+        if on_event is None:
+            return await self.execute_tool_async(block.name, block.input, on_progress,
+                                                 deadline, running)
+        await on_event({"type": "tool_use", "id": block.id, "name": block.name,
+                        "input": block.input})
+        start = time.perf_counter()
+        result = await self.execute_tool_async(block.name, block.input, on_progress,
+                                               deadline, running)
+        failed = isinstance(result, dict) and (result.get("success") is False or "error" in result)
+        await on_event({
+            "type": "tool_result",
+            "id": block.id,
+            "name": block.name,
+            "success": not failed,
+            "duration_s": round(time.perf_counter() - start, 3),
+        })
+        return result
+
+    async def aclose(self) -> None:
+        """Ferme le client Claude et le pool DSS."""
+        await self.client.close()
+        self.async_connector.close()
+
+
+async def create_async_chat_handler(
+    project_key: Optional[str] = None,
+    **kwargs
+) -> AsyncChatHandler:
+    """
+    Factory asynchrone : construit le handler hors de la boucle d'événements.
+
+    Args:
+        project_key: Clé du projet Dataiku
+        **kwargs: Options transmises à AsyncChatHandler
+
+    Returns:
+        Instance de AsyncChatHandler
+    """
+    return await asyncio.to_thread(AsyncChatHandler, project_key, **kwargs)
@@ -0,0 +1,278 @@
+"""
+batch_runner.py - Exécution par lots de demandes de workflows
+
+Lit un fichier JSONL de demandes, une par ligne :
+
+    {"id": "ventes_region", "prompt": "Agrège sales par région..."}
+    {"id": "clients_fr", "spec": {"workflow_name": ..., "source_datasets": [...],
+                                   "recipes": [...], "output_dataset": ...}}
+
+Les demandes "prompt" passent par ChatHandler en mode lot (conversation d'un
+tour, sans demande de confirmation), les demandes "spec" vont directement à
+WorkflowBuilder.create_workflow. Dans les deux cas, le statut vient du
+résultat de create_workflow : une réponse de Claude sans workflow créé est un
+échec, rejoué par --retry-failed.
+Les demandes s'exécutent en parallèle (nombre borné) et chaque résultat est
+ajouté au fichier de sortie dès qu'il est connu : ce fichier sert de point de
+reprise, une relance saute les demandes déjà traitées.
+"""
+
+import json
+import logging
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+PROMPT = "prompt"
+SPEC = "spec"
+
+# Statuts d'une demande traitée
+OK = "ok"
+FAILED = "failed"
+ERROR = "error"
+
+# Caractères conservés de la réponse de Claude dans le fichier de résultats
+MAX_RESPONSE_CHARS = 2000
+
+
+def load_requests(path: Path) -> List[Dict[str, Any]]:
+    """
+    Lit le fichier de demandes.
+
+    Args:
+        path: Fichier JSONL (lignes vides et commentaires « # » ignorés)
+
+    Returns:
+        Demandes {id, kind, prompt | spec}, id = numéro de ligne si absent
+
+    Raises:
+        ValueError: Ligne invalide, sans "prompt" ni "spec", ou id en double
+    """
+    requests = []
+    seen: Set[str] = set()
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}, ligne {number} : JSON invalide ({e.msg})") from e
+
+            kinds = [kind for kind in (PROMPT, SPEC) if kind in item]
+            if len(kinds) != 1:
+                raise ValueError(f"{path}, ligne {number} : \"prompt\" ou \"spec\" attendu")
+            request_id = str(item.get("id", number))
+            if request_id in seen:
+                raise ValueError(f"{path}, ligne {number} : id « {request_id} » en double")
+            seen.add(request_id)
+            requests.append({"id": request_id, "kind": kinds[0], kinds[0]: item[kinds[0]]})
+    return requests
+
+
+def load_checkpoint(path: Path, retry_failed: bool = False) -> Set[str]:
+    """
+    Ids des demandes déjà traitées d'après le fichier de résultats.
+
+    Args:
+        path: Fichier de résultats JSONL (absent = rien de traité)
+        retry_failed: Si True, les demandes en échec sont rejouées
+
+    Returns:
+        Ensemble des ids à ne pas relancer
+    """
+    done: Set[str] = set()
+    if not path.exists():
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                # Dernière ligne tronquée par un arrêt brutal : demande à refaire
+                continue
+            if retry_failed and result.get("status") != OK:
+                done.discard(result["id"])
+            else:
+                done.add(result["id"])
+    return done
+
+
+class BatchRunner:
+    """Exécute des demandes en parallèle et journalise chaque résultat."""
+
+    def __init__(
+        self,
+        handler_factory: Callable[[], Any],
+        builder: Any,
+        concurrency: int = 4
+    ):
+        """
+        Initialise l'exécuteur.
+
+        Args:
+            handler_factory: Crée un ChatHandler (un par thread, ses métriques
+                donnent les tokens de chaque demande)
+            builder: WorkflowBuilder des demandes "spec"
+            concurrency: Demandes traitées simultanément
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency doit être >= 1")
+        self.handler_factory = handler_factory
+        self.builder = builder
+        self.concurrency = concurrency
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+    def _handler(self) -> Any:
+        """ChatHandler du thread courant (créé au premier usage)."""
+        handler = getattr(self._local, "handler", None)
+        if handler is None:
+            handler = self._local.handler = self.handler_factory()
+        return handler
+
+    def _run_prompt(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Conversation d'un tour avec Claude (outils compris)."""
+        handler = self._handler()
+        before = handler.route_metrics.totals()
+        try:
+            response, _ = handler.process_message(request[PROMPT], [])
+        finally:
+            after = handler.route_metrics.totals()
+            self._local.tokens = {key: after[key] - before[key] for key in after}
+
+        results = [result for tool, result in handler.tool_calls if tool == "create_workflow"]
+        # Un dry_run ne crée rien : seul un appel réel compte
+        applied = [r for r in results if not (isinstance(r, dict) and r.get("dry_run"))]
+        if not applied:
+            outcome = {"status": FAILED, "error": "create_workflow n'a pas été appelé"
+                       + (" (dry_run uniquement)" if results else "")}
+        else:
+            # Dernier appel réussi (Claude relance après une erreur), sinon dernier échec
+            created = [r for r in applied if isinstance(r, dict) and r.get("success")]
+            outcome = self._workflow_outcome(created[-1] if created else applied[-1])
+        outcome["response"] = response[:MAX_RESPONSE_CHARS]
+        return outcome
+
+    def _run_spec(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Création directe d'un workflow, sans Claude."""
+        return self._workflow_outcome(self.builder.create_workflow(**request[SPEC]))
+
+    @staticmethod
+    def _workflow_outcome(result: Any) -> Dict[str, Any]:
+        """Statut et détails d'un résultat de create_workflow."""
+        if not isinstance(result, dict):
+            return {"status": FAILED, "error": f"Résultat inattendu : {result!r}"}
+        outcome = {
+            "status": OK if result.get("success") else FAILED,
+            "created_recipes": result.get("created_recipes", []),
+            "updated_recipes": result.get("updated_recipes", []),
+            "created_datasets": result.get("created_datasets", []),
+        }
+        for key in ("error", "code_errors", "timings"):
+            if key in result:
+                outcome[key] = result[key]
+        return outcome
+
+    def run_one(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Traite une demande ; les exceptions deviennent un statut "error".
+
+        Args:
+            request: Demande issue de load_requests()
+
+        Returns:
+            Résultat {id, kind, status, latency_s, tokens, ...}
+        """
+        self._local.tokens = {"calls": 0, "input_tokens": 0, "output_tokens": 0}
+        start = time.perf_counter()
+        try:
+            run = self._run_prompt if request["kind"] == PROMPT else self._run_spec
+            outcome = run(request)
+        except Exception as e:
+            logger.error(f"Demande {request['id']} en erreur : {e}")
+            outcome = {"status": ERROR, "error": str(e)}
+        return {
+            "id": request["id"],
+            "kind": request["kind"],
+            "status": outcome.pop("status"),
+            "latency_s": round(time.perf_counter() - start, 3),
+            "tokens": self._local.tokens,
+            **outcome,
+        }
+
+    def run(
+        self,
+        requests: List[Dict[str, Any]],
+        output_path: Path,
+        retry_failed: bool = False,
+        on_result: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Traite les demandes non encore présentes dans le fichier de résultats.
+
+        Args:
+            requests: Demandes issues de load_requests()
+            output_path: Fichier de résultats JSONL (complété, jamais écrasé)
+            retry_failed: Rejoue les demandes en échec d'une exécution précédente
+            on_result: Appelé après chaque demande (un appel à la fois)
+
+        Returns:
+            Résultats de cette exécution, dans l'ordre de fin
+        """
+        done = load_checkpoint(output_path, retry_failed)
+        pending = [r for r in requests if r["id"] not in done]
+        logger.info(
+            f"Lot : {len(pending)} demande(s) à traiter, {len(requests) - len(pending)} "
+            f"déjà faite(s), {self.concurrency} en parallèle"
+        )
+        results: List[Dict[str, Any]] = []
+        if not pending:
+            return results
+
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, "a", encoding="utf-8") as out:
+
+            def process(request: Dict[str, Any]) -> None:
+                result = self.run_one(request)
+                with self._write_lock:
+                    out.write(json.dumps(result, ensure_ascii=False, default=str) + "\n")
+                    out.flush()
+                    results.append(result)
+                    if on_result is not None:
+                        on_result(result)
+
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                # list() propage une éventuelle erreur d'écriture
+                list(pool.map(process, pending))
+        return results
+
+
+def summarize_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Synthèse d'un lot : statuts, latences et tokens.
+
+    Args:
+        results: Résultats retournés par BatchRunner.run()
+
+    Returns:
+        Dict {count, by_status, p50_s, p95_s, input_tokens, output_tokens}
+    """
+    latencies = sorted(r["latency_s"] for r in results)
+    by_status: Dict[str, int] = {}
+    for r in results:
+        by_status[r["status"]] = by_status.get(r["status"], 0) + 1
+    return {
+        "count": len(results),
+        "by_status": by_status,
+        "p50_s": statistics.median(latencies) if latencies else None,
+        "p95_s": latencies[max(0, int(len(latencies) * 0.95) - 1)] if latencies else None,
+        "input_tokens": sum(r["tokens"]["input_tokens"] for r in results),
+        "output_tokens": sum(r["tokens"]["output_tokens"] for r in results),
+    }
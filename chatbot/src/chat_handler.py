@@ -5,45 +5,93 @@ Gère les interactions avec Claude et l'exécution des commandes Dataiku.
 """
 
 import os
-import json
+import time
 import logging
 from typing import List, Dict, Any, Optional
 from anthropic import Anthropic
 
-from dataiku_connector import get_connector
+from dataiku_connector import DataikuConnector, get_connector
+from job_monitor import ProgressCallback
 from workflow_builder import WorkflowBuilder
+from workflow_preview import WorkflowPreview
 from prompts import get_system_prompt
+from routing import RoutingPolicy, HeuristicRoutingPolicy, RouteDecision, RouteMetrics
+from tool_encoding import EncodingStats, encode_tool_result
 
 logger = logging.getLogger(__name__)
 
+MAX_TOKENS = 4096
+
+# Pagination par défaut des outils à schéma
+DATASETS_PAGE_SIZE = 20
+MAX_COLUMNS = 50
+
+# Lignes d'exemple par dataset dans un aperçu de workflow
+PREVIEW_ROWS = 5
+
+# Budget d'un aperçu de dataset (preview_dataset)
+DATASET_PREVIEW_ROWS = 20
+DATASET_PREVIEW_MAX_ROWS = 50
+DATASET_PREVIEW_BYTES = 8000
+
+# Lignes lues au plus par profile_dataset (sauf demande explicite de Claude)
+PROFILE_MAX_ROWS = 1_000_000
+
 
 class ChatHandler:
     """Gestionnaire de chat avec Claude API"""
 
-    def __init__(self, project_key: Optional[str] = None):
+    def __init__(
+        self,
+        project_key: Optional[str] = None,
+        connector: Optional[DataikuConnector] = None,
+        client: Optional[Any] = None,
+        routing_policy: Optional[RoutingPolicy] = None,
+        batch: bool = False
+    ):
         """
         Initialise le gestionnaire de chat.
 
         Args:
             project_key: Clé du projet Dataiku
+            connector: Connecteur existant à réutiliser (créé si None)
+            client: Client Claude à utiliser (créé depuis .env si None)
+            routing_policy: Choix du modèle par appel (heuristique si None)
+            batch: Mode lot : prompt système sans demande de confirmation
         """
         self.api_key = os.getenv("ANTHROPIC_API_KEY")
-        if not self.api_key:
+        if not self.api_key and client is None:
             raise ValueError("ANTHROPIC_API_KEY non définie dans .env")
 
-        self.client = Anthropic(api_key=self.api_key)
-        self.connector = get_connector(project_key)
+        self.router = routing_policy or HeuristicRoutingPolicy()
+        self.route_metrics = RouteMetrics()
+        self.encoding_stats = EncodingStats()
+        self.client = client or self._create_client()
+        self.connector = connector or get_connector(project_key)
         self.builder = WorkflowBuilder(self.connector)
+        self.previewer = WorkflowPreview(self.connector)
 
         # Récupère les infos des datasets pour le prompt système
         self.datasets_info = self.connector.get_all_datasets_info()
         self.system_prompt = get_system_prompt(
             self.connector.project_key,
-            self.datasets_info
+            self.datasets_info,
+            batch=batch
         )
+        # (outil, résultat) des outils exécutés par le dernier process_message
+        self.tool_calls: List[tuple[str, Any]] = []
 
         logger.info(f"ChatHandler initialisé pour projet {self.connector.project_key}")
 
+    def _create_client(self) -> Anthropic:
+        """
+        Crée le client Claude utilisé pour les appels messages.create.
+
+        Returns:
+            Client Anthropic synchrone
+        """
+        return Anthropic(api_key=self.api_key)
+
     def get_tools(self) -> List[Dict[str, Any]]:
         """
         Définit les outils disponibles pour Claude.
@@ -51,13 +99,63 @@ class ChatHandler:
         Returns:
             Liste des outils (function tools)
         """
+        recipes_schema = {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "type": {"type": "string", "enum": ["python", "grouping", "join"]},
+                    "name": {"type": "string"},
+                    "inputs": {"type": "array", "items": {"type": "string"}},
+                    "input": {"type": "string"},
+                    "left": {"type": "string"},
+                    "right": {"type": "string"},
+                    "output": {"type": "string"},
+                    "code": {"type": "string"},
+                    "group_by": {"type": "array", "items": {"type": "string"}},
+                    "aggregations": {"type": "array"},
+                    "join_keys": {"type": "array"},
+                    "join_type": {"type": "string"},
+                    "engine": {
+                        "type": "string",
+                        "enum": ["auto", "DSS", "SQL", "SQL_RECIPE"],
+                        "description": "Moteur : auto (SQL si toutes les entrées sont sur une même connexion SQL), DSS, SQL (en base), SQL_RECIPE (requête SQL générée, grouping/join)"
+                    },
+                    "partitioning": {
+                        "type": "object",
+                        "description": "Partitionnement du dataset de sortie : {\"dimensions\": [{\"name\": \"day\", \"type\": \"time\", \"period\": \"DAY\"}, {\"name\": \"country\", \"type\": \"value\"}]}"
+                    },
+                    "partition_deps": {
+                        "type": "object",
+                        "description": "Dépendance de partition par entrée partitionnée : \"equals\", \"all\" ou {\"type\": \"time_range\", \"from\": -6, \"to\": 0}"
+                    }
+                }
+            },
+            "description": "Liste des recettes à créer (l'ordre de création est déduit des entrées/sorties)"
+        }
         return [
             {
                 "name": "list_datasets",
-                "description": "Liste tous les datasets disponibles dans le projet Dataiku avec leurs schémas",
+                "description": "Liste les datasets disponibles dans le projet Dataiku avec leurs schémas (paginé)",
                 "input_schema": {
                     "type": "object",
-                    "properties": {},
+                    "properties": {
+                        "offset": {
+                            "type": "integer",
+                            "minimum": 0,
+                            "description": "Index du premier dataset (défaut 0)"
+                        },
+                        "limit": {
+                            "type": "integer",
+                            "minimum": 1,
+                            "description": f"Nombre de datasets (défaut {DATASETS_PAGE_SIZE})"
+                        },
+                        "max_columns": {
+                            "type": "integer",
+                            "minimum": 1,
+                            "description": f"Colonnes affichées par dataset (défaut {MAX_COLUMNS})"
+                        }
+                    },
                     "required": []
                 }
             },
@@ -70,14 +168,85 @@ class ChatHandler:
                         "dataset_name": {
                             "type": "string",
                             "description": "Nom du dataset à analyser"
+                        },
+                        "column_offset": {
+                            "type": "integer",
+                            "minimum": 0,
+                            "description": "Index de la première colonne (défaut 0)"
+                        },
+                        "max_columns": {
+                            "type": "integer",
+                            "minimum": 1,
+                            "description": f"Nombre de colonnes (défaut {MAX_COLUMNS})"
                         }
                     },
                     "required": ["dataset_name"]
                 }
             },
+            {
+                "name": "preview_dataset",
+                "description": "Retourne quelques lignes réelles d'un dataset (premières lignes, colonnes choisies), dans un budget de lignes et d'octets. À utiliser pour voir le format des valeurs avant de concevoir une transformation, plutôt que de demander un échantillon à l'utilisateur.",
+                "input_schema": {
+                    "type": "object",
+                    "properties": {
+                        "dataset_name": {
+                            "type": "string",
+                            "description": "Nom du dataset"
+                        },
+                        "columns": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "Colonnes à afficher (toutes par défaut ; à restreindre pour les datasets larges)"
+                        },
+                        "max_rows": {
+                            "type": "integer",
+                            "description": f"Nombre de lignes (défaut {DATASET_PREVIEW_ROWS}, maximum {DATASET_PREVIEW_MAX_ROWS})"
+                        }
+                    },
+                    "required": ["dataset_name"]
+                }
+            },
+            {
+                "name": "profile_dataset",
+                "description": "Profil statistique des colonnes d'un dataset, calculé en une lecture par blocs et mis en cache : taux de nulls, nombre de valeurs distinctes (approché), min/max, quantiles des colonnes numériques, valeurs les plus fréquentes. À utiliser plutôt que de demander à l'utilisateur cardinalités, nulls ou plages de valeurs.",
+                "input_schema": {
+                    "type": "object",
+                    "properties": {
+                        "dataset_name": {
+                            "type": "string",
+                            "description": "Nom du dataset à profiler"
+                        },
+                        "columns": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "Colonnes à profiler (toutes par défaut)"
+                        },
+                        "max_rows": {
+                            "type": "integer",
+                            "description": f"Lignes lues au plus (défaut et maximum {PROFILE_MAX_ROWS})"
+                        }
+                    },
+                    "required": ["dataset_name"]
+                }
+            },
+            {
+                "name": "preview_workflow",
+                "description": "Exécute localement un workflow proposé sur un échantillon des datasets sources, sans rien créer dans Dataiku. Retourne le nombre de lignes et des lignes d'exemple par dataset produit. À proposer avant la confirmation.",
+                "input_schema": {
+                    "type": "object",
+                    "properties": {
+                        "recipes": recipes_schema,
+                        "output_dataset": {
+                            "type": "string",
+                            "description": "Nom du dataset final"
+                        }
+                    },
+                    "required": ["recipes", "output_dataset"]
+                }
+            },
             {
                 "name": "create_workflow",
-                "description": "Crée un workflow complet dans Dataiku (datasets + recettes). À utiliser UNIQUEMENT après confirmation de l'utilisateur.",
+                "description": "Crée ou met à jour un workflow complet dans Dataiku (datasets + recettes) : seules les différences avec le projet sont appliquées. À utiliser UNIQUEMENT après confirmation de l'utilisateur (dry_run=true pour montrer le plan avant).",
                 "input_schema": {
                     "type": "object",
                     "properties": {
@@ -90,25 +259,23 @@ class ChatHandler:
                             "items": {"type": "string"},
                             "description": "Liste des datasets sources utilisés"
                         },
-                        "recipes": {
-                            "type": "array",
-                            "items": {
-                                "type": "object",
-                                "properties": {
-                                    "type": {"type": "string", "enum": ["python", "grouping", "join"]},
-                                    "name": {"type": "string"},
-                                    "inputs": {"type": "array", "items": {"type": "string"}},
-                                    "input": {"type": "string"},
-                                    "output": {"type": "string"},
-                                    "group_by": {"type": "array", "items": {"type": "string"}},
-                                    "aggregations": {"type": "array"}
-                                }
-                            },
-                            "description": "Liste des recettes à créer dans l'ordre"
-                        },
+                        "recipes": recipes_schema,
                         "output_dataset": {
                             "type": "string",
                             "description": "Nom du dataset final créé"
+                        },
+                        "dry_run": {
+                            "type": "boolean",
+                            "description": "Si true, retourne uniquement le plan (création / mise à jour / inchangé) sans rien modifier"
+                        },
+                        "build": {
+                            "type": "string",
+                            "enum": ["output", "terminal"],
+                            "description": "Lance le build après création : dataset final (output) ou toutes les sorties terminales (terminal). Retourne l'état, la durée et le nombre de lignes de chaque job."
+                        },
+                        "partitions": {
+                            "type": "string",
+                            "description": "Partitions à construire pour un workflow partitionné (ex. \"2024-06-01\" ou \"2024-06-01|FR\") : seules ces partitions des datasets partitionnés sont recalculées. Exige build."
                         }
                     },
                     "required": ["workflow_name", "source_datasets", "recipes", "output_dataset"]
@@ -116,13 +283,19 @@ class ChatHandler:
             }
         ]
 
-    def execute_tool(self, tool_name: str, tool_input: Dict[str, Any]) -> Any:
+    def execute_tool(
+        self,
+        tool_name: str,
+        tool_input: Dict[str, Any],
+        on_progress: Optional[ProgressCallback] = None
+    ) -> Any:
         """
         Exécute un outil demandé par Claude.
 
         Args:
             tool_name: Nom de l'outil
             tool_input: Paramètres de l'outil
+            on_progress: Callback des événements de progression (builds)
 
         Returns:
             Résultat de l'exécution
@@ -132,26 +305,68 @@ class ChatHandler:
         try:
             if tool_name == "list_datasets":
                 datasets = self.connector.get_available_datasets()
-                datasets_with_info = []
-                for ds in datasets:
-                    info = self.connector.get_dataset_info(ds)
-                    datasets_with_info.append({
-                        "name": ds,
-                        "columns": [f"{c['name']} ({c['type']})" for c in info['columns']]
-                    })
-                return {"datasets": datasets_with_info}
+                offset = self._page_param(tool_input, "offset", 0, minimum=0)
+                limit = self._page_param(tool_input, "limit", DATASETS_PAGE_SIZE, minimum=1)
+                max_columns = self._page_param(tool_input, "max_columns", MAX_COLUMNS, minimum=1)
+
+                # Seuls les schémas de la page demandée sont lus
+                datasets_with_info = [
+                    self._slice_columns(self.connector.get_dataset_info(ds), 0, max_columns)
+                    for ds in datasets[offset:offset + limit]
+                ]
+                return {
+                    "datasets": datasets_with_info,
+                    "total": len(datasets),
+                    "offset": offset
+                }
 
             elif tool_name == "get_dataset_info":
                 dataset_name = tool_input["dataset_name"]
                 info = self.connector.get_dataset_info(dataset_name)
-                return info
+                return self._slice_columns(
+                    info,
+                    self._page_param(tool_input, "column_offset", 0, minimum=0),
+                    self._page_param(tool_input, "max_columns", MAX_COLUMNS, minimum=1)
+                )
+
+            elif tool_name == "preview_dataset":
+                return self.connector.preview_dataset(
+                    tool_input["dataset_name"],
+                    columns=tool_input.get("columns"),
+                    max_rows=min(
+                        self._page_param(tool_input, "max_rows", DATASET_PREVIEW_ROWS, minimum=1),
+                        DATASET_PREVIEW_MAX_ROWS
+                    ),
+                    max_bytes=DATASET_PREVIEW_BYTES
+                )
+
+            elif tool_name == "profile_dataset":
+                return self.connector.profile_dataset(
+                    tool_input["dataset_name"],
+                    columns=tool_input.get("columns"),
+                    max_rows=min(
+                        self._page_param(tool_input, "max_rows", PROFILE_MAX_ROWS, minimum=1),
+                        PROFILE_MAX_ROWS
+                    )
+                )
+
+            elif tool_name == "preview_workflow":
+                preview = self.previewer.preview_workflow(
+                    recipes=tool_input["recipes"],
+                    output_dataset=tool_input["output_dataset"]
+                )
+                return preview.to_dict(max_rows=PREVIEW_ROWS)
 
             elif tool_name == "create_workflow":
                 result = self.builder.create_workflow(
                     workflow_name=tool_input["workflow_name"],
                     source_datasets=tool_input["source_datasets"],
                     recipes=tool_input["recipes"],
-                    output_dataset=tool_input["output_dataset"]
+                    output_dataset=tool_input["output_dataset"],
+                    dry_run=tool_input.get("dry_run", False),
+                    build=tool_input.get("build"),
+                    on_progress=on_progress,
+                    partitions=tool_input.get("partitions")
                 )
                 return result
 
@@ -162,10 +377,53 @@ class ChatHandler:
             logger.error(f"Erreur exécution outil {tool_name} : {e}")
             return {"error": str(e)}
 
+    @staticmethod
+    def _page_param(tool_input: Dict[str, Any], key: str, default: int, minimum: int) -> int:
+        """
+        Lit un paramètre de pagination fourni par Claude.
+
+        Args:
+            tool_input: Paramètres de l'outil
+            key: Nom du paramètre
+            default: Valeur si absent
+            minimum: Valeur minimale acceptée
+
+        Returns:
+            Valeur entière
+
+        Raises:
+            ValueError: Si la valeur n'est pas un entier ≥ minimum (renvoyée à
+                Claude comme erreur d'outil)
+        """
+        value = tool_input.get(key, default)
+        if isinstance(value, bool) or not isinstance(value, int) or value < minimum:
+            raise ValueError(f"« {key} » doit être un entier ≥ {minimum} (reçu : {value!r})")
+        return value
+
+    @staticmethod
+    def _slice_columns(info: Dict[str, Any], offset: int, limit: int) -> Dict[str, Any]:
+        """
+        Restreint les colonnes d'un résultat get_dataset_info à une page.
+
+        Args:
+            info: Résultat de DataikuConnector.get_dataset_info
+            offset: Index de la première colonne
+            limit: Nombre maximum de colonnes
+
+        Returns:
+            Copie de info avec column_offset et les colonnes de la page
+        """
+        return {
+            **info,
+            "columns": info["columns"][offset:offset + limit],
+            "column_offset": offset
+        }
+
     def process_message(
         self,
         user_message: str,
-        conversation_history: List[Dict[str, Any]]
+        conversation_history: List[Dict[str, Any]],
+        on_progress: Optional[ProgressCallback] = None
     ) -> tuple[str, List[Dict[str, Any]]]:
         """
         Traite un message utilisateur et retourne la réponse de Claude.
@@ -173,10 +431,14 @@ class ChatHandler:
         Args:
             user_message: Message de l'utilisateur
             conversation_history: Historique de la conversation
+            on_progress: Callback des événements de progression des outils
+                longs (appelé depuis le thread appelant)
 
         Returns:
             Tuple (réponse, historique_mis_à_jour)
         """
+        self.tool_calls = []
+
         # Ajoute le message utilisateur
         messages = conversation_history + [
             {"role": "user", "content": user_message}
@@ -184,21 +446,15 @@ class ChatHandler:
 
         # Boucle pour gérer les tool uses
         while True:
-            response = self.client.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=4096,
-                system=self.system_prompt,
-                messages=messages,
-                tools=self.get_tools()
-            )
+            decision = self.router.route(user_message, messages)
+            start = time.perf_counter()
+            response = self.client.messages.create(**self._request_params(messages, decision))
+            self._record_call(decision, start, response)
 
             # Traite la réponse
             if response.stop_reason == "end_turn":
                 # Fin normale, extrait le texte
-                text_content = ""
-                for block in response.content:
-                    if hasattr(block, "text"):
-                        text_content += block.text
+                text_content = self._extract_text(response)
 
                 # Ajoute la réponse à l'historique
                 messages.append({
@@ -220,13 +476,10 @@ class ChatHandler:
                         assistant_content.append(block)
 
                         # Exécute l'outil
-                        result = self.execute_tool(block.name, block.input)
+                        result = self.execute_tool(block.name, block.input, on_progress)
+                        self.tool_calls.append((block.name, result))
 
-                        tool_results.append({
-                            "type": "tool_result",
-                            "tool_use_id": block.id,
-                            "content": json.dumps(result, ensure_ascii=False)
-                        })
+                        tool_results.append(self._tool_result_block(block, result))
 
                 # Ajoute la réponse de l'assistant et les résultats des outils
                 messages.append({
@@ -244,6 +497,86 @@ class ChatHandler:
                 # Autre stop_reason
                 return f"Réponse inattendue : {response.stop_reason}", messages
 
+    def _request_params(
+        self,
+        messages: List[Dict[str, Any]],
+        decision: RouteDecision
+    ) -> Dict[str, Any]:
+        """
+        Construit les paramètres d'un appel messages.create.
+
+        Args:
+            messages: Messages de la conversation
+            decision: Route choisie pour cet appel
+
+        Returns:
+            Dict de paramètres pour l'API Claude
+        """
+        return {
+            "model": decision.model,
+            "max_tokens": MAX_TOKENS,
+            "system": self.system_prompt,
+            "messages": messages,
+            "tools": self.get_tools()
+        }
+
+    def _record_call(self, decision: RouteDecision, start: float, response: Any) -> None:
+        """
+        Enregistre la latence et les tokens d'un appel Claude pour sa route.
+
+        Args:
+            decision: Route utilisée
+            start: Instant de l'appel (time.perf_counter)
+            response: Réponse de messages.create
+        """
+        usage = getattr(response, "usage", None)
+        self.route_metrics.record(
+            decision,
+            time.perf_counter() - start,
+            input_tokens=getattr(usage, "input_tokens", 0),
+            output_tokens=getattr(usage, "output_tokens", 0)
+        )
+
+    @staticmethod
+    def _extract_text(response: Any) -> str:
+        """
+        Concatène les blocs texte d'une réponse Claude.
+
+        Args:
+            response: Réponse de messages.create
+
+        Returns:
+            Texte de la réponse
+        """
+        text_content = ""
+        for block in response.content:
+            if hasattr(block, "text"):
+                text_content += block.text
+        return text_content
+
+    def _tool_result_block(self, block: Any, result: Any) -> Dict[str, Any]:
+        """
+        Formate le résultat d'un outil pour le renvoyer à Claude (encodage compact).
+
+        Args:
+            block: Bloc tool_use de la réponse
+            result: Résultat de execute_tool
+
+        Returns:
+            Bloc tool_result
+        """
+        content, verbose_tokens, compact_tokens = encode_tool_result(block.name, result)
+        self.encoding_stats.record(block.name, verbose_tokens, compact_tokens)
+        tool_result = {
+            "type": "tool_result",
+            "tool_use_id": block.id,
+            "content": content
+        }
+        # Échec signalé à Claude (et au routage, qui garde alors le modèle capable)
+        if isinstance(result, dict) and ("error" in result or result.get("success") is False):
+            tool_result["is_error"] = True
+        return tool_result
+
 
 def create_chat_handler(project_key: Optional[str] = None) -> ChatHandler:
     """
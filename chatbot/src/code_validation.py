@@ -0,0 +1,274 @@
+"""
+code_validation.py - Validation statique du code des recettes Python
+
+Analyse le code fourni par Claude avant toute création dans DSS : syntaxe,
+datasets référencés par dataiku.Dataset(...) comparés aux entrées / sorties
+déclarées, et colonnes lues comparées aux schémas connus. Aucun appel DSS :
+une erreur est renvoyée à Claude immédiatement au lieu d'un job en échec
+quelques minutes plus tard.
+
+Le suivi des colonnes est volontairement prudent : un DataFrame modifié sur
+place (inplace=True, insert, df.columns = ..., df.loc[...] = ...) n'est plus
+suivi, et les paramètres d'une fonction masquent les variables du module.
+"""
+
+import ast
+import difflib
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from workflow_dag import WorkflowSpecError
+
+# Méthodes de lecture d'un dataset qui retournent des DataFrames
+READ_METHODS = frozenset({"get_dataframe", "iter_dataframes"})
+
+# Méthodes qui modifient un DataFrame sur place (colonnes ajoutées, retirées ou renommées)
+MUTATING_METHODS = frozenset({"insert", "pop", "update", "set_axis", "eval"})
+
+
+class RecipeCodeError(WorkflowSpecError):
+    """Code de recette Python invalide ; problems détaille chaque erreur."""
+
+    def __init__(self, problems: List[str]):
+        super().__init__("Code des recettes Python invalide :\n- " + "\n- ".join(problems))
+        self.problems = problems
+
+
+def _dataset_name(node: ast.AST) -> Optional[str]:
+    """Nom du dataset si node est un appel dataiku.Dataset("nom") / Dataset("nom")."""
+    if not isinstance(node, ast.Call) or not node.args:
+        return None
+    func = node.func
+    is_dataset = (
+        (isinstance(func, ast.Attribute) and func.attr == "Dataset"
+         and isinstance(func.value, ast.Name) and func.value.id == "dataiku")
+        or (isinstance(func, ast.Name) and func.id == "Dataset")
+    )
+    arg = node.args[0]
+    if is_dataset and isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+        # "PROJET.dataset" : seul le nom compte pour les entrées déclarées
+        return arg.value.split(".")[-1]
+    return None
+
+
+def _string_list(node: ast.AST) -> List[str]:
+    """Chaînes d'une constante ou d'une liste / tuple de constantes."""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return [node.value]
+    if isinstance(node, (ast.List, ast.Tuple)):
+        return [e.value for e in node.elts if isinstance(e, ast.Constant) and isinstance(e.value, str)]
+    return []
+
+
+class _RecipeVisitor(ast.NodeVisitor):
+    """Parcourt le code dans l'ordre et relève datasets et colonnes lues."""
+
+    def __init__(self):
+        self.datasets: Dict[str, int] = {}        # dataset -> première ligne
+        self.dataset_vars: Dict[str, str] = {}    # variable -> dataset (objet Dataset)
+        self.frame_vars: Dict[str, str] = {}      # variable -> dataset (DataFrame lu)
+        self.created: Dict[str, Set[str]] = {}    # variable -> colonnes créées
+        self.columns: List[tuple] = []            # (dataset, colonne, ligne)
+
+    def _read_source(self, node: ast.AST) -> Optional[str]:
+        """Dataset lu si node est <Dataset>.get_dataframe(...) / iter_dataframes(...)."""
+        if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+                and node.func.attr in READ_METHODS):
+            return None
+        target = node.func.value
+        dataset = _dataset_name(target)
+        if dataset is None and isinstance(target, ast.Name):
+            dataset = self.dataset_vars.get(target.id)
+        if dataset is not None:
+            for kw in node.keywords:
+                if kw.arg == "columns":
+                    self.columns.extend((dataset, c, node.lineno) for c in _string_list(kw.value))
+        return dataset
+
+    def _bind(self, target: ast.AST, value: ast.AST) -> None:
+        """Met à jour les variables suivies après une affectation."""
+        if not isinstance(target, ast.Name):
+            return
+        name = target.id
+        # df = df[masque] : mêmes colonnes, le suivi continue
+        if (isinstance(value, ast.Subscript) and isinstance(value.value, ast.Name)
+                and value.value.id in self.frame_vars and not _string_list(value.slice)):
+            self.frame_vars[name] = self.frame_vars[value.value.id]
+            self.created[name] = set(self.created.get(value.value.id, set()))
+            return
+        self.dataset_vars.pop(name, None)
+        self.frame_vars.pop(name, None)
+        self.created.pop(name, None)
+        dataset = _dataset_name(value)
+        if dataset is not None:
+            self.dataset_vars[name] = dataset
+            return
+        source = self._read_source(value)
+        if source is not None:
+            self.frame_vars[name] = source
+
+    def _forget(self, name: str) -> None:
+        """Arrête le suivi d'une variable (colonnes devenues inconnues)."""
+        self.dataset_vars.pop(name, None)
+        self.frame_vars.pop(name, None)
+        self.created.pop(name, None)
+
+    def visit_Call(self, node: ast.Call) -> None:
+        dataset = _dataset_name(node)
+        if dataset is not None:
+            self.datasets.setdefault(dataset, node.lineno)
+        self.generic_visit(node)
+        # df.rename(..., inplace=True), df.insert(...) : colonnes modifiées sur place
+        func = node.func
+        if (isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name)
+                and func.value.id in self.frame_vars):
+            inplace = any(
+                kw.arg == "inplace" and not (isinstance(kw.value, ast.Constant) and not kw.value.value)
+                for kw in node.keywords
+            )
+            if inplace or func.attr in MUTATING_METHODS:
+                self._forget(func.value.id)
+
+    def visit_Assign(self, node: ast.Assign) -> None:
+        self.visit(node.value)
+        for target in node.targets:
+            if isinstance(target, ast.Subscript) and isinstance(target.value, ast.Name):
+                self._store_column(target)
+                self.visit(target.value)
+            elif isinstance(target, (ast.Attribute, ast.Subscript)):
+                # df.columns = [...], df.loc[:, "x"] = ... : plus de suivi
+                base = target
+                while isinstance(base, (ast.Attribute, ast.Subscript)):
+                    base = base.value
+                self.visit(target)
+                if isinstance(base, ast.Name):
+                    self._forget(base.id)
+            else:
+                self._bind(target, node.value)
+
+    def visit_FunctionDef(self, node: ast.AST) -> None:
+        """Corps de fonction : portée propre, paramètres non suivis."""
+        for decorator in getattr(node, "decorator_list", []):
+            self.visit(decorator)
+        self.visit(node.args)
+        saved = (dict(self.dataset_vars), dict(self.frame_vars),
+                 {var: set(cols) for var, cols in self.created.items()})
+        args = node.args
+        for arg in args.posonlyargs + args.args + args.kwonlyargs + [args.vararg, args.kwarg]:
+            if arg is not None:
+                self._forget(arg.arg)
+        body = node.body if isinstance(node.body, list) else [node.body]
+        for stmt in body:
+            self.visit(stmt)
+        self.dataset_vars, self.frame_vars, self.created = saved
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+    visit_Lambda = visit_FunctionDef
+
+    def visit_For(self, node: ast.For) -> None:
+        self.visit(node.iter)
+        self._bind(node.target, node.iter)
+        for stmt in node.body + node.orelse:
+            self.visit(stmt)
+
+    def visit_With(self, node: ast.With) -> None:
+        for item in node.items:
+            self.visit(item.context_expr)
+            if item.optional_vars is not None:
+                self._bind(item.optional_vars, item.context_expr)
+        for stmt in node.body:
+            self.visit(stmt)
+
+    def _store_column(self, node: ast.Subscript) -> None:
+        """df["nouvelle"] = ... : la colonne existe ensuite."""
+        if isinstance(node.value, ast.Name) and node.value.id in self.frame_vars:
+            self.created.setdefault(node.value.id, set()).update(_string_list(node.slice))
+
+    def visit_Subscript(self, node: ast.Subscript) -> None:
+        if isinstance(node.value, ast.Name) and node.value.id in self.frame_vars:
+            var = node.value.id
+            created = self.created.get(var, set())
+            self.columns.extend(
+                (self.frame_vars[var], c, node.lineno)
+                for c in _string_list(node.slice) if c not in created
+            )
+        self.generic_visit(node)
+
+
+def validate_recipe_code(
+    recipe_config: Dict[str, Any],
+    output: str,
+    schema_columns: Optional[Callable[[str], Optional[List[str]]]] = None
+) -> List[str]:
+    """
+    Vérifie le code d'une recette Python sans l'exécuter.
+
+    Args:
+        recipe_config: Recette au format de create_workflow() (type python)
+        output: Dataset de sortie de la recette
+        schema_columns: Colonnes connues d'un dataset (None si schéma inconnu)
+
+    Returns:
+        Liste des problèmes (vide si le code est valide)
+    """
+    name = recipe_config["name"]
+    code = recipe_config.get("code")
+    if not code:
+        return []
+
+    try:
+        tree = ast.parse(code, filename=name)
+        compile(tree, name, "exec")
+    except SyntaxError as e:
+        return [f"{name}, ligne {e.lineno} : erreur de syntaxe ({e.msg})"]
+
+    visitor = _RecipeVisitor()
+    visitor.visit(tree)
+
+    inputs = list(recipe_config.get("inputs", []))
+    declared = set(inputs) | {output}
+    problems = [
+        f"{name}, ligne {line} : dataiku.Dataset(\"{ds}\") n'est ni une entrée "
+        f"({', '.join(inputs) or 'aucune'}) ni la sortie ({output})"
+        for ds, line in visitor.datasets.items() if ds not in declared
+    ]
+
+    if schema_columns is not None:
+        known: Dict[str, Optional[List[str]]] = {}
+        for ds, column, line in visitor.columns:
+            if ds not in inputs:
+                continue
+            if ds not in known:
+                known[ds] = schema_columns(ds)
+            columns = known[ds]
+            if columns is None or column in columns:
+                continue
+            close = difflib.get_close_matches(column, columns, n=1)
+            hint = f" (vouliez-vous dire « {close[0]} » ?)" if close else ""
+            problems.append(f"{name}, ligne {line} : colonne « {column} » absente de {ds}{hint}")
+    return problems
+
+
+def validate_workflow_code(
+    recipes: List[Dict[str, Any]],
+    output_dataset: str,
+    schema_columns: Optional[Callable[[str], Optional[List[str]]]] = None
+) -> None:
+    """
+    Vérifie le code de toutes les recettes Python d'un workflow.
+
+    Args:
+        recipes: Recettes au format de create_workflow()
+        output_dataset: Sortie par défaut des recettes sans "output"
+        schema_columns: Colonnes connues d'un dataset (None si schéma inconnu)
+
+    Raises:
+        RecipeCodeError: Au moins un problème détecté
+    """
+    problems = []
+    for recipe_config in recipes:
+        if recipe_config.get("type") == "python" and recipe_config.get("name"):
+            problems.extend(validate_recipe_code(
+                recipe_config, recipe_config.get("output", output_dataset), schema_columns
+            ))
+    if problems:
+        raise RecipeCodeError(problems)
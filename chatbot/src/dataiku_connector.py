@@ -6,8 +6,13 @@ Réutilise le code API existant du projet parent.
 
 import os
 import sys
+import time
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 
 # Ajoute le répertoire parent au PYTHONPATH pour importer src.api
 parent_dir = Path(__file__).resolve().parents[2]
@@ -21,23 +26,39 @@ from src.api import (
     get_dataset_as_dataframe,
     get_project_summary
 )
-from src.api.datasets import get_dataset_schema
+from src.api.datasets import dataset_fingerprint, get_dataset_schema, preview_dataset
+from src.api.nodes import replica_reads
+from src.api.profiling import profile_dataset
+from src.recipes.generator import get_records_count
+
+from partitioning import apply_dimensions
+
+# Durée de validité d'un schéma en cache (secondes) : un schéma modifié dans
+# DSS par un autre outil est relu au plus tard après ce délai
+SCHEMA_TTL = float(os.getenv("CHATBOT_SCHEMA_TTL", "300"))
 
 
 class DataikuConnector:
     """Connecteur pour interagir avec Dataiku DSS"""
 
-    def __init__(self, project_key: Optional[str] = None):
+    def __init__(self, project_key: Optional[str] = None, schema_ttl: float = SCHEMA_TTL):
         """
         Initialise le connecteur Dataiku.
 
         Args:
             project_key: Clé du projet (utilise .env si None)
+            schema_ttl: Durée de validité d'un schéma en cache en secondes
         """
         self.project_key = project_key or os.getenv("DSS_PROJECT_KEY")
         self.client = get_client()
         self.project = get_project(self.project_key)
 
+        # Cache des schémas, partagé par toutes les sessions utilisant ce connecteur :
+        # {nom: (infos, instant de lecture)}
+        self.schema_ttl = schema_ttl
+        self._info_cache: Dict[str, tuple[Dict[str, Any], float]] = {}
+        self._cache_lock = threading.Lock()
+
     def get_available_datasets(self) -> List[str]:
         """
         Liste tous les datasets disponibles dans le projet.
@@ -47,16 +68,61 @@ class DataikuConnector:
         """
         return list_datasets(self.project_key)
 
-    def get_dataset_info(self, dataset_name: str) -> Dict[str, Any]:
+    def get_datasets_storage(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Stockage de tous les datasets du projet, en un seul appel.
+
+        Returns:
+            Dict {nom: {"type", "connection", "table", "schema"}}
+        """
+        storage = {}
+        for ds in self.project.list_datasets():
+            params = ds.get("params", {})
+            storage[ds["name"]] = {
+                "type": ds.get("type"),
+                "connection": params.get("connection"),
+                "table": params.get("table"),
+                "schema": params.get("schema"),
+            }
+        return storage
+
+    def get_dataset_info(self, dataset_name: str, refresh: bool = False) -> Dict[str, Any]:
         """
         Récupère les informations d'un dataset (schéma, colonnes, etc.).
 
+        Le résultat est mis en cache schema_ttl secondes : les appels suivants
+        ne touchent pas DSS.
+
         Args:
             dataset_name: Nom du dataset
+            refresh: Si True, ignore le cache et relit le schéma
 
         Returns:
             Dict avec schema, columns, types
         """
+        if not refresh:
+            cached = self.get_cached_info(dataset_name)
+            if cached is not None:
+                return cached
+
+        info = self.fetch_dataset_info(dataset_name)
+        with self._cache_lock:
+            self._info_cache[dataset_name] = (info, time.monotonic())
+        return info
+
+    def fetch_dataset_info(self, dataset_name: str) -> Dict[str, Any]:
+        """
+        Lit les informations d'un dataset sans passer par le cache ni le remplir.
+
+        Sert aux lecteurs qui tolèrent un schéma en retard (replica_reads) :
+        ce qu'ils lisent ne doit pas servir ensuite à construire les workflows.
+
+        Args:
+            dataset_name: Nom du dataset
+
+        Returns:
+            Dict comme get_dataset_info
+        """
         schema = get_dataset_schema(dataset_name, self.project_key)
 
         columns_info = []
@@ -73,6 +139,116 @@ class DataikuConnector:
             "nb_columns": len(columns_info)
         }
 
+    def get_cached_info(self, dataset_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Informations d'un dataset si son schéma est déjà en cache (aucun appel DSS).
+
+        Args:
+            dataset_name: Nom du dataset
+
+        Returns:
+            Dict comme get_dataset_info, None si le schéma n'a pas encore été lu
+            ou si sa lecture date de plus de schema_ttl secondes
+        """
+        with self._cache_lock:
+            entry = self._info_cache.get(dataset_name)
+            if entry is None:
+                return None
+            info, loaded_at = entry
+            if time.monotonic() - loaded_at >= self.schema_ttl:
+                del self._info_cache[dataset_name]
+                return None
+            return info
+
+    def get_cached_columns(self, dataset_name: str) -> Optional[List[str]]:
+        """
+        Colonnes d'un dataset si son schéma est déjà en cache (aucun appel DSS).
+
+        Args:
+            dataset_name: Nom du dataset
+
+        Returns:
+            Noms des colonnes, None si le schéma n'a pas encore été lu
+        """
+        cached = self.get_cached_info(dataset_name)
+        return [c["name"] for c in cached["columns"]] if cached else None
+
+    def profile_dataset(
+        self,
+        dataset_name: str,
+        columns: Optional[List[str]] = None,
+        max_rows: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Profil statistique des colonnes d'un dataset (une lecture par blocs, mis en cache).
+
+        Args:
+            dataset_name: Nom du dataset
+            columns: Colonnes à profiler (toutes si None)
+            max_rows: Lignes lues au plus (tout le dataset si None)
+
+        Returns:
+            Dict {rows, columns: [{name, nulls, null_rate, distinct, min, max, top, quantiles...}]}
+        """
+        return profile_dataset(dataset_name, self.project_key, columns=columns, max_rows=max_rows)
+
+    def preview_dataset(
+        self,
+        dataset_name: str,
+        columns: Optional[List[str]] = None,
+        max_rows: int = 20,
+        max_bytes: int = 8000
+    ) -> Dict[str, Any]:
+        """
+        Premières lignes d'un dataset, bornées en lignes et en octets (mis en cache par version).
+
+        Args:
+            dataset_name: Nom du dataset
+            columns: Colonnes retournées (toutes si None)
+            max_rows: Nombre maximal de lignes
+            max_bytes: Taille maximale des lignes sérialisées
+
+        Returns:
+            Dict {columns, rows, truncated, bytes}
+        """
+        return preview_dataset(
+            dataset_name, self.project_key, columns=columns, max_rows=max_rows, max_bytes=max_bytes
+        )
+
+    def get_sample(self, dataset_name: str, limit: int = 1000) -> Any:
+        """
+        Lit un échantillon d'un dataset (premières lignes), éventuellement
+        sur un nœud en lecture : il ne sert qu'à l'aperçu local.
+
+        Args:
+            dataset_name: Nom du dataset
+            limit: Nombre maximum de lignes
+
+        Returns:
+            pd.DataFrame
+        """
+        with replica_reads():
+            return get_dataset_as_dataframe(dataset_name, self.project_key, limit=limit)
+
+    def dataset_fingerprint(self, dataset_name: str) -> str:
+        """
+        Empreinte d'un dataset, qui change avec ses données ou son schéma.
+
+        Args:
+            dataset_name: Nom du dataset
+
+        Returns:
+            Empreinte hexadécimale
+        """
+        # Même nœud que get_sample, qu'elle sert à invalider
+        with replica_reads():
+            return dataset_fingerprint(self.project.get_dataset(dataset_name))
+
+    def clear_cache(self) -> None:
+        """Vide le cache des schémas (après modification du projet)."""
+        with self._cache_lock:
+            self._info_cache.clear()
+
     def get_all_datasets_info(self) -> str:
         """
         Récupère les informations de tous les datasets disponibles.
@@ -113,19 +289,31 @@ class DataikuConnector:
         """
         return get_project_summary(self.project_key)
 
-    def create_dataset(self, dataset_name: str, dataset_type: str = "managed") -> Any:
+    def create_dataset(
+        self,
+        dataset_name: str,
+        dataset_type: str = "managed",
+        connection: Optional[str] = None,
+        partitioning: Optional[Dict[str, Any]] = None
+    ) -> Any:
         """
         Crée un nouveau dataset dans le projet.
 
         Args:
             dataset_name: Nom du dataset
             dataset_type: Type de dataset (managed, sql, etc.)
+            connection: Connexion SQL d'un dataset géré (filesystem_managed si None)
+            partitioning: {"dimensions": [...]} (voir partitioning.py) ; None
+                pour un dataset non partitionné
 
         Returns:
             Dataset créé
         """
         # Utilise l'API Dataiku pour créer un dataset
-        if dataset_type == "managed":
+        if dataset_type == "managed" and connection:
+            dataset = self.project.new_managed_dataset(dataset_name) \
+                .with_store_into(connection).create()
+        elif dataset_type == "managed":
             dataset = self.project.create_dataset(
                 dataset_name,
                 type="Filesystem",
@@ -134,6 +322,18 @@ class DataikuConnector:
         else:
             raise ValueError(f"Type de dataset non supporté : {dataset_type}")
 
+        dimensions = (partitioning or {}).get("dimensions")
+        if dimensions:
+            settings = dataset.get_settings()
+            apply_dimensions(
+                settings.get_raw().setdefault("partitioning", {}),
+                dimensions,
+                file_based=connection is None
+            )
+            settings.save()
+
+        with self._cache_lock:
+            self._info_cache.pop(dataset_name, None)
         return dataset
 
     def dataset_exists(self, dataset_name: str) -> bool:
@@ -146,11 +346,110 @@ class DataikuConnector:
         Returns:
             True si le dataset existe
         """
-        try:
-            self.project.get_dataset(dataset_name)
-            return True
-        except:
-            return False
+        return self.project.get_dataset(dataset_name).exists()
+
+    def get_records_count(self, dataset_name: str) -> Optional[int]:
+        """
+        Nombre de lignes d'un dataset (dernière métrique calculée).
+
+        Args:
+            dataset_name: Nom du dataset
+
+        Returns:
+            Nombre de lignes, None si inconnu (métrique absente, dataset à construire)
+        """
+        return get_records_count(self.project, dataset_name)
+
+    def get_recipes(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Liste les recettes du projet en un seul appel.
+
+        Returns:
+            Dict {nom: {"type", "tags"}}
+        """
+        return {
+            r["name"]: {"type": r.get("type"), "tags": list(r.get("tags", []))}
+            for r in self.project.list_recipes()
+        }
+
+
+class AsyncDataikuConnector:
+    """
+    Façade asyncio d'un DataikuConnector.
+
+    dataikuapi est bloquant : chaque appel est délégué à un pool de threads
+    borné, pour que la boucle d'événements continue de servir les autres
+    conversations pendant les allers-retours DSS.
+    """
+
+    def __init__(
+        self,
+        connector: DataikuConnector,
+        max_workers: int = 16,
+        timeout: Optional[float] = None
+    ):
+        """
+        Initialise la façade asynchrone.
+
+        Args:
+            connector: Connecteur synchrone à envelopper
+            max_workers: Nombre maximum d'appels DSS simultanés
+            timeout: Délai maximum par appel en secondes (None = illimité)
+        """
+        self.connector = connector
+        self.project_key = connector.project_key
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix=f"dss-{self.project_key}"
+        )
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Exécute un appel bloquant dans le pool et attend son résultat.
+
+        L'annulation et le timeout libèrent immédiatement l'appelant. Un appel
+        encore dans la file du pool n'est pas lancé ; un appel déjà lancé ne
+        peut pas être interrompu (dataikuapi est bloquant) : le thread termine
+        ses requêtes en arrière-plan, leurs effets dans DSS sont conservés et
+        le résultat est ignoré.
+
+        Args:
+            func: Fonction bloquante à exécuter
+            *args: Arguments positionnels
+            **kwargs: Arguments nommés
+
+        Returns:
+            Résultat de func
+
+        Raises:
+            asyncio.TimeoutError: Si l'appel dépasse self.timeout
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs)
+        )
+        return await asyncio.wait_for(future, timeout=self.timeout)
+
+    async def get_available_datasets(self) -> List[str]:
+        """Version asynchrone de DataikuConnector.get_available_datasets."""
+        return await self.run(self.connector.get_available_datasets)
+
+    async def get_dataset_info(self, dataset_name: str) -> Dict[str, Any]:
+        """Version asynchrone de DataikuConnector.get_dataset_info."""
+        return await self.run(self.connector.get_dataset_info, dataset_name)
+
+    async def get_all_datasets_info(self) -> str:
+        """Version asynchrone de DataikuConnector.get_all_datasets_info."""
+        return await self.run(self.connector.get_all_datasets_info)
+
+    async def get_project_summary(self) -> Dict[str, Any]:
+        """Version asynchrone de DataikuConnector.get_project_summary."""
+        return await self.run(self.connector.get_project_summary)
+
+    def close(self) -> None:
+        """Arrête le pool de threads (les appels en cours se terminent)."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
 
 
 def get_connector(project_key: Optional[str] = None) -> DataikuConnector:
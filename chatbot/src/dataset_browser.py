@@ -0,0 +1,170 @@
+"""
+dataset_browser.py - Navigation dans les datasets d'un projet (sidebar)
+
+La liste des noms vient d'un seul appel DSS, gardé en cache quelques minutes ;
+le filtre et la pagination s'appliquent sur cette liste en mémoire. Les
+schémas ne sont lus qu'à la demande, et ceux de la page affichée (et de la
+suivante) sont préchargés en arrière-plan : le premier affichage ne dépend
+jamais du nombre de datasets du projet.
+
+Ces lectures tolèrent un léger retard : elles peuvent être servies par les
+nœuds DSS en lecture (voir src/api/nodes.py). Les schémas lus ainsi restent
+dans le cache du navigateur et n'entrent jamais dans celui du connecteur, qui
+sert à construire les workflows.
+"""
+
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from src.api.nodes import replica_reads
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 15
+
+# Durée de validité de la liste des noms (secondes)
+NAMES_TTL = float(os.getenv("CHATBOT_DATASETS_TTL", "300"))
+
+
+class BrowserPage(NamedTuple):
+    """Page de la liste filtrée des datasets"""
+    names: List[str]
+    total: int
+    page: int
+    pages: int
+
+
+class DatasetBrowser:
+    """Liste des datasets en cache et schémas chargés à la demande (thread-safe)."""
+
+    def __init__(self, connector: Any, names_ttl: float = NAMES_TTL, max_workers: int = 4,
+                 schema_ttl: Optional[float] = None):
+        """
+        Initialise le navigateur.
+
+        Args:
+            connector: DataikuConnector (son cache de schémas est consulté, jamais rempli)
+            names_ttl: Durée de validité de la liste des noms en secondes
+            max_workers: Lectures de schémas simultanées en arrière-plan
+            schema_ttl: Durée de validité d'un schéma lu par le navigateur
+                (None = celle du connecteur)
+        """
+        self.connector = connector
+        self.names_ttl = names_ttl
+        self.max_workers = max_workers
+        self.schema_ttl = connector.schema_ttl if schema_ttl is None else schema_ttl
+        self._schemas: Dict[str, tuple[Dict[str, Any], float]] = {}
+        self._names: Optional[List[str]] = None
+        self._names_at = 0.0
+        self._lock = threading.Lock()
+        self._pending: set = set()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def names(self, refresh: bool = False) -> List[str]:
+        """
+        Noms des datasets du projet (un appel DSS par période names_ttl).
+
+        Args:
+            refresh: Si True, relit la liste
+
+        Returns:
+            Noms triés
+        """
+        with self._lock:
+            if not refresh and self._names is not None \
+                    and time.monotonic() - self._names_at < self.names_ttl:
+                return self._names
+        with replica_reads():
+            names = sorted(self.connector.get_available_datasets(), key=str.lower)
+        with self._lock:
+            self._names, self._names_at = names, time.monotonic()
+        return names
+
+    def page(self, query: str = "", page: int = 0, page_size: int = PAGE_SIZE) -> BrowserPage:
+        """
+        Page de la liste filtrée (sous-chaîne, sans tenir compte de la casse).
+
+        Args:
+            query: Filtre sur le nom
+            page: Numéro de page (0 = première ; ramené dans les bornes)
+            page_size: Datasets par page
+
+        Returns:
+            BrowserPage
+        """
+        query = query.strip().lower()
+        names = [n for n in self.names() if query in n.lower()] if query else self.names()
+        pages = max(1, -(-len(names) // page_size))
+        page = min(max(page, 0), pages - 1)
+        start = page * page_size
+        return BrowserPage(names[start:start + page_size], len(names), page, pages)
+
+    def cached_info(self, name: str) -> Optional[Dict[str, Any]]:
+        """Schéma déjà en cache, du connecteur ou du navigateur (aucun appel DSS), None sinon."""
+        info = self.connector.get_cached_info(name)
+        if info is not None:
+            return info
+        with self._lock:
+            entry = self._schemas.get(name)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[1] >= self.schema_ttl:
+                del self._schemas[name]
+                return None
+            return entry[0]
+
+    def info(self, name: str) -> Dict[str, Any]:
+        """Schéma d'un dataset (appel DSS s'il n'est pas encore en cache)."""
+        cached = self.cached_info(name)
+        if cached is not None:
+            return cached
+        with replica_reads():
+            info = self.connector.fetch_dataset_info(name)
+        with self._lock:
+            self._schemas[name] = (info, time.monotonic())
+        return info
+
+    def warm(self, names: List[str]) -> int:
+        """
+        Précharge en arrière-plan les schémas absents du cache.
+
+        Args:
+            names: Datasets à précharger (dans l'ordre de priorité)
+
+        Returns:
+            Nombre de lectures lancées
+        """
+        todo = [n for n in names if self.cached_info(n) is None]
+        with self._lock:
+            todo = [n for n in todo if n not in self._pending]
+            if not todo:
+                return 0
+            self._pending.update(todo)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="dataset-browser"
+                )
+            for name in todo:
+                self._executor.submit(self._load, name)
+        return len(todo)
+
+    def _load(self, name: str) -> None:
+        """Lit un schéma dans le cache du navigateur (erreurs journalisées)."""
+        try:
+            self.info(name)
+        except Exception as e:
+            logger.debug(f"Préchargement du schéma de {name} impossible : {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(name)
+
+    def close(self) -> None:
+        """Arrête les préchargements en attente."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,268 @@
+"""
+job_monitor.py - Lancement et suivi concurrent des builds DSS
+
+Démarre un job par dataset à construire puis interroge le statut de tous les
+jobs en parallèle. L'intervalle de chaque job s'allonge tant que rien ne
+change (backoff adaptatif) et revient au minimum dès qu'il progresse. Chaque
+changement est remonté sous forme d'événement de progression. Un job dont le
+statut reste illisible max_status_errors fois de suite est rapporté en
+STATUS_ERROR sans attendre le timeout.
+"""
+
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Collection, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATES = frozenset({"DONE", "FAILED", "ABORTED"})
+
+# État rapporté quand le statut d'un job reste illisible
+STATUS_ERROR = "STATUS_ERROR"
+
+# Événement de progression : {"type": "job", "dataset", "job_id", "state", "done", "total", "elapsed_s"}
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+
+class _TrackedJob:
+    """État de suivi d'un job"""
+
+    def __init__(self, dataset: str, job: Any, interval: float, now: float):
+        self.dataset = dataset
+        self.job = job
+        self.interval = interval
+        self.next_poll = now
+        self.started = now
+        self.progress: Optional[Tuple[str, int, int]] = None
+        self.status: Dict[str, Any] = {}
+        self.polls = 0
+        # Erreurs de statut consécutives et dernier message
+        self.errors = 0
+        self.last_error: Optional[str] = None
+
+
+class JobMonitor:
+    """Lance des builds DSS et suit leurs jobs en parallèle"""
+
+    def __init__(
+        self,
+        project: Any,
+        poll_interval: float = 1.0,
+        max_poll_interval: float = 15.0,
+        backoff: float = 1.5,
+        timeout: float = 3600.0,
+        max_workers: int = 8,
+        max_status_errors: int = 5
+    ):
+        """
+        Initialise le moniteur.
+
+        Args:
+            project: DSSProject
+            poll_interval: Intervalle minimal entre deux statuts d'un job (s)
+            max_poll_interval: Intervalle maximal atteint par le backoff (s)
+            backoff: Facteur d'allongement quand un job ne progresse pas
+            timeout: Durée maximale de suivi ; les jobs encore actifs sont
+                rapportés en TIMEOUT (ils continuent dans DSS)
+            max_workers: Statuts interrogés en parallèle
+            max_status_errors: Erreurs de statut consécutives au-delà
+                desquelles un job est rapporté en STATUS_ERROR
+        """
+        self.project = project
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.backoff = backoff
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.max_status_errors = max_status_errors
+
+    def start_builds(
+        self,
+        datasets: List[str],
+        job_type: str = "RECURSIVE_BUILD",
+        partitions: Optional[str] = None,
+        partitioned: Optional[Collection[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Démarre un job de build par dataset.
+
+        Args:
+            datasets: Datasets à construire
+            job_type: Type de job DSS (RECURSIVE_BUILD, NON_RECURSIVE_FORCED_BUILD...)
+            partitions: Partitions ciblées des datasets partitionnés, au format
+                DSS ("2024-06-01", "2024-06-01|FR", plusieurs séparées par des virgules)
+            partitioned: Datasets partitionnés, seuls à recevoir partitions
+                (tous si None) ; DSS refuse une partition sur un dataset qui n'en a pas
+
+        Returns:
+            Dict {dataset: DSSJob}
+        """
+        jobs = {}
+        for ds in datasets:
+            partition = partitions if partitioned is None or ds in partitioned else None
+            job = self.project.new_job(job_type).with_output(ds, partition=partition).start()
+            logger.info(f"Build de {ds} lancé (job {job.id})")
+            jobs[ds] = job
+        return jobs
+
+    def wait(
+        self,
+        jobs: Dict[str, Any],
+        on_progress: Optional[ProgressCallback] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Suit les jobs jusqu'à leur fin (ou jusqu'au timeout).
+
+        Les événements sont émis depuis le thread appelant.
+
+        Args:
+            jobs: Dict {dataset: DSSJob}
+            on_progress: Appelé à chaque changement d'état ou d'avancement
+
+        Returns:
+            Dict {dataset: {job_id, state, duration_s, rows, polls}} (plus
+            error pour un job en STATUS_ERROR)
+        """
+        start = time.monotonic()
+        tracked = {ds: _TrackedJob(ds, job, self.poll_interval, start) for ds, job in jobs.items()}
+        pending = dict(tracked)
+        results: Dict[str, Dict[str, Any]] = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="jobs") as pool:
+            while pending:
+                now = time.monotonic()
+                if now - start > self.timeout:
+                    for t in pending.values():
+                        results[t.dataset] = self._result(t, "TIMEOUT", now)
+                    logger.warning(f"Suivi interrompu après {self.timeout}s : {', '.join(pending)}")
+                    break
+
+                due = [t for t in pending.values() if t.next_poll <= now]
+                if not due:
+                    time.sleep(min(t.next_poll for t in pending.values()) - now)
+                    continue
+
+                for t, status in zip(due, pool.map(self._fetch_status, due)):
+                    self._update(t, status, time.monotonic(), start, on_progress)
+                    if t.progress and t.progress[0] in TERMINAL_STATES:
+                        del pending[t.dataset]
+                        results[t.dataset] = self._result(t, t.progress[0], time.monotonic())
+                    elif t.errors >= self.max_status_errors:
+                        del pending[t.dataset]
+                        results[t.dataset] = self._result(t, STATUS_ERROR, time.monotonic())
+                        results[t.dataset]["error"] = t.last_error
+                        logger.error(
+                            f"Suivi du job {t.job.id} abandonné après {t.errors} "
+                            f"erreurs de statut : {t.last_error}"
+                        )
+
+            done = [ds for ds, r in results.items() if r["state"] == "DONE"]
+            for ds, rows in zip(done, pool.map(self._row_count, done)):
+                results[ds]["rows"] = rows
+
+        return results
+
+    def build(
+        self,
+        datasets: List[str],
+        job_type: str = "RECURSIVE_BUILD",
+        on_progress: Optional[ProgressCallback] = None,
+        partitions: Optional[str] = None,
+        partitioned: Optional[Collection[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Lance les builds puis attend leur fin.
+
+        Args:
+            datasets: Datasets à construire
+            job_type: Type de job DSS
+            on_progress: Callback de progression
+            partitions: Partitions ciblées (voir start_builds)
+            partitioned: Datasets partitionnés (voir start_builds)
+
+        Returns:
+            Dict {success, jobs, total_s}
+        """
+        start = time.perf_counter()
+        jobs = self.start_builds(datasets, job_type, partitions, partitioned)
+        results = self.wait(jobs, on_progress)
+        return {
+            "success": all(r["state"] == "DONE" for r in results.values()),
+            "jobs": results,
+            "total_s": round(time.perf_counter() - start, 3),
+        }
+
+    @staticmethod
+    def _fetch_status(tracked: _TrackedJob) -> Optional[Dict[str, Any]]:
+        """Statut d'un job ; None en cas d'erreur transitoire."""
+        try:
+            return tracked.job.get_status()
+        except Exception as e:
+            logger.warning(f"Statut du job {tracked.job.id} indisponible : {e}")
+            tracked.last_error = str(e)
+            return None
+
+    def _update(
+        self,
+        tracked: _TrackedJob,
+        status: Optional[Dict[str, Any]],
+        now: float,
+        start: float,
+        on_progress: Optional[ProgressCallback]
+    ) -> None:
+        """Met à jour un job après un statut et planifie le suivant."""
+        tracked.polls += 1
+        tracked.errors = 0 if status is not None else tracked.errors + 1
+        progress = self._progress(status) if status else None
+
+        if progress is not None and progress != tracked.progress:
+            tracked.progress = progress
+            tracked.status = status
+            tracked.interval = self.poll_interval
+            if on_progress:
+                state, done, total = progress
+                on_progress({
+                    "type": "job",
+                    "dataset": tracked.dataset,
+                    "job_id": tracked.job.id,
+                    "state": state,
+                    "done": done,
+                    "total": total,
+                    "elapsed_s": round(now - start, 1),
+                })
+        else:
+            tracked.interval = min(tracked.interval * self.backoff, self.max_poll_interval)
+
+        tracked.next_poll = now + tracked.interval
+
+    @staticmethod
+    def _progress(status: Dict[str, Any]) -> Tuple[str, int, int]:
+        """(état, activités terminées, activités totales) d'un statut de job."""
+        state = status.get("baseStatus", {}).get("state", "UNKNOWN")
+        global_state = status.get("globalState", {})
+        return state, int(global_state.get("done", 0)), int(global_state.get("total", 0))
+
+    @staticmethod
+    def _result(tracked: _TrackedJob, state: str, now: float) -> Dict[str, Any]:
+        """Résultat d'un job : durée DSS si disponible, sinon durée observée."""
+        base = tracked.status.get("baseStatus", {})
+        begin, end = base.get("jobStartTime", 0), base.get("jobEndTime", 0)
+        duration = (end - begin) / 1000 if begin and end else now - tracked.started
+        return {
+            "job_id": tracked.job.id,
+            "state": state,
+            "duration_s": round(duration, 3),
+            "rows": None,
+            "polls": tracked.polls,
+        }
+
+    def _row_count(self, dataset: str) -> Optional[int]:
+        """Nombre de lignes d'après la dernière métrique calculée (None si absente)."""
+        try:
+            metrics = self.project.get_dataset(dataset).get_last_metric_values()
+            value = metrics.get_global_value("records:COUNT_RECORDS")
+            return int(value) if value is not None else None
+        except Exception as e:
+            logger.debug(f"Nombre de lignes de {dataset} indisponible : {e}")
+            return None
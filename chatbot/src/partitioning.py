@@ -0,0 +1,139 @@
+"""
+partitioning.py - Partitionnement des datasets et dépendances de partitions des recettes
+
+Format dans la spécification d'une recette (create_workflow) :
+    "partitioning": {"dimensions": [
+        {"name": "day", "type": "time", "period": "DAY"},
+        {"name": "country", "type": "value"}
+    ]}
+s'applique au dataset de sortie créé ;
+    "partition_deps": {"sales": "equals", "history": {"type": "time_range", "from": -6, "to": 0}}
+règle la dépendance de partition de chaque entrée partitionnée.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from workflow_dag import WorkflowSpecError, recipe_inputs
+
+TIME_PERIODS = {"YEAR": "%Y/", "MONTH": "%Y/%M/", "DAY": "%Y/%M/%D/", "HOUR": "%Y/%M/%D/%H/"}
+
+DEPENDENCY_TYPES = ("equals", "all", "time_range")
+
+
+def validate_partitioning(recipe_config: Dict[str, Any]) -> None:
+    """
+    Vérifie le partitionnement et les dépendances de partitions d'une recette.
+
+    Args:
+        recipe_config: Recette au format de create_workflow()
+
+    Raises:
+        WorkflowSpecError: Dimension ou dépendance invalide
+    """
+    name = recipe_config["name"]
+    dimensions = (recipe_config.get("partitioning") or {}).get("dimensions", [])
+    seen = set()
+    for dim in dimensions:
+        if not dim.get("name") or dim["name"] in seen:
+            raise WorkflowSpecError(f"Recette {name} : dimension sans nom ou en double")
+        seen.add(dim["name"])
+        if dim.get("type") not in ("time", "value"):
+            raise WorkflowSpecError(
+                f"Recette {name} : type de dimension inconnu : {dim.get('type')}"
+            )
+        if dim["type"] == "time" and dim.get("period", "DAY") not in TIME_PERIODS:
+            raise WorkflowSpecError(f"Recette {name} : période inconnue : {dim.get('period')}")
+    if sum(dim["type"] == "time" for dim in dimensions) > 1:
+        raise WorkflowSpecError(f"Recette {name} : une seule dimension temporelle possible")
+
+    inputs = set(recipe_inputs(recipe_config))
+    for ds, dep in (recipe_config.get("partition_deps") or {}).items():
+        if ds not in inputs:
+            raise WorkflowSpecError(
+                f"Recette {name} : dépendance sur {ds}, qui n'est pas une entrée"
+            )
+        dep_type = dep if isinstance(dep, str) else dep.get("type")
+        if dep_type not in DEPENDENCY_TYPES:
+            raise WorkflowSpecError(f"Recette {name} : dépendance inconnue : {dep_type}")
+
+
+def apply_dimensions(
+    partitioning: Dict[str, Any],
+    dimensions: List[Dict[str, Any]],
+    file_based: bool
+) -> None:
+    """
+    Renseigne le bloc "partitioning" des settings d'un dataset.
+
+    Args:
+        partitioning: Bloc settings["partitioning"] du dataset (modifié en place)
+        dimensions: Dimensions de la spécification
+        file_based: Ajoute le motif de chemins (datasets fichiers) ; les
+            datasets SQL sont partitionnés sur les colonnes de même nom
+    """
+    partitioning["dimensions"] = [
+        {"name": dim["name"], "type": "time", "params": {"period": dim.get("period", "DAY")}}
+        if dim["type"] == "time" else {"name": dim["name"], "type": "value"}
+        for dim in dimensions
+    ]
+    if file_based:
+        partitioning["filePathPattern"] = file_path_pattern(dimensions)
+
+
+def file_path_pattern(dimensions: List[Dict[str, Any]]) -> str:
+    """
+    Motif de chemins d'un dataset fichier partitionné (dimension temporelle d'abord).
+
+    Example:
+        day (DAY) + country -> "%Y/%M/%D/%{country}/.*"
+    """
+    time_dims = [d for d in dimensions if d["type"] == "time"]
+    pattern = "".join(TIME_PERIODS[d.get("period", "DAY")] for d in time_dims)
+    pattern += "".join(f"%{{{d['name']}}}/" for d in dimensions if d["type"] == "value")
+    return pattern + ".*"
+
+
+def partition_dependency(dep: Any) -> Dict[str, Any]:
+    """
+    Traduit une dépendance de la spécification au format DSS.
+
+    Args:
+        dep: "equals", "all" ou {"type": "time_range", "from": -6, "to": 0, "period": "DAY"}
+
+    Returns:
+        Dépendance DSS {"func", "params", "out"}
+    """
+    dep_type = dep if isinstance(dep, str) else dep["type"]
+    if dep_type == "equals":
+        return {"func": "equals", "params": {}, "out": []}
+    if dep_type == "all":
+        return {"func": "all_available", "params": {}, "out": []}
+    return {
+        "func": "time_range",
+        "params": {
+            "fromMode": "RELATIVE_OFFSET",
+            "fromOffset": dep.get("from", 0),
+            "toOffset": dep.get("to", 0),
+            "period": dep.get("period", "DAY"),
+        },
+        "out": [],
+    }
+
+
+def set_partition_deps(
+    recipe_definition: Dict[str, Any],
+    partition_deps: Optional[Dict[str, Any]]
+) -> None:
+    """
+    Pose les dépendances de partitions sur les entrées d'une définition de recette.
+
+    Args:
+        recipe_definition: Définition brute (get_recipe_raw_definition), modifiée en place
+        partition_deps: Dict {dataset d'entrée: dépendance de la spécification}
+    """
+    if not partition_deps:
+        return
+    for role in recipe_definition.get("inputs", {}).values():
+        for item in role.get("items", []):
+            if item.get("ref") in partition_deps:
+                item["deps"] = [partition_dependency(partition_deps[item["ref"]])]
@@ -0,0 +1,226 @@
+"""
+preview_sandbox.py - Exécution isolée du code d'une recette Python (aperçu)
+
+Lancé par workflow_preview dans un sous-processus, sans les variables
+d'environnement du chatbot. Installe un module `dataiku` factice qui lit les
+échantillons d'entrée et capture les sorties, en Parquet, dans le répertoire
+de travail.
+
+Avant d'exécuter le code, le processus plafonne sa mémoire et son temps CPU
+(POSIX) puis installe un hook d'audit : lecture limitée au répertoire de
+travail et à l'installation Python, écriture limitée au répertoire de travail,
+ni réseau, ni sous-processus, ni ctypes, ni liens symboliques. Le dépôt (et
+son .env) n'est donc pas lisible par le code de la recette.
+
+Usage : python preview_sandbox.py <répertoire_de_travail>
+"""
+
+import os
+import sys
+import json
+import types
+import sysconfig
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Événements d'audit toujours refusés : réseau, processus, code natif
+# (liens symboliques compris, qui fausseraient la normalisation des chemins,
+# et accès du ramasse-miettes, qui donnerait accès au hook lui-même)
+DENIED_EVENTS = (
+    "socket.", "subprocess.", "os.system", "os.exec", "os.posix_spawn",
+    "os.spawn", "os.fork", "os.forkpty", "os.kill", "ctypes.", "webbrowser.",
+    "os.symlink", "gc.get_objects", "gc.get_referrers", "gc.get_referents",
+)
+
+# Événements modifiant le système de fichiers : chemins vérifiés en écriture
+PATH_EVENTS = {
+    "os.remove": 1, "os.rmdir": 1, "os.mkdir": 1, "os.chmod": 1, "os.chown": 1,
+    "os.truncate": 1, "os.utime": 1, "os.rename": 2, "os.link": 2,
+    "shutil.rmtree": 1, "shutil.copyfile": 2, "shutil.move": 2,
+}
+
+WRITE_FLAGS = os.O_WRONLY | os.O_RDWR | os.O_APPEND | os.O_CREAT | os.O_TRUNC
+
+
+def _install_fake_dataiku(workdir: Path, manifest: dict, outputs: dict) -> None:
+    """Enregistre un module `dataiku` minimal limité aux datasets déclarés."""
+    inputs = manifest["inputs"]
+    declared_outputs = set(manifest["outputs"])
+
+    class Writer:
+        def __init__(self, name):
+            self.name = name
+
+        def write_dataframe(self, df):
+            outputs.setdefault(self.name, []).append(df)
+
+        def close(self):
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            self.close()
+
+    class Dataset:
+        def __init__(self, name, project_key=None, ignore_flow=False):
+            self.name = name
+
+        def _read(self, columns=None):
+            if self.name not in inputs:
+                raise ValueError(f"Dataset non déclaré en entrée : {self.name}")
+            return pd.read_parquet(workdir / inputs[self.name], columns=columns)
+
+        def get_dataframe(self, columns=None, limit=None, **kwargs):
+            df = self._read(columns)
+            return df.head(limit) if limit else df
+
+        def iter_dataframes(self, chunksize=10000, columns=None, **kwargs):
+            df = self._read(columns)
+            for start in range(0, len(df), chunksize):
+                yield df.iloc[start:start + chunksize]
+
+        def read_schema(self, **kwargs):
+            df = self._read()
+            return [{"name": c, "type": str(t)} for c, t in df.dtypes.items()]
+
+        def _check_output(self):
+            if self.name not in declared_outputs:
+                raise ValueError(f"Dataset non déclaré en sortie : {self.name}")
+
+        def write_with_schema(self, df, **kwargs):
+            self._check_output()
+            outputs[self.name] = [df]
+
+        def write_dataframe(self, df, **kwargs):
+            self.write_with_schema(df)
+
+        def write_schema_from_dataframe(self, df, **kwargs):
+            self._check_output()
+
+        def get_writer(self):
+            self._check_output()
+            outputs[self.name] = []
+            return Writer(self.name)
+
+    module = types.ModuleType("dataiku")
+    module.Dataset = Dataset
+    module.default_project_key = lambda: manifest.get("project_key", "PREVIEW")
+    module.get_custom_variables = lambda *args, **kwargs: {}
+    sys.modules["dataiku"] = module
+
+
+def _limit_resources(limits: dict) -> None:
+    """Plafonne la mémoire et le CPU du processus courant (POSIX)."""
+    if resource is None:
+        return
+    memory = limits["memory_mb"] * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    resource.setrlimit(resource.RLIMIT_CPU, (limits["cpu_s"], limits["cpu_s"]))
+
+
+def _restrict_access(workdir: Path) -> None:
+    """
+    Installe le hook d'audit qui borne fichiers, réseau et processus.
+
+    Le code de la recette s'exécute dans le même interpréteur : il peut
+    remplacer os.path.realpath, un builtin ou une constante de ce module. Le
+    hook n'utilise donc que des références liées ici, avant toute exécution
+    de la recette, et normalise lui-même les chemins (sans os.path). Les liens
+    symboliques étant interdits, la normalisation textuelle suffit.
+    """
+    getcwd, fspath = os.getcwd, os.fspath
+    startswith, str_type, bytes_type, int_type = str.startswith, str, bytes, int
+    denied = PermissionError
+    sep = os.sep
+    encoding = sys.getfilesystemencoding()
+    denied_events = tuple(DENIED_EVENTS)
+    path_events = dict(PATH_EVENTS)
+    write_flags = WRITE_FLAGS
+
+    def normalize(path: str) -> str:
+        if not startswith(path, sep):
+            path = getcwd() + sep + path
+        parts = []
+        for part in path.split(sep):
+            if part == "..":
+                if parts:
+                    parts.pop()
+            elif part and part != ".":
+                parts.append(part)
+        return sep + sep.join(parts)
+
+    def roots_of(*paths) -> tuple:
+        # Chemin tel qu'écrit et chemin réel : un préfixe de l'installation
+        # Python peut passer par un lien symbolique
+        roots = set()
+        for path in paths:
+            if path:
+                for root in (normalize(fspath(path)), os.path.realpath(path)):
+                    if root != sep:
+                        roots.add(root)
+        return tuple(roots)
+
+    writable = roots_of(workdir)
+    readable = writable + roots_of(
+        sys.prefix, sys.base_prefix, sys.exec_prefix, *sysconfig.get_paths().values()
+    )
+
+    def inside(path, roots) -> bool:
+        if type(path) is int_type:
+            return True  # descripteur déjà ouvert
+        if type(path) is bytes_type:
+            path = path.decode(encoding, "surrogateescape")
+        elif type(path) is not str_type:
+            # Objet os.PathLike : son __fspath__ pourrait répondre autre chose ici
+            return False
+        path = normalize(path)
+        for root in roots:
+            if path == root or startswith(path, root + sep):
+                return True
+        return False
+
+    def hook(event, args):
+        if event == "open":
+            path, _, flags = args
+            roots = writable if flags and flags & write_flags else readable
+            if path is not None and not inside(path, roots):
+                raise denied(f"Accès refusé hors du répertoire d'aperçu : {path}")
+        elif event in path_events:
+            for path in args[:path_events[event]]:
+                if path is not None and not inside(path, writable):
+                    raise denied(f"Accès refusé hors du répertoire d'aperçu : {path}")
+        elif startswith(event, denied_events):
+            raise denied(f"Opération interdite en aperçu : {event}")
+
+    sys.addaudithook(hook)
+
+
+def main(workdir: Path) -> None:
+    manifest = json.loads((workdir / "manifest.json").read_text(encoding="utf-8"))
+    _limit_resources(manifest["limits"])
+    outputs: dict = {}
+    _install_fake_dataiku(workdir, manifest, outputs)
+    _restrict_access(workdir)
+
+    code = (workdir / "recipe.py").read_text(encoding="utf-8")
+    exec(compile(code, "recipe.py", "exec"), {"__name__": "__main__"})
+
+    written = {}
+    for i, (name, chunks) in enumerate(outputs.items()):
+        df = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+        filename = f"output_{i}.parquet"
+        df.to_parquet(workdir / filename, index=False)
+        written[name] = filename
+    (workdir / "result.json").write_text(json.dumps({"outputs": written}), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main(Path(sys.argv[1]))
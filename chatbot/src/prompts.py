@@ -11,10 +11,13 @@ Tu analyses les datasets disponibles et proposes les transformations nécessaire
 ## Processus de conversation
 1. Comprendre l'objectif de l'utilisateur
 2. Identifier les datasets sources disponibles
-3. Analyser les schémas des datasets
+3. Analyser les schémas des datasets (et leur profil via `profile_dataset` :
+   nulls, cardinalités, plages de valeurs, plutôt que de les demander) ; regarder
+   quelques lignes réelles avec `preview_dataset` quand le format des valeurs compte
 4. Proposer un plan de workflow clair
-5. Demander confirmation avant création
-6. Créer le workflow dans DSS
+5. Proposer un aperçu sur échantillon (`preview_workflow`) si utile
+6. Demander confirmation avant création
+7. Créer le workflow dans DSS
 
 ## Règles importantes
 - Sois conversationnel et pédagogique
@@ -60,23 +63,36 @@ Quand tu proposes un workflow, utilise ce format :
 {datasets_info}
 """
 
-def get_system_prompt(project_key: str, datasets_info: str) -> str:
+BATCH_INSTRUCTIONS = """
+## Mode lot (prioritaire sur les règles ci-dessus)
+La demande vient d'un fichier de lot : personne ne peut répondre à une question.
+La demande vaut confirmation : ne demande PAS de confirmation et ne pose pas de
+question. Analyse les datasets si nécessaire, puis appelle directement
+`create_workflow` (sans dry_run). Si le résultat contient une erreur ou des
+`code_errors`, corrige la spécification et relance. Termine par un résumé
+court de ce qui a été créé.
+"""
+
+
+def get_system_prompt(project_key: str, datasets_info: str, batch: bool = False) -> str:
     """
     Génère le prompt système avec le contexte du projet.
 
     Args:
         project_key: Clé du projet Dataiku
         datasets_info: Information sur les datasets disponibles
+        batch: Mode lot (création sans confirmation, voir batch_runner.py)
 
     Returns:
         Prompt système complet
     """
     project_context = f"Projet Dataiku : {project_key}"
 
-    return SYSTEM_PROMPT.format(
+    prompt = SYSTEM_PROMPT.format(
         project_context=project_context,
         datasets_info=datasets_info
     )
+    return prompt + BATCH_INSTRUCTIONS if batch else prompt
 
 
 WORKFLOW_CREATION_PROMPT = """
@@ -85,8 +101,15 @@ L'utilisateur a confirmé la création du workflow.
 Utilise la fonction `create_workflow` avec les paramètres suivants :
 - workflow_name : nom descriptif du workflow
 - source_datasets : liste des datasets sources
-- recipes : liste des recettes à créer (type, nom, config)
+- recipes : liste des recettes à créer (type, nom, config, engine optionnel — "auto" par défaut)
 - output_dataset : nom du dataset final
+- dry_run : true pour obtenir le plan (création / mise à jour / inchangé) sans rien modifier
+- build : "output" ou "terminal" si l'utilisateur veut lancer le build après création
+- partitioning / partition_deps (par recette) et partitions : pour un traitement incrémental
+  (ex. partition journalière), afin de ne recalculer que les partitions demandées
+
+Si le résultat contient `code_errors` (code Python vérifié avant création :
+syntaxe, datasets non déclarés, colonnes absentes), corrige le code et relance.
 
 Après création, confirme à l'utilisateur avec le lien vers le flow Dataiku.
 """
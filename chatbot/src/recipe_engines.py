@@ -0,0 +1,267 @@
+"""
+recipe_engines.py - Choix du moteur d'exécution des recettes et génération SQL
+
+Trois moteurs sont proposés dans la spécification d'une recette ("engine") :
+- DSS : moteur de flux DSS (les données transitent par le serveur DSS)
+- SQL : recette visuelle exécutée en base (entrées et sortie sur la même connexion SQL)
+- SQL_RECIPE : recette SQL générée (grouping / join traduits en requête)
+
+"auto" (défaut) choisit SQL quand toutes les entrées sont sur une même connexion
+SQL, DSS sinon. Chaque choix est accompagné de sa raison.
+"""
+
+from typing import Any, Collection, Dict, List, NamedTuple, Optional
+
+from workflow_dag import WorkflowSpecError, recipe_inputs
+
+AUTO = "auto"
+DSS = "DSS"
+SQL = "SQL"
+SQL_RECIPE = "SQL_RECIPE"
+
+ENGINES = (AUTO, DSS, SQL, SQL_RECIPE)
+
+# Types de datasets DSS stockés dans une base SQL
+SQL_DATASET_TYPES = frozenset({
+    "PostgreSQL", "MySQL", "Vertica", "Greenplum", "Redshift", "Teradata", "Oracle",
+    "SQLServer", "Synapse", "Snowflake", "BigQuery", "Databricks", "Athena",
+    "Netezza", "SAPHANA", "Trino", "JDBC",
+})
+
+# Bases dont les identifiants se quotent avec des backticks (guillemets doubles sinon)
+BACKTICK_DIALECTS = frozenset({"MySQL", "BigQuery", "Databricks"})
+
+# Stockage des datasets créés par défaut (voir DataikuConnector.create_dataset)
+DEFAULT_STORAGE = {"type": "Filesystem", "connection": "filesystem_managed", "table": None,
+                   "schema": None}
+
+# Fonctions d'agrégation DSS -> SQL
+SQL_AGGREGATIONS = {
+    "sum": "SUM({})",
+    "avg": "AVG({})",
+    "mean": "AVG({})",
+    "min": "MIN({})",
+    "max": "MAX({})",
+    "count": "COUNT({})",
+    "countdistinct": "COUNT(DISTINCT {})",
+    "stddev": "STDDEV({})",
+    "std": "STDDEV({})",
+}
+
+SQL_JOIN_TYPES = {"LEFT": "LEFT JOIN", "INNER": "INNER JOIN", "RIGHT": "RIGHT JOIN",
+                  "OUTER": "FULL OUTER JOIN", "FULL": "FULL OUTER JOIN"}
+
+
+class EngineChoice(NamedTuple):
+    """Moteur retenu pour une recette"""
+    engine: str
+    reason: str
+    connection: Optional[str] = None
+
+
+def is_sql_storage(storage: Dict[str, Any]) -> bool:
+    """Vrai si le dataset est stocké dans une base SQL."""
+    return storage.get("type") in SQL_DATASET_TYPES
+
+
+def select_engine(
+    recipe_config: Dict[str, Any],
+    output: str,
+    storage: Dict[str, Dict[str, Any]],
+    unbuilt: Collection[str] = ()
+) -> EngineChoice:
+    """
+    Choisit le moteur d'une recette d'après la spécification et le stockage de ses datasets.
+
+    Args:
+        recipe_config: Recette au format de create_workflow() (clé "engine" optionnelle)
+        output: Dataset de sortie résolu
+        storage: Stockage connu {dataset: {"type", "connection", "table"}} ; les
+            sorties des recettes précédentes du workflow doivent y figurer
+        unbuilt: Datasets dont le schéma n'est pas encore connu (sorties du
+            workflow à construire) ; un Join SQL_RECIPE sur l'un d'eux passe
+            en recette visuelle SQL, qui calcule ses colonnes elle-même
+
+    Returns:
+        EngineChoice (connection renseignée pour SQL / SQL_RECIPE)
+
+    Raises:
+        WorkflowSpecError: Moteur inconnu ou inapplicable à la recette
+    """
+    requested = recipe_config.get("engine", AUTO)
+    name = recipe_config["name"]
+    if requested not in ENGINES:
+        raise WorkflowSpecError(f"Moteur inconnu pour la recette {name} : {requested}")
+
+    if recipe_config["type"] == "python":
+        if requested in (SQL, SQL_RECIPE):
+            raise WorkflowSpecError(
+                f"Recette {name} : le moteur {requested} ne s'applique pas au code Python"
+            )
+        inputs = recipe_inputs(recipe_config)
+        sql_inputs = [ds for ds in inputs if is_sql_storage(storage.get(ds, {}))]
+        if sql_inputs:
+            return EngineChoice(DSS, "code Python exécuté en pandas dans DSS "
+                                f"(entrées SQL transférées : {', '.join(sql_inputs)})")
+        return EngineChoice(DSS, "code Python exécuté en pandas dans DSS")
+
+    if requested == DSS:
+        return EngineChoice(DSS, "choisi dans la spécification")
+
+    connection, blocker = _common_sql_connection(recipe_inputs(recipe_config), output, storage)
+    if requested == AUTO:
+        if connection:
+            return EngineChoice(SQL, f"entrées sur la connexion SQL {connection} : calcul en base",
+                                connection)
+        return EngineChoice(DSS, blocker)
+
+    if not connection:
+        raise WorkflowSpecError(f"Recette {name} : moteur {requested} impossible, {blocker}")
+    if requested == SQL_RECIPE and recipe_config["type"] == "join":
+        pending = [ds for ds in recipe_inputs(recipe_config) if ds in unbuilt]
+        if pending:
+            return EngineChoice(SQL, f"colonnes de {', '.join(pending)} inconnues avant "
+                                "construction : recette visuelle en base", connection)
+    return EngineChoice(requested, "choisi dans la spécification", connection)
+
+
+def _common_sql_connection(
+    inputs: List[str],
+    output: str,
+    storage: Dict[str, Dict[str, Any]]
+) -> tuple:
+    """
+    Connexion SQL commune aux entrées (et à la sortie si elle existe déjà).
+
+    Returns:
+        Tuple (connexion ou None, raison de l'absence)
+    """
+    non_sql = [ds for ds in inputs if not is_sql_storage(storage.get(ds, {}))]
+    if non_sql:
+        return None, f"entrée(s) hors SQL : {', '.join(non_sql)}"
+
+    connections = {storage[ds]["connection"] for ds in inputs}
+    if len(connections) > 1:
+        return None, f"entrées sur des connexions SQL différentes ({', '.join(sorted(connections))})"
+
+    connection = connections.pop()
+    if output in storage and storage[output].get("connection") != connection:
+        return None, f"sortie {output} existante hors de la connexion {connection}"
+    return connection, ""
+
+
+def output_storage(
+    choice: EngineChoice,
+    storage: Dict[str, Dict[str, Any]],
+    inputs: List[str]
+) -> Dict[str, Any]:
+    """Stockage de la sortie d'une recette créée avec ce moteur."""
+    if choice.connection:
+        return {"type": storage[inputs[0]]["type"], "connection": choice.connection, "table": None,
+                "schema": None}
+    return dict(DEFAULT_STORAGE)
+
+
+def dss_recipe_type(recipe_config: Dict[str, Any], choice: EngineChoice) -> str:
+    """Type de recette DSS créé pour une recette de la spécification et son moteur."""
+    return "sql_query" if choice.engine == SQL_RECIPE else recipe_config["type"]
+
+
+def quote_identifier(identifier: str, dialect: Optional[str] = None) -> str:
+    """Identifiant SQL quoté selon le type de dataset (backticks pour MySQL, BigQuery...)."""
+    if dialect in BACKTICK_DIALECTS:
+        return "`" + identifier.replace("`", "``") + "`"
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def table_name(dataset_name: str, storage: Dict[str, Any]) -> str:
+    """
+    Référence SQL quotée de la table d'un dataset, préfixée de son schéma.
+
+    La table par défaut des datasets gérés est utilisée si elle est inconnue.
+    """
+    dialect = storage.get("type")
+    parts = [storage.get("schema"), storage.get("table") or "${projectKey}_" + dataset_name]
+    return ".".join(quote_identifier(part, dialect) for part in parts if part)
+
+
+def grouping_sql(recipe_config: Dict[str, Any], table: str, dialect: Optional[str] = None) -> str:
+    """
+    Requête SQL équivalente à une recette Grouping.
+
+    Args:
+        recipe_config: Recette au format de create_workflow()
+        table: Référence de la table d'entrée (voir table_name)
+        dialect: Type de dataset SQL (quotage des identifiants)
+
+    Raises:
+        WorkflowSpecError: Agrégation sans équivalent SQL
+    """
+    def quote(identifier: str) -> str:
+        return quote_identifier(identifier, dialect)
+
+    keys = [quote(col) for col in recipe_config["group_by"]]
+    values = []
+    for agg in recipe_config["aggregations"]:
+        template = SQL_AGGREGATIONS.get(str(agg["function"]).lower())
+        if template is None:
+            raise WorkflowSpecError(
+                f"Recette {recipe_config['name']} : agrégation sans équivalent SQL : {agg['function']}"
+            )
+        values.append(f"{template.format(quote(agg['column']))} AS {quote(agg['output'])}")
+
+    select = ",\n    ".join(keys + values)
+    return (
+        f"SELECT\n    {select}\n"
+        f"FROM {table}\n"
+        f"GROUP BY {', '.join(keys)}"
+    )
+
+
+def join_sql(
+    recipe_config: Dict[str, Any],
+    left_table: str,
+    right_table: str,
+    left_columns: List[str],
+    right_columns: List[str],
+    dialect: Optional[str] = None
+) -> str:
+    """
+    Requête SQL équivalente à une recette Join, avec les préfixes left_ / right_
+    de WorkflowBuilder.create_join_recipe().
+
+    Args:
+        recipe_config: Recette au format de create_workflow()
+        left_table: Référence de la table de gauche (voir table_name)
+        right_table: Référence de la table de droite
+        left_columns: Colonnes de l'entrée de gauche
+        right_columns: Colonnes de l'entrée de droite
+        dialect: Type de dataset SQL (quotage des identifiants)
+
+    Raises:
+        WorkflowSpecError: Type de join sans équivalent SQL, ou colonnes d'une
+            entrée inconnues
+    """
+    def quote(identifier: str) -> str:
+        return quote_identifier(identifier, dialect)
+
+    join_type = recipe_config.get("join_type", "LEFT").upper()
+    if join_type not in SQL_JOIN_TYPES:
+        raise WorkflowSpecError(f"Type de join sans équivalent SQL : {join_type}")
+    if not left_columns or not right_columns:
+        raise WorkflowSpecError(
+            f"Recette {recipe_config['name']} : colonnes des entrées inconnues, "
+            "requête SQL impossible"
+        )
+
+    columns = [f"l.{quote(c)} AS {quote('left_' + c)}" for c in left_columns]
+    columns += [f"r.{quote(c)} AS {quote('right_' + c)}" for c in right_columns]
+    on = " AND ".join(
+        f"l.{quote(left)} = r.{quote(right)}" for left, right in recipe_config["join_keys"]
+    )
+    select = ",\n    ".join(columns)
+    return (
+        f"SELECT\n    {select}\n"
+        f"FROM {left_table} l\n"
+        f"{SQL_JOIN_TYPES[join_type]} {right_table} r ON {on}"
+    )
@@ -0,0 +1,327 @@
+"""
+replay.py - Enregistrement et rejeu déterministe des appels Claude et DSS
+
+En mode "record", chaque échange HTTP avec Claude (messages.create) et avec DSS
+est capturé dans une cassette compacte (JSON gzip). En mode "replay", les
+réponses sont servies depuis la cassette sans réseau, avec une latence simulée
+optionnelle : ChatHandler.process_message() et WorkflowBuilder.create_workflow()
+peuvent alors être profilés et testés en charge hors ligne.
+
+Usage :
+    with use_cassette("cassettes/demo.json.gz", mode="replay") as cassette:
+        handler = ChatHandler("TEST_WORKFLOW", client=cassette.anthropic_client())
+        handler.process_message("Liste les datasets", [])
+"""
+
+import io
+import sys
+import gzip
+import json
+import time
+import base64
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+try:  # les versions récentes du SDK anthropic reposent sur httpx2
+    import httpx2 as httpx
+except ImportError:
+    import httpx
+import requests
+from anthropic import Anthropic, AsyncAnthropic
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+# Ajoute le répertoire parent au PYTHONPATH pour importer src.api
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.api.client import add_transport_layer, remove_transport_layer
+
+logger = logging.getLogger(__name__)
+
+RECORD = "record"
+REPLAY = "replay"
+
+CASSETTE_VERSION = 1
+
+# Seuls ces en-têtes de réponse sont conservés (jamais les en-têtes de requête,
+# qui contiennent les clés API)
+_KEPT_HEADERS = ("content-type", "dku-call-id")
+
+
+class CassetteMissError(LookupError):
+    """Requête absente de la cassette en mode replay."""
+
+
+class Cassette:
+    """Stockage des échanges HTTP enregistrés, indexés par requête"""
+
+    def __init__(self, path: str, mode: str = REPLAY, latency_scale: float = 0.0):
+        """
+        Initialise la cassette.
+
+        Args:
+            path: Fichier de cassette (.json.gz)
+            mode: "record" (réseau réel + capture) ou "replay" (hors ligne)
+            latency_scale: En replay, facteur appliqué à la latence enregistrée
+                (0 = réponse immédiate, 1 = latence d'origine)
+        """
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Mode de cassette inconnu : {mode}")
+
+        self.path = Path(path)
+        self.mode = mode
+        self.latency_scale = latency_scale
+
+        self._lock = threading.Lock()
+        self._interactions: List[Dict[str, Any]] = []
+        self._queues: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self._last: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+
+        if mode == REPLAY:
+            self._load()
+
+    # ------------------------------------------------------------------
+    # Persistance
+    # ------------------------------------------------------------------
+
+    def _load(self) -> None:
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        for interaction in data["interactions"]:
+            self._queues[interaction["key"]].append(interaction)
+        logger.info(f"Cassette {self.path} chargée : {len(data['interactions'])} échange(s)")
+
+    def save(self) -> None:
+        """Écrit les échanges enregistrés (mode record uniquement)."""
+        if self.mode != RECORD:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            data = {"version": CASSETTE_VERSION, "interactions": self._interactions}
+        with gzip.open(self.path, "wt", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        logger.info(f"Cassette {self.path} écrite : {len(data['interactions'])} échange(s)")
+
+    # ------------------------------------------------------------------
+    # Enregistrement / rejeu
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def request_key(method: str, url: str, body: Optional[bytes]) -> str:
+        """
+        Calcule la clé d'une requête : méthode, chemin, query triée et corps.
+
+        L'hôte est ignoré pour qu'une cassette reste valable quel que soit DSS_URL.
+        """
+        parts = urlsplit(url)
+        query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+        digest = hashlib.sha1(body or b"").hexdigest()[:16]
+        return f"{method.upper()} {parts.path}?{query} {digest}"
+
+    def record(self, key: str, status: int, headers: Dict[str, str],
+               content: bytes, elapsed: float) -> None:
+        """Ajoute un échange à la cassette."""
+        try:
+            body, encoding = content.decode("utf-8"), "utf-8"
+        except UnicodeDecodeError:
+            body, encoding = base64.b64encode(content).decode("ascii"), "base64"
+
+        interaction = {
+            "key": key,
+            "status": status,
+            "headers": {k: v for k, v in headers.items() if k.lower() in _KEPT_HEADERS},
+            "body": body,
+            "encoding": encoding,
+            "elapsed": round(elapsed, 4),
+        }
+        with self._lock:
+            self._interactions.append(interaction)
+
+    def play(self, key: str) -> tuple[Dict[str, Any], bytes]:
+        """
+        Retourne le prochain échange enregistré pour cette requête.
+
+        Les requêtes répétées sont servies dans l'ordre d'enregistrement ; une
+        fois la file épuisée, la dernière réponse est resservie.
+
+        Raises:
+            CassetteMissError: Si la requête n'a jamais été enregistrée
+        """
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue:
+                interaction = queue.popleft()
+                self._last[key] = interaction
+            elif key in self._last:
+                interaction = self._last[key]
+            else:
+                raise CassetteMissError(f"Requête absente de la cassette : {key}")
+            self.hits += 1
+
+        if interaction["encoding"] == "base64":
+            content = base64.b64decode(interaction["body"])
+        else:
+            content = interaction["body"].encode("utf-8")
+        return interaction, content
+
+    def replay_delay(self, interaction: Dict[str, Any]) -> float:
+        """Latence simulée d'un échange rejoué, en secondes."""
+        return interaction["elapsed"] * self.latency_scale
+
+    # ------------------------------------------------------------------
+    # Fabriques de transports
+    # ------------------------------------------------------------------
+
+    def dss_layer(self, inner: BaseAdapter) -> BaseAdapter:
+        """Couche de transport DSS (voir src.api.client.add_transport_layer)."""
+        return DSSCassetteAdapter(self, inner)
+
+    def _client_defaults(self, kwargs: Dict[str, Any]) -> None:
+        """En replay : clé factice, et pas de retry (un échec est un manque de cassette)."""
+        if self.mode == REPLAY:
+            kwargs.setdefault("api_key", "replay")
+            kwargs.setdefault("max_retries", 0)
+
+    def anthropic_client(self, **kwargs) -> Anthropic:
+        """Client Claude synchrone branché sur la cassette."""
+        self._client_defaults(kwargs)
+        transport = ClaudeCassetteTransport(self, httpx.HTTPTransport())
+        return Anthropic(http_client=httpx.Client(transport=transport), **kwargs)
+
+    def async_anthropic_client(self, **kwargs) -> AsyncAnthropic:
+        """Client Claude asynchrone branché sur la cassette."""
+        self._client_defaults(kwargs)
+        transport = AsyncClaudeCassetteTransport(self, httpx.AsyncHTTPTransport())
+        return AsyncAnthropic(http_client=httpx.AsyncClient(transport=transport), **kwargs)
+
+
+class DSSCassetteAdapter(BaseAdapter):
+    """Adapter requests qui enregistre ou rejoue les appels à l'API DSS"""
+
+    def __init__(self, cassette: Cassette, inner: BaseAdapter):
+        super().__init__()
+        self.cassette = cassette
+        self.inner = inner
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        body = request.body.encode("utf-8") if isinstance(request.body, str) else request.body
+        key = Cassette.request_key(request.method, request.url, body)
+
+        if self.cassette.mode == RECORD:
+            start = time.perf_counter()
+            response = self.inner.send(request, **kwargs)
+            content = response.content
+            self.cassette.record(key, response.status_code, dict(response.headers),
+                                 content, time.perf_counter() - start)
+            response.raw = io.BytesIO(content)
+            return response
+
+        interaction, content = self.cassette.play(key)
+        time.sleep(self.cassette.replay_delay(interaction))
+
+        response = requests.Response()
+        response.status_code = interaction["status"]
+        response.headers = CaseInsensitiveDict(interaction["headers"])
+        response._content = content
+        response._content_consumed = True
+        response.raw = io.BytesIO(content)
+        response.url = request.url
+        response.request = request
+        response.encoding = "utf-8"
+        return response
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+class ClaudeCassetteTransport(httpx.BaseTransport):
+    """Transport httpx qui enregistre ou rejoue les appels à l'API Claude"""
+
+    def __init__(self, cassette: Cassette, inner: httpx.BaseTransport):
+        self.cassette = cassette
+        self.inner = inner
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        key = Cassette.request_key(request.method, str(request.url), request.read())
+
+        if self.cassette.mode == RECORD:
+            start = time.perf_counter()
+            response = self.inner.handle_request(request)
+            content = response.read()
+            self.cassette.record(key, response.status_code, dict(response.headers),
+                                 content, time.perf_counter() - start)
+            return _httpx_response(request, response.status_code, response.headers, content)
+
+        interaction, content = self.cassette.play(key)
+        time.sleep(self.cassette.replay_delay(interaction))
+        return _httpx_response(request, interaction["status"], interaction["headers"], content)
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+class AsyncClaudeCassetteTransport(httpx.AsyncBaseTransport):
+    """Variante asynchrone de ClaudeCassetteTransport (AsyncAnthropic)"""
+
+    def __init__(self, cassette: Cassette, inner: httpx.AsyncBaseTransport):
+        self.cassette = cassette
+        self.inner = inner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = Cassette.request_key(request.method, str(request.url), await request.aread())
+
+        if self.cassette.mode == RECORD:
+            start = time.perf_counter()
+            response = await self.inner.handle_async_request(request)
+            content = await response.aread()
+            self.cassette.record(key, response.status_code, dict(response.headers),
+                                 content, time.perf_counter() - start)
+            return _httpx_response(request, response.status_code, response.headers, content)
+
+        interaction, content = self.cassette.play(key)
+        await asyncio.sleep(self.cassette.replay_delay(interaction))
+        return _httpx_response(request, interaction["status"], interaction["headers"], content)
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+def _httpx_response(request: httpx.Request, status: int, headers: Any,
+                    content: bytes) -> httpx.Response:
+    """Construit une réponse httpx au contenu déjà décodé."""
+    headers = {k: v for k, v in dict(headers).items() if k.lower() in _KEPT_HEADERS}
+    return httpx.Response(status, headers=headers, content=content, request=request)
+
+
+@contextmanager
+def use_cassette(path: str, mode: str = REPLAY, latency_scale: float = 0.0) -> Iterator[Cassette]:
+    """
+    Active une cassette pour les clients DSS créés dans le bloc.
+
+    Les clients Claude s'obtiennent via cassette.anthropic_client() ou
+    cassette.async_anthropic_client(). En mode record, la cassette est
+    écrite à la sortie du bloc.
+
+    Args:
+        path: Fichier de cassette (.json.gz)
+        mode: "record" ou "replay"
+        latency_scale: Facteur de latence simulée en replay
+
+    Yields:
+        Cassette active
+    """
+    cassette = Cassette(path, mode=mode, latency_scale=latency_scale)
+    add_transport_layer(cassette.dss_layer)
+    try:
+        yield cassette
+    finally:
+        remove_transport_layer(cassette.dss_layer)
+        cassette.save()
@@ -0,0 +1,122 @@
+"""
+resources.py - Ressources partagées entre sessions (un ChatHandler par projet)
+
+Un ChatHandler ne garde aucun état de conversation : l'historique est passé
+à chaque appel. Il peut donc être partagé par toutes les sessions d'un même
+projet, avec son connecteur DSS et les métadonnées déjà chargées.
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ResourceRegistry:
+    """Registre process-wide des ressources par projet, avec éviction LRU"""
+
+    def __init__(
+        self,
+        factory: Callable[[str], Any],
+        max_projects: int = 8,
+        idle_ttl: Optional[float] = 1800
+    ):
+        """
+        Initialise le registre.
+
+        Args:
+            factory: Fonction project_key -> ressource (ex: create_chat_handler)
+            max_projects: Nombre maximum de projets gardés en mémoire
+            idle_ttl: Durée d'inactivité (s) avant éviction (None = jamais)
+        """
+        self.factory = factory
+        self.max_projects = max_projects
+        self.idle_ttl = idle_ttl
+
+        # project_key -> (ressource, dernier accès), du moins au plus récent
+        self._entries: OrderedDict[str, tuple[Any, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._creation_locks: Dict[str, threading.Lock] = {}
+
+    def get(self, project_key: str) -> Any:
+        """
+        Retourne la ressource du projet, en la créant au premier accès.
+
+        La création (appels DSS) se fait hors du verrou global : deux sessions
+        qui ouvrent le même projet attendent la même création, sans bloquer
+        les autres projets.
+
+        Args:
+            project_key: Clé du projet Dataiku
+
+        Returns:
+            Ressource partagée du projet
+        """
+        with self._lock:
+            self._evict_idle(time.monotonic())
+            entry = self._touch(project_key)
+            if entry is not None:
+                return entry
+            creation_lock = self._creation_locks.setdefault(project_key, threading.Lock())
+
+        with creation_lock:
+            with self._lock:
+                entry = self._touch(project_key)
+                if entry is not None:
+                    return entry
+
+            logger.info(f"Création des ressources partagées du projet {project_key}")
+            try:
+                resource = self.factory(project_key)
+            finally:
+                # Retiré aussi en cas d'échec : la création suivante repart d'un verrou neuf
+                with self._lock:
+                    self._creation_locks.pop(project_key, None)
+
+            with self._lock:
+                self._entries[project_key] = (resource, time.monotonic())
+                while len(self._entries) > self.max_projects:
+                    evicted, _ = self._entries.popitem(last=False)
+                    logger.info(f"Projet {evicted} évincé (LRU)")
+            return resource
+
+    def invalidate(self, project_key: str) -> None:
+        """
+        Oublie la ressource d'un projet (rechargée au prochain accès).
+
+        Args:
+            project_key: Clé du projet Dataiku
+        """
+        with self._lock:
+            self._entries.pop(project_key, None)
+
+    def __contains__(self, project_key: str) -> bool:
+        with self._lock:
+            return project_key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _touch(self, project_key: str) -> Optional[Any]:
+        """Met à jour l'accès d'une entrée existante (verrou tenu par l'appelant)."""
+        entry = self._entries.get(project_key)
+        if entry is None:
+            return None
+        self._entries[project_key] = (entry[0], time.monotonic())
+        self._entries.move_to_end(project_key)
+        return entry[0]
+
+    def _evict_idle(self, now: float) -> None:
+        """Évince les projets inactifs depuis idle_ttl (verrou tenu par l'appelant)."""
+        if self.idle_ttl is None:
+            return
+        while self._entries:
+            key, (_, last_access) = next(iter(self._entries.items()))
+            if now - last_access < self.idle_ttl:
+                break
+            self._entries.popitem(last=False)
+            logger.info(f"Projet {key} évincé (inactif)")
@@ -0,0 +1,233 @@
+"""
+routing.py - Choix du modèle Claude par tour de conversation
+
+Les tours simples (lister les datasets, lire un schéma, résumer un résultat
+d'outil) partent vers un modèle rapide ; la conception de workflows reste sur
+le modèle le plus capable. Les latences et tokens sont mesurés par route
+pour ajuster la politique.
+"""
+
+import os
+import re
+import logging
+import threading
+import statistics
+from abc import ABC, abstractmethod
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+FAST = "fast"
+CAPABLE = "capable"
+
+DEFAULT_FAST_MODEL = "claude-3-5-haiku-20241022"
+DEFAULT_CAPABLE_MODEL = "claude-3-5-sonnet-20241022"
+
+# Latences conservées par route pour les percentiles (les plus récentes)
+LATENCY_WINDOW = 1000
+
+
+class RouteDecision(NamedTuple):
+    """Route retenue pour un appel messages.create"""
+    route: str
+    model: str
+    reason: str
+
+
+class RoutingPolicy(ABC):
+    """Interface d'une politique de routage (à sous-classer)"""
+
+    def __init__(self, fast_model: Optional[str] = None, capable_model: Optional[str] = None):
+        """
+        Initialise les modèles des deux routes.
+
+        Args:
+            fast_model: Modèle rapide (CLAUDE_FAST_MODEL si None)
+            capable_model: Modèle capable (CLAUDE_MODEL si None)
+        """
+        self.models = {
+            FAST: fast_model or os.getenv("CLAUDE_FAST_MODEL", DEFAULT_FAST_MODEL),
+            CAPABLE: capable_model or os.getenv("CLAUDE_MODEL", DEFAULT_CAPABLE_MODEL),
+        }
+
+    @abstractmethod
+    def route(self, user_message: str, messages: List[Dict[str, Any]]) -> RouteDecision:
+        """
+        Choisit la route du prochain appel Claude.
+
+        Args:
+            user_message: Message utilisateur du tour en cours
+            messages: Messages envoyés à Claude (dernier = message ou tool_result)
+
+        Returns:
+            RouteDecision
+        """
+
+    def _decision(self, route: str, reason: str) -> RouteDecision:
+        return RouteDecision(route, self.models[route], reason)
+
+
+class FixedRoutingPolicy(RoutingPolicy):
+    """Toujours le modèle capable (comportement historique)"""
+
+    def route(self, user_message: str, messages: List[Dict[str, Any]]) -> RouteDecision:
+        return self._decision(CAPABLE, "fixe")
+
+
+class HeuristicRoutingPolicy(RoutingPolicy):
+    """Routage par heuristiques : intention, longueur, relances après outils"""
+
+    WORKFLOW_PATTERN = re.compile(
+        r"workflow|recette|recipe|pipeline|\bcr[ée]{1,2}(?:e|er|ez|ate)?\b|construi|"
+        r"joind|jointure|\bjoin|agr[èé]g|nettoi|nettoy|transform|calcul|confirm|"
+        r"\boui\b|\bok\b|vas-y",
+        re.IGNORECASE,
+    )
+    LOOKUP_PATTERN = re.compile(
+        r"liste|list|quel(?:le)?s? (?:sont|datasets?|colonnes?)|colonnes?|columns?|"
+        r"sch[ée]ma|schema|types?\b|d[ée]cri|montre|affiche|combien",
+        re.IGNORECASE,
+    )
+    READ_ONLY_TOOLS = frozenset({
+        "list_datasets", "get_dataset_info", "preview_dataset", "profile_dataset",
+        "preview_workflow"
+    })
+
+    def __init__(self, max_fast_chars: int = 160, **kwargs):
+        """
+        Initialise la politique.
+
+        Args:
+            max_fast_chars: Longueur au-delà de laquelle un message va au modèle capable
+            **kwargs: Modèles (voir RoutingPolicy)
+        """
+        super().__init__(**kwargs)
+        self.max_fast_chars = max_fast_chars
+
+    def route(self, user_message: str, messages: List[Dict[str, Any]]) -> RouteDecision:
+        workflow_intent = bool(self.WORKFLOW_PATTERN.search(user_message))
+
+        tools = self._pending_tool_names(messages)
+        if tools:
+            if tools == {"create_workflow"}:
+                # Échec : Claude doit revoir la conception, pas seulement résumer
+                if self._last_results_failed(messages):
+                    return self._decision(CAPABLE, "échec de create_workflow")
+                return self._decision(FAST, "compte rendu de create_workflow")
+            if tools <= self.READ_ONLY_TOOLS and not workflow_intent:
+                return self._decision(FAST, "relance après outils de lecture")
+
+        if workflow_intent:
+            return self._decision(CAPABLE, "intention de workflow")
+        if len(user_message) > self.max_fast_chars:
+            return self._decision(CAPABLE, "message long")
+        if self.LOOKUP_PATTERN.search(user_message):
+            return self._decision(FAST, "consultation simple")
+        return self._decision(CAPABLE, "par défaut")
+
+    @staticmethod
+    def _last_results_failed(messages: List[Dict[str, Any]]) -> bool:
+        """True si un des résultats d'outils du dernier message est une erreur."""
+        return any(block.get("is_error") for block in messages[-1]["content"])
+
+    @staticmethod
+    def _pending_tool_names(messages: List[Dict[str, Any]]) -> set:
+        """Noms des outils dont les résultats terminent la conversation (vide sinon)."""
+        if len(messages) < 2 or not isinstance(messages[-1]["content"], list):
+            return set()
+        if not all(
+            isinstance(block, dict) and block.get("type") == "tool_result"
+            for block in messages[-1]["content"]
+        ):
+            return set()
+        names = set()
+        for block in messages[-2]["content"]:
+            # Blocs SDK (objets) ou blocs déjà sérialisés (dicts)
+            get = block.get if isinstance(block, dict) else lambda k: getattr(block, k, None)
+            if get("type") == "tool_use":
+                names.add(get("name"))
+        return names
+
+
+class RouteMetrics:
+    """
+    Latences et tokens des appels Claude, agrégés par route (thread-safe).
+
+    Les cumuls sont tenus à jour à chaque appel ; seules les window dernières
+    latences de chaque route sont gardées pour les percentiles.
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._lock = threading.Lock()
+        self.window = window
+        # route -> [appels, tokens d'entrée, tokens de sortie]
+        self._totals: Dict[str, List[int]] = defaultdict(lambda: [0, 0, 0])
+        self._latencies: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=self.window))
+
+    def record(
+        self,
+        decision: RouteDecision,
+        latency: float,
+        input_tokens: int = 0,
+        output_tokens: int = 0
+    ) -> None:
+        """
+        Enregistre un appel Claude.
+
+        Args:
+            decision: Route utilisée
+            latency: Durée de l'appel en secondes
+            input_tokens: Tokens d'entrée facturés
+            output_tokens: Tokens de sortie facturés
+        """
+        with self._lock:
+            totals = self._totals[decision.route]
+            totals[0] += 1
+            totals[1] += input_tokens
+            totals[2] += output_tokens
+            self._latencies[decision.route].append(latency)
+        logger.info(
+            f"Appel Claude [{decision.route}/{decision.model}] {latency * 1000:.0f} ms, "
+            f"{input_tokens}+{output_tokens} tokens ({decision.reason})"
+        )
+
+    def totals(self) -> Dict[str, int]:
+        """
+        Cumul toutes routes confondues.
+
+        Returns:
+            Dict {calls, input_tokens, output_tokens}
+        """
+        with self._lock:
+            totals = list(self._totals.values())
+        return {
+            "calls": sum(t[0] for t in totals),
+            "input_tokens": sum(t[1] for t in totals),
+            "output_tokens": sum(t[2] for t in totals),
+        }
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Résumé par route : nombre d'appels, latences p50/p95 (fenêtre récente),
+        tokens moyens.
+
+        Returns:
+            Dict {route: {calls, p50_ms, p95_ms, avg_input_tokens, avg_output_tokens}}
+        """
+        with self._lock:
+            routes = {
+                route: (list(totals), sorted(self._latencies[route]))
+                for route, totals in self._totals.items()
+            }
+
+        summary = {}
+        for route, ((calls, input_tokens, output_tokens), latencies) in routes.items():
+            summary[route] = {
+                "calls": calls,
+                "p50_ms": statistics.median(latencies) * 1000,
+                "p95_ms": latencies[max(0, int(len(latencies) * 0.95) - 1)] * 1000,
+                "avg_input_tokens": input_tokens / calls,
+                "avg_output_tokens": output_tokens / calls,
+            }
+        return summary
@@ -0,0 +1,251 @@
+"""
+session_store.py - Conversations persistées dans SQLite
+
+Chaque message est stocké une fois, à la fin du tour qui l'a produit : le
+contenu complet (blocs SDK convertis en dicts, JSON compressé zlib) pour le
+renvoyer à Claude, et à part le texte affiché dans le chat. L'interface ne lit
+que les derniers messages affichables (pagination) ; l'historique complet
+n'est relu que pour envoyer un nouveau message. Une session inactive n'occupe
+donc en mémoire que son identifiant, et survit au redémarrage du serveur.
+
+Une session appartient à un utilisateur (owner, None pour un accès anonyme)
+et n'est rouverte que par lui. Les sessions inactives depuis plus de
+CHATBOT_SESSION_RETENTION_DAYS jours (défaut 30) sont supprimées.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List, NamedTuple, Optional
+
+DEFAULT_DB_PATH = Path(__file__).resolve().parents[1] / "data" / "sessions.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id  TEXT PRIMARY KEY,
+    project_key TEXT,
+    created_at  REAL NOT NULL,
+    updated_at  REAL NOT NULL,
+    owner       TEXT
+);
+CREATE INDEX IF NOT EXISTS sessions_updated ON sessions(updated_at);
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL REFERENCES sessions(session_id) ON DELETE CASCADE,
+    seq        INTEGER NOT NULL,
+    role       TEXT NOT NULL,
+    display    TEXT,
+    payload    BLOB NOT NULL,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+"""
+
+
+class DisplayMessage(NamedTuple):
+    """Message affichable d'une conversation"""
+    seq: int
+    role: str
+    text: str
+
+
+def to_plain(value: Any) -> Any:
+    """Convertit blocs SDK (pydantic) et SimpleNamespace en dicts / listes JSON."""
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json", exclude_none=True)
+    if isinstance(value, SimpleNamespace):
+        return {k: to_plain(v) for k, v in vars(value).items()}
+    if isinstance(value, dict):
+        return {k: to_plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_plain(v) for v in value]
+    return value
+
+
+def display_text(message: Dict[str, Any]) -> Optional[str]:
+    """
+    Texte affiché d'un message (None pour les échanges d'outils).
+
+    Args:
+        message: Message {"role", "content"} au format de l'API Claude
+
+    Returns:
+        Texte du message, ou None s'il ne contient aucun texte
+    """
+    content = message["content"]
+    if isinstance(content, str):
+        return content
+    text = "".join(
+        block.get("text", "") for block in to_plain(content)
+        if isinstance(block, dict) and block.get("type") == "text"
+    )
+    return text or None
+
+
+class SessionStore:
+    """Conversations et messages dans une base SQLite (thread-safe)."""
+
+    def __init__(self, path: Optional[str] = None, retention_days: Optional[float] = None):
+        """
+        Ouvre (ou crée) la base et supprime les sessions expirées.
+
+        Args:
+            path: Fichier SQLite (CHATBOT_SESSION_DB, sinon chatbot/data/sessions.db)
+            retention_days: Inactivité avant suppression (CHATBOT_SESSION_RETENTION_DAYS,
+                défaut 30)
+        """
+        self.path = Path(path or os.getenv("CHATBOT_SESSION_DB", DEFAULT_DB_PATH))
+        if retention_days is None:
+            retention_days = float(os.getenv("CHATBOT_SESSION_RETENTION_DAYS", "30"))
+        self.retention_s = retention_days * 86400
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA foreign_keys=ON")
+        self._db.executescript(_SCHEMA)
+        # Base créée avant l'ajout des propriétaires
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(sessions)")}
+        if "owner" not in columns:
+            self._db.execute("ALTER TABLE sessions ADD COLUMN owner TEXT")
+        self.purge()
+
+    def create_session(self, project_key: Optional[str] = None, owner: Optional[str] = None) -> str:
+        """
+        Crée une session vide et retourne son identifiant.
+
+        À appeler au premier message : une visite sans message ne crée rien.
+
+        Args:
+            project_key: Clé du projet Dataiku
+            owner: Utilisateur propriétaire (None : anonyme)
+        """
+        self.purge()
+        session_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO sessions (session_id, project_key, created_at, updated_at, owner) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (session_id, project_key, now, now, owner)
+            )
+        return session_id
+
+    def session_exists(self, session_id: str, owner: Optional[str] = None) -> bool:
+        """Indique si la session existe et appartient à owner (None : session anonyme)."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT 1 FROM sessions WHERE session_id = ? AND owner IS ?", (session_id, owner)
+            ).fetchone()
+        return row is not None
+
+    def purge(self) -> int:
+        """Supprime les sessions inactives depuis plus que la rétention ; retourne leur nombre."""
+        with self._lock, self._db:
+            return self._db.execute(
+                "DELETE FROM sessions WHERE updated_at < ?", (time.time() - self.retention_s,)
+            ).rowcount
+
+    def delete_session(self, session_id: str) -> None:
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def message_count(self, session_id: str) -> int:
+        """Nombre total de messages (échanges d'outils compris)."""
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM messages WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+
+    def display_count(self, session_id: str) -> int:
+        """Nombre de messages affichables."""
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM messages WHERE session_id = ? AND display IS NOT NULL",
+                (session_id,)
+            ).fetchone()[0]
+
+    def append_messages(self, session_id: str, messages: List[Dict[str, Any]]) -> None:
+        """
+        Ajoute des messages à la fin de la conversation.
+
+        Args:
+            session_id: Identifiant de la session
+            messages: Nouveaux messages {"role", "content"} (blocs SDK acceptés)
+        """
+        if not messages:
+            return
+        with self._lock, self._db:
+            start = self._db.execute(
+                "SELECT COALESCE(MAX(seq) + 1, 0) FROM messages WHERE session_id = ?",
+                (session_id,)
+            ).fetchone()[0]
+            self._db.executemany(
+                "INSERT INTO messages VALUES (?, ?, ?, ?, ?)",
+                [
+                    (session_id, start + i, m["role"], display_text(m), zlib.compress(
+                        json.dumps(to_plain(m["content"]), ensure_ascii=False,
+                                   separators=(",", ":")).encode("utf-8")
+                    ))
+                    for i, m in enumerate(messages)
+                ]
+            )
+            self._db.execute(
+                "UPDATE sessions SET updated_at = ? WHERE session_id = ?", (time.time(), session_id)
+            )
+
+    def load_history(self, session_id: str) -> List[Dict[str, Any]]:
+        """
+        Historique complet, au format attendu par ChatHandler.process_message.
+
+        Args:
+            session_id: Identifiant de la session
+
+        Returns:
+            Messages {"role", "content"} (blocs sous forme de dicts)
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT role, payload FROM messages WHERE session_id = ? ORDER BY seq",
+                (session_id,)
+            ).fetchall()
+        return [
+            {"role": role, "content": json.loads(zlib.decompress(payload))}
+            for role, payload in rows
+        ]
+
+    def page(
+        self,
+        session_id: str,
+        limit: int = 20,
+        before_seq: Optional[int] = None
+    ) -> List[DisplayMessage]:
+        """
+        Derniers messages affichables, du plus ancien au plus récent.
+
+        Args:
+            session_id: Identifiant de la session
+            limit: Nombre de messages au plus
+            before_seq: Ne retourne que les messages antérieurs (page précédente)
+
+        Returns:
+            Liste de DisplayMessage
+        """
+        query = "SELECT seq, role, display FROM messages WHERE session_id = ? AND display IS NOT NULL"
+        params: List[Any] = [session_id]
+        if before_seq is not None:
+            query += " AND seq < ?"
+            params.append(before_seq)
+        query += " ORDER BY seq DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+        return [DisplayMessage(*row) for row in reversed(rows)]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,415 @@
+"""
+simulation.py - Doublures simulées de Claude et DSS
+
+Permet de faire tourner ChatHandler / AsyncChatHandler sans réseau,
+avec des latences configurables, pour les tests de charge et les tests unitaires.
+"""
+
+import time
+import asyncio
+import threading
+import itertools
+from types import SimpleNamespace
+from typing import List, Dict, Any, Optional, Callable
+
+import pandas as pd
+
+from src.api.profiling import profile_chunks
+
+
+class SimulatedRecipeSettings:
+    """Réglages d'une recette simulée : conservent ce que le builder y écrit."""
+
+    def __init__(self, inputs: List[str], outputs: List[str]):
+        self.definition: Dict[str, Any] = {
+            "inputs": {"main": {"items": [{"ref": name, "deps": []} for name in inputs]}},
+            "outputs": {"main": {"items": [{"ref": name} for name in outputs]}},
+        }
+        self.raw_params: Dict[str, Any] = {}
+        self.tags: List[str] = []
+        self.code: Optional[str] = None
+        self.payload: Optional[str] = None
+        self.saves = 0
+
+    def get_recipe_raw_definition(self) -> Dict[str, Any]:
+        return self.definition
+
+    def set_recipe_raw_definition(self, definition: Dict[str, Any]) -> None:
+        self.definition = definition
+
+    def set_code(self, code: str) -> None:
+        self.code = code
+
+    def set_payload(self, payload: str) -> None:
+        self.payload = payload
+
+    def save(self) -> None:
+        self.saves += 1
+
+
+class SimulatedRecipe:
+    """Recette simulée (résultat de new_recipe().build() ou de get_recipe())."""
+
+    def __init__(self, project: "SimulatedProject", recipe_type: str, name: str,
+                 inputs: List[str], outputs: List[str]):
+        self.project = project
+        self.type = recipe_type
+        self.name = name
+        self.settings = SimulatedRecipeSettings(inputs, outputs)
+
+    def get_settings(self) -> SimulatedRecipeSettings:
+        return self.settings
+
+    def delete(self) -> None:
+        self.project.deleted_recipes.append(self.name)
+
+
+class SimulatedRecipeCreator:
+    """Équivalent de DSSRecipeCreator : accumule entrées et sorties."""
+
+    def __init__(self, project: "SimulatedProject", recipe_type: str, name: str):
+        self.project = project
+        self.type = recipe_type
+        self.name = name
+        self.inputs: List[str] = []
+        self.outputs: List[str] = []
+
+    def with_input(self, name: str, *args, **kwargs) -> "SimulatedRecipeCreator":
+        self.inputs.append(name)
+        return self
+
+    def with_output(self, name: str, *args, **kwargs) -> "SimulatedRecipeCreator":
+        self.outputs.append(name)
+        return self
+
+    def build(self) -> SimulatedRecipe:
+        time.sleep(self.project.recipe_latency)
+        if self.name in self.project.failing_recipes:
+            raise RuntimeError(f"Création de {self.name} refusée (simulation)")
+        recipe = SimulatedRecipe(self.project, self.type, self.name, self.inputs, self.outputs)
+        with self.project.lock:
+            self.project.built_recipes.append(recipe)
+        return recipe
+
+
+class SimulatedJob:
+    """Job terminé dès sa première interrogation."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, state: str = "DONE"):
+        self.id = f"simulated_job_{next(self._ids)}"
+        self.state = state
+
+    def get_status(self) -> Dict[str, Any]:
+        return {"baseStatus": {"state": self.state}, "globalState": {"done": 1, "total": 1}}
+
+
+class SimulatedJobBuilder:
+    """Équivalent de DSSJobDefinitionBuilder : démarre un job via project.job_factory."""
+
+    def __init__(self, project: "SimulatedProject", job_type: str):
+        self.project = project
+        self.job_type = job_type
+        self.outputs: List[tuple] = []
+
+    def with_output(self, name: str, partition: Optional[str] = None, **kwargs) -> "SimulatedJobBuilder":
+        self.outputs.append((name, partition))
+        return self
+
+    def start(self) -> Any:
+        with self.project.lock:
+            self.project.started_jobs.append((self.job_type, list(self.outputs)))
+        return self.project.job_factory(self.job_type, self.outputs)
+
+
+class SimulatedDataset:
+    """Dataset simulé : existence et dernière métrique de volumétrie."""
+
+    def __init__(self, connector: "SimulatedConnector", name: str):
+        self.connector = connector
+        self.name = name
+
+    def exists(self) -> bool:
+        return self.name in self.connector.datasets
+
+    def get_last_metric_values(self) -> Any:
+        count = self.connector.records.get(self.name)
+        return SimpleNamespace(
+            get_global_value=lambda metric: count if metric == "records:COUNT_RECORDS" else None
+        )
+
+
+class SimulatedProject:
+    """
+    Projet DSS simulé, utilisé par WorkflowBuilder et JobMonitor.
+
+    Enregistre les recettes construites, relues, supprimées et les jobs lancés pour
+    que les tests puissent vérifier ce qui aurait été envoyé à DSS.
+    """
+
+    def __init__(self, connector: "SimulatedConnector"):
+        self.connector = connector
+        self.client = SimpleNamespace(_session=None)
+        self.lock = threading.Lock()
+        self.recipe_latency = 0.0
+        self.failing_recipes: set = set()
+        self.built_recipes: List[SimulatedRecipe] = []
+        self.deleted_recipes: List[str] = []
+        self.fetched_recipes: List[SimulatedRecipe] = []
+        self.started_jobs: List[tuple] = []
+        self.job_factory: Callable[[str, List[tuple]], Any] = lambda job_type, outputs: SimulatedJob()
+
+    def new_recipe(self, recipe_type: str, name: str) -> SimulatedRecipeCreator:
+        return SimulatedRecipeCreator(self, recipe_type, name)
+
+    def get_recipe(self, name: str) -> SimulatedRecipe:
+        info = self.connector.recipes.get(name, {})
+        recipe = SimulatedRecipe(self, info.get("type", "python"), name, [], [])
+        recipe.settings.tags = list(info.get("tags", []))
+        with self.lock:
+            self.fetched_recipes.append(recipe)
+        return recipe
+
+    def new_job(self, job_type: str) -> SimulatedJobBuilder:
+        return SimulatedJobBuilder(self, job_type)
+
+    def get_dataset(self, name: str) -> SimulatedDataset:
+        return SimulatedDataset(self.connector, name)
+
+    def recipe(self, name: str) -> Optional[SimulatedRecipe]:
+        """Dernière recette construite sous ce nom (None si aucune)."""
+        return next((r for r in reversed(self.built_recipes) if r.name == name), None)
+
+
+class SimulatedConnector:
+    """Connecteur DSS factice : schémas fixes, latence bloquante simulée."""
+
+    def __init__(
+        self,
+        project_key: str = "SIMULATED",
+        datasets: Optional[Dict[str, List[Dict[str, str]]]] = None,
+        latency: float = 0.05
+    ):
+        """
+        Initialise le connecteur simulé.
+
+        Args:
+            project_key: Clé de projet affichée
+            datasets: Dict {nom: [{"name", "type"}, ...]} (jeu par défaut si None)
+            latency: Durée bloquante de chaque appel en secondes
+        """
+        self.project_key = project_key
+        self.latency = latency
+        self.project = SimulatedProject(self)
+        self.datasets = datasets or {
+            "sales": [
+                {"name": "region", "type": "string"},
+                {"name": "amount", "type": "double"},
+                {"name": "order_date", "type": "date"},
+            ],
+            "customers": [
+                {"name": "customer_id", "type": "bigint"},
+                {"name": "region", "type": "string"},
+            ],
+        }
+        self.recipes: Dict[str, Dict[str, Any]] = {}
+        # Nombre de lignes connu par dataset (absent = inconnu)
+        self.records: Dict[str, int] = {}
+        # Stockage des datasets hors Filesystem : {nom: {"type", "connection", "table", "schema"}}
+        self.storage: Dict[str, Dict[str, Any]] = {}
+        # Version des données par dataset (incrémentée pour simuler une modification)
+        self.versions: Dict[str, int] = {}
+
+    def get_available_datasets(self) -> List[str]:
+        time.sleep(self.latency)
+        return list(self.datasets)
+
+    def get_datasets_storage(self) -> Dict[str, Dict[str, Any]]:
+        time.sleep(self.latency)
+        default = {"type": "Filesystem", "connection": "filesystem_managed", "table": None,
+                   "schema": None}
+        return {name: dict(self.storage.get(name, default)) for name in self.datasets}
+
+    def get_dataset_info(self, dataset_name: str) -> Dict[str, Any]:
+        time.sleep(self.latency)
+        columns = [
+            {"name": c["name"], "type": c["type"], "meaning": ""}
+            for c in self.datasets[dataset_name]
+        ]
+        return {"name": dataset_name, "columns": columns, "nb_columns": len(columns)}
+
+    def get_cached_info(self, dataset_name: str) -> Optional[Dict[str, Any]]:
+        columns = self.datasets.get(dataset_name)
+        if columns is None:
+            return None
+        columns = [{"name": c["name"], "type": c["type"], "meaning": ""} for c in columns]
+        return {"name": dataset_name, "columns": columns, "nb_columns": len(columns)}
+
+    def get_cached_columns(self, dataset_name: str) -> Optional[List[str]]:
+        columns = self.datasets.get(dataset_name)
+        return [c["name"] for c in columns] if columns else None
+
+    def profile_dataset(
+        self,
+        dataset_name: str,
+        columns: Optional[List[str]] = None,
+        max_rows: Optional[int] = None
+    ) -> Dict[str, Any]:
+        sample = self.get_sample(dataset_name, max_rows or 1000)
+        profile = profile_chunks([sample[columns] if columns else sample], self.datasets[dataset_name])
+        return {"dataset": dataset_name, **profile}
+
+    def preview_dataset(
+        self,
+        dataset_name: str,
+        columns: Optional[List[str]] = None,
+        max_rows: int = 20,
+        max_bytes: int = 8000
+    ) -> Dict[str, Any]:
+        sample = self.get_sample(dataset_name, max_rows)
+        sample = sample[columns] if columns else sample
+        return {
+            "dataset": dataset_name,
+            "columns": list(sample.columns),
+            "rows": sample.astype(str).values.tolist(),
+            "truncated": False,
+        }
+
+    def dataset_fingerprint(self, dataset_name: str) -> str:
+        return f"{dataset_name}:{self.versions.get(dataset_name, 0)}"
+
+    def get_sample(self, dataset_name: str, limit: int = 1000) -> pd.DataFrame:
+        time.sleep(self.latency)
+        rows = min(limit, 12)
+        generators = {
+            "string": lambda name, i: f"{name}_{i % 3}",
+            "double": lambda name, i: float(i * 10),
+            "bigint": lambda name, i: i,
+            "date": lambda name, i: pd.Timestamp("2024-01-01") + pd.Timedelta(days=i),
+        }
+        return pd.DataFrame({
+            c["name"]: [generators.get(c["type"], generators["string"])(c["name"], i)
+                        for i in range(rows)]
+            for c in self.datasets[dataset_name]
+        })
+
+    def get_all_datasets_info(self) -> str:
+        return "\n".join(
+            f"  • {name} ({len(cols)} colonnes)" for name, cols in self.datasets.items()
+        )
+
+    def dataset_exists(self, dataset_name: str) -> bool:
+        time.sleep(self.latency)
+        return dataset_name in self.datasets
+
+    def get_records_count(self, dataset_name: str) -> Optional[int]:
+        time.sleep(self.latency)
+        return self.records.get(dataset_name)
+
+    def get_recipes(self) -> Dict[str, Dict[str, Any]]:
+        time.sleep(self.latency)
+        return {name: dict(info) for name, info in self.recipes.items()}
+
+    def create_dataset(
+        self,
+        dataset_name: str,
+        dataset_type: str = "managed",
+        connection: Optional[str] = None,
+        partitioning: Optional[Dict[str, Any]] = None
+    ) -> Any:
+        time.sleep(self.latency)
+        self.datasets.setdefault(dataset_name, [])
+        return SimulatedDataset(self, dataset_name)
+
+
+class _SimulatedMessages:
+    """Implémente messages.create : un appel d'outil puis une réponse finale."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, latency: float, tool_name: str,
+                 tool_input: Optional[Dict[str, Any]] = None):
+        self.latency = latency
+        self.tool_name = tool_name
+        self.tool_input = tool_input or {}
+        self.calls = 0
+
+    def _respond(self, messages: List[Dict[str, Any]]) -> SimpleNamespace:
+        self.calls += 1
+        last = messages[-1]["content"]
+        usage = SimpleNamespace(input_tokens=sum(len(str(m["content"])) for m in messages) // 4,
+                                output_tokens=20)
+        if isinstance(last, list) and last and isinstance(last[0], dict) \
+                and last[0].get("type") == "tool_result":
+            block = SimpleNamespace(type="text", text="Voici les datasets disponibles.")
+            return SimpleNamespace(stop_reason="end_turn", content=[block], usage=usage)
+
+        block = SimpleNamespace(
+            type="tool_use",
+            id=f"toolu_sim_{next(self._ids)}",
+            name=self.tool_name,
+            input=self.tool_input,
+        )
+        return SimpleNamespace(stop_reason="tool_use", content=[block], usage=usage)
+
+
+class SimulatedAnthropic:
+    """Client Claude synchrone simulé (même interface que Anthropic)."""
+
+    def __init__(self, latency: float = 0.2, tool_name: str = "list_datasets",
+                 tool_input: Optional[Dict[str, Any]] = None):
+        self.messages = _SyncMessages(latency, tool_name, tool_input)
+
+
+class SimulatedAsyncAnthropic:
+    """Client Claude asynchrone simulé (même interface que AsyncAnthropic)."""
+
+    def __init__(self, latency: float = 0.2, tool_name: str = "list_datasets"):
+        self.messages = _AsyncMessages(latency, tool_name)
+
+    async def close(self) -> None:
+        return None
+
+
+class _SyncMessages(_SimulatedMessages):
+    def create(self, *, messages, **kwargs) -> SimpleNamespace:
+        time.sleep(self.latency)
+        return self._respond(messages)
+
+
+class _AsyncMessages(_SimulatedMessages):
+    async def create(self, *, messages, **kwargs) -> SimpleNamespace:
+        await asyncio.sleep(self.latency)
+        return self._respond(messages)
+
+    def stream(self, *, messages, **kwargs) -> "_SimulatedStream":
+        return _SimulatedStream(self, messages)
+
+
+class _SimulatedStream:
+    """Équivalent de messages.stream : le texte final arrive mot par mot."""
+
+    def __init__(self, owner: _AsyncMessages, messages: List[Dict[str, Any]]):
+        self._owner = owner
+        self._messages = messages
+        self._response: Optional[SimpleNamespace] = None
+
+    async def __aenter__(self) -> "_SimulatedStream":
+        await asyncio.sleep(self._owner.latency)
+        self._response = self._owner._respond(self._messages)
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        return None
+
+    @property
+    async def text_stream(self):
+        for block in self._response.content:
+            if block.type == "text":
+                for i, word in enumerate(block.text.split(" ")):
+                    await asyncio.sleep(0)
+                    yield word if i == 0 else " " + word
+
+    async def get_final_message(self) -> SimpleNamespace:
+        return self._response
@@ -0,0 +1,186 @@
+"""
+tool_encoding.py - Encodage compact des résultats d'outils envoyés à Claude
+
+Les résultats d'outils sont renvoyés à Claude à chaque appel suivant du tour :
+les schémas de datasets dominent alors les tokens d'entrée. Ce module les
+encode en colonnes (noms de colonnes + index dans un dictionnaire de types
+dédupliqué), ajoute des marqueurs "more" quand la liste est tronquée, et
+mesure le gain estimé par rapport au JSON verbeux.
+"""
+
+import json
+import math
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Estimation grossière (≈ 4 caractères par token), suffisante pour comparer deux encodages
+CHARS_PER_TOKEN = 4
+
+SCHEMA_FORMAT = "cols[i] a le type type_dict[types[i]]"
+
+
+def estimate_tokens(text: str) -> int:
+    """Estime le nombre de tokens d'un texte."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _dumps(payload: Any) -> str:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+
+
+class _TypeDict:
+    """Dictionnaire de types dédupliqué : type -> index"""
+
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+
+    def __call__(self, type_name: str) -> int:
+        return self.index.setdefault(type_name, len(self.index))
+
+    def as_list(self) -> List[str]:
+        return list(self.index)
+
+
+def _encode_columns(info: Dict[str, Any], types: _TypeDict) -> Dict[str, Any]:
+    """Encode les colonnes d'un dataset (voir DataikuConnector.get_dataset_info)."""
+    columns = info["columns"]
+    encoded = {
+        "name": info["name"],
+        "cols": [c["name"] for c in columns],
+        "types": [types(c["type"]) for c in columns],
+    }
+    meanings = {c["name"]: c["meaning"] for c in columns if c.get("meaning")}
+    if meanings:
+        encoded["meanings"] = meanings
+
+    shown_until = info.get("column_offset", 0) + len(columns)
+    remaining = info.get("nb_columns", len(columns)) - shown_until
+    if remaining > 0:
+        encoded["more_cols"] = remaining
+    return encoded
+
+
+def _encode_dataset_list(result: Dict[str, Any]) -> Dict[str, Any]:
+    types = _TypeDict()
+    datasets = [_encode_columns(info, types) for info in result["datasets"]]
+    payload = {"_format": SCHEMA_FORMAT, "type_dict": types.as_list(), "datasets": datasets}
+
+    next_offset = result.get("offset", 0) + len(datasets)
+    remaining = result.get("total", next_offset) - next_offset
+    if remaining > 0:
+        payload["more"] = (
+            f"{remaining} dataset(s) supplémentaire(s) : relancer avec offset={next_offset}"
+        )
+    if any("more_cols" in d for d in datasets):
+        payload["more_cols"] = "colonnes tronquées : get_dataset_info pour le détail"
+    return payload
+
+
+def _encode_dataset_info(result: Dict[str, Any]) -> Dict[str, Any]:
+    types = _TypeDict()
+    encoded = _encode_columns(result, types)
+    remaining = encoded.pop("more_cols", 0)
+
+    payload = {"_format": SCHEMA_FORMAT, "type_dict": types.as_list(), **encoded}
+    payload["nb_columns"] = result.get("nb_columns", len(result["columns"]))
+    if remaining:
+        next_offset = result.get("column_offset", 0) + len(result["columns"])
+        payload["more"] = (
+            f"{remaining} colonne(s) supplémentaire(s) : "
+            f"relancer avec column_offset={next_offset}"
+        )
+    return payload
+
+
+def _encode_dataset_preview(result: Dict[str, Any]) -> Dict[str, Any]:
+    payload = {"name": result["dataset"], "cols": result["columns"], "rows": result["rows"]}
+    if result.get("truncated"):
+        payload["more"] = (
+            f"aperçu limité à {len(result['rows'])} ligne(s) : "
+            "restreindre columns pour voir plus de lignes"
+        )
+    return payload
+
+
+_ENCODERS: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    "list_datasets": _encode_dataset_list,
+    "get_dataset_info": _encode_dataset_info,
+    "preview_dataset": _encode_dataset_preview,
+}
+
+
+def encode_tool_result(tool_name: str, result: Any) -> Tuple[str, int, int]:
+    """
+    Encode le résultat d'un outil pour un bloc tool_result.
+
+    Les outils à schéma sont encodés en colonnes ; les autres résultats (et les
+    erreurs) sont sérialisés en JSON sans espaces.
+
+    Args:
+        tool_name: Nom de l'outil
+        result: Résultat de ChatHandler.execute_tool
+
+    Returns:
+        Tuple (contenu encodé, tokens estimés en JSON verbeux, tokens estimés encodés)
+    """
+    verbose = json.dumps(result, ensure_ascii=False)
+
+    encoder = _ENCODERS.get(tool_name)
+    if encoder is not None and isinstance(result, dict) and "error" not in result:
+        content = _dumps(encoder(result))
+    else:
+        content = _dumps(result)
+
+    return content, estimate_tokens(verbose), estimate_tokens(content)
+
+
+class EncodingStats:
+    """Gains de tokens de l'encodage compact, cumulés par outil (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals: Dict[str, List[int]] = defaultdict(lambda: [0, 0, 0])
+
+    def record(self, tool_name: str, verbose_tokens: int, compact_tokens: int) -> None:
+        """
+        Enregistre un appel d'outil et journalise son gain.
+
+        Args:
+            tool_name: Nom de l'outil
+            verbose_tokens: Tokens estimés du JSON verbeux
+            compact_tokens: Tokens estimés de l'encodage envoyé
+        """
+        with self._lock:
+            totals = self._totals[tool_name]
+            totals[0] += 1
+            totals[1] += verbose_tokens
+            totals[2] += compact_tokens
+
+        saved = verbose_tokens - compact_tokens
+        ratio = saved / verbose_tokens * 100 if verbose_tokens else 0.0
+        logger.info(
+            f"Résultat {tool_name} : ~{compact_tokens} tokens "
+            f"(~{saved} économisés, -{ratio:.0f}%)"
+        )
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        """
+        Résumé par outil.
+
+        Returns:
+            Dict {outil: {calls, verbose_tokens, compact_tokens, saved_tokens}}
+        """
+        with self._lock:
+            return {
+                tool: {
+                    "calls": calls,
+                    "verbose_tokens": verbose,
+                    "compact_tokens": compact,
+                    "saved_tokens": verbose - compact,
+                }
+                for tool, (calls, verbose, compact) in self._totals.items()
+            }
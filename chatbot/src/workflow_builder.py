@@ -4,32 +4,62 @@ workflow_builder.py - Construction et création de workflows Dataiku
 Gère la création de workflows complets (datasets + recettes) dans DSS.
 """
 
+import os
+import time
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import List, Dict, Any, Optional, Set, Tuple
+from code_validation import RecipeCodeError, validate_workflow_code
 from dataiku_connector import DataikuConnector
+from src.recipes.generator import STREAMING, build_python_recipe, select_template_mode
+from job_monitor import JobMonitor, ProgressCallback
+from partitioning import set_partition_deps, validate_partitioning
+from recipe_engines import (
+    SQL_RECIPE, EngineChoice, dss_recipe_type, grouping_sql, join_sql, output_storage,
+    select_engine, table_name
+)
+from workflow_dag import WorkflowDAG, recipe_inputs
+from workflow_plan import (
+    CREATE, UPDATE, UNCHANGED, CONFLICT, SPEC_TAG_PREFIX,
+    PlanAction, WorkflowPlan, install_request_counter, spec_tag
+)
 
 logger = logging.getLogger(__name__)
 
+BUILD_MODES = ("output", "terminal")
+
+
+def _elapsed(start: float) -> float:
+    """Durée écoulée depuis start (time.perf_counter), arrondie à la ms."""
+    return round(time.perf_counter() - start, 3)
+
 
 class WorkflowBuilder:
     """Construit et crée des workflows Dataiku"""
 
-    def __init__(self, connector: DataikuConnector):
+    def __init__(self, connector: DataikuConnector, max_workers: Optional[int] = None):
         """
         Initialise le builder.
 
         Args:
             connector: Instance de DataikuConnector
+            max_workers: Recettes créées en parallèle (WORKFLOW_MAX_WORKERS si None)
         """
         self.connector = connector
         self.project = connector.project
+        self.max_workers = max_workers or int(os.getenv("WORKFLOW_MAX_WORKERS", "4"))
+        self.job_monitor = JobMonitor(self.project)
 
     def create_python_recipe(
         self,
         recipe_name: str,
         input_datasets: List[str],
         output_dataset: str,
-        code: Optional[str] = None
+        code: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        partition_deps: Optional[Dict[str, Any]] = None,
+        update: bool = False
     ) -> Any:
         """
         Crée une recette Python.
@@ -38,7 +68,10 @@ class WorkflowBuilder:
             recipe_name: Nom de la recette
             input_datasets: Liste des datasets d'entrée
             output_dataset: Dataset de sortie
-            code: Code Python (template si None)
+            code: Code Python (template si None, en streaming pour les grosses entrées)
+            tags: Tags posés sur la recette
+            partition_deps: Dépendances de partitions par entrée (voir partitioning.py)
+            update: Si True, réécrit sur place la recette existante du même nom
 
         Returns:
             Recette créée
@@ -47,22 +80,17 @@ class WorkflowBuilder:
 
         # Code par défaut si non fourni
         if code is None:
-            code = self._generate_python_template(input_datasets, output_dataset)
-
-        # Crée la recette via l'API
-        builder = self.project.new_recipe("python", recipe_name)
-
-        # Ajoute les inputs
-        for ds in input_datasets:
-            builder.with_input(ds)
+            code = self._generate_python_template(recipe_name, input_datasets, output_dataset)
 
-        # Ajoute l'output
-        builder.with_output(output_dataset)
-
-        # Crée et configure
-        recipe = builder.build()
-        recipe.get_settings().set_code(code)
-        recipe.get_settings().save()
+        # Crée (ou rouvre) et configure (un seul aller-retour pour les settings)
+        recipe, settings = self._open_recipe(
+            "python", recipe_name, input_datasets, output_dataset, update
+        )
+        settings.set_code(code)
+        set_partition_deps(settings.get_recipe_raw_definition(), partition_deps)
+        if tags:
+            self._set_tags(settings, tags)
+        settings.save()
 
         logger.info(f"Recette {recipe_name} créée avec succès")
         return recipe
@@ -73,7 +101,11 @@ class WorkflowBuilder:
         input_dataset: str,
         output_dataset: str,
         group_by: List[str],
-        aggregations: List[Dict[str, str]]
+        aggregations: List[Dict[str, str]],
+        tags: Optional[List[str]] = None,
+        engine: Optional[str] = None,
+        partition_deps: Optional[Dict[str, Any]] = None,
+        update: bool = False
     ) -> Any:
         """
         Crée une recette Grouping (agrégation).
@@ -84,18 +116,19 @@ class WorkflowBuilder:
             output_dataset: Dataset de sortie
             group_by: Colonnes pour grouper
             aggregations: Liste de {column, function, output}
+            tags: Tags posés sur la recette
+            engine: Moteur d'exécution (DSS, SQL ; défaut DSS si None)
+            partition_deps: Dépendances de partitions par entrée (voir partitioning.py)
+            update: Si True, réécrit sur place la recette existante du même nom
 
         Returns:
             Recette créée
         """
         logger.info(f"Création recette Grouping : {recipe_name}")
 
-        builder = self.project.new_recipe("grouping", recipe_name)
-        builder.with_input(input_dataset)
-        builder.with_output(output_dataset)
-
-        recipe = builder.build()
-        settings = recipe.get_settings()
+        recipe, settings = self._open_recipe(
+            "grouping", recipe_name, [input_dataset], output_dataset, update
+        )
 
         # Configuration du grouping
         payload = settings.get_recipe_raw_definition()
@@ -108,8 +141,13 @@ class WorkflowBuilder:
                 "aggregation": agg["function"],
                 "outputColumn": agg["output"]
             })
+        set_partition_deps(payload, partition_deps)
 
         settings.set_recipe_raw_definition(payload)
+        if engine:
+            settings.raw_params["engineType"] = engine
+        if tags:
+            self._set_tags(settings, tags)
         settings.save()
 
         logger.info(f"Recette {recipe_name} créée avec succès")
@@ -122,7 +160,11 @@ class WorkflowBuilder:
         right_dataset: str,
         output_dataset: str,
         join_keys: List[tuple],  # [(left_col, right_col), ...]
-        join_type: str = "LEFT"
+        join_type: str = "LEFT",
+        tags: Optional[List[str]] = None,
+        engine: Optional[str] = None,
+        partition_deps: Optional[Dict[str, Any]] = None,
+        update: bool = False
     ) -> Any:
         """
         Crée une recette Join.
@@ -134,19 +176,19 @@ class WorkflowBuilder:
             output_dataset: Dataset de sortie
             join_keys: Paires de colonnes pour la jointure
             join_type: Type de join (LEFT, INNER, OUTER, etc.)
+            tags: Tags posés sur la recette
+            engine: Moteur d'exécution (DSS, SQL ; défaut DSS si None)
+            partition_deps: Dépendances de partitions par entrée (voir partitioning.py)
+            update: Si True, réécrit sur place la recette existante du même nom
 
         Returns:
             Recette créée
         """
         logger.info(f"Création recette Join : {recipe_name}")
 
-        builder = self.project.new_recipe("join", recipe_name)
-        builder.with_input(left_dataset)
-        builder.with_input(right_dataset)
-        builder.with_output(output_dataset)
-
-        recipe = builder.build()
-        settings = recipe.get_settings()
+        recipe, settings = self._open_recipe(
+            "join", recipe_name, [left_dataset, right_dataset], output_dataset, update
+        )
 
         # Configuration du join
         payload = settings.get_recipe_raw_definition()
@@ -160,31 +202,239 @@ class WorkflowBuilder:
             "type": join_type.upper(),
             "on": [{"column1": left, "column2": right} for left, right in join_keys]
         }]
+        set_partition_deps(payload, partition_deps)
 
         settings.set_recipe_raw_definition(payload)
+        if engine:
+            settings.raw_params["engineType"] = engine
+        if tags:
+            self._set_tags(settings, tags)
         settings.save()
 
         logger.info(f"Recette {recipe_name} créée avec succès")
         return recipe
 
-    def create_workflow(
+    def create_sql_recipe(
+        self,
+        recipe_name: str,
+        input_datasets: List[str],
+        output_dataset: str,
+        sql: str,
+        tags: Optional[List[str]] = None,
+        partition_deps: Optional[Dict[str, Any]] = None,
+        update: bool = False
+    ) -> Any:
+        """
+        Crée une recette SQL (requête exécutée en base).
+
+        Args:
+            recipe_name: Nom de la recette
+            input_datasets: Datasets d'entrée (même connexion SQL)
+            output_dataset: Dataset de sortie (même connexion SQL)
+            sql: Requête SELECT
+            tags: Tags posés sur la recette
+            partition_deps: Dépendances de partitions par entrée (voir partitioning.py)
+            update: Si True, réécrit sur place la recette existante du même nom
+
+        Returns:
+            Recette créée
+        """
+        logger.info(f"Création recette SQL : {recipe_name}")
+
+        recipe, settings = self._open_recipe(
+            "sql_query", recipe_name, input_datasets, output_dataset, update
+        )
+        settings.set_payload(sql)
+        set_partition_deps(settings.get_recipe_raw_definition(), partition_deps)
+        if tags:
+            self._set_tags(settings, tags)
+        settings.save()
+
+        logger.info(f"Recette {recipe_name} créée avec succès")
+        return recipe
+
+    @staticmethod
+    def _set_tags(settings: Any, tags: List[str]) -> None:
+        """
+        Ajoute des tags à une recette en conservant ceux posés par ailleurs.
+
+        Un tag d'empreinte (wfspec:) fourni remplace l'ancien : une recette
+        mise à jour n'en porte jamais deux.
+
+        Args:
+            settings: Réglages de la recette (enregistrés par l'appelant)
+            tags: Tags à poser
+        """
+        new_spec = any(t.startswith(SPEC_TAG_PREFIX) for t in tags)
+        kept = [
+            t for t in settings.tags or []
+            if t not in tags and not (new_spec and t.startswith(SPEC_TAG_PREFIX))
+        ]
+        settings.tags = kept + list(tags)
+
+    def _open_recipe(
+        self,
+        recipe_type: str,
+        recipe_name: str,
+        input_datasets: List[str],
+        output_dataset: str,
+        update: bool
+    ) -> Tuple[Any, Any]:
+        """
+        Recette à configurer : nouvelle, ou existante dont les entrées et la
+        sortie sont réécrites dans ses réglages.
+
+        La mise à jour ne supprime rien : si l'enregistrement des réglages
+        échoue, la recette existante reste en service telle quelle.
+
+        Returns:
+            Tuple (recette, réglages)
+        """
+        if not update:
+            builder = self.project.new_recipe(recipe_type, recipe_name)
+            for ds in input_datasets:
+                builder.with_input(ds)
+            builder.with_output(output_dataset)
+            recipe = builder.build()
+            return recipe, recipe.get_settings()
+
+        recipe = self.project.get_recipe(recipe_name)
+        settings = recipe.get_settings()
+        definition = settings.get_recipe_raw_definition()
+        definition["inputs"] = {"main": {"items": [{"ref": ds, "deps": []} for ds in input_datasets]}}
+        definition["outputs"] = {"main": {"items": [{"ref": output_dataset, "appendMode": False}]}}
+        return recipe, settings
+
+    def plan_workflow(
         self,
         workflow_name: str,
         source_datasets: List[str],
         recipes: List[Dict[str, Any]],
         output_dataset: str
+    ) -> WorkflowPlan:
+        """
+        Calcule le plan d'un workflow sans rien modifier.
+
+        Le projet est lu en deux appels (datasets, recettes). Une recette est
+        inchangée si elle porte le tag d'empreinte de sa spécification, à mettre
+        à jour si elle porte une autre empreinte, en conflit si elle existe sans
+        avoir été créée par le chatbot. Le moteur de chaque recette est choisi
+        d'après le stockage de ses entrées (voir recipe_engines).
+
+        Args:
+            workflow_name: Nom du workflow
+            source_datasets: Datasets sources
+            recipes: Liste des recettes (format de create_workflow)
+            output_dataset: Dataset final
+
+        Returns:
+            WorkflowPlan
+
+        Raises:
+            WorkflowSpecError: Spécification invalide
+        """
+        counter = install_request_counter(getattr(self.project.client, "_session", None))
+        calls_before = counter.count if counter else 0
+
+        storage = self.connector.get_datasets_storage()
+        existing = set(storage)
+        dag = WorkflowDAG(recipes, output_dataset, existing | set(source_datasets))
+        existing_recipes = self.connector.get_recipes()
+
+        for recipe_config in dag.recipes.values():
+            validate_partitioning(recipe_config)
+
+        # Moteurs dans l'ordre du DAG : le stockage d'une sortie dépend du moteur qui la produit
+        engines: Dict[str, EngineChoice] = {}
+        for level in dag.levels:
+            for name in level:
+                output = dag.outputs[name]
+                engines[name] = select_engine(
+                    dag.recipes[name], output, storage, unbuilt=set(dag.outputs.values()) - existing
+                )
+                if output not in storage:
+                    storage[output] = output_storage(
+                        engines[name], storage, recipe_inputs(dag.recipes[name])
+                    )
+
+        actions = []
+        outputs = list(dict.fromkeys([output_dataset, *dag.outputs.values()]))
+        for ds in outputs:
+            if ds in existing:
+                actions.append(PlanAction("dataset", ds, UNCHANGED, "existe déjà"))
+            else:
+                actions.append(PlanAction("dataset", ds, CREATE, "absent du projet"))
+
+        for level in dag.levels:
+            for name in level:
+                tag = spec_tag(dag.recipes[name], dag.outputs[name])
+                current = existing_recipes.get(name)
+                dss_type = dss_recipe_type(dag.recipes[name], engines[name])
+                if current is None:
+                    actions.append(PlanAction("recipe", name, CREATE, "absente du projet"))
+                elif not any(t.startswith(SPEC_TAG_PREFIX) for t in current["tags"]):
+                    actions.append(PlanAction(
+                        "recipe", name, CONFLICT, "recette existante non créée par le chatbot"
+                    ))
+                elif current.get("type") not in (None, dss_type):
+                    # Une recette ne change pas de type sur place, et la supprimer
+                    # avant de la recréer perdrait une recette en service
+                    actions.append(PlanAction(
+                        "recipe", name, CONFLICT,
+                        f"type modifié ({current['type']} → {dss_type}) : "
+                        "supprimez la recette dans DSS pour la recréer"
+                    ))
+                elif dag.outputs[name] not in existing:
+                    actions.append(PlanAction("recipe", name, UPDATE, "dataset de sortie absent"))
+                elif tag in current["tags"]:
+                    actions.append(PlanAction("recipe", name, UNCHANGED, "spécification identique"))
+                else:
+                    actions.append(PlanAction("recipe", name, UPDATE, "spécification modifiée"))
+
+        api_calls = counter.count - calls_before if counter else None
+        return WorkflowPlan(
+            workflow_name, output_dataset, dag, actions, api_calls, engines, storage
+        )
+
+    def create_workflow(
+        self,
+        workflow_name: str,
+        source_datasets: List[str],
+        recipes: List[Dict[str, Any]],
+        output_dataset: str,
+        dry_run: bool = False,
+        build: Optional[str] = None,
+        on_progress: Optional[ProgressCallback] = None,
+        partitions: Optional[str] = None
     ) -> Dict[str, Any]:
         """
-        Crée un workflow complet.
+        Crée ou met à jour un workflow complet (idempotent).
+
+        Un plan est d'abord calculé (voir plan_workflow) puis seules les
+        différences sont appliquées : relancer la même spécification ne crée
+        rien, une recette modifiée est réécrite sur place. Les recettes
+        forment un DAG validé avant toute création ; les branches indépendantes
+        sont créées en parallèle. Le code des recettes Python est vérifié
+        localement avant le premier appel DSS (voir code_validation) ; les
+        problèmes sont retournés dans "code_errors".
 
         Args:
             workflow_name: Nom du workflow
             source_datasets: Datasets sources
             recipes: Liste des recettes à créer
             output_dataset: Dataset final
+            dry_run: Si True, retourne le plan sans rien appliquer
+            build: Après création, construit "output" (dataset final) ou
+                "terminal" (toutes les sorties non relues) ; rien si None
+            on_progress: Callback des événements de progression du build
+            partitions: Partitions à construire pour les datasets dont la
+                recette déclare un partitionnement (ex. "2024-06-01") ; toutes
+                si None. Exige build.
 
         Returns:
-            Dict avec résumé de la création
+            Dict avec résumé, plan ("plan_text"), moteur par recette ("engines"),
+            appels DSS ("api_calls"), jobs de build ("build") et durées par
+            étape ("timings")
 
         Example:
             recipes = [
@@ -210,89 +460,423 @@ class WorkflowBuilder:
         logger.info(f"Création workflow : {workflow_name}")
 
         created_recipes = []
+        updated_recipes = []
         created_datasets = []
+        timings: Dict[str, Any] = {}
+        workflow_start = time.perf_counter()
+        counter = install_request_counter(getattr(self.project.client, "_session", None))
 
         try:
-            # Crée le dataset de sortie final s'il n'existe pas
-            if not self.connector.dataset_exists(output_dataset):
-                self.connector.create_dataset(output_dataset)
-                created_datasets.append(output_dataset)
-
-            # Crée les recettes dans l'ordre
-            for recipe_config in recipes:
-                recipe_type = recipe_config["type"]
-                recipe_name = recipe_config["name"]
-
-                # Crée les datasets intermédiaires si nécessaire
-                output = recipe_config.get("output", output_dataset)
-                if not self.connector.dataset_exists(output) and output != output_dataset:
-                    self.connector.create_dataset(output)
-                    created_datasets.append(output)
-
-                # Crée la recette selon son type
-                if recipe_type == "python":
-                    recipe = self.create_python_recipe(
-                        recipe_name,
-                        recipe_config["inputs"],
-                        output,
-                        recipe_config.get("code")
-                    )
-                elif recipe_type == "grouping":
-                    recipe = self.create_grouping_recipe(
-                        recipe_name,
-                        recipe_config["input"],
-                        output,
-                        recipe_config["group_by"],
-                        recipe_config["aggregations"]
-                    )
-                elif recipe_type == "join":
-                    recipe = self.create_join_recipe(
-                        recipe_name,
-                        recipe_config["left"],
-                        recipe_config["right"],
-                        output,
-                        recipe_config["join_keys"],
-                        recipe_config.get("join_type", "LEFT")
-                    )
-                else:
-                    raise ValueError(f"Type de recette non supporté : {recipe_type}")
-
-                created_recipes.append(recipe_name)
+            if build is not None and build not in BUILD_MODES:
+                raise ValueError(f"Mode de build inconnu : {build}")
+            if partitions and build is None:
+                raise ValueError("partitions exige un build (\"output\" ou \"terminal\")")
+
+            # Code des recettes Python vérifié localement, avant tout appel DSS
+            stage_start = time.perf_counter()
+            validate_workflow_code(recipes, output_dataset, self.connector.get_cached_columns)
+            timings["validation_s"] = _elapsed(stage_start)
+
+            # Plan complet avant toute création (deux listings DSS)
+            stage_start = time.perf_counter()
+            plan = self.plan_workflow(workflow_name, source_datasets, recipes, output_dataset)
+            timings["plan_s"] = _elapsed(stage_start)
+            logger.info(plan.format())
+
+            summary = {
+                "workflow_name": workflow_name,
+                "output_dataset": output_dataset,
+                "plan": plan.to_dict(),
+                "plan_text": plan.format(),
+                "dag_levels": plan.dag.levels,
+                "engines": plan.to_dict()["engines"],
+            }
+            if plan.conflicts:
+                names = ", ".join(a.name for a in plan.conflicts)
+                raise ValueError(f"Recettes existantes non gérées par le chatbot : {names}")
+            if dry_run:
+                timings["total_s"] = _elapsed(workflow_start)
+                return {"success": True, "dry_run": True, **summary,
+                        "api_calls": {"plan": plan.api_calls}, "timings": timings}
 
-            logger.info(f"Workflow {workflow_name} créé avec succès")
+            calls_before = counter.count if counter else 0
+            existing = {a.name for a in plan.actions_for("dataset", UNCHANGED)}
 
-            return {
+            # Crée le dataset de sortie final s'il n'existe pas
+            stage_start = time.perf_counter()
+            if output_dataset not in existing:
+                self.connector.create_dataset(
+                    output_dataset,
+                    connection=plan.dataset_connection(output_dataset),
+                    partitioning=self._output_partitioning(plan, output_dataset)
+                )
+                created_datasets.append(output_dataset)
+                existing.add(output_dataset)
+            timings["output_dataset_s"] = _elapsed(stage_start)
+
+            # Applique les recettes à créer / mettre à jour, branches indépendantes en parallèle
+            stage_start = time.perf_counter()
+            timings["recipes"] = self._create_recipes_from_dag(
+                plan, existing, created_recipes, updated_recipes, created_datasets
+            )
+            timings["recipes_s"] = _elapsed(stage_start)
+
+            api_calls: Dict[str, Any] = {"plan": plan.api_calls}
+            if counter:
+                api_calls["apply"] = counter.count - calls_before
+                api_calls["total"] = api_calls["plan"] + api_calls["apply"]
+
+            result = {
                 "success": True,
-                "workflow_name": workflow_name,
+                **summary,
                 "created_recipes": created_recipes,
+                "updated_recipes": updated_recipes,
+                "unchanged_recipes": [a.name for a in plan.actions_for("recipe", UNCHANGED)],
                 "created_datasets": created_datasets,
-                "output_dataset": output_dataset
+                "api_calls": api_calls,
+                "timings": timings
             }
 
+            # Build optionnel : jobs suivis en parallèle
+            if build:
+                stage_start = time.perf_counter()
+                targets = self._build_targets(plan, build)
+                result["build"] = self.job_monitor.build(
+                    targets,
+                    on_progress=on_progress,
+                    partitions=partitions,
+                    partitioned=[ds for ds in targets if self._output_partitioning(plan, ds)]
+                )
+                timings["build_s"] = _elapsed(stage_start)
+                failed = [
+                    f"{ds} ({job['state']})" for ds, job in result["build"]["jobs"].items()
+                    if job["state"] != "DONE"
+                ]
+                if failed:
+                    result["success"] = False
+                    result["error"] = f"Build en échec : {', '.join(failed)}"
+
+            timings["total_s"] = _elapsed(workflow_start)
+            logger.info(
+                f"Workflow {workflow_name} appliqué en {timings['total_s']}s "
+                f"(appels DSS : {api_calls})"
+            )
+            return result
+
         except Exception as e:
             logger.error(f"Erreur création workflow : {e}")
-            return {
+            timings["total_s"] = _elapsed(workflow_start)
+            result = {
                 "success": False,
                 "error": str(e),
                 "created_recipes": created_recipes,
-                "created_datasets": created_datasets
+                "updated_recipes": updated_recipes,
+                "created_datasets": created_datasets,
+                "timings": timings
             }
+            if isinstance(e, RecipeCodeError):
+                result["code_errors"] = e.problems
+            return result
+
+    @staticmethod
+    def _output_partitioning(plan: WorkflowPlan, dataset_name: str) -> Optional[Dict[str, Any]]:
+        """Partitionnement déclaré par la recette qui produit un dataset."""
+        for name, output in plan.dag.outputs.items():
+            if output == dataset_name:
+                return plan.dag.recipes[name].get("partitioning")
+        return None
+
+    @staticmethod
+    def _build_targets(plan: WorkflowPlan, build: str) -> List[str]:
+        """
+        Datasets à construire.
+
+        Args:
+            plan: Plan du workflow
+            build: "output" (dataset final) ou "terminal" (sorties qu'aucune
+                recette du workflow ne relit)
+
+        Returns:
+            Liste de datasets
+        """
+        if build == "output":
+            return [plan.output_dataset]
+        if build == "terminal":
+            dependents = plan.dag.dependents
+            return [plan.dag.outputs[name] for name in plan.dag.recipes if not dependents[name]]
+        raise ValueError(f"Mode de build inconnu : {build}")
+
+    def _create_recipes_from_dag(
+        self,
+        plan: WorkflowPlan,
+        existing: Set[str],
+        created_recipes: List[str],
+        updated_recipes: List[str],
+        created_datasets: List[str]
+    ) -> Dict[str, Dict[str, float]]:
+        """
+        Applique les recettes du plan sur un pool borné.
+
+        Une recette est soumise dès que toutes les recettes dont elle lit les
+        sorties sont appliquées ; les recettes inchangées sont considérées comme
+        déjà faites. Au premier échec, plus aucune recette n'est soumise ;
+        celles en cours se terminent.
+
+        Args:
+            plan: Plan du workflow (DAG validé + actions)
+            existing: Datasets existants (complété au fil des créations)
+            created_recipes: Liste complétée avec les recettes créées
+            updated_recipes: Liste complétée avec les recettes recréées
+            created_datasets: Liste complétée avec les datasets créés
+
+        Returns:
+            Durées par recette appliquée {nom: {dataset_s, recipe_s}}
+
+        Raises:
+            Exception: Première erreur rencontrée
+        """
+        dag = plan.dag
+        unchanged = {a.name for a in plan.actions_for("recipe", UNCHANGED)}
+        pending = {
+            name: deps - unchanged
+            for name, deps in dag.dependencies.items()
+            if name not in unchanged
+        }
+        dependents = dag.dependents
+        existing_lock = threading.Lock()
+        recipe_timings: Dict[str, Dict[str, float]] = {}
+        error: Optional[Exception] = None
+
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="workflow"
+        ) as pool:
+            running: Dict[Future, str] = {}
+
+            def submit_ready() -> None:
+                for name in [n for n, deps in pending.items() if not deps]:
+                    del pending[name]
+                    future = pool.submit(
+                        self._create_recipe_task, plan, name, existing, existing_lock
+                    )
+                    running[future] = name
+
+            submit_ready()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        dataset_created, recipe_timings[name] = future.result()
+                    except Exception as e:
+                        logger.error(f"Échec de la recette {name} : {e}")
+                        error = error or e
+                        continue
+                    if plan.recipe_action(name).action == UPDATE:
+                        updated_recipes.append(name)
+                    else:
+                        created_recipes.append(name)
+                    if dataset_created:
+                        created_datasets.append(dag.outputs[name])
+                    for dependent in dependents[name]:
+                        if dependent in pending:
+                            pending[dependent].discard(name)
+                if error is None:
+                    submit_ready()
+
+        if error is not None:
+            raise error
+        return recipe_timings
+
+    def _create_recipe_task(
+        self,
+        plan: WorkflowPlan,
+        name: str,
+        existing: Set[str],
+        existing_lock: threading.Lock
+    ) -> Tuple[bool, Dict[str, float]]:
+        """
+        Crée le dataset de sortie d'une recette si nécessaire, puis la recette
+        (réécrite sur place si le plan prévoit sa mise à jour).
+
+        Returns:
+            Tuple (dataset créé ?, durées {dataset_s, recipe_s})
+        """
+        recipe_config = plan.dag.recipes[name]
+        output = plan.dag.outputs[name]
+        with existing_lock:
+            needs_dataset = output not in existing
+            existing.add(output)
+
+        stage_start = time.perf_counter()
+        if needs_dataset:
+            try:
+                self.connector.create_dataset(
+                    output,
+                    connection=plan.dataset_connection(output),
+                    partitioning=recipe_config.get("partitioning")
+                )
+            except Exception:
+                # Réservé avant l'appel pour éviter une double création : rendu en cas d'échec
+                with existing_lock:
+                    existing.discard(output)
+                raise
+        dataset_s = _elapsed(stage_start)
+
+        stage_start = time.perf_counter()
+        self._create_recipe(
+            recipe_config, output, plan.engines.get(name), plan.storage,
+            update=plan.recipe_action(name).action == UPDATE
+        )
+        return needs_dataset, {"dataset_s": dataset_s, "recipe_s": _elapsed(stage_start)}
+
+    def _create_recipe(
+        self,
+        recipe_config: Dict[str, Any],
+        output: str,
+        engine: Optional[EngineChoice] = None,
+        storage: Optional[Dict[str, Dict[str, Any]]] = None,
+        update: bool = False
+    ) -> Any:
+        """
+        Crée une recette selon son type et son moteur, marquée du tag
+        d'empreinte de sa spécification.
+
+        Args:
+            recipe_config: Recette au format de create_workflow()
+            output: Dataset de sortie
+            engine: Moteur retenu par le plan (moteur par défaut de DSS si None)
+            storage: Stockage des datasets (tables des recettes SQL générées)
+            update: Si True, réécrit sur place la recette existante
+
+        Returns:
+            Recette créée
+        """
+        recipe_type = recipe_config["type"]
+        recipe_name = recipe_config["name"]
+        tags = [spec_tag(recipe_config, output)]
+        engine_type = engine.engine if engine else None
+
+        if engine_type == SQL_RECIPE:
+            return self.create_sql_recipe(
+                recipe_name,
+                recipe_inputs(recipe_config),
+                output,
+                self._generate_sql(recipe_config, storage or {}),
+                tags=tags,
+                partition_deps=recipe_config.get("partition_deps"),
+                update=update
+            )
+
+        if recipe_type == "python":
+            return self.create_python_recipe(
+                recipe_name,
+                recipe_config["inputs"],
+                output,
+                recipe_config.get("code"),
+                tags=tags,
+                partition_deps=recipe_config.get("partition_deps"),
+                update=update
+            )
+        elif recipe_type == "grouping":
+            return self.create_grouping_recipe(
+                recipe_name,
+                recipe_config["input"],
+                output,
+                recipe_config["group_by"],
+                recipe_config["aggregations"],
+                tags=tags,
+                engine=engine_type,
+                partition_deps=recipe_config.get("partition_deps"),
+                update=update
+            )
+        elif recipe_type == "join":
+            return self.create_join_recipe(
+                recipe_name,
+                recipe_config["left"],
+                recipe_config["right"],
+                output,
+                recipe_config["join_keys"],
+                recipe_config.get("join_type", "LEFT"),
+                tags=tags,
+                engine=engine_type,
+                partition_deps=recipe_config.get("partition_deps"),
+                update=update
+            )
+        else:
+            raise ValueError(f"Type de recette non supporté : {recipe_type}")
+
+    def _generate_sql(
+        self,
+        recipe_config: Dict[str, Any],
+        storage: Dict[str, Dict[str, Any]]
+    ) -> str:
+        """
+        Traduit une recette Grouping ou Join en requête SQL.
+
+        Args:
+            recipe_config: Recette au format de create_workflow()
+            storage: Stockage des datasets (noms de tables)
+
+        Returns:
+            Requête SELECT
+        """
+        def table(ds: str) -> str:
+            return table_name(ds, storage.get(ds, {}))
+
+        # Entrées sur une même connexion SQL (voir select_engine) : même dialecte
+        dialect = storage.get(recipe_inputs(recipe_config)[0], {}).get("type")
+
+        if recipe_config["type"] == "grouping":
+            return grouping_sql(recipe_config, table(recipe_config["input"]), dialect)
+
+        if recipe_config["type"] == "join":
+            left, right = recipe_config["left"], recipe_config["right"]
+            return join_sql(
+                recipe_config,
+                table(left),
+                table(right),
+                [c["name"] for c in self.connector.get_dataset_info(left)["columns"]],
+                [c["name"] for c in self.connector.get_dataset_info(right)["columns"]],
+                dialect
+            )
+
+        raise ValueError(f"Pas de traduction SQL pour les recettes {recipe_config['type']}")
 
     def _generate_python_template(
         self,
+        recipe_name: str,
         input_datasets: List[str],
         output_dataset: str
     ) -> str:
         """
         Génère un template Python par défaut.
 
+        Au-delà de RECIPE_STREAMING_THRESHOLD lignes sur une entrée, le
+        template lit par blocs (iter_dataframes) et écrit en flux (get_writer)
+        pour ne jamais charger le dataset entier en mémoire.
+
         Args:
+            recipe_name: Nom de la recette
             input_datasets: Datasets d'entrée
             output_dataset: Dataset de sortie
 
         Returns:
             Code Python template
         """
+        records = {ds: self.connector.get_records_count(ds) for ds in input_datasets}
+        if select_template_mode(input_records=records) == STREAMING:
+            # Schéma connu des seules entrées déjà construites
+            schemas = {
+                ds: self.connector.get_dataset_info(ds)["columns"]
+                for ds in input_datasets
+                if records[ds] is not None
+            }
+            return build_python_recipe(
+                recipe_name, input_datasets, output_dataset,
+                mode=STREAMING, schemas=schemas, input_records=records
+            )
+
         input_readers = "\n".join(
             f'{ds.lower().replace("-", "_")}_df = dataiku.Dataset("{ds}").get_dataframe()'
             for ds in input_datasets
@@ -0,0 +1,122 @@
+"""
+workflow_dag.py - Graphe de dépendances des recettes d'un workflow
+
+Transforme la liste de recettes acceptée par WorkflowBuilder.create_workflow()
+en DAG (recette -> recettes dont elle lit les sorties), vérifié avant toute
+création : sorties en double, entrées introuvables, cycles.
+"""
+
+from typing import Any, Dict, Iterable, List, Set
+
+
+class WorkflowSpecError(ValueError):
+    """Spécification de workflow invalide (détectée avant tout appel DSS)."""
+
+
+def recipe_inputs(recipe_config: Dict[str, Any]) -> List[str]:
+    """
+    Datasets lus par une recette, quel que soit son type.
+
+    Args:
+        recipe_config: Recette au format de create_workflow()
+
+    Returns:
+        Liste des noms de datasets d'entrée
+    """
+    recipe_type = recipe_config.get("type")
+    if recipe_type == "python":
+        return list(recipe_config.get("inputs", []))
+    if recipe_type == "grouping":
+        return [recipe_config["input"]] if recipe_config.get("input") else []
+    if recipe_type == "join":
+        return [recipe_config[k] for k in ("left", "right") if recipe_config.get(k)]
+    return list(recipe_config.get("inputs", [])) + (
+        [recipe_config["input"]] if recipe_config.get("input") else []
+    )
+
+
+class WorkflowDAG:
+    """DAG des recettes d'un workflow"""
+
+    def __init__(
+        self,
+        recipes: List[Dict[str, Any]],
+        output_dataset: str,
+        available_datasets: Iterable[str] = ()
+    ):
+        """
+        Construit et valide le DAG.
+
+        Args:
+            recipes: Recettes au format de create_workflow()
+            output_dataset: Sortie par défaut des recettes sans "output"
+            available_datasets: Datasets existants ou sources (entrées valides)
+
+        Raises:
+            WorkflowSpecError: Nom de recette ou sortie en double, entrée
+                introuvable, ou cycle
+        """
+        self.recipes: Dict[str, Dict[str, Any]] = {}
+        self.outputs: Dict[str, str] = {}
+        producers: Dict[str, str] = {}
+
+        for recipe_config in recipes:
+            name = recipe_config.get("name")
+            if not name:
+                raise WorkflowSpecError("Recette sans nom dans la spécification")
+            if name in self.recipes:
+                raise WorkflowSpecError(f"Recette en double : {name}")
+            output = recipe_config.get("output", output_dataset)
+            if output in producers:
+                raise WorkflowSpecError(
+                    f"Dataset {output} produit par {producers[output]} et {name}"
+                )
+            self.recipes[name] = recipe_config
+            self.outputs[name] = output
+            producers[output] = name
+
+        available = set(available_datasets)
+        self.dependencies: Dict[str, Set[str]] = {}
+        for name, recipe_config in self.recipes.items():
+            deps = set()
+            for ds in recipe_inputs(recipe_config):
+                if ds in producers:
+                    deps.add(producers[ds])
+                elif ds not in available:
+                    raise WorkflowSpecError(
+                        f"Entrée introuvable pour la recette {name} : {ds}"
+                    )
+            self.dependencies[name] = deps
+
+        self.levels = self._topological_levels()
+
+    @property
+    def dependents(self) -> Dict[str, Set[str]]:
+        """Recettes qui lisent la sortie de chaque recette."""
+        result: Dict[str, Set[str]] = {name: set() for name in self.recipes}
+        for name, deps in self.dependencies.items():
+            for dep in deps:
+                result[dep].add(name)
+        return result
+
+    def _topological_levels(self) -> List[List[str]]:
+        """
+        Regroupe les recettes par niveau (Kahn) : un niveau ne dépend que des précédents.
+
+        Raises:
+            WorkflowSpecError: Si le graphe contient un cycle
+        """
+        remaining = {name: set(deps) for name, deps in self.dependencies.items()}
+        levels = []
+        while remaining:
+            ready = sorted(name for name, deps in remaining.items() if not deps)
+            if not ready:
+                raise WorkflowSpecError(
+                    f"Cycle entre les recettes : {', '.join(sorted(remaining))}"
+                )
+            levels.append(ready)
+            for name in ready:
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        return levels
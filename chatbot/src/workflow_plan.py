@@ -0,0 +1,181 @@
+"""
+workflow_plan.py - Plan idempotent (create / update / unchanged) d'un workflow
+
+Le plan compare la spécification d'un workflow à l'état du projet, obtenu en
+deux listings (datasets, recettes). Chaque recette créée par le chatbot porte
+un tag "wfspec:<empreinte>" de sa spécification : une recette dont le tag
+correspond est inchangée, sans aucun appel supplémentaire.
+"""
+
+import json
+import hashlib
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import requests
+from requests.adapters import BaseAdapter
+
+from recipe_engines import EngineChoice, is_sql_storage
+from workflow_dag import WorkflowDAG
+
+CREATE = "create"
+UPDATE = "update"
+UNCHANGED = "unchanged"
+CONFLICT = "conflict"
+
+SPEC_TAG_PREFIX = "wfspec:"
+
+_SYMBOLS = {CREATE: "+", UPDATE: "~", UNCHANGED: "=", CONFLICT: "!"}
+
+
+def spec_tag(recipe_config: Dict[str, Any], output: str) -> str:
+    """
+    Tag d'empreinte de la spécification d'une recette.
+
+    Args:
+        recipe_config: Recette au format de create_workflow()
+        output: Dataset de sortie résolu
+
+    Returns:
+        Tag "wfspec:<12 caractères hexadécimaux>"
+    """
+    canonical = json.dumps({**recipe_config, "output": output}, sort_keys=True,
+                           ensure_ascii=False)
+    return SPEC_TAG_PREFIX + hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:12]
+
+
+class PlanAction(NamedTuple):
+    """Action prévue sur un objet du projet"""
+    kind: str
+    name: str
+    action: str
+    reason: str
+
+
+class WorkflowPlan:
+    """Différence entre la spécification d'un workflow et l'état du projet"""
+
+    def __init__(
+        self,
+        workflow_name: str,
+        output_dataset: str,
+        dag: WorkflowDAG,
+        actions: List[PlanAction],
+        api_calls: Optional[int],
+        engines: Optional[Dict[str, EngineChoice]] = None,
+        storage: Optional[Dict[str, Dict[str, Any]]] = None
+    ):
+        """
+        Initialise le plan.
+
+        Args:
+            workflow_name: Nom du workflow
+            output_dataset: Dataset final
+            dag: DAG validé des recettes
+            actions: Actions sur les datasets puis les recettes
+            api_calls: Appels DSS effectués pour calculer le plan (None si non mesuré)
+            engines: Moteur retenu par recette
+            storage: Stockage des datasets existants et prévus
+        """
+        self.workflow_name = workflow_name
+        self.output_dataset = output_dataset
+        self.dag = dag
+        self.actions = actions
+        self.api_calls = api_calls
+        self.engines = engines or {}
+        self.storage = storage or {}
+
+    def actions_for(self, kind: str, action: str) -> List[PlanAction]:
+        """Actions d'un type d'objet ("dataset" / "recipe") et d'un type d'action."""
+        return [a for a in self.actions if a.kind == kind and a.action == action]
+
+    def recipe_action(self, recipe_name: str) -> PlanAction:
+        """Action prévue pour une recette."""
+        return next(a for a in self.actions if a.kind == "recipe" and a.name == recipe_name)
+
+    def dataset_connection(self, dataset_name: str) -> Optional[str]:
+        """Connexion SQL où créer un dataset (None : stockage par défaut)."""
+        storage = self.storage.get(dataset_name)
+        return storage["connection"] if storage and is_sql_storage(storage) else None
+
+    @property
+    def conflicts(self) -> List[PlanAction]:
+        return [a for a in self.actions if a.action == CONFLICT]
+
+    @property
+    def has_changes(self) -> bool:
+        return any(a.action in (CREATE, UPDATE) for a in self.actions)
+
+    def format(self) -> str:
+        """
+        Plan lisible, une ligne par objet.
+
+        Returns:
+            Texte du plan (+ création, ~ mise à jour, = inchangé, ! conflit)
+        """
+        lines = [f"Plan du workflow {self.workflow_name} :"]
+        for a in self.actions:
+            line = f"  {_SYMBOLS[a.action]} {a.kind} {a.name} ({a.action} : {a.reason})"
+            if a.kind == "recipe" and a.name in self.engines:
+                engine = self.engines[a.name]
+                line += f" [moteur {engine.engine} : {engine.reason}]"
+            lines.append(line)
+        counts = {action: sum(a.action == action for a in self.actions) for action in _SYMBOLS}
+        lines.append(
+            f"  → {counts[CREATE]} à créer, {counts[UPDATE]} à mettre à jour, "
+            f"{counts[UNCHANGED]} inchangé(s), {counts[CONFLICT]} conflit(s)"
+        )
+        return "\n".join(lines)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "workflow_name": self.workflow_name,
+            "actions": [a._asdict() for a in self.actions],
+            "dag_levels": self.dag.levels,
+            "engines": {name: {"engine": e.engine, "reason": e.reason}
+                        for name, e in self.engines.items()},
+            "api_calls": self.api_calls,
+        }
+
+
+class RequestCounter(BaseAdapter):
+    """Adapter requests qui compte les requêtes HTTP d'une session DSS"""
+
+    def __init__(self, inner: BaseAdapter):
+        super().__init__()
+        self.inner = inner
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        with self._lock:
+            self.count += 1
+        return self.inner.send(request, **kwargs)
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+def install_request_counter(session: Any) -> Optional[RequestCounter]:
+    """
+    Monte un RequestCounter sur une session (une seule fois par session).
+
+    Le compteur est global à la session : en cas d'usage concurrent du même
+    connecteur, les écarts mesurés incluent les appels des autres sessions.
+
+    Args:
+        session: requests.Session d'un DSSClient
+
+    Returns:
+        Compteur de la session, None si ce n'est pas une requests.Session
+    """
+    if not isinstance(session, requests.Session):
+        return None
+    existing = getattr(session, "_dku_request_counter", None)
+    if existing is not None:
+        return existing
+    counter = RequestCounter(session.get_adapter("https://"))
+    session.mount("https://", counter)
+    session.mount("http://", counter)
+    session._dku_request_counter = counter
+    return counter
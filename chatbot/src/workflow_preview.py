@@ -0,0 +1,351 @@
+"""
+workflow_preview.py - Aperçu local d'un workflow avant sa création dans DSS
+
+Exécute la spécification acceptée par WorkflowBuilder.create_workflow() sur
+des échantillons des datasets sources (lus une seule fois via src/api/datasets) :
+grouping et join en opérations pandas vectorisées, code Python dans un
+sous-processus isolé (voir preview_sandbox.py).
+
+Les échantillons sont gardés entre deux aperçus, par dataset et par
+empreinte (version DSS), dans un cache LRU borné dont les entrées expirent
+aussi après sample_ttl secondes (sources SQL modifiées hors de DSS).
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import tempfile
+import threading
+import subprocess
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from workflow_dag import WorkflowDAG, recipe_inputs
+
+logger = logging.getLogger(__name__)
+
+SANDBOX_SCRIPT = Path(__file__).resolve().parent / "preview_sandbox.py"
+
+# Fonctions d'agrégation DSS -> pandas
+AGGREGATIONS = {
+    "sum": "sum",
+    "avg": "mean",
+    "mean": "mean",
+    "min": "min",
+    "max": "max",
+    "count": "count",
+    "countdistinct": "nunique",
+    "nunique": "nunique",
+    "first": "first",
+    "last": "last",
+    "stddev": "std",
+    "std": "std",
+    "median": "median",
+}
+
+JOIN_TYPES = {"LEFT": "left", "INNER": "inner", "RIGHT": "right", "OUTER": "outer", "FULL": "outer"}
+
+
+class PreviewError(RuntimeError):
+    """Échec de l'aperçu d'une recette."""
+
+
+class WorkflowPreviewResult:
+    """Résultat de l'aperçu : DataFrames produits et nombres de lignes"""
+
+    def __init__(self):
+        self.frames: Dict[str, pd.DataFrame] = {}
+        self.row_counts: Dict[str, Dict[str, Any]] = {}
+        self.timings: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+
+    @property
+    def success(self) -> bool:
+        return self.error is None
+
+    def to_dict(self, max_rows: int = 5) -> Dict[str, Any]:
+        """
+        Résumé sérialisable en JSON (pour un résultat d'outil).
+
+        Args:
+            max_rows: Lignes d'exemple par dataset produit
+
+        Returns:
+            Dict avec success, datasets {nom: rows, columns, sample}, row_counts, timings
+        """
+        datasets = {
+            name: {
+                "rows": len(df),
+                "columns": [str(c) for c in df.columns],
+                "sample": json.loads(
+                    df.head(max_rows).to_json(orient="records", date_format="iso")
+                ),
+            }
+            for name, df in self.frames.items()
+        }
+        result = {
+            "success": self.success,
+            "datasets": datasets,
+            "row_counts": self.row_counts,
+            "timings": self.timings,
+        }
+        if self.error:
+            result["error"] = self.error
+        return result
+
+
+class WorkflowPreview:
+    """Exécute localement une spécification de workflow sur des échantillons"""
+
+    def __init__(
+        self,
+        connector: Any,
+        sample_size: Optional[int] = None,
+        python_timeout: float = 30.0,
+        memory_limit_mb: int = 1024,
+        max_samples: int = 32,
+        sample_ttl: float = 600.0
+    ):
+        """
+        Initialise le moteur d'aperçu.
+
+        Args:
+            connector: DataikuConnector (ou doublure exposant get_sample et
+                dataset_fingerprint)
+            sample_size: Lignes lues par dataset source (PREVIEW_SAMPLE_SIZE, défaut 1000)
+            python_timeout: Durée maximale d'une recette Python en secondes
+            memory_limit_mb: Mémoire maximale du sous-processus Python (POSIX)
+            max_samples: Nombre maximal d'échantillons gardés en cache
+            sample_ttl: Durée de validité d'un échantillon en secondes
+        """
+        self.connector = connector
+        self.sample_size = sample_size or int(os.getenv("PREVIEW_SAMPLE_SIZE", "1000"))
+        self.python_timeout = python_timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.max_samples = max_samples
+        self.sample_ttl = sample_ttl
+
+        # dataset -> (empreinte, date de lecture, échantillon), du moins au plus récent
+        self._samples: OrderedDict[str, Tuple[str, float, pd.DataFrame]] = OrderedDict()
+        self._samples_lock = threading.Lock()
+
+    def clear_cache(self) -> None:
+        """Oublie les échantillons lus (après modification des données sources)."""
+        with self._samples_lock:
+            self._samples.clear()
+
+    def preview_workflow(
+        self,
+        recipes: List[Dict[str, Any]],
+        output_dataset: str
+    ) -> WorkflowPreviewResult:
+        """
+        Exécute les recettes niveau par niveau sur des échantillons.
+
+        Args:
+            recipes: Recettes au format de create_workflow()
+            output_dataset: Sortie par défaut des recettes sans "output"
+
+        Returns:
+            WorkflowPreviewResult (error renseigné en cas d'échec)
+        """
+        result = WorkflowPreviewResult()
+        start = time.perf_counter()
+
+        try:
+            produced = {r.get("output", output_dataset) for r in recipes}
+            sources = sorted({ds for r in recipes for ds in recipe_inputs(r)} - produced)
+            dag = WorkflowDAG(recipes, output_dataset, sources)
+
+            stage_start = time.perf_counter()
+            frames = self._load_samples(sources)
+            result.timings["samples_s"] = round(time.perf_counter() - stage_start, 3)
+
+            for level in dag.levels:
+                for name in level:
+                    recipe_config = dag.recipes[name]
+                    output = dag.outputs[name]
+                    inputs = recipe_inputs(recipe_config)
+
+                    stage_start = time.perf_counter()
+                    df = self._run_recipe(recipe_config, {ds: frames[ds] for ds in inputs}, output)
+                    frames[output] = df
+                    result.frames[output] = df
+                    result.row_counts[name] = {
+                        "input_rows": {ds: len(frames[ds]) for ds in inputs},
+                        "output_rows": len(df),
+                    }
+                    result.timings[name] = round(time.perf_counter() - stage_start, 3)
+
+        except Exception as e:
+            logger.error(f"Erreur aperçu workflow : {e}")
+            result.error = str(e)
+
+        result.timings["total_s"] = round(time.perf_counter() - start, 3)
+        return result
+
+    def _load_samples(self, datasets: List[str]) -> Dict[str, pd.DataFrame]:
+        """Lit en parallèle les échantillons absents du cache, périmés ou expirés."""
+        if not datasets:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(8, len(datasets))) as pool:
+            fingerprints = dict(zip(datasets, pool.map(self.connector.dataset_fingerprint, datasets)))
+
+            now = time.monotonic()
+            frames = {}
+            with self._samples_lock:
+                for ds in datasets:
+                    entry = self._samples.get(ds)
+                    if entry and entry[0] == fingerprints[ds] and now - entry[1] < self.sample_ttl:
+                        self._samples.move_to_end(ds)
+                        frames[ds] = entry[2]
+            missing = [ds for ds in datasets if ds not in frames]
+
+            if missing:
+                loaded = dict(zip(missing, pool.map(
+                    lambda ds: self.connector.get_sample(ds, self.sample_size), missing
+                )))
+                frames.update(loaded)
+                with self._samples_lock:
+                    for ds, df in loaded.items():
+                        self._samples[ds] = (fingerprints[ds], now, df)
+                        self._samples.move_to_end(ds)
+                    while len(self._samples) > self.max_samples:
+                        self._samples.popitem(last=False)
+
+        return frames
+
+    def _run_recipe(
+        self,
+        recipe_config: Dict[str, Any],
+        inputs: Dict[str, pd.DataFrame],
+        output: str
+    ) -> pd.DataFrame:
+        """Exécute une recette selon son type."""
+        recipe_type = recipe_config["type"]
+        if recipe_type == "grouping":
+            return self._run_grouping(recipe_config, inputs[recipe_config["input"]])
+        elif recipe_type == "join":
+            return self._run_join(
+                recipe_config,
+                inputs[recipe_config["left"]],
+                inputs[recipe_config["right"]]
+            )
+        elif recipe_type == "python":
+            return self._run_python(recipe_config, inputs, output)
+        else:
+            raise PreviewError(f"Type de recette non supporté : {recipe_type}")
+
+    @staticmethod
+    def _run_grouping(recipe_config: Dict[str, Any], df: pd.DataFrame) -> pd.DataFrame:
+        """Grouping : agrégations nommées pandas."""
+        named = {}
+        for agg in recipe_config["aggregations"]:
+            function = AGGREGATIONS.get(str(agg["function"]).lower())
+            if function is None:
+                raise PreviewError(
+                    f"Recette {recipe_config['name']} : agrégation non supportée "
+                    f"en aperçu : {agg['function']}"
+                )
+            named[agg["output"]] = (agg["column"], function)
+
+        return df.groupby(recipe_config["group_by"], as_index=False, dropna=False).agg(**named)
+
+    @staticmethod
+    def _run_join(
+        recipe_config: Dict[str, Any],
+        left: pd.DataFrame,
+        right: pd.DataFrame
+    ) -> pd.DataFrame:
+        """
+        Join : fusion pandas, avec les préfixes left_ / right_ posés par
+        WorkflowBuilder.create_join_recipe().
+        """
+        join_type = recipe_config.get("join_type", "LEFT").upper()
+        how = JOIN_TYPES.get(join_type)
+        if how is None:
+            raise PreviewError(f"Type de join non supporté en aperçu : {join_type}")
+
+        keys = [tuple(pair) for pair in recipe_config["join_keys"]]
+        return pd.merge(
+            left.add_prefix("left_"),
+            right.add_prefix("right_"),
+            how=how,
+            left_on=[f"left_{left_key}" for left_key, _ in keys],
+            right_on=[f"right_{right_key}" for _, right_key in keys],
+        )
+
+    def _run_python(
+        self,
+        recipe_config: Dict[str, Any],
+        inputs: Dict[str, pd.DataFrame],
+        output: str
+    ) -> pd.DataFrame:
+        """
+        Python : exécute le code dans un sous-processus isolé.
+
+        Le sous-processus ne reçoit ni les clés DSS ni la clé Claude, est
+        limité en durée et (POSIX) en mémoire et CPU, ne lit que son
+        répertoire temporaire et l'installation Python (ni le dépôt ni .env),
+        sans réseau, et ne voit que les datasets déclarés de la recette. Sans code, la recette copie sa première entrée,
+        comme le template de WorkflowBuilder.
+        """
+        name = recipe_config["name"]
+        code = recipe_config.get("code")
+        if code is None:
+            return next(iter(inputs.values())).copy()
+
+        with tempfile.TemporaryDirectory(prefix="wf_preview_") as tmp:
+            workdir = Path(tmp)
+            files = {}
+            for i, (ds, df) in enumerate(inputs.items()):
+                files[ds] = f"input_{i}.parquet"
+                df.to_parquet(workdir / files[ds], index=False)
+            (workdir / "recipe.py").write_text(code, encoding="utf-8")
+            (workdir / "manifest.json").write_text(
+                json.dumps({
+                    "inputs": files,
+                    "outputs": [output],
+                    "limits": {"memory_mb": self.memory_limit_mb,
+                               "cpu_s": int(self.python_timeout) + 1},
+                }),
+                encoding="utf-8"
+            )
+
+            try:
+                proc = subprocess.run(
+                    [sys.executable, "-I", str(SANDBOX_SCRIPT), str(workdir)],
+                    cwd=workdir,
+                    env=self._sandbox_env(workdir),
+                    capture_output=True,
+                    text=True,
+                    timeout=self.python_timeout,
+                )
+            except subprocess.TimeoutExpired:
+                raise PreviewError(
+                    f"Recette {name} : délai de {self.python_timeout}s dépassé"
+                )
+
+            if proc.returncode != 0:
+                lines = proc.stderr.strip().splitlines()
+                raise PreviewError(f"Recette {name} : {lines[-1] if lines else proc.returncode}")
+
+            written = json.loads((workdir / "result.json").read_text(encoding="utf-8"))
+            if output not in written["outputs"]:
+                raise PreviewError(f"Recette {name} : aucune écriture dans {output}")
+            return pd.read_parquet(workdir / written["outputs"][output])
+
+    @staticmethod
+    def _sandbox_env(workdir: Path) -> Dict[str, str]:
+        """Environnement minimal du sous-processus (aucun secret hérité)."""
+        env = {"HOME": str(workdir), "TMPDIR": str(workdir)}
+        for key in ("PATH", "LANG", "SYSTEMROOT"):
+            if key in os.environ:
+                env[key] = os.environ[key]
+        return env
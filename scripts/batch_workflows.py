@@ -0,0 +1,89 @@
+"""
+batch_workflows.py - Création de workflows par lots depuis un fichier JSONL
+
+Chaque ligne du fichier d'entrée est une demande en langage naturel
+({"id", "prompt"}) ou une spécification create_workflow ({"id", "spec"}).
+Les résultats (statut, latence, tokens) sont ajoutés ligne par ligne au
+fichier de sortie ; relancer la même commande reprend là où le lot s'est
+arrêté.
+
+Usage :
+    python scripts/batch_workflows.py demandes.jsonl --concurrency 4
+    python scripts/batch_workflows.py demandes.jsonl --output resultats.jsonl --retry-failed
+    python scripts/batch_workflows.py demandes.jsonl --simulate
+"""
+
+import sys
+import json
+import argparse
+from pathlib import Path
+
+# Ajoute la racine du projet et chatbot/src au PYTHONPATH
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "chatbot" / "src"))
+
+from src.utils.logger import setup_logging
+from batch_runner import BatchRunner, load_requests, summarize_results
+from chat_handler import ChatHandler
+from workflow_builder import WorkflowBuilder
+
+logger = setup_logging("batch_workflows")
+
+
+def make_runner(args: argparse.Namespace) -> BatchRunner:
+    """Connecteur et client Claude partagés par tous les threads."""
+    if args.simulate:
+        from simulation import SimulatedAnthropic, SimulatedConnector
+        connector, client = SimulatedConnector(), SimulatedAnthropic()
+    else:
+        from dataiku_connector import get_connector
+        connector, client = get_connector(args.project), None
+
+    # Créé d'emblée : clé API absente détectée avant le premier thread
+    handlers = [ChatHandler(connector=connector, client=client, batch=True)]
+    shared_client = handlers[0].client
+
+    def handler_factory() -> ChatHandler:
+        try:
+            return handlers.pop()
+        except IndexError:
+            return ChatHandler(connector=connector, client=shared_client, batch=True)
+
+    return BatchRunner(handler_factory, WorkflowBuilder(connector), args.concurrency)
+
+
+def main(args: argparse.Namespace) -> int:
+    requests = load_requests(args.input)
+    output = args.output or args.input.with_suffix(".results.jsonl")
+    runner = make_runner(args)
+
+    def on_result(result: dict) -> None:
+        print(f"  [{result['status']:>6}] {result['id']} ({result['latency_s']:.1f} s)")
+
+    results = runner.run(requests, output, retry_failed=args.retry_failed, on_result=on_result)
+    summary = summarize_results(results)
+
+    print("\n  Lot de workflows")
+    print("  " + "-" * 40)
+    print(f"  Demandes traitées : {summary['count']} / {len(requests)}")
+    print(f"  Statuts           : {json.dumps(summary['by_status'])}")
+    if results:
+        print(f"  Latence p50 / p95 : {summary['p50_s']:.1f} s / {summary['p95_s']:.1f} s")
+    print(f"  Tokens            : {summary['input_tokens']} + {summary['output_tokens']}")
+    print(f"  Résultats         : {output}\n")
+    return 0 if all(r["status"] == "ok" for r in results) else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("input", type=Path, help="Fichier JSONL des demandes")
+    parser.add_argument("--output", type=Path, default=None,
+                        help="Fichier JSONL des résultats (défaut : <input>.results.jsonl)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--project", default=None, help="Clé du projet DSS (défaut : .env)")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="Rejoue les demandes en échec d'une exécution précédente")
+    parser.add_argument("--simulate", action="store_true",
+                        help="Doublures simulées de Claude et DSS (aucun appel réseau)")
+    sys.exit(main(parser.parse_args()))
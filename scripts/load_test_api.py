@@ -0,0 +1,141 @@
+"""
+load_test_api.py - Test de charge de l'API HTTP du chatbot
+
+Démarre api_server dans le processus (uvicorn, port local libre) avec des
+doublures simulées de Claude et DSS, puis ouvre N sessions simultanées qui
+envoient chacune plusieurs messages et lisent le flux SSE jusqu'à "done".
+
+Usage :
+    python scripts/load_test_api.py --sessions 200 --turns 3
+"""
+
+import ssl
+import sys
+import time
+import socket
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+
+import httpx
+import uvicorn
+
+# Ajoute la racine du projet et chatbot/src au PYTHONPATH
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "chatbot" / "src"))
+
+from api_server import HandlerPool, create_app
+from async_chat_handler import AsyncChatHandler
+from simulation import SimulatedAsyncAnthropic, SimulatedConnector
+
+
+# Contexte TLS partagé : httpx en charge un par client sinon (~40 ms chacun)
+SSL_CONTEXT = ssl.create_default_context()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run_session(
+    base_url: str,
+    turns: int,
+    latencies: list,
+    first_events: list,
+    errors: list
+) -> None:
+    """Crée une session, joue `turns` messages et mesure chaque tour."""
+    # Un client (une connexion) par utilisateur simulé : un pool httpx partagé
+    # par des centaines de flux devient le goulot du générateur de charge
+    async with httpx.AsyncClient(base_url=base_url, timeout=None, verify=SSL_CONTEXT) as client:
+        session_id = (await client.post("/sessions", json={})).json()["session_id"]
+        for i in range(turns):
+            await run_turn(client, session_id, i, latencies, first_events, errors)
+
+
+async def run_turn(
+    client: httpx.AsyncClient,
+    session_id: str,
+    i: int,
+    latencies: list,
+    first_events: list,
+    errors: list
+) -> None:
+    """Envoie un message et lit le flux SSE jusqu'à la fin."""
+    start = time.perf_counter()
+    first = None
+    async with client.stream(
+        "POST", f"/sessions/{session_id}/messages",
+        json={"content": f"Liste les datasets ({i})"}
+    ) as response:
+        if response.status_code != 200:
+            errors.append(response.status_code)
+            return
+        async for line in response.aiter_lines():
+            if first is None and line.startswith("event: "):
+                first = time.perf_counter() - start
+            if line == "event: error":
+                errors.append("error")
+    latencies.append(time.perf_counter() - start)
+    first_events.append(first or 0.0)
+
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[max(0, int(len(values) * q) - 1)]
+
+
+async def main(args: argparse.Namespace) -> None:
+    async def factory(project_key):
+        return AsyncChatHandler(
+            connector=SimulatedConnector(latency=args.dss_latency),
+            client=SimulatedAsyncAnthropic(latency=args.claude_latency),
+            max_dss_workers=args.dss_workers,
+        )
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(
+        create_app(HandlerPool(factory)), host="127.0.0.1", port=port, log_level="warning"
+    ))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    latencies: list = []
+    first_events: list = []
+    errors: list = []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        run_session(f"http://127.0.0.1:{port}", args.turns, latencies, first_events, errors)
+        for _ in range(args.sessions)
+    ))
+    elapsed = time.perf_counter() - start
+
+    server.should_exit = True
+    await server_task
+
+    print("\n  Test de charge de l'API HTTP (SSE)")
+    print("  " + "-" * 40)
+    print(f"  Sessions simultanées : {args.sessions}")
+    print(f"  Tours par session    : {args.turns}")
+    print(f"  Durée totale         : {elapsed:.2f} s")
+    print(f"  Débit                : {args.sessions / elapsed:.1f} sessions/s, "
+          f"{len(latencies) / elapsed:.1f} tours/s")
+    print(f"  Latence p50          : {statistics.median(latencies) * 1000:.0f} ms")
+    print(f"  Latence p99          : {percentile(latencies, 0.99) * 1000:.0f} ms")
+    print(f"  1er événement p50    : {statistics.median(first_events) * 1000:.0f} ms")
+    print(f"  Erreurs              : {len(errors)}\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--claude-latency", type=float, default=0.5)
+    parser.add_argument("--dss-latency", type=float, default=0.05)
+    parser.add_argument("--dss-workers", type=int, default=32)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,75 @@
+"""
+load_test_async.py - Test de charge de AsyncChatHandler
+
+Lance N conversations simultanées dans un seul processus, contre des
+doublures simulées de Claude et DSS (aucun appel réseau), et mesure le débit.
+
+Usage :
+    python scripts/load_test_async.py --sessions 50 --turns 3
+"""
+
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+
+# Ajoute la racine du projet et chatbot/src au PYTHONPATH
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "chatbot" / "src"))
+
+from async_chat_handler import AsyncChatHandler
+from simulation import SimulatedAsyncAnthropic, SimulatedConnector
+
+
+async def run_session(handler: AsyncChatHandler, turns: int, latencies: list) -> None:
+    """Joue une conversation de `turns` messages et enregistre la latence de chacun."""
+    history = []
+    for i in range(turns):
+        start = time.perf_counter()
+        _, history = await handler.aprocess_message(f"Liste les datasets ({i})", history)
+        latencies.append(time.perf_counter() - start)
+
+
+async def main(args: argparse.Namespace) -> None:
+    connector = SimulatedConnector(latency=args.dss_latency)
+    handler = AsyncChatHandler(
+        connector=connector,
+        client=SimulatedAsyncAnthropic(latency=args.claude_latency),
+        max_dss_workers=args.dss_workers,
+    )
+
+    latencies: list = []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        run_session(handler, args.turns, latencies) for _ in range(args.sessions)
+    ))
+    elapsed = time.perf_counter() - start
+    await handler.aclose()
+
+    total_turns = args.sessions * args.turns
+    # Un tour simulé = 2 appels Claude + list_datasets (1 listing + 1 schéma par dataset)
+    serial_turn = 2 * args.claude_latency + (1 + len(connector.datasets)) * args.dss_latency
+    latencies.sort()
+
+    print("\n  Test de charge AsyncChatHandler")
+    print("  " + "-" * 40)
+    print(f"  Sessions simultanées : {args.sessions}")
+    print(f"  Tours par session    : {args.turns}")
+    print(f"  Durée totale         : {elapsed:.2f} s")
+    print(f"  Débit                : {total_turns / elapsed:.1f} tours/s")
+    print(f"  Latence p50          : {statistics.median(latencies) * 1000:.0f} ms")
+    print(f"  Latence p99          : {latencies[int(len(latencies) * 0.99) - 1] * 1000:.0f} ms")
+    print(f"  Équivalent séquentiel: {serial_turn * total_turns:.2f} s\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--claude-latency", type=float, default=0.5)
+    parser.add_argument("--dss-latency", type=float, default=0.05)
+    parser.add_argument("--dss-workers", type=int, default=32)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,99 @@
+"""
+profile_chatbot.py - Profilage du chatbot sur une cassette enregistrée
+
+Enregistre une session réelle (Claude + DSS) dans une cassette, puis la rejoue
+hors ligne autant de fois que nécessaire, sous cProfile si demandé.
+
+Usage :
+    # 1. Enregistrement (réseau réel, .env requis)
+    python scripts/profile_chatbot.py --mode record --cassette cassettes/demo.json.gz \\
+        --message "Liste les datasets"
+
+    # 2. Rejeu hors ligne, latence d'origine, profilage
+    python scripts/profile_chatbot.py --mode replay --cassette cassettes/demo.json.gz \\
+        --message "Liste les datasets" --repeat 20 --latency-scale 1 --profile
+
+    # Création de workflow depuis une spec JSON (arguments de create_workflow)
+    python scripts/profile_chatbot.py --mode replay --cassette cassettes/wf.json.gz \\
+        --workflow specs/aggregation.json
+"""
+
+import os
+import sys
+import json
+import time
+import pstats
+import cProfile
+import argparse
+import statistics
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "chatbot" / "src"))
+
+from dotenv import load_dotenv
+
+from src.utils.logger import setup_logging
+from chat_handler import ChatHandler
+from replay import REPLAY, use_cassette
+
+logger = setup_logging("profile_chatbot")
+
+
+def run_scenario(args: argparse.Namespace, cassette) -> list:
+    """Joue le scénario demandé `repeat` fois et retourne les durées."""
+    handler = ChatHandler(args.project_key, client=cassette.anthropic_client())
+    spec = json.loads(Path(args.workflow).read_text(encoding="utf-8")) if args.workflow else None
+
+    durations = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        if spec is not None:
+            result = handler.builder.create_workflow(**spec)
+            if not result["success"]:
+                logger.error("Échec du workflow : %s", result["error"])
+        else:
+            handler.process_message(args.message, [])
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def main(args: argparse.Namespace) -> None:
+    load_dotenv(ROOT / ".env")
+    load_dotenv(ROOT / "chatbot" / ".env")
+    if args.mode == REPLAY:
+        # Hors ligne : seules des valeurs factices sont nécessaires
+        os.environ.setdefault("DSS_URL", "https://dss.replay")
+        os.environ.setdefault("DSS_API_KEY", "replay")
+    # Résolu après le chargement du .env, pour que sa valeur soit prise en compte
+    args.project_key = args.project_key or os.getenv("DSS_PROJECT_KEY", "TEST_WORKFLOW")
+
+    profiler = cProfile.Profile() if args.profile else None
+    with use_cassette(args.cassette, mode=args.mode, latency_scale=args.latency_scale) as cassette:
+        if profiler:
+            profiler.enable()
+        durations = run_scenario(args, cassette)
+        if profiler:
+            profiler.disable()
+
+    print(f"\n  {args.mode} : {len(durations)} exécution(s)")
+    print(f"  Durée médiane : {statistics.median(durations) * 1000:.0f} ms")
+    print(f"  Durée max     : {max(durations) * 1000:.0f} ms\n")
+
+    if profiler:
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(args.top)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profilage du chatbot par cassette")
+    parser.add_argument("--mode", choices=["record", "replay"], default="replay")
+    parser.add_argument("--cassette", required=True)
+    parser.add_argument("--project-key", help="Projet DSS (défaut : DSS_PROJECT_KEY du .env)")
+    parser.add_argument("--message", default="Liste les datasets disponibles")
+    parser.add_argument("--workflow", help="Spec JSON passée à create_workflow()")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--latency-scale", type=float, default=0.0)
+    parser.add_argument("--profile", action="store_true")
+    parser.add_argument("--top", type=int, default=25)
+    main(parser.parse_args())
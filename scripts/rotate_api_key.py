@@ -2,45 +2,124 @@
 rotate_api_key.py - Rotation sécurisée de la clé API Dataiku
 
 Bonne pratique de sécurité : renouvelez régulièrement votre clé API.
-Ce script génère une nouvelle clé via l'API DSS et met à jour le .env.
+Ce script génère une nouvelle clé via l'API DSS, vérifie qu'elle fonctionne,
+l'écrit dans sa source (.env ou DSS_API_KEY_FILE), laisse aux processus en
+cours le temps de la recharger (voir src/api/credentials.py), puis révoque
+l'ancienne clé. Si la nouvelle clé ne fonctionne pas ou ne peut pas être
+publiée, elle est supprimée et rien n'est modifié ; l'ancienne clé n'est
+révoquée qu'après avoir relu la nouvelle dans sa source.
 
 Usage :
     python scripts/rotate_api_key.py
+    python scripts/rotate_api_key.py --grace 60 --keep-old
 
 IMPORTANT : Nécessite que l'utilisateur DSS ait les droits de gestion des clés API.
 """
 
-import sys
+import os
 import re
+import sys
+import time
+import argparse
+import tempfile
+from datetime import date
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
+import dataikuapi
 from dotenv import load_dotenv
 from src.api.client import get_client, get_config
+from src.api.credentials import credentials_source, default_check_interval, read_key
 from src.utils.logger import setup_logging
 
 logger = setup_logging("rotate_api_key")
 
 
-def update_env_file(new_key: str, env_path: Path) -> None:
-    """Met à jour DSS_API_KEY dans le fichier .env sans toucher aux autres variables."""
+def write_atomically(path: Path, content: str) -> None:
+    """Remplace le fichier d'un coup : un lecteur voit l'ancienne ou la nouvelle version."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+        if path.exists():
+            os.chmod(tmp, path.stat().st_mode & 0o777)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def update_env_file(new_key: str, env_path: Path, variable: str = "DSS_API_KEY") -> None:
+    """
+    Met à jour la clé dans le fichier .env sans toucher aux autres variables.
+
+    Raises:
+        RuntimeError: Si la variable est absente du fichier (rien n'est écrit).
+    """
     content = env_path.read_text(encoding="utf-8")
-    updated = re.sub(
-        r"^DSS_API_KEY=.*$",
-        f"DSS_API_KEY={new_key}",
+    updated, count = re.subn(
+        rf"^([ \t]*(?:export[ \t]+)?){re.escape(variable)}[ \t]*=.*$",
+        # Fonction : une clé contenant « \ » n'est pas interprétée comme motif
+        lambda match: f"{match.group(1)}{variable}={new_key}",
         content,
         flags=re.MULTILINE,
     )
-    env_path.write_text(updated, encoding="utf-8")
-    logger.info(".env mis à jour avec la nouvelle clé API.")
-
-
-def rotate_api_key() -> None:
-    """Crée une nouvelle clé API DSS et met à jour le .env."""
+    if count == 0:
+        raise RuntimeError(f"{variable} absente de {env_path} : fichier non modifié.")
+    write_atomically(env_path, updated)
+    logger.info("%s mis à jour avec la nouvelle clé API.", env_path)
+
+
+def delete_key(client: dataikuapi.DSSClient, key_id: str) -> None:
+    """Supprime la nouvelle clé après un échec : l'ancienne reste la seule active."""
+    client.get_personal_api_key(key_id).delete()
+    logger.error("Nouvelle clé supprimée ; l'ancienne clé reste active.")
+
+
+def verify_key(url: str, api_key: str, login: str, ssl_verify: bool, attempts: int = 5) -> None:
+    """
+    Vérifie qu'une clé authentifie bien l'utilisateur attendu.
+
+    La clé peut mettre quelques secondes à être active sur tous les nœuds :
+    plusieurs essais espacés avant d'abandonner.
+
+    Raises:
+        RuntimeError: Si la clé ne fonctionne pas après tous les essais.
+    """
+    client = dataikuapi.DSSClient(url, api_key=api_key, no_check_certificate=not ssl_verify)
+    for attempt in range(1, attempts + 1):
+        try:
+            identity = client.get_auth_info().get("authIdentifier")
+            if identity != login:
+                raise RuntimeError(f"la clé authentifie « {identity} » au lieu de « {login} »")
+            logger.info("Nouvelle clé vérifiée (essai %d).", attempt)
+            return
+        except Exception as exc:
+            if attempt == attempts:
+                raise RuntimeError(f"Nouvelle clé refusée par DSS : {exc}") from exc
+            time.sleep(2 ** (attempt - 1))
+
+
+def revoke_key(client: dataikuapi.DSSClient, old_key: str) -> bool:
+    """Supprime la clé personnelle old_key (False si introuvable)."""
+    for key in client.list_personal_api_keys(as_type="objects"):
+        if key.key == old_key:
+            key.delete()
+            return True
+    return False
+
+
+def rotate_api_key(grace: float, keep_old: bool) -> None:
+    """Crée une nouvelle clé, la vérifie, la publie, puis révoque l'ancienne."""
     load_dotenv()
     config = get_config()
     client = get_client()
+    old_key = config.api_key
+
+    path, variable = credentials_source()
+    if path is None:
+        raise RuntimeError("Aucun fichier .env ni DSS_API_KEY_FILE : rien à mettre à jour.")
 
     # Récupère l'utilisateur courant
     auth_info = client.get_auth_info()
@@ -50,25 +129,52 @@ def rotate_api_key() -> None:
 
     logger.info("Rotation de la clé API pour l'utilisateur : %s", user_login)
 
-    # Crée une nouvelle clé API
-    user = client.get_user(user_login)
-    new_key_obj = user.create_personal_api_key(label="VS Code - auto-rotated")
-    new_key = new_key_obj["key"]
-
-    # Met à jour le .env
-    env_path = Path(__file__).resolve().parents[1] / ".env"
-    if env_path.exists():
-        update_env_file(new_key, env_path)
-        print(f"\n  Nouvelle clé API créée et sauvegardée dans .env")
-        print(f"  Ancienne clé toujours active — supprimez-la manuellement dans DSS.")
+    # Crée une nouvelle clé API et la vérifie avant toute modification
+    created = client.create_personal_api_key(label=f"VS Code - auto-rotated {date.today()}")
+    new_key = created["key"]
+    try:
+        verify_key(config.url, new_key, user_login, config.ssl_verify)
+        # Publie la clé : les processus en cours la rechargent (date de modification)
+        if variable is None:
+            write_atomically(Path(path), new_key + "\n")
+        else:
+            update_env_file(new_key, Path(path), variable)
+    except Exception:
+        delete_key(client, created["id"])
+        raise
+
+    if keep_old:
+        print("\n  Nouvelle clé API vérifiée et enregistrée.")
+        print("  Ancienne clé conservée (--keep-old) — supprimez-la dans DSS après vérification.")
+        return
+
+    logger.info("Attente de %.0f s avant révocation (rechargement des processus).", grace)
+    time.sleep(grace)
+
+    # Source relue juste avant la révocation : écriture perdue ou fichier
+    # modifié entre-temps, l'ancienne clé est peut-être encore la seule publiée
+    if read_key(Path(path), variable) != new_key:
+        delete_key(client, created["id"])
+        raise RuntimeError(f"{path} ne contient pas la nouvelle clé : ancienne clé conservée.")
+    new_client = dataikuapi.DSSClient(
+        config.url, api_key=new_key, no_check_certificate=not config.ssl_verify
+    )
+    if revoke_key(new_client, old_key):
+        print("\n  Nouvelle clé API vérifiée et enregistrée ; ancienne clé révoquée.")
     else:
-        print(f"\n  Nouvelle clé API : {new_key}")
-        print("  ATTENTION : Ajoutez-la dans votre .env manuellement (fichier .env introuvable).")
+        print("\n  Nouvelle clé API vérifiée et enregistrée.")
+        print("  Ancienne clé introuvable parmi vos clés personnelles — supprimez-la manuellement.")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--grace", type=float, default=3 * default_check_interval(),
+                        help="Secondes entre la publication et la révocation de l'ancienne clé")
+    parser.add_argument("--keep-old", action="store_true",
+                        help="Ne révoque pas l'ancienne clé")
+    args = parser.parse_args()
     try:
-        rotate_api_key()
+        rotate_api_key(args.grace, args.keep_old)
     except Exception as exc:
         logger.error("Échec de la rotation : %s", exc)
         sys.exit(1)
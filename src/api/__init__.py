@@ -1,17 +1,51 @@
 """Package api - Accès à Dataiku DSS."""
 
-from .client import get_client, get_project, get_config
+from .client import (
+    get_client,
+    get_project,
+    get_config,
+    add_transport_layer,
+    remove_transport_layer,
+    get_node_pool,
+)
+from .credentials import CredentialProvider, get_credentials
+from .nodes import replica_reads
+from .throttle import get_throttle
+from .singleflight import single_flight_stats
 from .projects import list_projects, get_project_summary, list_datasets
-from .datasets import get_dataset_as_dataframe, push_dataframe_to_dataset, get_dataset_schema
+from .datasets import (
+    get_dataset_as_dataframe,
+    push_dataframe_to_dataset,
+    get_dataset_schema,
+    preview_dataset,
+)
+from .lineage import LineageGraph, RebuildPlan, get_lineage, invalidate_lineage, plan_rebuild
+from .profiling import invalidate_profiles, profile_dataset
 
 __all__ = [
     "get_client",
     "get_project",
     "get_config",
+    "add_transport_layer",
+    "remove_transport_layer",
+    "get_node_pool",
+    "replica_reads",
+    "CredentialProvider",
+    "get_credentials",
+    "get_throttle",
+    "single_flight_stats",
     "list_projects",
     "get_project_summary",
     "list_datasets",
     "get_dataset_as_dataframe",
     "push_dataframe_to_dataset",
     "get_dataset_schema",
+    "preview_dataset",
+    "LineageGraph",
+    "RebuildPlan",
+    "get_lineage",
+    "invalidate_lineage",
+    "plan_rebuild",
+    "profile_dataset",
+    "invalidate_profiles",
 ]
@@ -0,0 +1,70 @@
+"""
+cache.py - Cache borné des résultats calculés sur un dataset
+
+Une entrée est servie tant que l'empreinte du dataset (voir
+datasets.dataset_fingerprint) n'a pas changé et qu'elle a moins de ttl
+secondes : l'empreinte ne voit pas les données d'une table SQL source
+modifiées hors de DSS. Au-delà de max_entries, l'entrée la moins récemment
+lue est évincée (LRU).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any, Optional
+
+
+class FingerprintCache:
+    """Cache LRU thread-safe, validé par empreinte et par durée."""
+
+    def __init__(self, max_entries: int = 256):
+        """
+        Args:
+            max_entries: Nombre maximal d'entrées gardées.
+        """
+        self.max_entries = max_entries
+        # clé -> (empreinte, date d'écriture, valeur), de la moins à la plus récemment lue
+        self._entries: OrderedDict[Hashable, tuple[str, float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, fingerprint: str, ttl: float) -> Optional[Any]:
+        """
+        Valeur en cache, ou None si absente, périmée ou expirée.
+
+        Args:
+            key: Clé de l'entrée.
+            fingerprint: Empreinte courante du dataset.
+            ttl: Âge maximal de l'entrée en secondes.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] != fingerprint or time.monotonic() - entry[1] >= ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[2]
+
+    def put(self, key: Hashable, fingerprint: str, value: Any) -> None:
+        """Enregistre une valeur et évince les entrées en trop."""
+        with self._lock:
+            self._entries[key] = (fingerprint, time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, predicate: Callable[[Hashable], bool]) -> None:
+        """Retire les entrées dont la clé vérifie predicate."""
+        with self._lock:
+            for key in [k for k in self._entries if predicate(k)]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -2,17 +2,26 @@
 client.py - Connexion sécurisée à Dataiku DSS via API
 
 Ce module charge les credentials depuis .env (jamais en dur dans le code)
-et expose un client réutilisable dans tout le projet.
+et expose un client réutilisable dans tout le projet. La clé API est lue à
+chaque requête depuis credentials.get_credentials() : une rotation est prise
+en compte sans recréer les clients. Si DSS_READ_URLS est défini, les lectures
+sont réparties entre ces nœuds (voir nodes.py). Toutes les requêtes passent
+par le limiteur de débit et de concurrence du processus (voir throttle.py).
 """
 
 import os
 import logging
 from functools import lru_cache
-from typing import Optional
+from typing import Callable, List, Optional
 
 import dataikuapi
 from dataikuapi.dss.project import DSSProject
 from dotenv import load_dotenv
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+from .credentials import CredentialAuth, get_credentials
+from .nodes import LATENCY, NodePool, NodeRouter
+from .throttle import ThrottledAdapter, get_throttle
 
 # Charger le fichier .env depuis la racine du projet
 load_dotenv()
@@ -29,6 +38,10 @@ class DataikuConfig:
         self.project_key: str = os.getenv("DSS_PROJECT_KEY", "")
         self.ssl_verify: bool = os.getenv("DSS_SSL_VERIFY", "true").lower() == "true"
         self.timeout: int = int(os.getenv("DSS_TIMEOUT", "30"))
+        self.read_urls: List[str] = [
+            url.strip() for url in os.getenv("DSS_READ_URLS", "").split(",") if url.strip()
+        ]
+        self.read_strategy: str = os.getenv("DSS_READ_STRATEGY", LATENCY)
 
     @staticmethod
     def _require(key: str) -> str:
@@ -43,8 +56,77 @@ class DataikuConfig:
 
 @lru_cache(maxsize=1)
 def get_config() -> DataikuConfig:
-    """Retourne la configuration (singleton mis en cache)."""
-    return DataikuConfig()
+    """Retourne la configuration (singleton mis en cache, clé API tenue à jour)."""
+    config = DataikuConfig()
+    credentials = get_credentials()
+    config.api_key = credentials.api_key
+
+    def update(key: str) -> None:
+        config.api_key = key
+
+    credentials.on_change(update)
+    return config
+
+
+@lru_cache(maxsize=1)
+def get_node_pool() -> Optional[NodePool]:
+    """
+    Retourne les nœuds DSS partagés par les clients (None sans DSS_READ_URLS).
+
+    L'état des nœuds (latences, exclusions) est commun à tous les clients du
+    processus.
+    """
+    config = get_config()
+    if not config.read_urls:
+        return None
+    logger.info("Lectures réparties sur %d nœud(s) DSS (%s).",
+                len(config.read_urls), config.read_strategy)
+    return NodePool(config.url, config.read_urls, strategy=config.read_strategy)
+
+
+# ---------------------------------------------------------------------------
+# Couches de transport HTTP
+# ---------------------------------------------------------------------------
+
+# Chaque couche reçoit l'adapter sous-jacent et retourne un adapter qui l'enveloppe
+# (enregistrement, rejeu, routage, limitation de débit...).
+TransportLayer = Callable[[BaseAdapter], BaseAdapter]
+
+_transport_layers: List[TransportLayer] = []
+
+
+def add_transport_layer(layer: TransportLayer) -> None:
+    """
+    Ajoute une couche de transport aux sessions des clients créés ensuite.
+
+    Les couches sont empilées dans l'ordre d'ajout : la dernière ajoutée
+    voit passer la requête en premier.
+
+    Args:
+        layer: Fonction adapter_sous_jacent -> adapter.
+    """
+    _transport_layers.append(layer)
+
+
+def remove_transport_layer(layer: TransportLayer) -> None:
+    """Retire une couche ajoutée par add_transport_layer (sans effet si absente)."""
+    if layer in _transport_layers:
+        _transport_layers.remove(layer)
+
+
+def _mount_transport_layers(client: dataikuapi.DSSClient) -> None:
+    """Monte la pile de couches de transport sur la session HTTP du client."""
+    pool = get_node_pool()
+    adapter: BaseAdapter = HTTPAdapter()
+    # Routage au plus près du réseau : les autres couches voient l'URL du nœud de design
+    if pool is not None:
+        adapter = NodeRouter(pool, adapter)
+    # Limiteur commun à tous les clients ; un rejeu de cassette ne le traverse pas
+    adapter = ThrottledAdapter(get_throttle(), adapter)
+    for layer in _transport_layers:
+        adapter = layer(adapter)
+    client._session.mount("https://", adapter)
+    client._session.mount("http://", adapter)
 
 
 def get_client() -> dataikuapi.DSSClient:
@@ -66,6 +148,8 @@ def get_client() -> dataikuapi.DSSClient:
         host=config.url,
         api_key=config.api_key,
     )
+    # Clé lue à chaque requête : suit les rotations sans recréer le client
+    client._session.auth = CredentialAuth(get_credentials(), client._session)
 
     # Désactiver la vérification SSL uniquement si explicitement demandé
     if not config.ssl_verify:
@@ -74,6 +158,8 @@ def get_client() -> dataikuapi.DSSClient:
         )
         client._session.verify = False
 
+    _mount_transport_layers(client)
+
     # Test de connectivité rapide
     try:
         client.get_auth_info()
@@ -0,0 +1,199 @@
+"""
+credentials.py - Clé API DSS rechargée à chaud
+
+La clé n'est plus figée à la création des clients : chaque requête lit la clé
+courante d'un CredentialProvider, qui surveille sa source (fichier .env ou
+fichier secret contenant la seule clé) par sa date de modification. Après une
+rotation, les clients déjà créés (connecteurs partagés, pools) utilisent la
+nouvelle clé dès la requête suivante ; une requête partie avec l'ancienne clé
+et refusée (401) est rejouée une fois avec la nouvelle.
+"""
+
+import logging
+import os
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from dotenv import dotenv_values, find_dotenv
+from requests import PreparedRequest, Response, Session
+from requests.auth import AuthBase, HTTPBasicAuth
+
+logger = logging.getLogger(__name__)
+
+
+def default_check_interval() -> float:
+    """Intervalle minimal entre deux vérifications de la source (DSS_CREDENTIALS_CHECK_INTERVAL)."""
+    return float(os.getenv("DSS_CREDENTIALS_CHECK_INTERVAL", "5"))
+
+
+def read_key(path: Path, variable: Optional[str] = "DSS_API_KEY") -> Optional[str]:
+    """
+    Clé lue dans un fichier source (None si absente).
+
+    Args:
+        path: Fichier .env, ou fichier secret contenant uniquement la clé.
+        variable: Variable lue dans le fichier .env ; None pour un fichier secret.
+    """
+    if variable is None:
+        return Path(path).read_text(encoding="utf-8").strip() or None
+    return dotenv_values(path).get(variable) or None
+
+
+class CredentialProvider:
+    """Clé API courante, relue quand son fichier change (thread-safe)."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        variable: Optional[str] = "DSS_API_KEY",
+        initial: Optional[str] = None,
+        check_interval: Optional[float] = None,
+    ):
+        """
+        Args:
+            path: Fichier source (.env, ou fichier secret) ; clé fixe si None.
+            variable: Variable lue dans le fichier .env ; None si le fichier
+                contient uniquement la clé.
+            initial: Clé utilisée tant que le fichier n'en fournit pas.
+            check_interval: Secondes entre deux lectures de la date de
+                modification (default_check_interval() si None).
+        """
+        self.path = Path(path) if path else None
+        self.variable = variable
+        self.check_interval = default_check_interval() if check_interval is None else check_interval
+        self.version = 0
+        self._key = initial
+        self._stamp: Optional[tuple] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[str], None]] = []
+        self.refresh(force=True)
+        if not self._key:
+            raise OSError(
+                f"Clé API introuvable ({self.path or 'aucune source'}). "
+                "Vérifiez votre fichier .env (copiez .env.example)."
+            )
+
+    @property
+    def api_key(self) -> str:
+        """Clé courante (source relue au plus toutes les check_interval secondes)."""
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            self.refresh()
+        return self._key
+
+    def on_change(self, listener: Callable[[str], None]) -> None:
+        """Appelle listener(nouvelle_clé) après chaque changement de clé."""
+        self._listeners.append(listener)
+
+    def refresh(self, force: bool = False) -> str:
+        """
+        Relit la source si sa date de modification a changé.
+
+        Args:
+            force: Vérifie immédiatement, sans attendre check_interval.
+
+        Returns:
+            La clé courante.
+        """
+        with self._lock:
+            if not force and time.monotonic() - self._checked_at < self.check_interval:
+                return self._key
+            self._checked_at = time.monotonic()
+            if self.path is None:
+                return self._key
+            try:
+                stat = self.path.stat()
+            except FileNotFoundError:
+                return self._key
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            if stamp == self._stamp:
+                return self._key
+            self._stamp = stamp
+
+            key = self._read()
+            if not key or key == self._key:
+                return self._key
+            first = self._key is None
+            self._key = key
+            self.version += 1
+            listeners = list(self._listeners)
+
+        if not first:
+            logger.info("Nouvelle clé API DSS chargée depuis %s.", self.path)
+        for listener in listeners:
+            listener(key)
+        return key
+
+    def _read(self) -> Optional[str]:
+        """Clé lue dans le fichier (None si absente)."""
+        return read_key(self.path, self.variable)
+
+
+class CredentialAuth(AuthBase):
+    """Authentification requests lisant la clé courante à chaque requête."""
+
+    def __init__(self, provider: CredentialProvider, session: Optional[Session] = None):
+        """
+        Args:
+            provider: Source de la clé courante.
+            session: Session qui porte cette authentification. Le rejeu après
+                un 401 repasse par ses adaptateurs montés (limiteur, routage
+                des nœuds) ; sans session, il part directement sur la
+                connexion de la réponse refusée.
+        """
+        self.provider = provider
+        self.session = session
+
+    def __call__(self, request: PreparedRequest) -> PreparedRequest:
+        HTTPBasicAuth(self.provider.api_key, "")(request)
+        request.register_hook("response", self._retry_on_401)
+        return request
+
+    def _retry_on_401(self, response: Response, **kwargs) -> Response:
+        """Rejoue une fois une requête refusée si une clé plus récente existe."""
+        request = response.request
+        if response.status_code != 401 or getattr(request, "_credentials_retry", False):
+            return response
+        # Corps non rejouable (flux d'upload) : l'erreur est remontée telle quelle
+        if request.body is not None and not isinstance(request.body, (bytes, str)):
+            return response
+
+        retry = request.copy()
+        HTTPBasicAuth(self.provider.refresh(force=True), "")(retry)
+        if retry.headers["Authorization"] == request.headers.get("Authorization"):
+            return response
+
+        logger.info("Requête refusée avec l'ancienne clé API : nouvel essai avec la clé courante.")
+        retry._credentials_retry = True
+        response.content  # libère la connexion
+        response.close()
+        if self.session is not None:
+            new_response = self.session.send(retry, **kwargs)
+        else:
+            new_response = response.connection.send(retry, **kwargs)
+        new_response.history.append(response)
+        new_response.request = retry
+        return new_response
+
+
+def credentials_source() -> tuple:
+    """
+    Source de la clé : DSS_API_KEY_FILE (fichier secret), sinon le .env.
+
+    Returns:
+        Tuple (chemin ou None, variable ou None).
+    """
+    key_file = os.getenv("DSS_API_KEY_FILE")
+    if key_file:
+        return key_file, None
+    return find_dotenv(usecwd=True) or None, "DSS_API_KEY"
+
+
+@lru_cache(maxsize=1)
+def get_credentials() -> CredentialProvider:
+    """Retourne le fournisseur de clé API du processus (singleton)."""
+    path, variable = credentials_source()
+    return CredentialProvider(path, variable, initial=os.getenv("DSS_API_KEY"))
@@ -5,15 +5,25 @@ Permet de récupérer des données depuis DSS sous forme de
 pandas DataFrame, et d'y repousser des résultats.
 """
 
+import hashlib
+import json
 import logging
-from typing import Optional
+import os
+from itertools import islice
+from typing import Any, Optional
 
 import pandas as pd
 
+from .cache import FingerprintCache
 from .client import get_project
+from .nodes import replica_reads
+from .singleflight import single_flight
 
 logger = logging.getLogger(__name__)
 
+# Aperçus par (projet, dataset, colonnes, budgets) ; durée de validité : PREVIEW_CACHE_TTL
+_preview_cache = FingerprintCache(max_entries=256)
+
 
 def get_dataset_as_dataframe(
     dataset_name: str,
@@ -46,7 +56,20 @@ def get_dataset_as_dataframe(
         f" (limite : {limit} lignes)" if limit else "",
     )
 
-    df = dataset.get_dataframe(limit=limit, infer_types=infer_types)
+    # Lecture en flux : DSSDataset n'a pas de get_dataframe, et la réponse est
+    # fermée dès que la limite est atteinte
+    columns = [col["name"] for col in dataset.get_schema()["columns"]]
+    stream = dataset.iter_rows()
+    try:
+        rows = list(islice(stream, limit) if limit else stream)
+    finally:
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
+
+    df = pd.DataFrame.from_records(rows, columns=columns)
+    if infer_types:
+        df = df.infer_objects()
     logger.info("Dataset chargé : %d lignes × %d colonnes.", *df.shape)
     return df
 
@@ -89,6 +112,7 @@ def push_dataframe_to_dataset(
     logger.info("Dataset '%s' mis à jour avec succès.", dataset_name)
 
 
+@single_flight
 def get_dataset_schema(
     dataset_name: str,
     project_key: Optional[str] = None,
@@ -102,6 +126,8 @@ def get_dataset_schema(
 
     Returns:
         Dict avec la liste des colonnes et leurs types DSS.
+
+    Les appels simultanés pour le même dataset partagent une seule requête.
     """
     project = get_project(project_key)
     dataset = project.get_dataset(dataset_name)
@@ -111,3 +137,119 @@ def get_dataset_schema(
         dataset_name, len(schema["columns"]),
     )
     return schema
+
+
+def dataset_fingerprint(dataset: Any) -> str:
+    """
+    Empreinte d'un dataset : change dès que ses données ou son schéma changent.
+
+    Args:
+        dataset: DSSDataset.
+
+    Returns:
+        Empreinte hexadécimale (sha1 tronqué).
+    """
+    raw = dataset.get_info().get_raw()
+    definition = raw.get("dataset", {})
+    version = definition.get("versionTag", {})
+    build = raw.get("lastBuild", {})
+    payload = {
+        "version": version.get("versionNumber"),
+        "modified": version.get("lastModifiedOn"),
+        "build": build.get("buildEndTime"),
+        "schema": definition.get("schema", {}).get("columns"),
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def _preview_cell(value: Any, max_chars: int) -> Any:
+    """Cellule sérialisable en JSON, texte tronqué à max_chars caractères."""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    text = str(value)
+    return text if len(text) <= max_chars else text[:max_chars] + "…"
+
+
+@replica_reads()
+def preview_dataset(
+    dataset_name: str,
+    project_key: Optional[str] = None,
+    columns: Optional[list[str]] = None,
+    max_rows: int = 20,
+    max_bytes: int = 8_000,
+    max_cell_chars: int = 100,
+    refresh: bool = False,
+) -> dict[str, Any]:
+    """
+    Retourne quelques lignes d'un dataset, dans un budget de lignes et d'octets.
+
+    Une seule requête de lecture en flux : DSS ne renvoie que les colonnes
+    demandées et la lecture s'arrête dès que le budget est atteint (premières
+    lignes du dataset). Le résultat est mis en cache par version du dataset,
+    PREVIEW_CACHE_TTL secondes au plus (défaut 600 : données d'une table
+    source modifiées hors de DSS). Lecture servie par les nœuds en lecture
+    s'ils sont configurés (voir nodes.replica_reads).
+
+    Args:
+        dataset_name: Nom du dataset.
+        project_key: Clé du projet (utilise .env si None).
+        columns: Colonnes retournées (toutes si None).
+        max_rows: Nombre maximal de lignes.
+        max_bytes: Taille maximale des lignes sérialisées en JSON.
+        max_cell_chars: Longueur maximale d'une cellule texte.
+        refresh: Ignore le cache.
+
+    Returns:
+        Dict {dataset, columns, rows (listes de valeurs), truncated, bytes, cached}.
+
+    Example:
+        >>> preview = preview_dataset("clients", columns=["id", "pays"], max_rows=10)
+        >>> preview["rows"][0]
+        [1, 'FR']
+    """
+    project = get_project(project_key)
+    dataset = project.get_dataset(dataset_name)
+    fingerprint = dataset_fingerprint(dataset)
+    key = (project.project_key, dataset_name, tuple(columns or ()), max_rows, max_bytes, max_cell_chars)
+
+    if not refresh:
+        cached = _preview_cache.get(key, fingerprint, float(os.getenv("PREVIEW_CACHE_TTL", "600")))
+        if cached is not None:
+            return {**cached, "cached": True}
+
+    names = columns or [col["name"] for col in dataset.get_schema()["columns"]]
+    rows: list[list[Any]] = []
+    size = 0
+    truncated = False
+    stream = dataset.iter_rows(columns=columns)
+    try:
+        for row in stream:
+            if len(rows) >= max_rows:
+                truncated = True
+                break
+            cells = [_preview_cell(value, max_cell_chars) for value in row]
+            row_bytes = len(json.dumps(cells, ensure_ascii=False, separators=(",", ":")).encode())
+            if rows and size + row_bytes > max_bytes:
+                truncated = True
+                break
+            rows.append(cells)
+            size += row_bytes
+    finally:
+        # Ferme la réponse HTTP sans lire la suite du dataset
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
+
+    result = {
+        "dataset": dataset_name,
+        "columns": names,
+        "rows": rows,
+        "truncated": truncated,
+        "bytes": size,
+        "cached": False,
+    }
+    logger.info(
+        "Aperçu de '%s' : %d ligne(s), %d octet(s).", dataset_name, len(rows), size,
+    )
+    _preview_cache.put(key, fingerprint, result)
+    return result
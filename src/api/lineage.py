@@ -0,0 +1,317 @@
+"""
+lineage.py - Graphe de lignage d'un projet Dataiku DSS
+
+Construit le graphe du flow (datasets <-> recettes) à partir d'un seul listing
+des recettes et d'un seul listing des datasets, le met en cache, et répond aux
+questions « qu'y a-t-il en amont / en aval de X » et « que faut-il
+reconstruire » sans relancer de build récursif complet.
+"""
+
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from .client import get_project
+
+logger = logging.getLogger(__name__)
+
+_cache: Dict[str, Tuple[float, "LineageGraph"]] = {}
+_cache_lock = threading.Lock()
+
+
+def _refs(roles: Dict[str, Any]) -> List[str]:
+    """Datasets référencés par les rôles d'entrée ou de sortie d'une recette."""
+    return [
+        item["ref"]
+        for role in (roles or {}).values()
+        for item in role.get("items", [])
+    ]
+
+
+class LineageGraph:
+    """Graphe biparti datasets / recettes d'un projet."""
+
+    def __init__(
+        self,
+        recipes: Dict[str, Dict[str, List[str]]],
+        modified: Optional[Dict[str, Optional[int]]] = None,
+    ):
+        """
+        Construit le graphe.
+
+        Args:
+            recipes: Dict {recette: {"inputs": [...], "outputs": [...]}}.
+            modified: Dernière modification connue de chaque dataset (ms epoch).
+        """
+        self.recipes = recipes
+        self.modified = modified or {}
+        self.producers: Dict[str, str] = {}
+        self.consumers: Dict[str, List[str]] = {}
+        for name, io in recipes.items():
+            for ds in io["outputs"]:
+                self.producers[ds] = name
+            for ds in io["inputs"]:
+                self.consumers.setdefault(ds, []).append(name)
+
+    @property
+    def datasets(self) -> Set[str]:
+        """Tous les datasets connus (listés ou référencés par une recette)."""
+        return set(self.modified) | set(self.producers) | set(self.consumers)
+
+    @property
+    def sources(self) -> Set[str]:
+        """Datasets qu'aucune recette ne produit."""
+        return self.datasets - set(self.producers)
+
+    def downstream_recipes(self, datasets: Iterable[str]) -> Set[str]:
+        """
+        Recettes en aval (directement ou non) d'un ou plusieurs datasets.
+
+        Args:
+            datasets: Datasets de départ.
+
+        Returns:
+            Ensemble de noms de recettes.
+        """
+        seen: Set[str] = set()
+        stack = [r for ds in datasets for r in self.consumers.get(ds, [])]
+        while stack:
+            recipe = stack.pop()
+            if recipe in seen:
+                continue
+            seen.add(recipe)
+            for ds in self.recipes[recipe]["outputs"]:
+                stack.extend(self.consumers.get(ds, []))
+        return seen
+
+    def upstream_recipes(self, datasets: Iterable[str]) -> Set[str]:
+        """
+        Recettes en amont (directement ou non) d'un ou plusieurs datasets.
+
+        Args:
+            datasets: Datasets de départ.
+
+        Returns:
+            Ensemble de noms de recettes.
+        """
+        seen: Set[str] = set()
+        stack = [self.producers[ds] for ds in datasets if ds in self.producers]
+        while stack:
+            recipe = stack.pop()
+            if recipe in seen:
+                continue
+            seen.add(recipe)
+            stack.extend(
+                self.producers[ds] for ds in self.recipes[recipe]["inputs"]
+                if ds in self.producers
+            )
+        return seen
+
+    def downstream(self, dataset: str) -> Set[str]:
+        """Datasets en aval d'un dataset."""
+        return {
+            ds for r in self.downstream_recipes([dataset])
+            for ds in self.recipes[r]["outputs"]
+        }
+
+    def upstream(self, dataset: str) -> Set[str]:
+        """Datasets en amont d'un dataset."""
+        return {
+            ds for r in self.upstream_recipes([dataset])
+            for ds in self.recipes[r]["inputs"]
+        }
+
+    def levels(self, recipes: Iterable[str]) -> List[List[str]]:
+        """
+        Ordonne un sous-ensemble de recettes par niveaux (Kahn).
+
+        Une recette ne dépend que des recettes des niveaux précédents ; les
+        recettes d'un même niveau peuvent s'exécuter en parallèle.
+
+        Args:
+            recipes: Recettes à ordonner.
+
+        Returns:
+            Liste de niveaux (listes triées de noms de recettes).
+        """
+        subset = set(recipes)
+        remaining = {
+            r: {
+                self.producers[ds] for ds in self.recipes[r]["inputs"]
+                if self.producers.get(ds) in subset
+            } - {r}
+            for r in subset
+        }
+        levels = []
+        while remaining:
+            ready = sorted(r for r, deps in remaining.items() if not deps)
+            if not ready:
+                raise ValueError(f"Cycle dans le flow : {', '.join(sorted(remaining))}")
+            levels.append(ready)
+            for r in ready:
+                del remaining[r]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        return levels
+
+
+class RebuildPlan(NamedTuple):
+    """Recettes à relancer, par niveaux, et raison pour chacune."""
+
+    levels: List[List[str]]
+    reasons: Dict[str, str]
+    datasets: List[List[str]]
+
+    @property
+    def recipes(self) -> List[str]:
+        """Recettes dans l'ordre d'exécution."""
+        return [r for level in self.levels for r in level]
+
+
+def get_lineage(project_key: Optional[str] = None, refresh: bool = False) -> LineageGraph:
+    """
+    Retourne le graphe de lignage d'un projet (mis en cache).
+
+    Deux appels DSS au plus : listing des recettes (entrées / sorties) et
+    listing des datasets (dernière modification). Le cache expire après
+    LINEAGE_CACHE_TTL secondes (défaut 300).
+
+    Args:
+        project_key: Clé du projet (utilise .env si None).
+        refresh: Ignore le cache.
+
+    Returns:
+        LineageGraph du projet.
+    """
+    project = get_project(project_key)
+    key = project.project_key
+    ttl = float(os.getenv("LINEAGE_CACHE_TTL", "300"))
+
+    if not refresh:
+        with _cache_lock:
+            cached = _cache.get(key)
+        if cached and time.monotonic() - cached[0] < ttl:
+            return cached[1]
+
+    recipes = {
+        r["name"]: {"inputs": _refs(r.get("inputs")), "outputs": _refs(r.get("outputs"))}
+        for r in project.list_recipes()
+    }
+    modified = {
+        ds["name"]: ds.get("versionTag", {}).get("lastModifiedOn")
+        for ds in project.list_datasets()
+    }
+    graph = LineageGraph(recipes, modified)
+    logger.info(
+        "Lignage de '%s' : %d recette(s), %d dataset(s).",
+        key, len(recipes), len(graph.datasets),
+    )
+
+    with _cache_lock:
+        _cache[key] = (time.monotonic(), graph)
+    return graph
+
+
+def invalidate_lineage(project_key: Optional[str] = None) -> None:
+    """Vide le cache de lignage (d'un projet, ou de tous si None)."""
+    with _cache_lock:
+        if project_key is None:
+            _cache.clear()
+        else:
+            _cache.pop(project_key, None)
+
+
+def _last_builds(
+    project: Any,
+    datasets: List[str],
+    max_workers: int = 8,
+) -> Dict[str, Dict[str, Any]]:
+    """Dernier build de chaque dataset (get_info en parallèle)."""
+    def fetch(ds: str) -> Dict[str, Any]:
+        return project.get_dataset(ds).get_info().get_raw().get("lastBuild", {})
+
+    if not datasets:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(datasets))) as pool:
+        return dict(zip(datasets, pool.map(fetch, datasets)))
+
+
+def plan_rebuild(
+    project_key: Optional[str] = None,
+    changed: Optional[Iterable[str]] = None,
+    refresh: bool = False,
+) -> RebuildPlan:
+    """
+    Calcule l'ensemble minimal de recettes à relancer.
+
+    Si `changed` est fourni, seules les recettes en aval de ces datasets sont
+    relancées (aucun appel supplémentaire). Sinon, le dernier build de chaque
+    dataset produit est lu : une recette est périmée si une sortie n'a jamais
+    été construite avec succès, ou si une entrée a été modifiée (source) ou
+    reconstruite après le début du dernier build de ses sorties. Tout ce qui
+    est en aval d'une recette périmée l'est aussi.
+
+    Args:
+        project_key: Clé du projet.
+        changed: Datasets modifiés (sources en général).
+        refresh: Relit le graphe au lieu du cache.
+
+    Returns:
+        RebuildPlan : recettes par niveaux, datasets à construire par niveau
+        (build non récursif), raisons.
+
+    Example:
+        >>> plan = plan_rebuild("MON_PROJET", changed=["ventes_brutes"])
+        >>> for level in plan.datasets:
+        ...     print(level)  # builds NON_RECURSIVE_FORCED_BUILD, niveau par niveau
+    """
+    graph = get_lineage(project_key, refresh=refresh)
+    reasons: Dict[str, str] = {}
+
+    if changed is not None:
+        changed = list(changed)
+        for recipe in graph.downstream_recipes(changed):
+            reasons[recipe] = f"en aval de {', '.join(changed)}"
+    else:
+        project = get_project(project_key)
+        builds = _last_builds(project, sorted(graph.producers))
+
+        def updated_at(ds: str) -> Optional[int]:
+            if ds in builds:
+                return builds[ds].get("buildEndTime")
+            return graph.modified.get(ds)
+
+        stale: Set[str] = set()
+        for recipe, io in graph.recipes.items():
+            outputs = [builds.get(ds, {}) for ds in io["outputs"]]
+            if any(not b.get("buildSuccess") for b in outputs):
+                reasons[recipe] = "sortie jamais construite ou dernier build en échec"
+                stale.add(recipe)
+                continue
+            built_at = min(b.get("buildStartTime") or 0 for b in outputs) if outputs else 0
+            newer = [ds for ds in io["inputs"] if (updated_at(ds) or 0) > built_at]
+            if newer:
+                reasons[recipe] = f"entrée(s) modifiée(s) depuis le dernier build : {', '.join(newer)}"
+                stale.add(recipe)
+
+        stale_outputs = [ds for r in stale for ds in graph.recipes[r]["outputs"]]
+        for recipe in graph.downstream_recipes(stale_outputs) - stale:
+            reasons[recipe] = "en aval d'une recette à relancer"
+
+    levels = graph.levels(reasons)
+    plan = RebuildPlan(
+        levels=levels,
+        reasons=reasons,
+        datasets=[
+            sorted(ds for r in level for ds in graph.recipes[r]["outputs"])
+            for level in levels
+        ],
+    )
+    logger.info(
+        "Reconstruction minimale : %d recette(s) sur %d.",
+        len(plan.recipes), len(graph.recipes),
+    )
+    return plan
@@ -0,0 +1,232 @@
+"""
+nodes.py - Répartition des lectures entre plusieurs nœuds DSS
+
+Le nœud de design (DSS_URL) reçoit toutes les écritures. Les lectures sans
+effet de bord (listes de projets et de datasets, schémas, métadonnées,
+exports de données) faites dans un bloc replica_reads() peuvent être servies
+par des nœuds en lecture (DSS_READ_URLS : nœuds d'automatisation ou d'API
+exposant les mêmes projets), choisis par latence mesurée ou à tour de rôle.
+Ces nœuds peuvent être en retard sur le design : seuls les appelants qui le
+tolèrent (aperçus, profils, navigation) le demandent ; les autres lectures,
+comme celles qui précèdent une écriture, restent sur le design.
+
+Un nœud en erreur (connexion refusée, délai dépassé, 502/503/504) est écarté
+pendant DSS_NODE_COOLDOWN secondes et la requête passe au nœud suivant ; un
+404 d'un nœud en lecture (objet pas encore répliqué) passe aussi au suivant.
+Le nœud de design sert de dernier recours.
+"""
+
+import os
+import re
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import count
+from typing import Dict, Iterator, List, Optional
+
+import requests
+from requests.adapters import BaseAdapter
+
+logger = logging.getLogger(__name__)
+
+LATENCY = "latency"
+ROUND_ROBIN = "round_robin"
+
+# Poids d'une nouvelle mesure dans la moyenne glissante des latences
+LATENCY_WEIGHT = 0.3
+
+# Codes indiquant un nœud indisponible (la requête peut être rejouée ailleurs)
+UNAVAILABLE = {502, 503, 504}
+
+# Chemins de l'API publique servis en lecture seule (méthodes GET/HEAD)
+READ_PATHS = [re.compile(p) for p in (
+    r"^/projects/$",
+    r"^/projects/[^/]+/datasets/$",
+    r"^/projects/[^/]+/datasets/[^/]+$",
+    r"^/projects/[^/]+/datasets/[^/]+/(schema|metadata)$",
+    r"^/projects/[^/]+/datasets/[^/]+/data/$",
+)]
+
+API_PREFIX = "/dip/publicapi"
+
+# Lectures autorisées sur les nœuds en lecture (voir replica_reads)
+_replica_reads: ContextVar[bool] = ContextVar("dss_replica_reads", default=False)
+
+
+@contextmanager
+def replica_reads() -> Iterator[None]:
+    """
+    Autorise les lectures du bloc (thread ou coroutine courants) à passer par
+    les nœuds en lecture. Utilisable aussi en décorateur : @replica_reads().
+    """
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def replica_reads_enabled() -> bool:
+    """True dans un bloc replica_reads() (thread ou coroutine courants)."""
+    return _replica_reads.get()
+
+
+class DSSNode:
+    """État d'un nœud : latence moyenne, erreurs et exclusion temporaire."""
+
+    def __init__(self, url: str, role: str):
+        self.url = url.rstrip("/")
+        self.role = role
+        self.latency: Optional[float] = None
+        self.requests = 0
+        self.failures = 0
+        self.down_until = 0.0
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.down_until
+
+    def to_dict(self) -> Dict:
+        return {
+            "url": self.url,
+            "role": self.role,
+            "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "requests": self.requests,
+            "failures": self.failures,
+            "healthy": self.healthy(time.monotonic()),
+        }
+
+
+class NodePool:
+    """Nœuds DSS partagés par tous les clients du processus (thread-safe)."""
+
+    def __init__(
+        self,
+        design_url: str,
+        read_urls: List[str],
+        strategy: str = LATENCY,
+        cooldown: Optional[float] = None,
+    ):
+        """
+        Args:
+            design_url: Nœud de design (écritures, lectures en dernier recours).
+            read_urls: Nœuds servant les lectures.
+            strategy: "latency" (latence moyenne la plus basse) ou "round_robin".
+            cooldown: Secondes d'exclusion d'un nœud après une erreur
+                (DSS_NODE_COOLDOWN, défaut 30 ; lu ici, après le .env).
+
+        Raises:
+            ValueError: Si la stratégie est inconnue.
+        """
+        if strategy not in (LATENCY, ROUND_ROBIN):
+            raise ValueError(f"Stratégie de répartition inconnue : '{strategy}'.")
+        self.design = DSSNode(design_url, "design")
+        self.readers = [DSSNode(url, "read") for url in read_urls]
+        self.strategy = strategy
+        self.cooldown = float(os.getenv("DSS_NODE_COOLDOWN", "30")) if cooldown is None else cooldown
+        self._turn = count()
+        self._lock = threading.Lock()
+
+    def candidates(self, read: bool) -> List[DSSNode]:
+        """
+        Nœuds à essayer dans l'ordre pour une requête.
+
+        Args:
+            read: True si la requête peut être servie par un nœud en lecture.
+
+        Returns:
+            Nœuds en lecture disponibles (ordonnés selon la stratégie), puis le
+            nœud de design ; le nœud de design seul pour une écriture.
+        """
+        if not read:
+            return [self.design]
+        now = time.monotonic()
+        with self._lock:
+            healthy = [n for n in self.readers if n.healthy(now)]
+            if self.strategy == ROUND_ROBIN and healthy:
+                shift = next(self._turn) % len(healthy)
+                healthy = healthy[shift:] + healthy[:shift]
+            elif self.strategy == LATENCY:
+                # Nœuds jamais mesurés en premier, pour obtenir une mesure
+                healthy.sort(key=lambda n: -1.0 if n.latency is None else n.latency)
+        return healthy + [self.design]
+
+    def record_success(self, node: DSSNode, elapsed: float) -> None:
+        with self._lock:
+            node.requests += 1
+            node.down_until = 0.0
+            node.latency = elapsed if node.latency is None else \
+                (1 - LATENCY_WEIGHT) * node.latency + LATENCY_WEIGHT * elapsed
+
+    def record_failure(self, node: DSSNode, reason: str) -> None:
+        with self._lock:
+            node.requests += 1
+            node.failures += 1
+            node.down_until = time.monotonic() + self.cooldown
+        logger.warning("Nœud DSS %s écarté %.0f s : %s", node.url, self.cooldown, reason)
+
+    def stats(self) -> List[Dict]:
+        """État de chaque nœud (nœud de design en premier)."""
+        with self._lock:
+            return [n.to_dict() for n in [self.design] + self.readers]
+
+
+def is_read_request(request: requests.PreparedRequest, design_url: str) -> bool:
+    """True si la requête est une lecture de l'API publique pouvant changer de nœud."""
+    if request.method not in ("GET", "HEAD"):
+        return False
+    prefix = design_url.rstrip("/") + API_PREFIX
+    url = request.url.split("?", 1)[0]
+    if not url.startswith(prefix):
+        return False
+    path = url[len(prefix):]
+    return any(pattern.match(path) for pattern in READ_PATHS)
+
+
+class NodeRouter(BaseAdapter):
+    """Adapter requests qui envoie chaque requête au nœud DSS approprié"""
+
+    def __init__(self, pool: NodePool, inner: BaseAdapter):
+        super().__init__()
+        self.pool = pool
+        self.inner = inner
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        design_url = self.pool.design.url
+        if not request.url.startswith(design_url):
+            return self.inner.send(request, **kwargs)
+
+        read = replica_reads_enabled() and is_read_request(request, design_url)
+        nodes = self.pool.candidates(read)
+        for i, node in enumerate(nodes):
+            last = i == len(nodes) - 1
+            routed = request
+            if node is not self.pool.design:
+                routed = request.copy()
+                routed.url = node.url + request.url[len(design_url):]
+
+            start = time.perf_counter()
+            try:
+                response = self.inner.send(routed, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                self.pool.record_failure(node, type(exc).__name__)
+                if last:
+                    raise
+                continue
+            if response.status_code in UNAVAILABLE:
+                self.pool.record_failure(node, f"HTTP {response.status_code}")
+                if last:
+                    return response
+                response.close()
+                continue
+            if response.status_code == 404 and not last:
+                # Nœud en retard sur le design : il reste sain, le suivant est essayé
+                self.pool.record_success(node, time.perf_counter() - start)
+                response.close()
+                continue
+            self.pool.record_success(node, time.perf_counter() - start)
+            return response
+
+    def close(self) -> None:
+        self.inner.close()
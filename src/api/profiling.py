@@ -0,0 +1,331 @@
+"""
+profiling.py - Profilage des colonnes d'un dataset Dataiku DSS
+
+Calcule, en une seule lecture par blocs, des statistiques par colonne :
+valeurs nulles, distinctes (HyperLogLog), quantiles (t-digest), valeurs les
+plus fréquentes (top-K), min / max / moyenne. La mémoire reste bornée quelle
+que soit la taille du dataset. Les profils sont mis en cache par empreinte
+du dataset (version, dernière modification, dernier build, schéma) et pour
+PROFILE_CACHE_TTL secondes au plus (défaut 600) : un dataset inchangé n'est
+pas relu, mais une table SQL source modifiée hors de DSS finit par l'être.
+"""
+
+import logging
+import os
+import time
+from collections.abc import Iterable, Iterator
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+from dataikuapi.utils import DataikuStreamedHttpUTF8CSVReader
+
+from .cache import FingerprintCache
+from .client import get_project
+from .datasets import dataset_fingerprint
+from .nodes import replica_reads
+from .sketches import HyperLogLog, TDigest, TopK
+
+logger = logging.getLogger(__name__)
+
+NUMERIC_TYPES = frozenset({"tinyint", "smallint", "int", "bigint", "float", "double"})
+
+# Texte brut des booléens DSS (lus sans conversion, voir _iter_rows)
+BOOLEANS = {"true": True, "false": False}
+
+QUANTILES = (0.01, 0.25, 0.5, 0.75, 0.99)
+
+# Profils par (projet, dataset, colonnes, max_rows, top_k)
+_cache = FingerprintCache(max_entries=128)
+
+
+def _jsonable(value: Any) -> Any:
+    """Valeur sérialisable en JSON (types numpy, dates)."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float):
+        return round(value, 6)
+    if isinstance(value, (str, int, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def _parse_boolean(value: Any) -> Optional[bool]:
+    """Booléen DSS lu en texte brut ; None pour une cellule vide."""
+    if value is None or isinstance(value, bool):
+        return value
+    return BOOLEANS.get(str(value).lower())
+
+
+class ColumnProfiler:
+    """Statistiques en flux d'une colonne."""
+
+    def __init__(self, name: str, dss_type: Optional[str] = None, top_k: int = 10):
+        """
+        Args:
+            name: Nom de la colonne.
+            dss_type: Type DSS (les types numériques activent les quantiles).
+            top_k: Nombre de valeurs fréquentes rapportées.
+        """
+        self.name = name
+        self.dss_type = dss_type
+        self.numeric = dss_type in NUMERIC_TYPES
+        self.count = 0
+        self.nulls = 0
+        self.distinct = HyperLogLog()
+        self.top = TopK(top_k)
+        self.digest = TDigest() if self.numeric else None
+        self.minimum: Any = None
+        self.maximum: Any = None
+        self.total = 0.0
+
+    def update(self, values: pd.Series) -> None:
+        """
+        Ajoute un bloc de valeurs.
+
+        iter_rows lit une cellule vide comme "" (texte) : c'est une valeur
+        nulle pour toute colonne non numérique. Les booléens arrivent en
+        texte brut ("true", "false", "").
+        """
+        if self.numeric:
+            values = pd.to_numeric(values, errors="coerce")
+        elif self.dss_type == "boolean":
+            values = values.map(_parse_boolean)
+        elif pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values):
+            values = values.mask(values == "")
+        self.count += len(values)
+        present = values.dropna()
+        self.nulls += len(values) - len(present)
+        if present.empty:
+            return
+
+        self.distinct.update(present)
+        self.top.update(present)
+        if self.numeric:
+            array = present.to_numpy(dtype=np.float64)
+            self.digest.update(array)
+            self.total += float(array.sum())
+        try:
+            low, high = present.min(), present.max()
+        except TypeError:
+            # Types mélangés (colonne texte) : comparaison sur le texte
+            low, high = present.astype(str).min(), present.astype(str).max()
+        self.minimum = low if self.minimum is None else min(self.minimum, low)
+        self.maximum = high if self.maximum is None else max(self.maximum, high)
+
+    def result(self) -> dict[str, Any]:
+        """Profil de la colonne (valeurs sérialisables en JSON)."""
+        present = self.count - self.nulls
+        profile: dict[str, Any] = {
+            "name": self.name,
+            "type": self.dss_type,
+            "count": self.count,
+            "nulls": self.nulls,
+            "null_rate": round(self.nulls / self.count, 4) if self.count else None,
+            "distinct": min(self.distinct.count(), present),
+            "min": _jsonable(self.minimum),
+            "max": _jsonable(self.maximum),
+            "top": [
+                {"value": _jsonable(value), "count": count}
+                for value, count in self.top.top()
+            ],
+            "top_max_error": self.top.max_error,
+        }
+        if self.numeric:
+            profile["mean"] = _jsonable(self.total / present) if present else None
+            profile["quantiles"] = {
+                f"p{int(q * 100):02d}": _jsonable(v)
+                for q, v in zip(QUANTILES, self.digest.quantiles(list(QUANTILES)))
+            }
+        return profile
+
+
+def profile_chunks(
+    chunks: Iterable[pd.DataFrame],
+    schema: Optional[list[dict[str, Any]]] = None,
+    top_k: int = 10,
+) -> dict[str, Any]:
+    """
+    Profile une suite de blocs en une passe.
+
+    Args:
+        chunks: Blocs (DataFrames de mêmes colonnes).
+        schema: Colonnes DSS ({"name", "type"}) ; types déduits sinon.
+        top_k: Valeurs fréquentes rapportées par colonne.
+
+    Returns:
+        Dict {rows, columns: [profil par colonne]}.
+    """
+    types = {col["name"]: col.get("type") for col in schema or []}
+    profilers: dict[str, ColumnProfiler] = {}
+    rows = 0
+    for chunk in chunks:
+        rows += len(chunk)
+        for name in chunk.columns:
+            if name not in profilers:
+                dss_type = types.get(name)
+                if dss_type is None and pd.api.types.is_numeric_dtype(chunk[name]) \
+                        and not pd.api.types.is_bool_dtype(chunk[name]):
+                    dss_type = "double"
+                profilers[name] = ColumnProfiler(name, dss_type, top_k)
+            profilers[name].update(chunk[name])
+    return {"rows": rows, "columns": [p.result() for p in profilers.values()]}
+
+
+def iter_dataset_chunks(
+    dataset: Any,
+    chunk_size: int = 50_000,
+    columns: Optional[list[str]] = None,
+    max_rows: Optional[int] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Lit un dataset par blocs (flux TSV de DSS, sans tout charger en mémoire).
+
+    Args:
+        dataset: DSSDataset.
+        chunk_size: Lignes par bloc.
+        columns: Colonnes lues (toutes si None).
+        max_rows: Nombre maximal de lignes lues (tout si None).
+
+    Yields:
+        pd.DataFrame de chunk_size lignes au plus.
+    """
+    schema = dataset.get_schema()["columns"]
+    names = columns or [col["name"] for col in schema]
+    rows: list[list[Any]] = []
+    read = 0
+    stream = _iter_rows(dataset, schema, columns)
+    try:
+        for row in stream:
+            rows.append(row)
+            read += 1
+            if len(rows) >= chunk_size:
+                yield pd.DataFrame(rows, columns=names)
+                rows = []
+            if max_rows is not None and read >= max_rows:
+                break
+    finally:
+        # Ferme la réponse HTTP sans lire la suite du dataset
+        stream.close()
+    if rows:
+        yield pd.DataFrame(rows, columns=names)
+
+
+def _iter_rows(
+    dataset: Any,
+    schema: list[dict[str, Any]],
+    columns: Optional[list[str]],
+) -> Iterator[list[Any]]:
+    """
+    Lignes du dataset, booléens laissés en texte brut.
+
+    DSSDataset.iter_rows convertit une cellule booléenne vide en False : la
+    lecture est alors refaite avec les colonnes booléennes typées "string",
+    pour compter les valeurs nulles.
+    """
+    if columns is not None:
+        by_name = {col["name"]: col for col in schema}
+        schema = [by_name.get(name, {"name": name, "type": "string"}) for name in columns]
+    if not any(col.get("type") == "boolean" for col in schema):
+        stream = dataset.iter_rows(columns=columns)
+        try:
+            yield from stream
+        finally:
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+        return
+
+    raw_schema = [{**col, "type": "string"} if col.get("type") == "boolean" else col
+                  for col in schema]
+    response = _raw_rows_response(dataset, columns)
+    try:
+        yield from DataikuStreamedHttpUTF8CSVReader(raw_schema, response).iter_rows()
+    finally:
+        response.close()
+
+
+def _raw_rows_response(dataset: Any, columns: Optional[list[str]]) -> Any:
+    """
+    Réponse HTTP en flux des lignes du dataset (TSV sans en-tête), à fermer
+    par l'appelant.
+
+    DSSDataset.iter_rows décode les lignes avec le schéma du dataset et
+    n'accepte pas d'autre schéma : la requête qu'il envoie est refaite ici
+    avec DSSClient._perform_raw, méthode privée de dataikuapi. C'est le seul
+    appel à cette méthode du module, à revoir si dataikuapi la modifie.
+    """
+    return dataset.client._perform_raw(
+        "GET", f"/projects/{dataset.project_key}/datasets/{dataset.dataset_name}/data/",
+        params={"format": "tsv-excel-noheader", "columns": columns},
+    )
+
+
+@replica_reads()
+def profile_dataset(
+    dataset_name: str,
+    project_key: Optional[str] = None,
+    columns: Optional[list[str]] = None,
+    max_rows: Optional[int] = None,
+    chunk_size: int = 50_000,
+    top_k: int = 10,
+    refresh: bool = False,
+) -> dict[str, Any]:
+    """
+    Profile les colonnes d'un dataset en une lecture par blocs (servie par
+    les nœuds en lecture s'ils sont configurés).
+
+    Args:
+        dataset_name: Nom du dataset.
+        project_key: Clé du projet (utilise .env si None).
+        columns: Colonnes à profiler (toutes si None).
+        max_rows: Lignes lues au plus (tout le dataset si None).
+        chunk_size: Lignes par bloc.
+        top_k: Valeurs fréquentes rapportées par colonne.
+        refresh: Ignore le cache.
+
+    Returns:
+        Dict {dataset, fingerprint, rows, truncated, columns, duration_s, cached}.
+
+    Example:
+        >>> profile = profile_dataset("clients", max_rows=1_000_000)
+        >>> for col in profile["columns"]:
+        ...     print(col["name"], col["distinct"], col["null_rate"])
+    """
+    project = get_project(project_key)
+    dataset = project.get_dataset(dataset_name)
+    fingerprint = dataset_fingerprint(dataset)
+    key = (project.project_key, dataset_name, tuple(columns or ()), max_rows, top_k)
+
+    if not refresh:
+        cached = _cache.get(key, fingerprint, float(os.getenv("PROFILE_CACHE_TTL", "600")))
+        if cached is not None:
+            logger.info("Profil de '%s' servi depuis le cache.", dataset_name)
+            return {**cached, "cached": True}
+
+    start = time.perf_counter()
+    schema = dataset.get_schema()["columns"]
+    profile = profile_chunks(
+        iter_dataset_chunks(dataset, chunk_size, columns, max_rows), schema, top_k
+    )
+    result = {
+        "dataset": dataset_name,
+        "fingerprint": fingerprint,
+        "rows": profile["rows"],
+        "truncated": max_rows is not None and profile["rows"] >= max_rows,
+        "columns": profile["columns"],
+        "duration_s": round(time.perf_counter() - start, 3),
+        "cached": False,
+    }
+    logger.info(
+        "Profil de '%s' : %d ligne(s), %d colonne(s) en %.1fs.",
+        dataset_name, result["rows"], len(result["columns"]), result["duration_s"],
+    )
+
+    _cache.put(key, fingerprint, result)
+    return result
+
+
+def invalidate_profiles(dataset_name: Optional[str] = None) -> None:
+    """Vide le cache des profils (d'un dataset, ou de tous si None)."""
+    _cache.discard(lambda key: dataset_name is None or key[1] == dataset_name)
@@ -9,6 +9,7 @@ import logging
 from typing import List, Dict, Any
 
 from .client import get_client, get_project
+from .singleflight import single_flight
 
 logger = logging.getLogger(__name__)
 
@@ -61,6 +62,7 @@ def get_project_summary(project_key: str) -> Dict[str, Any]:
     return summary
 
 
+@single_flight
 def list_datasets(project_key: str) -> List[str]:
     """
     Liste les noms de tous les datasets d'un projet.
@@ -70,6 +72,8 @@ def list_datasets(project_key: str) -> List[str]:
 
     Returns:
         Liste des noms de datasets.
+
+    Les appels simultanés pour le même projet partagent une seule requête.
     """
     project = get_project(project_key)
     return [ds.name for ds in project.list_datasets()]
@@ -0,0 +1,127 @@
+"""
+singleflight.py - Regroupement des lectures DSS identiques simultanées
+
+Quand plusieurs sessions ou appels d'outils parallèles demandent au même
+moment le même schéma ou la même liste de datasets, un seul appel part vers
+DSS : les autres attendent son résultat (ou son exception). Rien n'est mis
+en cache au-delà de l'appel en cours : une demande arrivée après la fin de
+l'appel en relance un nouveau.
+
+Les appelants peuvent être des threads ou des coroutines (méthode aio),
+et un appel lancé par l'un est partagé avec l'autre. Un appel servi par les
+nœuds en lecture (voir nodes.replica_reads) n'est partagé qu'avec d'autres
+appelants qui les acceptent : un appelant du nœud de design n'hérite jamais
+d'un résultat en retard.
+"""
+
+import asyncio
+import copy
+import functools
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from .nodes import replica_reads_enabled
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Appels en cours indexés par clé, partagés entre threads et boucles asyncio."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.executed = 0
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Hashable, Future] = {}
+
+    def _join(self, key: Hashable) -> Tuple[Future, bool]:
+        """Retourne (appel en cours pour key, True si l'appelant doit l'exécuter)."""
+        with self._lock:
+            self.calls += 1
+            future = self._in_flight.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._in_flight[key] = future
+            self.executed += 1
+            return future, True
+
+    def _run(self, key: Hashable, future: Future, func: Callable, args, kwargs) -> None:
+        """Exécute l'appel et publie son issue à tous les appelants en attente."""
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as exc:
+            future.set_exception(exc)
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def do(self, key: Hashable, func: Callable, *args, **kwargs) -> Any:
+        """
+        Exécute func, ou attend l'appel identique déjà en cours.
+
+        Args:
+            key: Identité de l'appel.
+            func: Fonction bloquante.
+
+        Returns:
+            Résultat de func (copie pour les appelants en attente).
+        """
+        future, leader = self._join(key)
+        if leader:
+            self._run(key, future, func, args, kwargs)
+            return future.result()
+        return copy.deepcopy(future.result())
+
+    async def aio(self, key: Hashable, func: Callable, *args, **kwargs) -> Any:
+        """Version asynchrone de do : func s'exécute dans un thread."""
+        future, leader = self._join(key)
+        if leader:
+            await asyncio.to_thread(self._run, key, future, func, args, kwargs)
+            return future.result()
+        return copy.deepcopy(await asyncio.wrap_future(future))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"calls": self.calls, "executed": self.executed,
+                    "saved": self.calls - self.executed}
+
+
+_flights: Dict[str, SingleFlight] = {}
+
+
+def single_flight(func: Callable) -> Callable:
+    """
+    Décorateur : regroupe les appels simultanés avec les mêmes arguments.
+
+    La fonction décorée garde sa signature ; func.aio(...) est sa version
+    asynchrone.
+    """
+    # Nom qualifié : deux fonctions homonymes de modules différents ne
+    # partagent ni leurs vols ni leurs statistiques
+    name = f"{func.__module__}.{func.__qualname__}"
+    flight = _flights.setdefault(name, SingleFlight(name))
+
+    def key(args, kwargs) -> Hashable:
+        return replica_reads_enabled(), args, tuple(sorted(kwargs.items()))
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return flight.do(key(args, kwargs), func, *args, **kwargs)
+
+    async def aio(*args, **kwargs):
+        return await flight.aio(key(args, kwargs), func, *args, **kwargs)
+
+    wrapper.aio = aio
+    wrapper.flight = flight
+    return wrapper
+
+
+def single_flight_stats() -> Dict[str, Dict[str, int]]:
+    """Appels, exécutions réelles et requêtes économisées par fonction (module.nom)."""
+    return {name: flight.stats() for name, flight in _flights.items()}
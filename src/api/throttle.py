@@ -0,0 +1,270 @@
+"""
+throttle.py - Limitation du débit et de la concurrence des appels DSS
+
+Toutes les sessions HTTP créées par get_client() passent par un même
+Throttle, partagé par le processus :
+
+- un seau à jetons borne le débit (DSS_RATE_LIMIT requêtes/s, rafales de
+  DSS_RATE_BURST) ;
+- une limite de concurrence adaptative (AIMD) borne les requêtes en vol :
+  +1/limite à chaque réponse rapide, ×0,5 sur un 429, un 5xx, une erreur
+  réseau ou une latence au-delà de DSS_LATENCY_TARGET ;
+- les requêtes idempotentes (GET, HEAD, PUT, DELETE...) refusées par
+  surcharge (429, 502, 503, 504) ou en erreur réseau sont rejouées jusqu'à
+  DSS_MAX_RETRIES fois, après un délai exponentiel aléatoire (« full
+  jitter ») ou le Retry-After du serveur.
+
+Les temps d'attente (débit et file de concurrence) sont mesurés :
+get_throttle().stats().
+
+Les variables DSS_* sont lues à la création des objets, pas à l'import : le
+.env chargé ensuite par client.py est pris en compte.
+"""
+
+import os
+import time
+import random
+import logging
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import BaseAdapter
+
+logger = logging.getLogger(__name__)
+
+MIN_CONCURRENCY = 1
+
+# Délai de base et plafond des nouvelles tentatives (secondes)
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 20.0
+
+IDEMPOTENT = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRYABLE = {429, 502, 503, 504}
+
+
+class TokenBucket:
+    """Seau à jetons bloquant (thread-safe)."""
+
+    def __init__(self, rate: float, burst: float):
+        """
+        Args:
+            rate: Jetons ajoutés par seconde (0 = pas de limite).
+            burst: Capacité du seau.
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Prend un jeton, en attendant si le seau est vide. Retourne l'attente."""
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class AdaptiveLimit:
+    """Limite de requêtes en vol ajustée par AIMD (thread-safe)."""
+
+    def __init__(
+        self,
+        initial: Optional[int] = None,
+        minimum: int = MIN_CONCURRENCY,
+        maximum: Optional[int] = None,
+        latency_target: Optional[float] = None,
+    ):
+        """
+        Args:
+            initial: Limite de départ (le plafond si None).
+            minimum: Limite plancher.
+            maximum: Limite plafond (DSS_MAX_CONCURRENCY, défaut 16).
+            latency_target: Latence (secondes) au-delà de laquelle DSS est
+                considéré comme saturé (DSS_LATENCY_TARGET, défaut 5).
+        """
+        if maximum is None:
+            maximum = int(os.getenv("DSS_MAX_CONCURRENCY", "16"))
+        if latency_target is None:
+            latency_target = float(os.getenv("DSS_LATENCY_TARGET", "5"))
+        if initial is None:
+            initial = maximum
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.in_flight = 0
+        self._decreased_at = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> float:
+        """Attend une place sous la limite. Retourne l'attente en secondes."""
+        start = time.monotonic()
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+        return time.monotonic() - start
+
+    def release(self, latency: float, overloaded: bool) -> None:
+        """
+        Libère une place et ajuste la limite.
+
+        Args:
+            latency: Durée de la requête en secondes.
+            overloaded: True sur 429, 5xx ou erreur réseau.
+        """
+        with self._cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if overloaded or latency > self.latency_target:
+                # Une seule réduction par fenêtre : les requêtes déjà en vol
+                # lors de la saturation ne divisent pas la limite plusieurs fois
+                if now - self._decreased_at >= max(latency, 0.1):
+                    self.limit = max(self.minimum, self.limit / 2)
+                    self._decreased_at = now
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+class Throttle:
+    """Débit, concurrence, nouvelles tentatives et métriques des appels DSS."""
+
+    def __init__(
+        self,
+        bucket: Optional[TokenBucket] = None,
+        limit: Optional[AdaptiveLimit] = None,
+        max_retries: Optional[int] = None,
+    ):
+        """
+        Args:
+            bucket: Seau à jetons (DSS_RATE_LIMIT requêtes/s, rafales de
+                DSS_RATE_BURST si None).
+            limit: Limite de concurrence (réglages DSS_* si None).
+            max_retries: Nouvelles tentatives au plus (DSS_MAX_RETRIES, défaut 3).
+        """
+        if bucket is None:
+            rate = float(os.getenv("DSS_RATE_LIMIT", "20"))
+            bucket = TokenBucket(rate, float(os.getenv("DSS_RATE_BURST", "0")) or max(rate, 1.0))
+        if max_retries is None:
+            max_retries = int(os.getenv("DSS_MAX_RETRIES", "3"))
+        self.bucket = bucket
+        self.limit = limit or AdaptiveLimit()
+        self.max_retries = max_retries
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "throttled": 0,
+            "throttle_wait_s": 0.0,
+            "queued": 0,
+            "queue_wait_s": 0.0,
+            "max_queue_wait_s": 0.0,
+            "overloaded": 0,
+            "retries": 0,
+        }
+
+    def acquire(self) -> None:
+        """Attend un jeton puis une place de concurrence."""
+        throttle_wait = self.bucket.acquire()
+        queue_wait = self.limit.acquire()
+        with self._lock:
+            stats = self._stats
+            stats["requests"] += 1
+            if throttle_wait > 0:
+                stats["throttled"] += 1
+                stats["throttle_wait_s"] += throttle_wait
+            if queue_wait > 0.001:
+                stats["queued"] += 1
+                stats["queue_wait_s"] += queue_wait
+                stats["max_queue_wait_s"] = max(stats["max_queue_wait_s"], queue_wait)
+
+    def release(self, latency: float, overloaded: bool) -> None:
+        self.limit.release(latency, overloaded)
+        if overloaded:
+            with self._lock:
+                self._stats["overloaded"] += 1
+
+    def backoff(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """Délai avant la tentative suivante : Retry-After, sinon full jitter."""
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), BACKOFF_CAP)
+            except ValueError:
+                pass
+        return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self._stats["retries"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Compteurs cumulés, limite de concurrence courante et requêtes en vol."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["throttle_wait_s"] = round(stats["throttle_wait_s"], 3)
+        stats["queue_wait_s"] = round(stats["queue_wait_s"], 3)
+        stats["max_queue_wait_s"] = round(stats["max_queue_wait_s"], 3)
+        stats["concurrency_limit"] = int(self.limit.limit)
+        stats["in_flight"] = self.limit.in_flight
+        return stats
+
+
+class ThrottledAdapter(BaseAdapter):
+    """Adapter requests qui fait passer chaque requête par un Throttle"""
+
+    def __init__(self, throttle: Throttle, inner: BaseAdapter):
+        super().__init__()
+        self.throttle = throttle
+        self.inner = inner
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        # Corps en flux (upload) : ne peut pas être renvoyé
+        replayable = request.body is None or isinstance(request.body, (bytes, str))
+        retries = self.throttle.max_retries if request.method in IDEMPOTENT and replayable else 0
+
+        for attempt in range(retries + 1):
+            self.throttle.acquire()
+            start = time.perf_counter()
+            try:
+                response = self.inner.send(request, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                self.throttle.release(time.perf_counter() - start, overloaded=True)
+                if attempt == retries:
+                    raise
+                delay = self.throttle.backoff(attempt)
+                logger.info("%s %s : %s, nouvel essai dans %.1f s.",
+                            request.method, request.path_url, type(exc).__name__, delay)
+            else:
+                overloaded = response.status_code == 429 or response.status_code >= 500
+                self.throttle.release(time.perf_counter() - start, overloaded)
+                if response.status_code not in RETRYABLE or attempt == retries:
+                    return response
+                delay = self.throttle.backoff(attempt, response)
+                logger.info("%s %s : HTTP %d, nouvel essai dans %.1f s.",
+                            request.method, request.path_url, response.status_code, delay)
+                response.close()
+            self.throttle.record_retry()
+            time.sleep(delay)
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+@lru_cache(maxsize=1)
+def get_throttle() -> Throttle:
+    """Retourne le Throttle du processus (singleton)."""
+    return Throttle()
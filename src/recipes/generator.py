@@ -4,15 +4,29 @@ generator.py - Génération de recettes Dataiku avec GitHub Copilot / LLM
 Ce module propose des templates de recettes Python prêts à l'emploi,
 et des helpers pour créer/mettre à jour des recettes via l'API DSS.
 
+Deux modes de template :
+  - memory    : get_dataframe() sur chaque entrée, write_with_schema() du résultat ;
+  - streaming : iter_dataframes() par blocs sur l'entrée principale, colonnes et
+                types issus du schéma, écriture en flux via get_writer().
+  Le mode "auto" passe en streaming dès qu'une entrée dépasse
+  RECIPE_STREAMING_THRESHOLD lignes (défaut 1 000 000).
+
+create_python_recipes_in_dss() crée des lots de recettes (migrations) en
+parallèle, à débit limité, et rapporte un statut par recette.
+
 Intégration Copilot :
   Ouvrez ce fichier dans VS Code avec Copilot activé.
   Décrivez votre transformation en commentaire et laissez Copilot compléter.
 """
 
+import os
+import re
+import time
 import logging
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, NamedTuple, Optional
 
-from src.api.client import get_project
+from src.api.client import get_client, get_config, get_project
 
 logger = logging.getLogger(__name__)
 
@@ -42,11 +56,178 @@ import pandas as pd
 {output_writer}
 '''
 
+RECIPE_TEMPLATE_PYTHON_STREAMING = '''\
+# Recipe: {recipe_name}
+# Inputs : {inputs}
+# Output : {output}
+# Généré automatiquement (mode streaming) — personnalisez selon vos besoins
+
+import dataiku
+import pandas as pd
+
+CHUNK_SIZE = {chunk_size}
+
+# --- Colonnes lues et types (issus du schéma DSS) ---
+{input_specs}
+{lookup_readers}
+
+def transform(chunk):
+    """Transformation appliquée à chaque bloc de {main_input}."""
+    # Décrivez ici ce que vous voulez faire, Copilot suggérera le code.
+    # Le calcul doit rester valable bloc par bloc (pas d'agrégat global ici).
+    return chunk
+
+
+# --- Lecture par blocs et écriture en flux ---
+chunks = (
+    transform(chunk.astype({main_var}_DTYPES))
+    for chunk in dataiku.Dataset("{main_input}").iter_dataframes(
+        chunksize=CHUNK_SIZE, columns={main_var}_COLUMNS
+    )
+)
+output_ds = dataiku.Dataset("{output}")
+first = next(chunks, None)
+if first is None:
+    output_ds.write_with_schema(pd.DataFrame(columns={main_var}_COLUMNS))
+else:
+    output_ds.write_schema_from_dataframe(first)
+    with output_ds.get_writer() as writer:
+        writer.write_dataframe(first)
+        for chunk in chunks:
+            writer.write_dataframe(chunk)
+'''
+
+MEMORY = "memory"
+STREAMING = "streaming"
+AUTO = "auto"
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+# Types DSS -> dtypes pandas (les dates restent parsées par Dataiku)
+DSS_TO_PANDAS_DTYPES = {
+    "tinyint": "Int64",
+    "smallint": "Int64",
+    "int": "Int64",
+    "bigint": "Int64",
+    "float": "float64",
+    "double": "float64",
+    "boolean": "boolean",
+    "string": "object",
+}
+
+
+def _identifier(dataset_name: str) -> str:
+    """Nom de variable Python dérivé d'un nom de dataset."""
+    return re.sub(r"\W", "_", dataset_name)
+
+
+def pandas_dtypes(columns: list[dict[str, Any]]) -> dict[str, str]:
+    """
+    Dtypes pandas déduits d'un schéma DSS.
+
+    Args:
+        columns: Colonnes du schéma ({"name", "type"}).
+
+    Returns:
+        Dict {colonne: dtype} (colonnes de type inconnu ou date omises).
+    """
+    return {
+        col["name"]: DSS_TO_PANDAS_DTYPES[col["type"]]
+        for col in columns
+        if col.get("type") in DSS_TO_PANDAS_DTYPES
+    }
+
+
+def select_template_mode(
+    mode: str = AUTO,
+    input_records: Optional[dict[str, Optional[int]]] = None,
+) -> str:
+    """
+    Choisit le mode du template.
+
+    Args:
+        mode: "auto", "memory" ou "streaming".
+        input_records: Nombre de lignes connu de chaque entrée (None si inconnu).
+
+    Returns:
+        "memory" ou "streaming".
+    """
+    if mode not in (AUTO, MEMORY, STREAMING):
+        raise ValueError(f"Mode de template inconnu : {mode}")
+    if mode != AUTO:
+        return mode
+    threshold = int(os.getenv("RECIPE_STREAMING_THRESHOLD", "1000000"))
+    sizes = [n for n in (input_records or {}).values() if n is not None]
+    return STREAMING if sizes and max(sizes) >= threshold else MEMORY
+
+
+def build_streaming_python_recipe(
+    recipe_name: str,
+    input_datasets: list[str],
+    output_dataset: str,
+    schemas: Optional[dict[str, list[dict[str, Any]]]] = None,
+    input_records: Optional[dict[str, Optional[int]]] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> str:
+    """
+    Génère une recette Python qui lit et écrit par blocs.
+
+    La plus grosse entrée (la première si les tailles sont inconnues) est lue
+    par blocs de `chunk_size` lignes ; les autres, supposées petites (tables
+    de référence), sont chargées en mémoire. Chaque entrée n'est lue que sur
+    les colonnes de son schéma, avec des dtypes fixés pour que tous les blocs
+    aient les mêmes types.
+
+    Args:
+        recipe_name: Nom de la recette.
+        input_datasets: Liste des datasets d'entrée.
+        output_dataset: Nom du dataset de sortie.
+        schemas: Colonnes de chaque entrée ({"name", "type"}) ; toutes les
+            colonnes et les types inférés si absent.
+        input_records: Nombre de lignes de chaque entrée.
+        chunk_size: Lignes par bloc.
+
+    Returns:
+        Code Python de la recette.
+    """
+    schemas = schemas or {}
+    records = input_records or {}
+    main_input = max(input_datasets, key=lambda ds: records.get(ds) or 0)
+
+    input_specs = []
+    for ds in input_datasets:
+        var = _identifier(ds).upper()
+        columns = [col["name"] for col in schemas[ds]] if ds in schemas else None
+        dtypes = pandas_dtypes(schemas.get(ds, []))
+        input_specs.append(f"{var}_COLUMNS = {columns!r}\n{var}_DTYPES = {dtypes!r}")
+
+    lookup_readers = "".join(
+        f'\n{_identifier(ds).lower()}_df = dataiku.Dataset("{ds}").get_dataframe(\n'
+        f'    columns={_identifier(ds).upper()}_COLUMNS\n'
+        f').astype({_identifier(ds).upper()}_DTYPES)\n'
+        for ds in input_datasets if ds != main_input
+    )
+
+    return RECIPE_TEMPLATE_PYTHON_STREAMING.format(
+        recipe_name=recipe_name,
+        inputs=", ".join(input_datasets),
+        output=output_dataset,
+        chunk_size=chunk_size,
+        input_specs="\n".join(input_specs),
+        lookup_readers=lookup_readers,
+        main_input=main_input,
+        main_var=_identifier(main_input).upper(),
+    )
+
 
 def build_python_recipe(
     recipe_name: str,
     input_datasets: list[str],
     output_dataset: str,
+    mode: str = AUTO,
+    schemas: Optional[dict[str, list[dict[str, Any]]]] = None,
+    input_records: Optional[dict[str, Optional[int]]] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
 ) -> str:
     """
     Génère le code d'une recette Python Dataiku à partir de templates.
@@ -55,10 +236,22 @@ def build_python_recipe(
         recipe_name: Nom de la recette.
         input_datasets: Liste des datasets d'entrée.
         output_dataset: Nom du dataset de sortie.
+        mode: "memory", "streaming" ou "auto" (streaming au-delà du seuil).
+        schemas: Colonnes de chaque entrée (projection et dtypes en streaming).
+        input_records: Nombre de lignes de chaque entrée (mode auto).
+        chunk_size: Lignes par bloc en streaming.
 
     Returns:
         Code Python de la recette prêt à copier dans DSS.
     """
+    if select_template_mode(mode, input_records) == STREAMING:
+        code = build_streaming_python_recipe(
+            recipe_name, input_datasets, output_dataset,
+            schemas=schemas, input_records=input_records, chunk_size=chunk_size,
+        )
+        logger.info("Template streaming de recette '%s' généré.", recipe_name)
+        return code
+
     input_readers = "\n".join(
         f'{ds.lower()}_df = dataiku.Dataset("{ds}").get_dataframe()'
         for ds in input_datasets
@@ -78,11 +271,73 @@ def build_python_recipe(
     return code
 
 
+def get_records_count(project: Any, dataset_name: str) -> Optional[int]:
+    """
+    Nombre de lignes d'un dataset d'après sa dernière métrique calculée.
+
+    Args:
+        project: DSSProject.
+        dataset_name: Nom du dataset.
+
+    Returns:
+        Nombre de lignes, ou None si la métrique est absente.
+    """
+    try:
+        metrics = project.get_dataset(dataset_name).get_last_metric_values()
+        value = metrics.get_global_value("records:COUNT_RECORDS")
+        return int(value) if value is not None else None
+    except Exception as e:
+        logger.debug("Nombre de lignes de '%s' indisponible : %s", dataset_name, e)
+        return None
+
+
+def _recipe_code(
+    project: Any,
+    recipe_name: str,
+    input_datasets: list[str],
+    output_dataset: str,
+    mode: str,
+) -> str:
+    """Template de la recette, mesuré sur les entrées du projet en mode auto / streaming."""
+    schemas, records = {}, {}
+    if mode != MEMORY:
+        records = {ds: get_records_count(project, ds) for ds in input_datasets}
+        if select_template_mode(mode, records) == STREAMING:
+            schemas = {
+                ds: project.get_dataset(ds).get_schema()["columns"] for ds in input_datasets
+            }
+    return build_python_recipe(
+        recipe_name, input_datasets, output_dataset,
+        mode=mode, schemas=schemas, input_records=records,
+    )
+
+
+def _create_recipe(
+    project: Any,
+    recipe_name: str,
+    input_datasets: list[str],
+    output_dataset: str,
+    code: str,
+) -> Any:
+    """Crée la recette et pose son code (settings lus et sauvegardés une seule fois)."""
+    builder = project.new_recipe("python", recipe_name)
+    for ds in input_datasets:
+        builder.with_input(ds)
+    builder.with_output(output_dataset)
+
+    recipe = builder.build()
+    settings = recipe.get_settings()
+    settings.set_code(code)
+    settings.save()
+    return recipe
+
+
 def create_python_recipe_in_dss(
     recipe_name: str,
     input_datasets: list[str],
     output_dataset: str,
     project_key: Optional[str] = None,
+    mode: str = AUTO,
 ) -> None:
     """
     Crée une recette Python dans DSS via l'API.
@@ -92,20 +347,122 @@ def create_python_recipe_in_dss(
         input_datasets: Datasets d'entrée existants dans le projet.
         output_dataset: Dataset de sortie (doit exister ou être managé).
         project_key: Clé du projet DSS.
+        mode: Mode du template ("auto" mesure la taille des entrées).
     """
     project = get_project(project_key)
-    code = build_python_recipe(recipe_name, input_datasets, output_dataset)
-
-    builder = project.new_recipe("python", recipe_name)
-    for ds in input_datasets:
-        builder.with_input(ds)
-    builder.with_output(output_dataset)
-
-    recipe = builder.build()
-    recipe.get_settings().set_code(code)
-    recipe.get_settings().save()
+    code = _recipe_code(project, recipe_name, input_datasets, output_dataset, mode)
+    _create_recipe(project, recipe_name, input_datasets, output_dataset, code)
 
     logger.info(
         "Recette '%s' créée dans le projet '%s'.",
         recipe_name, project_key or "défaut",
     )
+
+
+# ---------------------------------------------------------------------------
+# Création en masse
+# ---------------------------------------------------------------------------
+
+class RecipeStatus(NamedTuple):
+    """Résultat de la création d'une recette."""
+
+    name: str
+    project_key: str
+    success: bool
+    duration_s: float
+    error: Optional[str] = None
+
+
+def create_python_recipes_in_dss(
+    specs: list[dict[str, Any]],
+    project_key: Optional[str] = None,
+    max_workers: int = 8,
+) -> list[RecipeStatus]:
+    """
+    Crée des recettes Python en masse, en parallèle.
+
+    Un seul client DSS est ouvert pour tout le lot et chaque projet n'est
+    résolu qu'une fois. Le débit vers DSS est borné par le Throttle du
+    processus (DSS_RATE_LIMIT, voir src/api/throttle.py). Une recette en
+    échec n'interrompt pas les autres : son erreur est rapportée dans le
+    tableau de résultats.
+
+    Args:
+        specs: Recettes à créer : {"name", "inputs", "output"} et
+            optionnellement "code", "mode" et "project_key".
+        project_key: Projet par défaut des specs sans "project_key".
+        max_workers: Créations simultanées.
+
+    Returns:
+        Un RecipeStatus par spec, dans l'ordre des specs.
+
+    Raises:
+        ValueError: Si une spec sans "project_key" n'a pas de projet par
+            défaut (project_key et DSS_PROJECT_KEY vides).
+
+    Example:
+        >>> statuses = create_python_recipes_in_dss([
+        ...     {"name": "clean_sales", "inputs": ["sales"], "output": "sales_clean"},
+        ...     {"name": "clean_stock", "inputs": ["stock"], "output": "stock_clean",
+        ...      "project_key": "LOGISTIQUE"},
+        ... ])
+        >>> print(format_recipe_statuses(statuses))
+    """
+    default_key = project_key
+    if any(not spec.get("project_key") for spec in specs):
+        if default_key is None:
+            default_key = get_config().project_key
+        if not default_key:
+            raise ValueError(
+                "Projet par défaut manquant : renseignez project_key ou DSS_PROJECT_KEY, "
+                "ou \"project_key\" dans chaque spec."
+            )
+    client = get_client()
+    projects = {
+        key: client.get_project(key)
+        for key in {spec.get("project_key") or default_key for spec in specs}
+    }
+
+    def create(spec: dict[str, Any]) -> RecipeStatus:
+        key = spec.get("project_key") or default_key
+        start = time.perf_counter()
+        try:
+            project = projects[key]
+            code = spec.get("code") or _recipe_code(
+                project, spec["name"], spec["inputs"], spec["output"], spec.get("mode", AUTO)
+            )
+            _create_recipe(project, spec["name"], spec["inputs"], spec["output"], code)
+            return RecipeStatus(spec["name"], key, True, round(time.perf_counter() - start, 3))
+        except Exception as exc:
+            logger.warning("Échec de création de la recette '%s' : %s", spec.get("name"), exc)
+            return RecipeStatus(
+                spec.get("name", "?"), key, False, round(time.perf_counter() - start, 3), str(exc)
+            )
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        statuses = list(pool.map(create, specs))
+
+    logger.info(
+        "%d recette(s) créée(s) sur %d.",
+        sum(s.success for s in statuses), len(statuses),
+    )
+    return statuses
+
+
+def format_recipe_statuses(statuses: list[RecipeStatus]) -> str:
+    """
+    Met en forme les résultats d'une création en masse (un tableau texte).
+
+    Args:
+        statuses: Résultats de create_python_recipes_in_dss().
+
+    Returns:
+        Tableau : projet, recette, statut, durée, erreur.
+    """
+    lines = [f"{'Projet':<20} {'Recette':<40} {'Statut':<6} {'Durée (s)':>9}  Erreur"]
+    for s in statuses:
+        lines.append(
+            f"{s.project_key:<20} {s.name:<40} {'OK' if s.success else 'ÉCHEC':<6} "
+            f"{s.duration_s:>9.3f}  {s.error or ''}"
+        )
+    return "\n".join(lines)
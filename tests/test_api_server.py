@@ -0,0 +1,166 @@
+"""
+test_api_server.py - Tests de l'API HTTP asynchrone du chatbot
+
+Utilise les doublures de chatbot/src/simulation.py (aucun appel réseau).
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+from starlette.requests import Request
+from starlette.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "chatbot" / "src"))
+
+from api_server import HandlerPool, create_app  # noqa: E402
+from async_chat_handler import AsyncChatHandler  # noqa: E402
+from simulation import SimulatedAsyncAnthropic, SimulatedConnector  # noqa: E402
+
+
+def make_pool(created=None, claude_latency=0.0):
+    async def factory(project_key):
+        if created is not None:
+            created.append(project_key)
+        await asyncio.sleep(0.01)
+        return AsyncChatHandler(
+            connector=SimulatedConnector(project_key or "SIMULATED", latency=0.0),
+            client=SimulatedAsyncAnthropic(latency=claude_latency),
+        )
+    return HandlerPool(factory)
+
+
+def read_events(response):
+    """Événements SSE (type, données) d'une réponse en flux."""
+    events, event = [], None
+    for line in response.iter_lines():
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+        elif line.startswith("data: "):
+            events.append((event, json.loads(line[len("data: "):])))
+    return events
+
+
+class TestChatAPI:
+    """Tests des sessions et du flux SSE."""
+
+    def test_message_streams_text_and_tool_events(self):
+        with TestClient(create_app(make_pool())) as client:
+            session = client.post("/sessions", json={"project_key": "P"}).json()
+            url = f"/sessions/{session['session_id']}/messages"
+
+            with client.stream("POST", url, json={"content": "Liste les datasets"}) as response:
+                assert response.headers["content-type"].startswith("text/event-stream")
+                events = read_events(response)
+
+            types = [event for event, _ in events]
+            assert types[:2] == ["tool_use", "tool_result"]
+            assert events[0][1]["name"] == "list_datasets"
+            assert types[-1] == "done"
+            streamed = "".join(data["text"] for event, data in events if event == "text")
+            assert streamed == events[-1][1]["text"] == "Voici les datasets disponibles."
+            assert client.get(f"/sessions/{session['session_id']}").json()["messages"] == 4
+
+    def test_handler_is_shared_per_project(self):
+        created = []
+        pool = make_pool(created)
+
+        async def run():
+            handlers = await asyncio.gather(*(pool.get(key) for key in ["A", "A", "B", "A"]))
+            return handlers
+
+        handlers = asyncio.run(run())
+
+        assert sorted(created) == ["A", "B"]
+        assert handlers[0] is handlers[1] is handlers[3]
+
+    def test_busy_session_and_saturation_are_rejected(self):
+        app = create_app(make_pool(), max_active_turns=1)
+        with TestClient(app) as client:
+            first = client.post("/sessions", json={}).json()["session_id"]
+            second = client.post("/sessions", json={}).json()["session_id"]
+            api = app.state.api
+
+            api.sessions[first].busy = True
+            api.active_turns = 1
+            busy = client.post(f"/sessions/{first}/messages", json={"content": "x"})
+            saturated = client.post(f"/sessions/{second}/messages", json={"content": "x"})
+
+            assert busy.status_code == 409
+            assert saturated.status_code == 503
+            assert saturated.headers["retry-after"] == "1"
+            assert client.post("/sessions/inconnue/messages", json={"content": "x"}).status_code == 404
+
+    def test_invalid_bodies_are_rejected(self):
+        with TestClient(create_app(make_pool())) as client:
+            session = client.post("/sessions", json={}).json()["session_id"]
+            url = f"/sessions/{session}/messages"
+
+            assert client.post("/sessions", content=b"{pas du json").status_code == 400
+            assert client.post("/sessions", json=["P"]).status_code == 400
+            assert client.post("/sessions", json={"project_key": "../P"}).status_code == 400
+            assert client.post(url, content=b"{pas du json").status_code == 400
+            assert client.post(url, json="x").status_code == 400
+
+    def test_turn_is_released_when_client_disconnects_early(self):
+        app = create_app(make_pool())
+        with TestClient(app) as client:
+            session = client.post("/sessions", json={}).json()["session_id"]
+        api = app.state.api
+
+        async def run():
+            body = json.dumps({"content": "x"}).encode()
+            messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+            async def receive():
+                return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+            async def send(message):
+                # Client parti avant le début de la réponse
+                if message["type"] == "http.response.start":
+                    raise OSError("connexion fermée")
+
+            scope = {"type": "http", "method": "POST", "path": f"/sessions/{session}/messages",
+                     "raw_path": f"/sessions/{session}/messages".encode(), "query_string": b"",
+                     "headers": [(b"content-type", b"application/json")], "app": app,
+                     "path_params": {"session_id": session}}
+            try:
+                response = await api.post_message(Request(scope, receive))
+                await response(scope, receive, send)
+            except OSError:
+                pass
+
+        asyncio.run(run())
+
+        assert api.active_turns == 0
+        assert api.sessions[session].busy is False
+
+    def test_sessions_expire_and_are_bounded(self):
+        app = create_app(make_pool(), max_sessions=2, session_ttl=60)
+        with TestClient(app) as client:
+            ids = [client.post("/sessions", json={}).json()["session_id"] for _ in range(3)]
+            api = app.state.api
+
+            assert list(api.sessions) == ids[1:]
+            api.sessions[ids[1]].last_used -= 120
+            assert client.get(f"/sessions/{ids[1]}").status_code == 404
+            assert client.get(f"/sessions/{ids[2]}").status_code == 200
+
+    def test_least_recently_used_idle_handler_is_closed(self):
+        pool = make_pool()
+        pool.max_handlers = 2
+        closed = []
+
+        async def run():
+            await pool.get("A")
+            b = await pool.get("B")
+            b.aclose = lambda: asyncio.sleep(0, closed.append("B"))
+            async with pool.use("A"):
+                await pool.get("C")
+            await asyncio.sleep(0)
+
+        asyncio.run(run())
+
+        assert list(pool._handlers) == ["A", "C"]
+        assert closed == ["B"]
@@ -0,0 +1,118 @@
+"""
+test_async_chat_handler.py - Tests du gestionnaire de chat asyncio
+
+Utilise les doublures de chatbot/src/simulation.py (aucun appel réseau).
+"""
+
+import sys
+import time
+import asyncio
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "chatbot" / "src"))
+
+from async_chat_handler import AsyncChatHandler  # noqa: E402
+from simulation import SimulatedAsyncAnthropic, SimulatedConnector  # noqa: E402
+
+
+def make_handler(claude_latency=0.05, dss_latency=0.01, tool_name="list_datasets",
+                 **kwargs) -> AsyncChatHandler:
+    return AsyncChatHandler(
+        connector=SimulatedConnector(latency=dss_latency),
+        client=SimulatedAsyncAnthropic(latency=claude_latency, tool_name=tool_name),
+        **kwargs,
+    )
+
+
+class TestAsyncChatHandler:
+    """Tests de la boucle messages.create / tool_use asynchrone."""
+
+    def test_process_message_runs_tool_loop(self):
+        handler = make_handler()
+        text, history = asyncio.run(handler.aprocess_message("Liste les datasets", []))
+
+        assert text == "Voici les datasets disponibles."
+        # user, assistant(tool_use), user(tool_result), assistant(texte)
+        assert [m["role"] for m in history] == ["user", "assistant", "user", "assistant"]
+        assert "sales" in history[2]["content"][0]["content"]
+
+    def test_sessions_run_concurrently(self):
+        handler = make_handler(claude_latency=0.1)
+
+        async def run_all():
+            return await asyncio.gather(*(
+                handler.aprocess_message("Liste les datasets", []) for _ in range(50)
+            ))
+
+        start = time.perf_counter()
+        results = asyncio.run(run_all())
+        elapsed = time.perf_counter() - start
+
+        assert len(results) == 50
+        # 50 tours séquentiels prendraient au moins 50 × 0.2 s
+        assert elapsed < 2.0
+
+    def test_turn_timeout_propagates(self):
+        handler = make_handler(claude_latency=0.5, turn_timeout=0.1)
+
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(handler.aprocess_message("Liste les datasets", []))
+
+    def test_cancellation_propagates(self):
+        handler = make_handler(claude_latency=1.0)
+
+        async def cancel_soon():
+            task = asyncio.create_task(handler.aprocess_message("Liste", []))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            await task
+
+        with pytest.raises(asyncio.CancelledError):
+            asyncio.run(cancel_soon())
+
+    def test_sync_process_message_is_rejected(self):
+        handler = make_handler()
+
+        with pytest.raises(TypeError, match="aprocess_message"):
+            handler.process_message("Liste les datasets", [])
+
+    def test_tool_error_is_reported_as_failure(self):
+        handler = make_handler(tool_name="outil_inexistant")
+        events = []
+
+        async def on_event(event):
+            events.append(event)
+
+        asyncio.run(handler.aprocess_message("Liste", [], on_event=on_event))
+
+        result = next(e for e in events if e["type"] == "tool_result")
+        assert result["success"] is False
+
+    def test_dss_timeout_is_returned_to_claude(self):
+        handler = make_handler(claude_latency=0.01, dss_timeout=0.1)
+        handler.connector.latency = 0.5
+
+        _, history = asyncio.run(handler.aprocess_message("Liste les datasets", []))
+
+        content = history[2]["content"][0]["content"]
+        assert "continue en arrière-plan" in content
+
+    def test_turn_timeout_names_tools_still_running(self):
+        handler = make_handler(claude_latency=0.01, turn_timeout=0.2)
+        handler.connector.latency = 0.5
+
+        with pytest.raises(asyncio.TimeoutError, match="list_datasets"):
+            asyncio.run(handler.aprocess_message("Liste les datasets", []))
+
+    def test_tools_are_not_started_after_the_deadline(self):
+        handler = make_handler()
+        running = {}
+
+        result = asyncio.run(handler.execute_tool_async(
+            "list_datasets", {}, deadline=time.monotonic() - 1, running=running
+        ))
+
+        assert "n'a pas été lancé" in result["error"]
+        assert running == {}
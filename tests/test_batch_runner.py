@@ -0,0 +1,127 @@
+"""
+test_batch_runner.py - Tests de l'exécution par lots des demandes de workflows
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "chatbot" / "src"))
+
+from batch_runner import BatchRunner, load_requests, summarize_results  # noqa: E402
+from chat_handler import ChatHandler  # noqa: E402
+from simulation import SimulatedAnthropic, SimulatedConnector  # noqa: E402
+from workflow_builder import WorkflowBuilder  # noqa: E402
+
+SPEC = {
+    "workflow_name": "wf",
+    "source_datasets": ["sales"],
+    "recipes": [{"type": "python", "name": "p", "inputs": ["sales"], "output": "out",
+                 "code": "import dataiku\ndf = dataiku.Dataset('sales').get_dataframe()\n"
+                         "df = df[df['amont'] > 0]\n"}],
+    "output_dataset": "out",
+    "dry_run": True,
+}
+
+
+def write_requests(path, lines):
+    path.write_text("\n".join(json.dumps(line) for line in lines) + "\n", encoding="utf-8")
+    return path
+
+
+CREATE = {
+    "workflow_name": "wf",
+    "source_datasets": ["sales"],
+    "recipes": [{"type": "python", "name": "p", "inputs": ["sales"], "output": "out"}],
+    "output_dataset": "out",
+}
+
+
+def make_runner(claude_latency=0.0, concurrency=4, tool_name="create_workflow", tool_input=CREATE):
+    connector = SimulatedConnector(latency=0.0)
+    client = SimulatedAnthropic(latency=claude_latency, tool_name=tool_name, tool_input=tool_input)
+    return BatchRunner(
+        lambda: ChatHandler(connector=connector, client=client, batch=True),
+        WorkflowBuilder(connector),
+        concurrency,
+    )
+
+
+class TestLoadRequests:
+    """Tests de lecture du fichier de demandes."""
+
+    def test_ids_default_to_line_number(self, tmp_path):
+        path = write_requests(tmp_path / "in.jsonl", [{"prompt": "a"}, {"id": "x", "spec": SPEC}])
+
+        requests = load_requests(path)
+
+        assert [(r["id"], r["kind"]) for r in requests] == [("1", "prompt"), ("x", "spec")]
+
+    def test_invalid_line_is_rejected(self, tmp_path):
+        path = write_requests(tmp_path / "in.jsonl", [{"prompt": "a", "spec": SPEC}])
+
+        with pytest.raises(ValueError, match="ligne 1"):
+            load_requests(path)
+
+
+class TestBatchRunner:
+    """Tests de l'exécution, des résultats et de la reprise."""
+
+    def test_prompts_run_concurrently_with_tokens(self, tmp_path):
+        requests = [{"id": str(i), "kind": "prompt", "prompt": f"Crée le workflow {i}"}
+                    for i in range(8)]
+        output = tmp_path / "out.jsonl"
+
+        start = time.perf_counter()
+        results = make_runner(claude_latency=0.05).run(requests, output)
+        elapsed = time.perf_counter() - start
+
+        lines = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+        assert sorted(r["id"] for r in lines) == [str(i) for i in range(8)]
+        assert all(r["status"] == "ok" and r["tokens"]["calls"] == 2 for r in results)
+        assert all(r["created_recipes"] == ["p"] for r in results)
+        assert all(r["tokens"]["input_tokens"] > 0 for r in results)
+        # 8 demandes × 2 appels × 50 ms = 0.8 s en série
+        assert elapsed < 0.6
+        assert summarize_results(results)["by_status"] == {"ok": 8}
+
+    def test_resume_skips_done_and_retries_failed(self, tmp_path):
+        requests = [
+            {"id": "a", "kind": "prompt", "prompt": "Crée le workflow"},
+            {"id": "b", "kind": "spec", "spec": SPEC},
+        ]
+        output = tmp_path / "out.jsonl"
+        runner = make_runner()
+
+        first = runner.run(requests, output)
+        again = runner.run(requests, output)
+        retried = runner.run(requests, output, retry_failed=True)
+
+        by_id = {r["id"]: r for r in first}
+        assert by_id["b"]["status"] == "failed"
+        assert "amont" in by_id["b"]["code_errors"][0]
+        assert again == []
+        assert [r["id"] for r in retried] == ["b"]
+        assert len(output.read_text(encoding="utf-8").splitlines()) == 3
+
+    def test_prompt_without_workflow_is_failed(self, tmp_path):
+        requests = [{"id": "a", "kind": "prompt", "prompt": "Agrège sales par région"}]
+        output = tmp_path / "out.jsonl"
+        # Claude ne fait que lister les datasets (ex. : il demande confirmation)
+        runner = make_runner(tool_name="list_datasets", tool_input={})
+
+        first = runner.run(requests, output)
+        retried = runner.run(requests, output, retry_failed=True)
+
+        assert first[0]["status"] == "failed"
+        assert "create_workflow" in first[0]["error"]
+        assert [r["id"] for r in retried] == ["a"]
+
+    def test_batch_prompt_does_not_ask_for_confirmation(self):
+        handler = ChatHandler(connector=SimulatedConnector(latency=0.0),
+                              client=SimulatedAnthropic(latency=0.0), batch=True)
+
+        assert "ne demande PAS de confirmation" in handler.system_prompt
@@ -0,0 +1,116 @@
+"""
+test_code_validation.py - Tests de la validation statique du code des recettes Python
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "chatbot" / "src"))
+
+from code_validation import validate_recipe_code  # noqa: E402
+from simulation import SimulatedConnector  # noqa: E402
+from workflow_builder import WorkflowBuilder  # noqa: E402
+
+SCHEMAS = {"sales": ["region", "amount", "order_date"]}
+
+
+def check(code, inputs=("sales",), output="out"):
+    recipe = {"type": "python", "name": "r", "inputs": list(inputs), "output": output, "code": code}
+    return validate_recipe_code(recipe, output, SCHEMAS.get)
+
+
+class TestValidateRecipeCode:
+    """Tests des vérifications sans exécution."""
+
+    def test_valid_code_has_no_problem(self):
+        code = (
+            "import dataiku\n"
+            "src = dataiku.Dataset('sales')\n"
+            "df = src.get_dataframe(columns=['region', 'amount'])\n"
+            "df = df[df['amount'] > 0]\n"
+            "df['double'] = df['amount'] * 2\n"
+            "df = df.groupby('region', as_index=False)['double'].sum()\n"
+            "df['anything'] = 1\n"
+            "dataiku.Dataset('out').write_with_schema(df)\n"
+        )
+        assert check(code) == []
+
+    def test_syntax_error_reports_line(self):
+        problems = check("import dataiku\ndf = dataiku.Dataset('sales').get_dataframe(\n")
+        assert len(problems) == 1
+        assert "erreur de syntaxe" in problems[0]
+
+    def test_undeclared_dataset_is_reported(self):
+        code = (
+            "import dataiku\n"
+            "df = dataiku.Dataset('customers').get_dataframe()\n"
+            "dataiku.Dataset('out').write_with_schema(df)\n"
+        )
+        problems = check(code)
+        assert problems == [
+            "r, ligne 2 : dataiku.Dataset(\"customers\") n'est ni une entrée (sales) ni la sortie (out)"
+        ]
+
+    def test_unknown_columns_with_suggestion(self):
+        code = (
+            "import dataiku\n"
+            "for chunk in dataiku.Dataset('sales').iter_dataframes(columns=['regoin']):\n"
+            "    total = chunk[['amount', 'qty']].sum()\n"
+        )
+        problems = check(code)
+        assert "ligne 2 : colonne « regoin » absente de sales (vouliez-vous dire « region » ?)" in problems[0]
+        assert "colonne « qty » absente de sales" in problems[1]
+        assert len(problems) == 2
+
+    def test_in_place_changes_stop_column_tracking(self):
+        code = (
+            "import dataiku\n"
+            "df = dataiku.Dataset('sales').get_dataframe()\n"
+            "df.rename(columns={'amount': 'montant'}, inplace=True)\n"
+            "print(df['montant'])\n"
+            "other = dataiku.Dataset('sales').get_dataframe()\n"
+            "other.columns = ['a', 'b', 'c']\n"
+            "print(other['a'])\n"
+            "third = dataiku.Dataset('sales').get_dataframe()\n"
+            "third.loc[:, 'flag'] = True\n"
+            "third.insert(0, 'rank', 1)\n"
+            "print(third[['flag', 'rank']])\n"
+        )
+        assert check(code) == []
+
+    def test_function_parameters_shadow_frames(self):
+        code = (
+            "import dataiku\n"
+            "df = dataiku.Dataset('sales').get_dataframe()\n"
+            "def enrich(df):\n"
+            "    return df['montant']\n"
+            "label = lambda df: df['libelle']\n"
+            "print(df['amont'])\n"
+        )
+        problems = check(code)
+        assert len(problems) == 1
+        assert "ligne 6 : colonne « amont » absente de sales" in problems[0]
+
+
+class TestCreateWorkflowValidation:
+    """Tests de l'intégration dans create_workflow()."""
+
+    def test_invalid_code_fails_before_any_dss_call(self):
+        connector = SimulatedConnector(latency=0.0)
+        calls = []
+        connector.get_datasets_storage = lambda: calls.append("storage") or {}
+        builder = WorkflowBuilder(connector)
+        recipe = {
+            "type": "python", "name": "p", "inputs": ["sales"], "output": "out",
+            "code": "import dataiku\ndf = dataiku.Dataset('sales').get_dataframe()\n"
+                    "df = df[df['amont'] > 0]\ndataiku.Dataset('out').write_with_schema(df)\n",
+        }
+
+        result = builder.create_workflow("wf", ["sales"], [recipe], "out")
+
+        assert result["success"] is False
+        assert result["code_errors"] == [
+            "p, ligne 3 : colonne « amont » absente de sales (vouliez-vous dire « amount » ?)"
+        ]
+        assert calls == []
+        assert connector.project.built_recipes == []
@@ -0,0 +1,121 @@
+"""
+test_credentials.py - Tests du rechargement à chaud de la clé API
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+from requests.auth import _basic_auth_str
+
+from src.api.credentials import CredentialAuth, CredentialProvider, read_key
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+from rotate_api_key import update_env_file  # noqa: E402
+
+
+class KeyCheckingAdapter(BaseAdapter):
+    """Adaptateur requests acceptant une seule clé, sans réseau."""
+
+    def __init__(self, valid_key):
+        super().__init__()
+        self.valid = _basic_auth_str(valid_key, "")
+        self.seen = []
+
+    def send(self, request, **kwargs):
+        self.seen.append(request.headers["Authorization"])
+        response = requests.Response()
+        response.status_code = 200 if request.headers["Authorization"] == self.valid else 401
+        response.request = request
+        response.connection = self
+        response._content = b"{}"
+        return response
+
+    def close(self):
+        pass
+
+
+class CountingLayer(BaseAdapter):
+    """Couche de transport intermédiaire (comme ThrottledAdapter), comptant les envois."""
+
+    def __init__(self, inner):
+        super().__init__()
+        self.inner = inner
+        self.sent = 0
+
+    def send(self, request, **kwargs):
+        self.sent += 1
+        return self.inner.send(request, **kwargs)
+
+    def close(self):
+        self.inner.close()
+
+
+def write_env(path, key, mtime):
+    path.write_text(f"DSS_URL=https://dss.test.local\nDSS_API_KEY={key}\n", encoding="utf-8")
+    os.utime(path, ns=(mtime, mtime))
+
+
+class TestCredentials:
+    """Tests du fournisseur de clé et de l'authentification requests."""
+
+    def test_provider_reloads_when_file_changes(self, tmp_path):
+        env = tmp_path / ".env"
+        write_env(env, "old", 1_000_000_000)
+        provider = CredentialProvider(env, check_interval=0)
+        changes = []
+        provider.on_change(changes.append)
+
+        assert provider.api_key == "old"
+        write_env(env, "new", 2_000_000_000)
+        assert provider.api_key == "new"
+        assert provider.api_key == "new"
+        assert (changes, provider.version) == (["new"], 2)
+
+        secret = tmp_path / "dss_api_key"
+        secret.write_text("secret-key\n", encoding="utf-8")
+        assert CredentialProvider(secret, variable=None).api_key == "secret-key"
+
+    def test_request_refused_with_old_key_is_retried_once(self, tmp_path):
+        env = tmp_path / ".env"
+        write_env(env, "old", 1_000_000_000)
+        provider = CredentialProvider(env, check_interval=3600)
+        adapter = KeyCheckingAdapter("new")
+        layer = CountingLayer(adapter)
+        session = requests.Session()
+        session.mount("https://", layer)
+        session.auth = CredentialAuth(provider, session)
+
+        # Clé tournée après la dernière vérification : première requête refusée
+        write_env(env, "new", 2_000_000_000)
+        response = session.post("https://dss.test.local/api", data=b"x")
+        assert response.status_code == 200
+        assert [r.status_code for r in response.history] == [401]
+        assert adapter.seen == [_basic_auth_str("old", ""), _basic_auth_str("new", "")]
+        # Le rejeu traverse les couches montées sur la session
+        assert layer.sent == 2
+
+        # Clé réellement invalide : pas de boucle de nouvelles tentatives
+        adapter.valid = _basic_auth_str("other", "")
+        assert session.get("https://dss.test.local/api").status_code == 401
+        assert len(adapter.seen) == 3
+        assert layer.sent == 3
+
+    def test_env_update_keeps_other_lines_and_requires_the_variable(self, tmp_path):
+        env = tmp_path / ".env"
+        env.write_text("DSS_URL=https://dss\nexport DSS_API_KEY=ancienne\n", encoding="utf-8")
+
+        update_env_file("nouvelle\\1", env)
+
+        assert env.read_text(encoding="utf-8") == \
+            "DSS_URL=https://dss\nexport DSS_API_KEY=nouvelle\\1\n"
+        assert read_key(env) == "nouvelle\\1"
+
+        env.write_text("DSS_URL=https://dss\n", encoding="utf-8")
+        with pytest.raises(RuntimeError, match="DSS_API_KEY absente"):
+            update_env_file("nouvelle", env)
+        assert env.read_text(encoding="utf-8") == "DSS_URL=https://dss\n"
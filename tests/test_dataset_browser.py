@@ -0,0 +1,98 @@
+"""
+test_dataset_browser.py - Tests du navigateur de datasets de la sidebar
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "chatbot" / "src"))
+
+from dataset_browser import DatasetBrowser  # noqa: E402
+
+
+class FakeConnector:
+    """Connecteur avec cache de schémas, comptant les appels DSS."""
+
+    def __init__(self, count=45, latency=0.05):
+        self.datasets = [f"Sales_{i:02d}" if i % 3 == 0 else f"orders_{i:02d}" for i in range(count)]
+        self.latency = latency
+        self.listings = 0
+        self.schema_calls = []
+        self.schema_ttl = 300
+        self.cache = {}
+        self.lock = threading.Lock()
+
+    def get_available_datasets(self):
+        self.listings += 1
+        return list(self.datasets)
+
+    def get_dataset_info(self, name):
+        info = self.fetch_dataset_info(name)
+        self.cache[name] = info
+        return info
+
+    def fetch_dataset_info(self, name):
+        with self.lock:
+            self.schema_calls.append(name)
+        time.sleep(self.latency)
+        return {"name": name, "columns": [{"name": "id", "type": "bigint"}], "nb_columns": 1}
+
+    def get_cached_info(self, name):
+        return self.cache.get(name)
+
+
+class TestDatasetBrowser:
+    """Tests de la liste en cache, du filtre et du préchargement."""
+
+    def test_pages_come_from_one_cached_listing(self):
+        connector = FakeConnector()
+        browser = DatasetBrowser(connector)
+
+        first = browser.page(page=0, page_size=20)
+        last = browser.page(page=99, page_size=20)
+        sales = browser.page("sales", page_size=10)
+
+        assert connector.listings == 1
+        assert (first.total, first.pages, len(first.names)) == (45, 3, 20)
+        assert (last.page, len(last.names)) == (2, 5)
+        assert sales.total == 15 and sales.pages == 2
+        assert all("sales" in name.lower() for name in sales.names)
+        assert connector.schema_calls == []
+
+    def test_warm_loads_schemas_in_background_once(self):
+        connector = FakeConnector(latency=0.1)
+        browser = DatasetBrowser(connector, max_workers=4)
+        names = browser.page(page_size=8).names
+
+        start = time.perf_counter()
+        launched = browser.warm(names)
+        again = browser.warm(names)
+        returned_after = time.perf_counter() - start
+
+        deadline = time.monotonic() + 2
+        while any(browser.cached_info(n) is None for n in names) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        browser.close()
+
+        assert (launched, again) == (8, 0)
+        assert returned_after < 0.05
+        assert sorted(connector.schema_calls) == sorted(names)
+        assert browser.warm(names) == 0
+
+    def test_browser_schemas_stay_out_of_the_connector_cache(self):
+        connector = FakeConnector(latency=0)
+        browser = DatasetBrowser(connector)
+
+        connector.get_dataset_info("orders_01")
+        assert browser.info("orders_01") == connector.cache["orders_01"]
+        assert connector.schema_calls == ["orders_01"]
+
+        browser.info("orders_02")
+        browser.warm(["orders_04"])
+        browser.close()
+
+        assert browser.cached_info("orders_02") is not None
+        # Les workflows ne voient que les schémas lus sur le nœud de design
+        assert list(connector.cache) == ["orders_01"]
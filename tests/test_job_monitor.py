@@ -0,0 +1,97 @@
+"""
+test_job_monitor.py - Tests du suivi concurrent des builds
+"""
+
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "chatbot" / "src"))
+
+from job_monitor import JobMonitor  # noqa: E402
+from simulation import SimulatedConnector  # noqa: E402
+from workflow_builder import WorkflowBuilder  # noqa: E402
+
+
+class FakeJob:
+    """Job dont le statut suit une liste d'états, un par appel."""
+
+    def __init__(self, job_id, states):
+        self.id = job_id
+        self.states = list(states)
+        self.calls = 0
+
+    def get_status(self):
+        self.calls += 1
+        time.sleep(0.02)
+        state, done = self.states[min(self.calls, len(self.states)) - 1]
+        return {"baseStatus": {"state": state}, "globalState": {"done": done, "total": 2}}
+
+
+def make_monitor(**kwargs):
+    project = MagicMock()
+    project.get_dataset.return_value.get_last_metric_values.return_value = \
+        SimpleNamespace(get_global_value=lambda metric: "42")
+    params = {"poll_interval": 0.01, "max_poll_interval": 0.05, **kwargs}
+    return JobMonitor(project, **params)
+
+
+class TestJobMonitor:
+    """Tests de JobMonitor.wait()."""
+
+    def test_jobs_are_polled_concurrently_with_progress_events(self):
+        monitor = make_monitor()
+        running = [("RUNNING", 0)] * 3 + [("RUNNING", 1)] * 3 + [("DONE", 2)]
+        jobs = {f"ds_{i}": FakeJob(f"job_{i}", running) for i in range(8)}
+        events = []
+
+        start = time.perf_counter()
+        results = monitor.wait(jobs, on_progress=events.append)
+        elapsed = time.perf_counter() - start
+
+        assert {r["state"] for r in results.values()} == {"DONE"}
+        assert results["ds_0"]["rows"] == 42
+        # 8 jobs × 7 statuts à 20 ms : ≥ 1.1 s en série
+        assert elapsed < 0.8
+        states = [(e["state"], e["done"]) for e in events if e["dataset"] == "ds_0"]
+        assert states == [("RUNNING", 0), ("RUNNING", 1), ("DONE", 2)]
+
+    def test_backoff_reduces_polls_of_idle_jobs(self):
+        monitor = make_monitor(poll_interval=0.01, max_poll_interval=0.2, backoff=2.0)
+        job = FakeJob("slow", [("RUNNING", 0)] * 1000)
+        monitor.timeout = 0.5
+
+        results = monitor.wait({"ds": job})
+
+        assert results["ds"]["state"] == "TIMEOUT"
+        # Sans backoff : ~50 interrogations en 0.5 s
+        assert job.calls < 15
+
+    def test_persistent_status_errors_stop_the_wait(self):
+        monitor = make_monitor(max_status_errors=3)
+        job = FakeJob("broken", [])
+        job.get_status = MagicMock(side_effect=ConnectionError("DSS injoignable"))
+
+        results = monitor.wait({"ds": job})
+
+        assert results["ds"]["state"] == "STATUS_ERROR"
+        assert results["ds"]["error"] == "DSS injoignable"
+        assert job.get_status.call_count == 3
+
+    def test_failed_build_is_reported_by_create_workflow(self):
+        connector = SimulatedConnector(latency=0.0)
+        builder = WorkflowBuilder(connector)
+        builder.job_monitor = make_monitor()
+        builder.job_monitor.project = connector.project
+        connector.project.job_factory = lambda job_type, outputs: \
+            FakeJob("job_fail", [("RUNNING", 0), ("FAILED", 1)])
+        recipes = [{"type": "python", "name": "p", "inputs": ["sales"], "output": "out"}]
+
+        result = builder.create_workflow("wf", ["sales"], recipes, "out", build="terminal")
+
+        assert result["success"] is False
+        assert "out (FAILED)" in result["error"]
+        assert result["created_recipes"] == ["p"]
+        assert result["build"]["jobs"]["out"]["rows"] is None
@@ -0,0 +1,122 @@
+"""
+test_lineage.py - Tests du graphe de lignage et du planificateur de reconstruction
+
+Utilise des mocks pour tester sans connexion réelle au serveur.
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.api.lineage import get_lineage, invalidate_lineage, plan_rebuild
+
+
+def recipe(name, inputs, outputs):
+    return {
+        "name": name,
+        "inputs": {"main": {"items": [{"ref": ds} for ds in inputs]}},
+        "outputs": {"main": {"items": [{"ref": ds} for ds in outputs]}},
+    }
+
+
+# raw -> clean -> agg -> report ; ref -> enriched (clean + ref) -> report
+RECIPES = [
+    recipe("r_clean", ["raw"], ["clean"]),
+    recipe("r_agg", ["clean"], ["agg"]),
+    recipe("r_enrich", ["clean", "ref"], ["enriched"]),
+    recipe("r_report", ["agg", "enriched"], ["report"]),
+]
+
+
+def make_project(builds=None, modified=None):
+    project = MagicMock()
+    project.project_key = "PROJ"
+    project.list_recipes.return_value = RECIPES
+    names = ["raw", "ref", "clean", "agg", "enriched", "report"]
+    project.list_datasets.return_value = [
+        {"name": ds, "versionTag": {"lastModifiedOn": (modified or {}).get(ds, 100)}}
+        for ds in names
+    ]
+
+    # Builds successifs le long du flow : clean, puis agg / enriched, puis report
+    starts = {"clean": 200, "agg": 220, "enriched": 220, "report": 240}
+
+    def get_dataset(name):
+        ds = MagicMock()
+        default = {"buildStartTime": starts.get(name), "buildEndTime": starts.get(name, 0) + 10,
+                   "buildSuccess": True}
+        last = (builds or {}).get(name, default)
+        ds.get_info.return_value.get_raw.return_value = {"lastBuild": last}
+        return ds
+
+    project.get_dataset.side_effect = get_dataset
+    return project
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    invalidate_lineage()
+    yield
+    invalidate_lineage()
+
+
+class TestLineageGraph:
+    """Tests des requêtes amont / aval."""
+
+    @patch("src.api.lineage.get_project")
+    def test_upstream_downstream(self, mock_get_project):
+        mock_get_project.return_value = make_project()
+        graph = get_lineage("PROJ")
+
+        assert graph.downstream("clean") == {"agg", "enriched", "report"}
+        assert graph.upstream("report") == {"raw", "ref", "clean", "agg", "enriched"}
+        assert graph.sources == {"raw", "ref"}
+        assert graph.levels(graph.recipes) == [
+            ["r_clean"], ["r_agg", "r_enrich"], ["r_report"]
+        ]
+
+    @patch("src.api.lineage.get_project")
+    def test_graph_is_cached(self, mock_get_project):
+        project = make_project()
+        mock_get_project.return_value = project
+
+        get_lineage("PROJ")
+        get_lineage("PROJ")
+        get_lineage("PROJ", refresh=True)
+
+        assert project.list_recipes.call_count == 2
+
+
+class TestPlanRebuild:
+    """Tests de l'ensemble minimal de recettes à relancer."""
+
+    @patch("src.api.lineage.get_project")
+    def test_changed_source_rebuilds_only_downstream(self, mock_get_project):
+        mock_get_project.return_value = make_project()
+
+        plan = plan_rebuild("PROJ", changed=["ref"])
+
+        assert plan.levels == [["r_enrich"], ["r_report"]]
+        assert plan.datasets == [["enriched"], ["report"]]
+
+    @patch("src.api.lineage.get_project")
+    def test_stale_detection_from_timestamps(self, mock_get_project):
+        # ref modifiée après le dernier build : seules r_enrich et r_report sont périmées
+        project = make_project(modified={"ref": 500})
+        mock_get_project.return_value = project
+
+        plan = plan_rebuild("PROJ")
+
+        assert plan.recipes == ["r_enrich", "r_report"]
+        assert "ref" in plan.reasons["r_enrich"]
+        assert plan.reasons["r_report"] == "en aval d'une recette à relancer"
+
+    @patch("src.api.lineage.get_project")
+    def test_failed_build_is_stale(self, mock_get_project):
+        mock_get_project.return_value = make_project(
+            builds={"agg": {"buildStartTime": 220, "buildEndTime": 230, "buildSuccess": False}}
+        )
+
+        plan = plan_rebuild("PROJ")
+
+        assert plan.recipes == ["r_agg", "r_report"]
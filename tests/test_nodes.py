@@ -0,0 +1,109 @@
+"""
+test_nodes.py - Tests de la répartition des lectures entre nœuds DSS
+"""
+
+import io
+
+import requests
+from requests.adapters import BaseAdapter
+
+from src.api.nodes import ROUND_ROBIN, NodePool, NodeRouter, replica_reads
+
+DESIGN = "https://design.test"
+AUTOMATION = "https://automation.test"
+API_NODE = "https://api.test"
+
+
+class FakeNodes(BaseAdapter):
+    """Adaptateur requests simulant plusieurs nœuds, sans réseau."""
+
+    def __init__(self, down=(), missing=()):
+        super().__init__()
+        self.down = set(down)
+        self.missing = set(missing)
+        self.calls = []
+
+    def send(self, request, **kwargs):
+        node = request.url.split("/dip/")[0]
+        self.calls.append((request.method, node))
+        if node in self.down:
+            raise requests.ConnectionError(f"{node} injoignable")
+        response = requests.Response()
+        response.status_code = 404 if node in self.missing else 200
+        response.request = request
+        response._content = b"[]"
+        response.raw = io.BytesIO(response._content)
+        return response
+
+    def close(self):
+        pass
+
+
+def session_for(pool, nodes):
+    session = requests.Session()
+    router = NodeRouter(pool, nodes)
+    session.mount("https://", router)
+    return session
+
+
+class TestNodeRouter:
+    """Tests du choix de nœud, du maintien des écritures et de la bascule."""
+
+    def test_reads_rotate_and_writes_stay_on_design(self):
+        nodes = FakeNodes()
+        pool = NodePool(DESIGN, [AUTOMATION, API_NODE], strategy=ROUND_ROBIN)
+        session = session_for(pool, nodes)
+
+        with replica_reads():
+            for _ in range(4):
+                session.get(f"{DESIGN}/dip/publicapi/projects/P/datasets/")
+            session.get(f"{DESIGN}/dip/publicapi/projects/P/datasets/orders/schema")
+            session.put(f"{DESIGN}/dip/publicapi/projects/P/datasets/orders/schema", json={})
+            session.get(f"{DESIGN}/dip/publicapi/projects/P/jobs/")
+
+        assert [node for _, node in nodes.calls] == [
+            AUTOMATION, API_NODE, AUTOMATION, API_NODE, AUTOMATION, DESIGN, DESIGN,
+        ]
+
+    def test_failed_read_node_is_skipped_then_design_is_last_resort(self):
+        nodes = FakeNodes(down={AUTOMATION})
+        pool = NodePool(DESIGN, [AUTOMATION, API_NODE], cooldown=60)
+        session = session_for(pool, nodes)
+        url = f"{DESIGN}/dip/publicapi/projects/P/datasets/orders/data/"
+
+        with replica_reads():
+            assert session.get(url).status_code == 200
+            session.get(url)
+        assert [node for _, node in nodes.calls] == [AUTOMATION, API_NODE, API_NODE]
+
+        nodes.down.add(API_NODE)
+        with replica_reads():
+            assert session.get(url).status_code == 200
+        assert nodes.calls[-2:] == [("GET", API_NODE), ("GET", DESIGN)]
+        stats = {s["url"]: s for s in pool.stats()}
+        assert not stats[AUTOMATION]["healthy"] and not stats[API_NODE]["healthy"]
+        assert stats[DESIGN]["requests"] == 1
+
+    def test_reads_stay_on_design_unless_replicas_are_allowed(self):
+        nodes = FakeNodes()
+        session = session_for(NodePool(DESIGN, [AUTOMATION]), nodes)
+        url = f"{DESIGN}/dip/publicapi/projects/P/datasets/"
+
+        session.get(url)
+        with replica_reads():
+            session.get(url)
+        session.get(url)
+
+        assert [node for _, node in nodes.calls] == [DESIGN, AUTOMATION, DESIGN]
+
+    def test_not_found_on_lagging_read_node_falls_back_to_design(self):
+        nodes = FakeNodes(missing={AUTOMATION})
+        pool = NodePool(DESIGN, [AUTOMATION])
+        session = session_for(pool, nodes)
+
+        with replica_reads():
+            response = session.get(f"{DESIGN}/dip/publicapi/projects/P/datasets/nouveau/schema")
+
+        assert response.status_code == 200
+        assert [node for _, node in nodes.calls] == [AUTOMATION, DESIGN]
+        assert all(s["healthy"] for s in pool.stats())
@@ -0,0 +1,146 @@
+"""
+test_partitioning.py - Tests des workflows partitionnés (dimensions, dépendances, builds ciblés)
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "chatbot" / "src"))
+
+from job_monitor import JobMonitor  # noqa: E402
+from partitioning import (  # noqa: E402
+    apply_dimensions,
+    file_path_pattern,
+    set_partition_deps,
+    validate_partitioning,
+)
+from simulation import SimulatedConnector  # noqa: E402
+from workflow_builder import WorkflowBuilder  # noqa: E402
+from workflow_dag import WorkflowSpecError  # noqa: E402
+
+DAY = {"name": "day", "type": "time", "period": "DAY"}
+COUNTRY = {"name": "country", "type": "value"}
+
+
+def daily_recipe(**extra):
+    return {
+        "type": "python", "name": "daily", "inputs": ["sales"], "output": "sales_daily",
+        "code": "#", "partitioning": {"dimensions": [DAY]}, **extra,
+    }
+
+
+class TestPartitioningSpec:
+    """Tests de traduction et de validation de la spécification."""
+
+    def test_dimensions_of_file_and_sql_datasets(self):
+        files, sql = {}, {}
+        apply_dimensions(files, [COUNTRY, DAY], file_based=True)
+        apply_dimensions(sql, [DAY], file_based=False)
+
+        assert files["filePathPattern"] == "%Y/%M/%D/%{country}/.*"
+        assert files["dimensions"][1] == {"name": "day", "type": "time", "params": {"period": "DAY"}}
+        assert "filePathPattern" not in sql
+        assert file_path_pattern([{"name": "m", "type": "time", "period": "MONTH"}]) == "%Y/%M/.*"
+
+    def test_invalid_specs_are_rejected(self):
+        with pytest.raises(WorkflowSpecError, match="pas une entrée"):
+            validate_partitioning(daily_recipe(partition_deps={"other": "equals"}))
+        with pytest.raises(WorkflowSpecError, match="une seule dimension temporelle"):
+            validate_partitioning(daily_recipe(partitioning={"dimensions": [DAY, {**DAY, "name": "d2"}]}))
+        with pytest.raises(WorkflowSpecError, match="dépendance inconnue"):
+            validate_partitioning(daily_recipe(partition_deps={"sales": "latest"}))
+
+    def test_deps_are_set_on_matching_inputs(self):
+        definition = {"inputs": {"main": {"items": [{"ref": "sales", "deps": []}, {"ref": "ref"}]}}}
+
+        set_partition_deps(definition, {"sales": {"type": "time_range", "from": -6, "to": 0}})
+
+        sales, ref = definition["inputs"]["main"]["items"]
+        assert sales["deps"][0]["func"] == "time_range"
+        assert sales["deps"][0]["params"]["fromOffset"] == -6
+        assert "deps" not in ref
+
+
+class TestPartitionedWorkflow:
+    """Tests de create_workflow() avec partitions."""
+
+    def test_output_is_partitioned_and_only_requested_partition_is_built(self):
+        connector = SimulatedConnector(latency=0.0)
+        created = {}
+        create_dataset = connector.create_dataset
+
+        def record(name, *args, partitioning=None, **kwargs):
+            created[name] = partitioning
+            return create_dataset(name, *args, partitioning=partitioning, **kwargs)
+
+        connector.create_dataset = record
+        builder = WorkflowBuilder(connector)
+
+        def build(datasets, on_progress=None, partitions=None, partitioned=None):
+            created["build"] = (datasets, partitions, partitioned)
+            return {"success": True, "jobs": {}, "total_s": 0.0}
+
+        builder.job_monitor.build = build
+        recipes = [
+            daily_recipe(partition_deps={"sales": "equals"}),
+            {"type": "python", "name": "weekly", "inputs": ["sales_daily"], "output": "sales_week",
+             "code": "#", "partition_deps": {"sales_daily": {"type": "time_range", "from": -6}}},
+        ]
+
+        result = builder.create_workflow(
+            "wf", ["sales"], recipes, "sales_week", build="terminal", partitions="2024-06-01"
+        )
+
+        assert result["success"] is True
+        assert created["sales_daily"] == {"dimensions": [DAY]}
+        assert created["sales_week"] is None
+        # sales_week n'est pas partitionné : pas de partition sur son job
+        assert created["build"] == (["sales_week"], "2024-06-01", [])
+
+        result = builder.create_workflow(
+            "wf", ["sales"], recipes[:1], "sales_daily", build="output", partitions="2024-06-01"
+        )
+        assert created["build"] == (["sales_daily"], "2024-06-01", ["sales_daily"])
+
+    def test_partitions_without_build_are_rejected(self):
+        connector = SimulatedConnector(latency=0.0)
+        builder = WorkflowBuilder(connector)
+
+        result = builder.create_workflow(
+            "wf", ["sales"], [daily_recipe()], "sales_daily", partitions="2024-06-01"
+        )
+
+        assert result["success"] is False
+        assert "build" in result["error"]
+        assert connector.project.built_recipes == []
+
+    def test_invalid_partitioning_creates_nothing(self):
+        connector = SimulatedConnector(latency=0.0)
+        builder = WorkflowBuilder(connector)
+        recipe = daily_recipe(partitioning={"dimensions": [{"name": "x", "type": "range"}]})
+
+        result = builder.create_workflow("wf", ["sales"], [recipe], "sales_daily")
+
+        assert result["success"] is False
+        assert "type de dimension inconnu" in result["error"]
+        assert connector.project.built_recipes == []
+
+
+def test_start_builds_targets_partitions():
+    project = SimpleNamespace(calls=[])
+
+    class Job:
+        def with_output(self, name, partition=None):
+            project.calls.append((name, partition))
+            return self
+
+        def start(self):
+            return SimpleNamespace(id="job")
+
+    project.new_job = lambda job_type: Job()
+    JobMonitor(project).start_builds(["a", "b"], partitions="2024-06-01", partitioned=["a"])
+
+    assert project.calls == [("a", "2024-06-01"), ("b", None)]
@@ -0,0 +1,134 @@
+"""
+test_preview_dataset.py - Tests de l'aperçu borné des datasets
+
+Utilise des mocks pour tester sans connexion réelle au serveur.
+"""
+
+import json
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "chatbot" / "src"))
+
+from src.api.datasets import _preview_cache, get_dataset_as_dataframe, preview_dataset  # noqa: E402
+from tool_encoding import encode_tool_result  # noqa: E402
+
+
+class Stream:
+    """Flux de lignes qui compte les lignes lues et sa fermeture."""
+
+    def __init__(self, rows):
+        self.rows = iter(rows)
+        self.read = 0
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        self.read += 1
+        return next(self.rows)
+
+    def close(self):
+        self.closed = True
+
+
+def make_project(rows, version=1):
+    project = MagicMock()
+    project.project_key = "PROJ"
+    dataset = project.get_dataset.return_value
+    dataset.get_schema.return_value = {"columns": [{"name": "id"}, {"name": "comment"}]}
+    dataset.streams = []
+
+    def iter_rows(columns=None):
+        stream = Stream(rows)
+        dataset.streams.append(stream)
+        return stream
+
+    dataset.iter_rows.side_effect = iter_rows
+    dataset.get_info.return_value.get_raw.return_value = {
+        "dataset": {"versionTag": {"versionNumber": version}}
+    }
+    return project
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    _preview_cache.clear()
+    yield
+    _preview_cache.clear()
+
+
+class TestPreviewDataset:
+    """Tests des budgets, de la fermeture du flux et du cache."""
+
+    @patch("src.api.datasets.get_project")
+    def test_row_budget_stops_the_stream(self, mock_get_project):
+        project = make_project([[i, "ok"] for i in range(1_000_000)])
+        mock_get_project.return_value = project
+
+        preview = preview_dataset("sales", max_rows=5)
+
+        stream = project.get_dataset.return_value.streams[0]
+        assert preview["rows"] == [[i, "ok"] for i in range(5)]
+        assert preview["truncated"] is True
+        assert stream.read == 6 and stream.closed
+
+    @patch("src.api.datasets.get_project")
+    def test_byte_budget_and_long_cells(self, mock_get_project):
+        mock_get_project.return_value = make_project([[i, "x" * 500] for i in range(100)])
+
+        preview = preview_dataset("sales", max_rows=50, max_bytes=1_000, max_cell_chars=100)
+
+        assert preview["bytes"] <= 1_000
+        assert preview["truncated"] is True
+        assert len(preview["rows"][0][1]) == 101
+
+    @patch("src.api.datasets.get_project")
+    def test_cached_per_version(self, mock_get_project):
+        project = make_project([[1, "a"]])
+        mock_get_project.return_value = project
+        dataset = project.get_dataset.return_value
+
+        assert preview_dataset("sales")["cached"] is False
+        assert preview_dataset("sales")["cached"] is True
+        dataset.get_info.return_value.get_raw.return_value["dataset"]["versionTag"]["versionNumber"] = 2
+        assert preview_dataset("sales")["cached"] is False
+        assert dataset.iter_rows.call_count == 2
+
+    @patch("src.api.datasets.get_project")
+    def test_dataframe_read_stops_at_limit(self, mock_get_project):
+        project = make_project([[i, "ok"] for i in range(1_000_000)])
+        mock_get_project.return_value = project
+
+        df = get_dataset_as_dataframe("sales", limit=3)
+
+        stream = project.get_dataset.return_value.streams[0]
+        assert list(df.columns) == ["id", "comment"]
+        assert df["id"].tolist() == [0, 1, 2]
+        assert stream.read == 3 and stream.closed
+
+    @patch("src.api.datasets.get_project")
+    def test_cache_is_bounded_and_expires(self, mock_get_project, monkeypatch):
+        project = make_project([[1, "a"]])
+        mock_get_project.return_value = project
+
+        for max_rows in range(300):
+            preview_dataset("sales", max_rows=max_rows + 1)
+        assert len(_preview_cache) == 256
+
+        monkeypatch.setenv("PREVIEW_CACHE_TTL", "0")
+        assert preview_dataset("sales", max_rows=300)["cached"] is False
+
+    def test_compact_encoding_for_claude(self):
+        result = {"dataset": "sales", "columns": ["id"], "rows": [[1], [2]],
+                  "truncated": True, "bytes": 8, "cached": False}
+
+        content, _, _ = encode_tool_result("preview_dataset", result)
+
+        payload = json.loads(content)
+        assert payload["rows"] == [[1], [2]]
+        assert "cached" not in payload and "more" in payload
@@ -0,0 +1,178 @@
+"""
+test_profiling.py - Tests des résumés en flux et du profilage des datasets
+
+Utilise des mocks pour tester sans connexion réelle au serveur.
+"""
+
+import io
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.api.profiling import invalidate_profiles, profile_chunks, profile_dataset
+from src.api.sketches import HyperLogLog, TDigest, TopK
+
+
+class TestSketches:
+    """Tests de précision des résumés à mémoire bornée."""
+
+    def test_hyperloglog_distinct_count(self):
+        hll = HyperLogLog(precision=14)
+        values = pd.Series(np.arange(300_000) % 120_000)
+        for start in range(0, len(values), 50_000):
+            hll.update(values[start:start + 50_000])
+
+        assert abs(hll.count() - 120_000) / 120_000 < 0.03
+        assert hll.registers.nbytes == 16_384
+
+    def test_tdigest_quantiles_are_close(self):
+        rng = np.random.default_rng(0)
+        values = rng.lognormal(size=400_000)
+        digest = TDigest()
+        for chunk in np.array_split(values, 8):
+            digest.update(chunk)
+
+        estimated = digest.quantiles([0.01, 0.5, 0.99])
+        exact = np.quantile(values, [0.01, 0.5, 0.99])
+
+        assert np.allclose(estimated, exact, rtol=0.02)
+        assert len(digest.means) < 200
+
+    def test_topk_finds_heavy_hitters(self):
+        rng = np.random.default_rng(1)
+        noise = pd.Series(rng.integers(1_000, 100_000, 90_000))
+        values = pd.concat([pd.Series(["FR"] * 6_000 + ["DE"] * 4_000), noise])
+        top = TopK(k=2, capacity=50)
+        values = values.sample(frac=1, random_state=0)
+        for start in range(0, len(values), 10_000):
+            top.update(values[start:start + 10_000])
+
+        (first, c1), (second, c2) = top.top()
+        assert (first, second) == ("FR", "DE")
+        assert c1 <= 6_000 <= c1 + top.max_error
+
+
+def make_dataset(rows, version=1):
+    dataset = MagicMock()
+    dataset.get_schema.return_value = {"columns": [
+        {"name": "country", "type": "string"},
+        {"name": "amount", "type": "double"},
+    ]}
+    dataset.iter_rows.side_effect = lambda columns=None: iter(rows)
+    dataset.get_info.return_value.get_raw.return_value = {
+        "dataset": {"versionTag": {"versionNumber": version}},
+        "lastBuild": {"buildEndTime": 1000},
+    }
+    return dataset
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    invalidate_profiles()
+    yield
+    invalidate_profiles()
+
+
+class TestProfileDataset:
+    """Tests du profilage d'un dataset DSS."""
+
+    @patch("src.api.profiling.get_project")
+    def test_profile_in_chunks(self, mock_get_project):
+        rows = [["FR" if i % 3 else None, float(i)] for i in range(1_000)]
+        project = mock_get_project.return_value
+        project.project_key = "PROJ"
+        project.get_dataset.return_value = make_dataset(rows)
+
+        profile = profile_dataset("sales", chunk_size=100)
+
+        country, amount = profile["columns"]
+        assert profile["rows"] == 1_000
+        assert country["nulls"] == 334
+        assert country["distinct"] == 1
+        assert country["top"] == [{"value": "FR", "count": 666}]
+        assert amount["min"] == 0.0 and amount["max"] == 999.0
+        assert amount["mean"] == pytest.approx(499.5)
+        assert amount["quantiles"]["p50"] == pytest.approx(499.5, rel=0.02)
+
+    @patch("src.api.profiling.get_project")
+    def test_max_rows_closes_the_row_stream(self, mock_get_project):
+        closed = []
+
+        def iter_rows(columns=None):
+            try:
+                for i in range(1_000):
+                    yield ["FR", float(i)]
+            finally:
+                closed.append(True)
+
+        project = mock_get_project.return_value
+        project.project_key = "PROJ"
+        dataset = make_dataset([])
+        dataset.iter_rows.side_effect = iter_rows
+        project.get_dataset.return_value = dataset
+
+        profile = profile_dataset("sales", max_rows=10, chunk_size=4)
+
+        assert profile["rows"] == 10
+        assert closed == [True]
+
+    @patch("src.api.profiling.get_project")
+    def test_profile_is_cached_by_fingerprint(self, mock_get_project):
+        project = mock_get_project.return_value
+        project.project_key = "PROJ"
+        dataset = make_dataset([["FR", 1.0]])
+        project.get_dataset.return_value = dataset
+
+        first = profile_dataset("sales")
+        second = profile_dataset("sales")
+        dataset.get_info.return_value.get_raw.return_value["dataset"]["versionTag"]["versionNumber"] = 2
+        third = profile_dataset("sales")
+
+        assert (first["cached"], second["cached"], third["cached"]) == (False, True, False)
+        assert dataset.iter_rows.call_count == 2
+        assert first["fingerprint"] != third["fingerprint"]
+
+    @patch("src.api.profiling.get_project")
+    def test_profile_cache_expires(self, mock_get_project, monkeypatch):
+        project = mock_get_project.return_value
+        project.project_key = "PROJ"
+        dataset = make_dataset([["FR", 1.0]])
+        project.get_dataset.return_value = dataset
+
+        monkeypatch.setenv("PROFILE_CACHE_TTL", "0")
+        profile_dataset("sales")
+
+        assert profile_dataset("sales")["cached"] is False
+        assert dataset.iter_rows.call_count == 2
+
+    @patch("src.api.profiling.get_project")
+    def test_empty_strings_and_booleans_are_nulls(self, mock_get_project):
+        project = mock_get_project.return_value
+        project.project_key = "PROJ"
+        dataset = make_dataset([])
+        dataset.get_schema.return_value = {"columns": [
+            {"name": "country", "type": "string"},
+            {"name": "active", "type": "boolean"},
+        ]}
+        # Flux TSV brut de DSS : une cellule vide par colonne sur la 2e ligne
+        response = MagicMock(raw=io.BytesIO(b"FR\ttrue\n\t\nDE\tfalse\n"))
+        dataset.client._perform_raw.return_value = response
+        project.get_dataset.return_value = dataset
+
+        country, active = profile_dataset("users")["columns"]
+
+        assert (country["nulls"], country["distinct"]) == (1, 2)
+        assert "" not in [t["value"] for t in country["top"]]
+        assert (active["nulls"], active["distinct"]) == (1, 2)
+        assert dataset.iter_rows.call_count == 0
+        response.close.assert_called()
+
+    def test_max_rows_and_json_output(self):
+        chunks = [pd.DataFrame({"d": pd.to_datetime(["2024-01-01", "2024-02-01"]), "n": [1, 2]})]
+
+        profile = profile_chunks(chunks)
+
+        assert profile["columns"][0]["min"] == "2024-01-01 00:00:00"
+        assert profile["columns"][1]["quantiles"]["p50"] == pytest.approx(1.5)
@@ -0,0 +1,117 @@
+"""
+test_recipe_engines.py - Tests du choix de moteur et de la génération SQL
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "chatbot" / "src"))
+
+from recipe_engines import (  # noqa: E402
+    DSS, SQL, SQL_RECIPE, grouping_sql, join_sql, select_engine, table_name
+)
+from simulation import SimulatedConnector  # noqa: E402
+from workflow_builder import WorkflowBuilder  # noqa: E402
+from workflow_dag import WorkflowSpecError  # noqa: E402
+
+PG = {"type": "PostgreSQL", "connection": "pg_dwh", "table": "sales_tbl", "schema": None}
+FS = {"type": "Filesystem", "connection": "filesystem_managed", "table": None}
+
+GROUPING = {
+    "type": "grouping", "name": "by_region", "input": "sales", "output": "by_region",
+    "group_by": ["region"],
+    "aggregations": [{"column": "amount", "function": "sum", "output": "total"}],
+}
+
+
+class TestSelectEngine:
+    """Tests du choix automatique et explicite du moteur."""
+
+    def test_auto_picks_sql_when_inputs_share_a_connection(self):
+        choice = select_engine(GROUPING, "by_region", {"sales": PG})
+        assert choice.engine == SQL
+        assert choice.connection == "pg_dwh"
+        assert "pg_dwh" in choice.reason
+
+    def test_auto_falls_back_to_dss_with_reason(self):
+        join = {"type": "join", "name": "j", "left": "sales", "right": "customers",
+                "join_keys": [["region", "region"]]}
+        choice = select_engine(join, "out", {"sales": PG, "customers": FS})
+        assert choice.engine == DSS
+        assert "customers" in choice.reason
+
+    def test_python_stays_on_dss_and_rejects_sql(self):
+        recipe = {"type": "python", "name": "p", "inputs": ["sales"]}
+        assert select_engine(recipe, "out", {"sales": PG}).engine == DSS
+        with pytest.raises(WorkflowSpecError, match="Python"):
+            select_engine({**recipe, "engine": SQL}, "out", {"sales": PG})
+
+    def test_explicit_sql_requires_sql_inputs(self):
+        with pytest.raises(WorkflowSpecError, match="hors SQL"):
+            select_engine({**GROUPING, "engine": SQL}, "by_region", {"sales": FS})
+
+
+class TestSqlGeneration:
+    """Tests de la traduction SQL des recettes visuelles."""
+
+    def test_grouping_sql(self):
+        sql = grouping_sql(GROUPING, table_name("sales", PG))
+        assert 'SUM("amount") AS "total"' in sql
+        assert sql.endswith('GROUP BY "region"')
+        assert 'FROM "sales_tbl"' in sql
+
+    def test_identifiers_follow_the_dialect_and_schema(self):
+        mysql = {"type": "MySQL", "connection": "my", "table": "sales_tbl", "schema": "dwh"}
+        sql = grouping_sql(GROUPING, table_name("sales", mysql), "MySQL")
+        assert "SUM(`amount`) AS `total`" in sql
+        assert "FROM `dwh`.`sales_tbl`" in sql
+        assert table_name("sales", {**PG, "schema": "dwh"}) == '"dwh"."sales_tbl"'
+
+    def test_join_sql_prefixes_columns(self):
+        join = {"type": "join", "name": "j", "join_keys": [["id", "customer_id"]],
+                "join_type": "INNER"}
+        sql = join_sql(join, '"a"', '"b"', ["id"], ["customer_id"])
+        assert 'l."id" AS "left_id"' in sql
+        assert 'INNER JOIN "b" r ON l."id" = r."customer_id"' in sql
+
+    def test_join_sql_requires_known_columns(self):
+        join = {"type": "join", "name": "j", "join_keys": [["id", "id"]]}
+        with pytest.raises(WorkflowSpecError, match="colonnes"):
+            join_sql(join, '"a"', '"b"', ["id"], [])
+
+    def test_sql_recipe_join_on_unbuilt_input_uses_visual_sql(self):
+        join = {"type": "join", "name": "j", "left": "sales", "right": "by_region",
+                "join_keys": [["region", "region"]], "engine": SQL_RECIPE}
+        storage = {"sales": PG, "by_region": {**PG, "table": None}}
+        choice = select_engine(join, "out", storage, unbuilt={"by_region"})
+        assert choice.engine == SQL
+        assert "by_region" in choice.reason
+
+
+class TestWorkflowEngines:
+    """Tests des moteurs dans le plan et la création."""
+
+    def make_builder(self):
+        connector = SimulatedConnector(latency=0.0)
+        connector.storage["sales"] = PG
+        return WorkflowBuilder(connector)
+
+    def test_sql_chain_is_reported_and_configured(self):
+        builder = self.make_builder()
+        recipes = [
+            GROUPING,
+            {**GROUPING, "name": "top", "input": "by_region", "output": "top",
+             "engine": SQL_RECIPE},
+        ]
+
+        result = builder.create_workflow("wf", ["sales"], recipes, "top")
+
+        assert result["success"], result.get("error")
+        assert result["engines"]["by_region"]["engine"] == SQL
+        assert result["engines"]["top"]["engine"] == SQL_RECIPE
+        assert "moteur SQL" in result["plan_text"]
+        assert builder.project.recipe("by_region").settings.raw_params["engineType"] == SQL
+        sql = builder.project.recipe("top").settings.payload
+        assert '"${projectKey}_by_region"' in sql
@@ -0,0 +1,190 @@
+"""
+test_recipe_generator.py - Tests des templates de recettes Python (mémoire / streaming)
+"""
+
+import sys
+import time
+import threading
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "chatbot" / "src"))
+
+from simulation import SimulatedConnector  # noqa: E402
+from src.recipes.generator import (  # noqa: E402
+    MEMORY,
+    STREAMING,
+    build_python_recipe,
+    create_python_recipes_in_dss,
+    format_recipe_statuses,
+    pandas_dtypes,
+    select_template_mode,
+)
+from workflow_builder import WorkflowBuilder  # noqa: E402
+from workflow_preview import WorkflowPreview  # noqa: E402
+
+SALES_SCHEMA = [
+    {"name": "region", "type": "string"},
+    {"name": "amount", "type": "double"},
+    {"name": "order_date", "type": "date"},
+]
+
+
+class TestTemplateMode:
+    """Tests du choix automatique du mode."""
+
+    def test_auto_switches_to_streaming_above_threshold(self, monkeypatch):
+        monkeypatch.setenv("RECIPE_STREAMING_THRESHOLD", "1000")
+
+        assert select_template_mode(input_records={"a": 999, "b": None}) == MEMORY
+        assert select_template_mode(input_records={"a": 10, "b": 1000}) == STREAMING
+        assert select_template_mode(input_records={"a": None}) == MEMORY
+        assert select_template_mode(STREAMING) == STREAMING
+        with pytest.raises(ValueError):
+            select_template_mode("chunked")
+
+    def test_dtypes_from_schema(self):
+        assert pandas_dtypes(SALES_SCHEMA + [{"name": "id", "type": "bigint"}]) == {
+            "region": "object", "amount": "float64", "id": "Int64",
+        }
+
+
+class TestStreamingTemplate:
+    """Tests du code généré en mode streaming."""
+
+    def test_largest_input_is_streamed_with_projection(self):
+        code = build_python_recipe(
+            "enrich", ["customers", "sales"], "out", mode=STREAMING,
+            schemas={"sales": SALES_SCHEMA}, input_records={"sales": 10**8, "customers": 500},
+            chunk_size=50_000,
+        )
+
+        assert "get_dataframe()" not in code
+        assert "write_with_schema(result_df)" not in code
+        assert 'dataiku.Dataset("sales").iter_dataframes(' in code
+        assert "SALES_COLUMNS = ['region', 'amount', 'order_date']" in code
+        assert "CHUNK_SIZE = 50000" in code
+        assert code.count("get_writer()") == 1
+        assert 'customers_df = dataiku.Dataset("customers").get_dataframe(' in code
+        compile(code, "enrich.py", "exec")
+
+    def test_generated_code_runs_chunk_by_chunk(self):
+        code = build_python_recipe(
+            "copy", ["sales"], "sales_copy", mode=STREAMING,
+            schemas={"sales": SALES_SCHEMA}, chunk_size=5,
+        )
+        recipe = {"type": "python", "name": "copy", "inputs": ["sales"],
+                  "output": "sales_copy", "code": code}
+
+        result = WorkflowPreview(SimulatedConnector(latency=0.0), python_timeout=20) \
+            .preview_workflow([recipe], "sales_copy")
+
+        assert result.success, result.error
+        assert len(result.frames["sales_copy"]) == 12
+        assert str(result.frames["sales_copy"]["amount"].dtype) == "float64"
+
+    def test_builder_picks_streaming_for_large_inputs(self, monkeypatch):
+        monkeypatch.setenv("RECIPE_STREAMING_THRESHOLD", "1000")
+        connector = SimulatedConnector(latency=0.0)
+        builder = WorkflowBuilder(connector)
+
+        small = builder._generate_python_template("p", ["sales"], "out")
+        connector.records["sales"] = 5000
+        large = builder._generate_python_template("p", ["sales"], "out")
+
+        assert "write_with_schema(result_df)" in small
+        assert "iter_dataframes(" in large
+
+
+def make_client(fail=()):
+    """
+    Client dont new_recipe().build() prend 50 ms et échoue pour les recettes de `fail`.
+
+    client.peak_builds : nombre maximum de build() en cours simultanément.
+    """
+    client = MagicMock()
+    client.peak_builds = 0
+    running = [0]
+    lock = threading.Lock()
+
+    def get_project(key):
+        project = MagicMock(name=key)
+
+        def new_recipe(recipe_type, name):
+            builder = MagicMock()
+
+            def build():
+                with lock:
+                    running[0] += 1
+                    client.peak_builds = max(client.peak_builds, running[0])
+                try:
+                    time.sleep(0.05)
+                finally:
+                    with lock:
+                        running[0] -= 1
+                if name in fail:
+                    raise RuntimeError(f"{name} existe déjà")
+                return MagicMock()
+
+            builder.build.side_effect = build
+            return builder
+
+        project.new_recipe.side_effect = new_recipe
+        return project
+
+    client.get_project.side_effect = get_project
+    return client
+
+
+class TestBulkCreation:
+    """Tests de create_python_recipes_in_dss()."""
+
+    @patch("src.recipes.generator.get_client")
+    def test_partial_failures_are_reported_per_recipe(self, mock_get_client):
+        client = make_client(fail={"r3"})
+        mock_get_client.return_value = client
+        specs = [
+            {"name": f"r{i}", "inputs": ["a"], "output": f"o{i}", "code": "#",
+             "project_key": "P2" if i % 2 else "P1"}
+            for i in range(16)
+        ]
+
+        statuses = create_python_recipes_in_dss(specs, max_workers=8)
+
+        assert [s.name for s in statuses] == [f"r{i}" for i in range(16)]
+        assert [s.name for s in statuses if not s.success] == ["r3"]
+        assert "existe déjà" in statuses[3].error
+        assert statuses[1].project_key == "P2"
+        # Un client, un objet projet par clé ; les créations se chevauchent
+        assert mock_get_client.call_count == 1
+        assert client.get_project.call_count == 2
+        assert 1 < client.peak_builds <= 8
+        assert "ÉCHEC" in format_recipe_statuses(statuses)
+
+    @patch("src.recipes.generator.get_client")
+    def test_settings_are_fetched_once(self, mock_get_client):
+        client = MagicMock()
+        mock_get_client.return_value = client
+        project = client.get_project.return_value
+        recipe = project.new_recipe.return_value.build.return_value
+        specs = [{"name": f"r{i}", "inputs": ["a"], "output": f"o{i}", "code": "#",
+                  "project_key": "P"} for i in range(5)]
+
+        statuses = create_python_recipes_in_dss(specs)
+
+        assert all(s.success for s in statuses)
+        assert recipe.get_settings.call_count == 5
+        assert recipe.get_settings.return_value.save.call_count == 5
+
+    @patch("src.recipes.generator.get_config")
+    @patch("src.recipes.generator.get_client")
+    def test_missing_default_project_fails_up_front(self, mock_get_client, mock_get_config):
+        mock_get_config.return_value.project_key = ""
+        specs = [{"name": "r", "inputs": ["a"], "output": "o", "code": "#"}]
+
+        with pytest.raises(ValueError, match="DSS_PROJECT_KEY"):
+            create_python_recipes_in_dss(specs)
+
+        mock_get_client.assert_not_called()
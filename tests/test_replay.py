@@ -0,0 +1,118 @@
+"""
+test_replay.py - Tests de l'enregistrement / rejeu des appels Claude et DSS
+
+Les transports réels sont remplacés par des doublures : aucun appel réseau.
+"""
+
+import sys
+import json
+from pathlib import Path
+
+try:  # les versions récentes du SDK anthropic reposent sur httpx2
+    import httpx2 as httpx
+except ImportError:
+    import httpx
+import pytest
+import requests
+from anthropic import Anthropic
+from requests.adapters import BaseAdapter
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "chatbot" / "src"))
+
+from replay import Cassette, CassetteMissError, RECORD, REPLAY  # noqa: E402
+from replay import ClaudeCassetteTransport  # noqa: E402
+
+CLAUDE_MESSAGE = {
+    "id": "msg_1",
+    "type": "message",
+    "role": "assistant",
+    "model": "claude-test",
+    "content": [{"type": "text", "text": "Bonjour"}],
+    "stop_reason": "end_turn",
+    "stop_sequence": None,
+    "usage": {"input_tokens": 10, "output_tokens": 2},
+}
+
+
+class FakeDSSAdapter(BaseAdapter):
+    """Simule l'API DSS : renvoie la liste de projets et compte les appels."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def send(self, request, **kwargs):
+        self.calls += 1
+        response = requests.Response()
+        response.status_code = 200
+        response.headers["Content-Type"] = "application/json"
+        response._content = json.dumps([{"projectKey": f"P{self.calls}"}]).encode()
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def session_with(adapter) -> requests.Session:
+    session = requests.Session()
+    session.mount("https://", adapter)
+    return session
+
+
+class TestDSSCassette:
+    """Tests de la couche requests (appels DSS)."""
+
+    def test_record_then_replay_offline(self, tmp_path):
+        path = tmp_path / "dss.json.gz"
+        inner = FakeDSSAdapter()
+        recorder = Cassette(str(path), mode=RECORD)
+        session = session_with(recorder.dss_layer(inner))
+        session.get("https://dss.a/dip/publicapi/projects/", params={"b": 1, "a": 2})
+        session.get("https://dss.a/dip/publicapi/projects/", params={"b": 1, "a": 2})
+        recorder.save()
+
+        player = Cassette(str(path), mode=REPLAY)
+        offline = FakeDSSAdapter()
+        session = session_with(player.dss_layer(offline))
+        # Hôte différent et query dans un autre ordre : même requête
+        url = "https://dss.b/dip/publicapi/projects/?a=2&b=1"
+        first, second, third = (session.get(url).json() for _ in range(3))
+
+        assert offline.calls == 0
+        assert first == [{"projectKey": "P1"}]
+        assert second == [{"projectKey": "P2"}]
+        assert third == second  # file épuisée : dernière réponse resservie
+
+    def test_replay_miss_raises(self, tmp_path):
+        path = tmp_path / "empty.json.gz"
+        Cassette(str(path), mode=RECORD).save()
+
+        session = session_with(Cassette(str(path), mode=REPLAY).dss_layer(FakeDSSAdapter()))
+        with pytest.raises(CassetteMissError):
+            session.get("https://dss/dip/publicapi/projects/")
+
+
+class TestClaudeCassette:
+    """Tests du transport httpx (appels messages.create)."""
+
+    def test_record_then_replay_messages_create(self, tmp_path):
+        path = tmp_path / "claude.json.gz"
+        recorder = Cassette(str(path), mode=RECORD)
+        live = httpx.MockTransport(lambda request: httpx.Response(200, json=CLAUDE_MESSAGE))
+        client = Anthropic(
+            api_key="test",
+            http_client=httpx.Client(transport=ClaudeCassetteTransport(recorder, live)),
+        )
+        params = {"model": "claude-test", "max_tokens": 10,
+                  "messages": [{"role": "user", "content": "Salut"}]}
+        client.messages.create(**params)
+        recorder.save()
+
+        player = Cassette(str(path), mode=REPLAY)
+        response = player.anthropic_client().messages.create(**params)
+
+        assert response.content[0].text == "Bonjour"
+        assert response.usage.input_tokens == 10
+        assert player.hits == 1
@@ -0,0 +1,103 @@
+"""
+test_resources.py - Tests du registre de ressources partagées du chatbot
+"""
+
+import sys
+import time
+import threading
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "chatbot" / "src"))
+
+from dataiku_connector import DataikuConnector  # noqa: E402
+from resources import ResourceRegistry  # noqa: E402
+
+
+class TestResourceRegistry:
+    """Tests du partage, de l'éviction LRU et de la création concurrente."""
+
+    def test_resource_is_shared_per_project(self):
+        calls = []
+        registry = ResourceRegistry(factory=lambda key: calls.append(key) or object())
+
+        first = registry.get("PROJ_A")
+        assert registry.get("PROJ_A") is first
+        assert calls == ["PROJ_A"]
+
+    def test_lru_eviction(self):
+        registry = ResourceRegistry(factory=lambda key: object(), max_projects=2)
+
+        registry.get("A")
+        registry.get("B")
+        registry.get("A")  # B devient le moins récemment utilisé
+        registry.get("C")
+
+        assert "A" in registry and "C" in registry
+        assert "B" not in registry
+
+    def test_idle_eviction(self):
+        registry = ResourceRegistry(factory=lambda key: object(), idle_ttl=0.05)
+
+        registry.get("A")
+        time.sleep(0.1)
+        registry.get("B")
+
+        assert "A" not in registry
+        assert len(registry) == 1
+
+    def test_concurrent_first_access_creates_once(self):
+        calls = []
+
+        def slow_factory(key):
+            calls.append(key)
+            time.sleep(0.1)
+            return object()
+
+        registry = ResourceRegistry(factory=slow_factory)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(registry.get("A")))
+            for _ in range(10)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert calls == ["A"]
+        assert all(r is results[0] for r in results)
+
+    def test_failed_creation_releases_its_lock(self):
+        attempts = []
+
+        def flaky_factory(key):
+            attempts.append(key)
+            if len(attempts) == 1:
+                raise ConnectionError("DSS injoignable")
+            return object()
+
+        registry = ResourceRegistry(factory=flaky_factory)
+        with pytest.raises(ConnectionError):
+            registry.get("A")
+
+        assert registry._creation_locks == {}
+        assert registry.get("A") is registry.get("A")
+        assert attempts == ["A", "A"]
+
+
+def test_connector_schema_cache_expires():
+    schema = {"columns": [{"name": "id", "type": "bigint"}]}
+    with patch("dataiku_connector.get_client"), patch("dataiku_connector.get_project"), \
+            patch("dataiku_connector.get_dataset_schema", return_value=schema) as read:
+        connector = DataikuConnector("P", schema_ttl=0.05)
+        connector.get_dataset_info("ds")
+        connector.get_dataset_info("ds")
+        assert read.call_count == 1 and connector.get_cached_info("ds") is not None
+
+        time.sleep(0.06)
+        assert connector.get_cached_info("ds") is None
+        connector.get_dataset_info("ds")
+        assert read.call_count == 2
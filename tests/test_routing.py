@@ -0,0 +1,104 @@
+"""
+test_routing.py - Tests du routage des appels Claude par tour
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "chatbot" / "src"))
+
+import pytest  # noqa: E402
+
+from routing import (  # noqa: E402
+    CAPABLE,
+    FAST,
+    HeuristicRoutingPolicy,
+    RouteMetrics,
+    RoutingPolicy,
+)
+
+
+def tool_exchange(*tool_names):
+    """Messages se terminant par des résultats d'outils."""
+    return [
+        {"role": "user", "content": "..."},
+        {"role": "assistant", "content": [
+            SimpleNamespace(type="tool_use", name=name, id=f"t{i}")
+            for i, name in enumerate(tool_names)
+        ]},
+        {"role": "user", "content": [
+            {"type": "tool_result", "tool_use_id": f"t{i}", "content": "{}"}
+            for i, _ in enumerate(tool_names)
+        ]},
+    ]
+
+
+class TestHeuristicRoutingPolicy:
+    """Tests de classification des tours."""
+
+    policy = HeuristicRoutingPolicy(fast_model="fast-model", capable_model="capable-model")
+
+    def route(self, message, messages=None):
+        messages = messages or [{"role": "user", "content": message}]
+        return self.policy.route(message, messages)
+
+    def test_simple_lookups_go_fast(self):
+        assert self.route("Liste les datasets").route == FAST
+        assert self.route("Quelles colonnes a sales ?").model == "fast-model"
+
+    def test_workflow_intent_goes_capable(self):
+        decision = self.route("Crée un workflow qui agrège les ventes par région")
+        assert decision.route == CAPABLE
+        assert decision.model == "capable-model"
+
+    def test_long_message_goes_capable(self):
+        assert self.route("liste " + "x" * 300).route == CAPABLE
+
+    def test_read_only_tool_followup_goes_fast(self):
+        decision = self.route("Décris sales", tool_exchange("get_dataset_info"))
+        assert decision.route == FAST
+
+    def test_tool_followup_keeps_workflow_turn_capable(self):
+        messages = tool_exchange("list_datasets", "get_dataset_info")
+        assert self.route("Joins sales et customers", messages).route == CAPABLE
+
+    def test_create_workflow_report_goes_fast(self):
+        messages = tool_exchange("create_workflow")
+        assert self.route("Oui, crée le workflow", messages).route == FAST
+
+    def test_failed_create_workflow_goes_capable(self):
+        messages = tool_exchange("create_workflow")
+        messages[-1]["content"][0]["is_error"] = True
+        decision = self.route("Oui, crée le workflow", messages)
+        assert (decision.route, decision.reason) == (CAPABLE, "échec de create_workflow")
+
+    def test_policy_interface_is_abstract(self):
+        with pytest.raises(TypeError):
+            RoutingPolicy()
+
+
+class TestRouteMetrics:
+    """Tests de l'agrégation des métriques par route."""
+
+    def test_summary_per_route(self):
+        metrics = RouteMetrics()
+        fast = HeuristicRoutingPolicy().route("liste", [{"role": "user", "content": "liste"}])
+        metrics.record(fast, 0.1, input_tokens=100, output_tokens=10)
+        metrics.record(fast, 0.3, input_tokens=300, output_tokens=30)
+
+        summary = metrics.summary()
+        assert summary[FAST]["calls"] == 2
+        assert summary[FAST]["p50_ms"] == 200
+        assert summary[FAST]["avg_input_tokens"] == 200
+        assert CAPABLE not in summary
+
+    def test_latency_window_is_bounded_but_totals_are_not(self):
+        metrics = RouteMetrics(window=10)
+        fast = HeuristicRoutingPolicy().route("liste", [{"role": "user", "content": "liste"}])
+        for i in range(100):
+            metrics.record(fast, i / 1000, input_tokens=10, output_tokens=1)
+
+        assert metrics.totals() == {"calls": 100, "input_tokens": 1000, "output_tokens": 100}
+        assert metrics.summary()[FAST]["p50_ms"] == pytest.approx(94.5)
+        assert len(metrics._latencies[FAST]) == 10
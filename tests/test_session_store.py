@@ -0,0 +1,108 @@
+"""
+test_session_store.py - Tests du stockage SQLite des conversations
+"""
+
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "chatbot" / "src"))
+
+from chat_handler import ChatHandler  # noqa: E402
+from session_store import SessionStore  # noqa: E402
+from simulation import SimulatedAnthropic, SimulatedConnector  # noqa: E402
+
+
+class TestSessionStore:
+    """Tests de persistance, de rechargement et de pagination."""
+
+    def test_turn_round_trips_and_survives_reopening(self, tmp_path):
+        path = tmp_path / "sessions.db"
+        handler = ChatHandler(
+            connector=SimulatedConnector(latency=0.0), client=SimulatedAnthropic(latency=0.0)
+        )
+        store = SessionStore(path)
+        session_id = store.create_session("P")
+
+        _, history = handler.process_message("Liste les datasets", store.load_history(session_id))
+        store.append_messages(session_id, history)
+        store.close()
+
+        reopened = SessionStore(path)
+        loaded = reopened.load_history(session_id)
+        assert [m["role"] for m in loaded] == ["user", "assistant", "user", "assistant"]
+        assert loaded[1]["content"][0]["type"] == "tool_use"
+        assert loaded[3]["content"] == [{"type": "text", "text": "Voici les datasets disponibles."}]
+        # Le tour suivant repart de l'historique relu (blocs sous forme de dicts)
+        _, history = handler.process_message("Et maintenant ?", loaded)
+        reopened.append_messages(session_id, history[len(loaded):])
+        assert reopened.message_count(session_id) == 8
+        assert [m.text for m in reopened.page(session_id)] == [
+            "Liste les datasets", "Voici les datasets disponibles.",
+            "Et maintenant ?", "Voici les datasets disponibles.",
+        ]
+
+    def test_page_returns_latest_messages_then_older(self, tmp_path):
+        store = SessionStore(tmp_path / "sessions.db")
+        session_id = store.create_session()
+        store.append_messages(session_id, [
+            {"role": "user", "content": f"question {i}"} if i % 2 == 0 else
+            {"role": "assistant", "content": [SimpleNamespace(type="text", text=f"réponse {i}")]}
+            for i in range(10)
+        ])
+
+        latest = store.page(session_id, limit=3)
+        older = store.page(session_id, limit=3, before_seq=latest[0].seq)
+
+        assert [m.text for m in latest] == ["réponse 7", "question 8", "réponse 9"]
+        assert [m.text for m in older] == ["question 4", "réponse 5", "question 6"]
+        assert store.display_count(session_id) == 10
+        store.delete_session(session_id)
+        assert not store.session_exists(session_id)
+        assert store.message_count(session_id) == 0
+
+    def test_session_is_only_reopened_by_its_owner(self, tmp_path):
+        store = SessionStore(tmp_path / "sessions.db")
+        mine = store.create_session("P", owner="alice@example.com")
+        anonymous = store.create_session("P")
+
+        assert store.session_exists(mine, "alice@example.com")
+        assert not store.session_exists(mine, "bob@example.com")
+        assert not store.session_exists(mine)
+        assert store.session_exists(anonymous)
+        assert not store.session_exists(anonymous, "alice@example.com")
+
+    def test_inactive_sessions_are_purged(self, tmp_path):
+        path = tmp_path / "sessions.db"
+        store = SessionStore(path, retention_days=1)
+        old = store.create_session("P")
+        store.append_messages(old, [{"role": "user", "content": "question"}])
+        recent = store.create_session("P")
+        with store._db:
+            store._db.execute(
+                "UPDATE sessions SET updated_at = ? WHERE session_id = ?",
+                (time.time() - 2 * 86400, old)
+            )
+        store.close()
+
+        reopened = SessionStore(path, retention_days=1)
+
+        assert not reopened.session_exists(old)
+        assert reopened.session_exists(recent)
+        assert reopened.message_count(old) == 0
+
+    def test_database_without_owner_column_is_migrated(self, tmp_path):
+        path = tmp_path / "sessions.db"
+        db = sqlite3.connect(path)
+        db.execute("CREATE TABLE sessions (session_id TEXT PRIMARY KEY, project_key TEXT, "
+                   "created_at REAL NOT NULL, updated_at REAL NOT NULL)")
+        db.execute("INSERT INTO sessions VALUES ('ancienne', 'P', ?, ?)", (time.time(), time.time()))
+        db.commit()
+        db.close()
+
+        store = SessionStore(path)
+
+        assert store.session_exists("ancienne")
+        assert store.session_exists(store.create_session("P", owner="alice"), "alice")
@@ -0,0 +1,128 @@
+"""
+test_singleflight.py - Tests du regroupement des lectures DSS simultanées
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.api.nodes import replica_reads
+from src.api.singleflight import SingleFlight, single_flight, single_flight_stats
+
+
+class TestSingleFlight:
+    """Tests du partage d'un appel entre threads et coroutines."""
+
+    def test_concurrent_schema_reads_share_one_dss_call(self):
+        from src.api.datasets import get_dataset_schema
+
+        project = MagicMock()
+
+        def slow_schema():
+            time.sleep(0.1)
+            return {"columns": [{"name": "id", "type": "bigint"}]}
+
+        project.get_dataset.return_value.get_schema.side_effect = slow_schema
+        before = get_dataset_schema.flight.stats()
+
+        with patch("src.api.datasets.get_project", return_value=project):
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                schemas = list(pool.map(lambda _: get_dataset_schema("orders", "P"), range(8)))
+            get_dataset_schema("customers", "P")
+
+        after = get_dataset_schema.flight.stats()
+        assert project.get_dataset.return_value.get_schema.call_count == 2
+        assert after["saved"] - before["saved"] == 7
+        assert all(s == schemas[0] for s in schemas)
+        # Chaque appelant reçoit sa propre copie
+        schemas[1]["columns"].clear()
+        assert schemas[0]["columns"]
+
+    def test_threads_and_coroutines_join_the_same_call(self):
+        flight = SingleFlight("test")
+        calls = []
+        release = threading.Event()
+
+        def fetch(name):
+            calls.append(name)
+            release.wait(1)
+            return [name]
+
+        async def scenario():
+            started = asyncio.create_task(flight.aio("k", fetch, "ds"))
+            await asyncio.sleep(0.05)
+            thread_result = []
+            thread = threading.Thread(target=lambda: thread_result.append(flight.do("k", fetch, "ds")))
+            thread.start()
+            waiters = [asyncio.create_task(flight.aio("k", fetch, "ds")) for _ in range(3)]
+            await asyncio.sleep(0.05)
+            release.set()
+            results = await asyncio.gather(started, *waiters)
+            await asyncio.to_thread(thread.join)
+            return results + thread_result
+
+        assert asyncio.run(scenario()) == [["ds"]] * 5
+        assert calls == ["ds"]
+        assert flight.stats() == {"calls": 5, "executed": 1, "saved": 4}
+
+        gate = threading.Event()
+
+        def broken():
+            calls.append("broken")
+            gate.wait(1)
+            raise ConnectionError("DSS injoignable")
+
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            futures = [pool.submit(flight.do, "b", broken) for _ in range(3)]
+            time.sleep(0.05)
+            gate.set()
+            for future in futures:
+                with pytest.raises(ConnectionError):
+                    future.result()
+        assert calls.count("broken") == 1
+
+    def test_same_name_in_two_modules_gets_two_flights(self):
+        def make(module):
+            def list_datasets(project_key):
+                return [module, project_key]
+            list_datasets.__module__ = module
+            return single_flight(list_datasets)
+
+        first, second = make("tests.module_a"), make("tests.module_b")
+
+        assert first.flight is not second.flight
+        assert second("P") == ["tests.module_b", "P"]
+        names = [name for name in single_flight_stats() if name.endswith(".list_datasets")]
+        assert any(name.startswith("tests.module_a.") for name in names)
+        assert any(name.startswith("tests.module_b.") for name in names)
+
+    def test_design_caller_does_not_join_a_replica_call(self):
+        release = threading.Event()
+        calls = []
+
+        @single_flight
+        def read_schema(name):
+            calls.append(name)
+            release.wait(1)
+            return [name]
+
+        def replica_caller():
+            with replica_reads():
+                return read_schema("orders")
+
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            replica = [pool.submit(replica_caller) for _ in range(2)]
+            time.sleep(0.05)
+            design = pool.submit(read_schema, "orders")
+            time.sleep(0.05)
+            release.set()
+            results = [f.result() for f in replica + [design]]
+
+        assert results == [["orders"]] * 3
+        # Un appel pour les deux appelants « replica », un pour le nœud de design
+        assert len(calls) == 2
+        assert read_schema.flight.stats() == {"calls": 3, "executed": 2, "saved": 1}
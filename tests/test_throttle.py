@@ -0,0 +1,111 @@
+"""
+test_throttle.py - Tests du limiteur de débit et de concurrence DSS
+"""
+
+import threading
+import time
+
+import requests
+from requests.adapters import BaseAdapter
+
+from src.api.nodes import NodePool
+from src.api.throttle import AdaptiveLimit, Throttle, ThrottledAdapter, TokenBucket
+
+
+class ScriptedAdapter(BaseAdapter):
+    """Adaptateur requests renvoyant des codes HTTP prédéfinis, sans réseau."""
+
+    def __init__(self, statuses=(), latency=0.0):
+        super().__init__()
+        self.statuses = list(statuses)
+        self.latency = latency
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        with self.lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            status = self.statuses.pop(0) if self.statuses else 200
+        time.sleep(self.latency)
+        with self.lock:
+            self.in_flight -= 1
+        response = requests.Response()
+        response.status_code = status
+        response.request = request
+        response._content = b"{}"
+        response._content_consumed = True
+        if status == 429:
+            response.headers["Retry-After"] = "0"
+        return response
+
+    def close(self):
+        pass
+
+
+def session_for(throttle, adapter):
+    session = requests.Session()
+    session.mount("https://", ThrottledAdapter(throttle, adapter))
+    return session
+
+
+class TestThrottle:
+    """Tests du seau à jetons, de l'AIMD et des nouvelles tentatives."""
+
+    def test_bucket_and_limit_bound_rate_and_concurrency(self):
+        throttle = Throttle(TokenBucket(rate=100, burst=5), AdaptiveLimit(initial=3, maximum=3))
+        adapter = ScriptedAdapter(latency=0.02)
+        session = session_for(throttle, adapter)
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=session.get, args=("https://dss.test/x",))
+                   for _ in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        stats = throttle.stats()
+        assert adapter.calls == 20 and adapter.max_in_flight <= 3
+        # 5 jetons immédiats puis 100/s : au moins ~0,15 s pour 20 requêtes
+        assert time.perf_counter() - start >= 0.14
+        assert stats["throttled"] >= 10 and stats["queued"] > 0
+        assert stats["throttle_wait_s"] > 0 and stats["in_flight"] == 0
+
+    def test_overload_halves_limit_and_idempotent_calls_are_retried(self):
+        limit = AdaptiveLimit(initial=8, maximum=8)
+        throttle = Throttle(TokenBucket(rate=0, burst=1), limit, max_retries=2)
+        adapter = ScriptedAdapter([429, 503])
+        session = session_for(throttle, adapter)
+
+        assert session.get("https://dss.test/x").status_code == 200
+        assert adapter.calls == 3
+        assert throttle.stats()["retries"] == 2 and throttle.stats()["overloaded"] == 2
+        assert 4 <= limit.limit < 5
+
+        # Écriture non idempotente : l'erreur est remontée sans nouvel essai
+        adapter.statuses = [503]
+        assert session.post("https://dss.test/x", data=b"{}").status_code == 503
+        assert adapter.calls == 4
+
+        for _ in range(20):
+            limit.acquire()
+            limit.release(0.01, overloaded=False)
+        assert limit.limit > 6
+
+    def test_settings_are_read_when_created_not_at_import(self, monkeypatch):
+        # Variables posées après l'import (load_dotenv de client.py)
+        monkeypatch.setenv("DSS_RATE_LIMIT", "7")
+        monkeypatch.setenv("DSS_MAX_CONCURRENCY", "3")
+        monkeypatch.setenv("DSS_MAX_RETRIES", "1")
+        monkeypatch.setenv("DSS_NODE_COOLDOWN", "12")
+
+        throttle = Throttle()
+
+        assert throttle.bucket.rate == 7
+        assert throttle.limit.maximum == throttle.limit.limit == 3
+        assert throttle.max_retries == 1
+        assert NodePool("https://design.test", []).cooldown == 12
@@ -0,0 +1,105 @@
+"""
+test_tool_encoding.py - Tests de l'encodage compact des résultats d'outils
+"""
+
+import sys
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "chatbot" / "src"))
+
+from chat_handler import DATASET_PREVIEW_MAX_ROWS, PROFILE_MAX_ROWS, ChatHandler  # noqa: E402
+from simulation import SimulatedAnthropic, SimulatedConnector  # noqa: E402
+from tool_encoding import encode_tool_result  # noqa: E402
+
+
+def dataset_info(name, nb_columns, shown=None, column_offset=0):
+    columns = [
+        {"name": f"col_{i}", "type": "string" if i % 2 else "bigint", "meaning": ""}
+        for i in range(column_offset, column_offset + (shown or nb_columns))
+    ]
+    return {"name": name, "columns": columns, "nb_columns": nb_columns,
+            "column_offset": column_offset}
+
+
+class TestEncodeToolResult:
+    """Tests de l'encodage en colonnes et des marqueurs de troncature."""
+
+    def test_list_datasets_is_columnar_with_type_dict(self):
+        result = {"datasets": [dataset_info("a", 4), dataset_info("b", 2)],
+                  "total": 2, "offset": 0}
+        content, verbose, compact = encode_tool_result("list_datasets", result)
+        payload = json.loads(content)
+
+        assert payload["type_dict"] == ["bigint", "string"]
+        assert payload["datasets"][0]["cols"] == ["col_0", "col_1", "col_2", "col_3"]
+        assert payload["datasets"][0]["types"] == [0, 1, 0, 1]
+        assert "more" not in payload
+        assert compact < verbose
+
+    def test_list_datasets_more_markers(self):
+        result = {"datasets": [dataset_info("a", 80, shown=50)], "total": 25, "offset": 20}
+        payload = json.loads(encode_tool_result("list_datasets", result)[0])
+
+        assert "offset=21" in payload["more"]
+        assert payload["datasets"][0]["more_cols"] == 30
+
+    def test_dataset_info_column_pagination(self):
+        result = dataset_info("a", 120, shown=50, column_offset=50)
+        payload = json.loads(encode_tool_result("get_dataset_info", result)[0])
+
+        assert payload["cols"][0] == "col_50"
+        assert payload["nb_columns"] == 120
+        assert "column_offset=100" in payload["more"]
+
+    def test_errors_and_other_tools_are_plain_json(self):
+        content, _, _ = encode_tool_result("list_datasets", {"error": "boom"})
+        assert json.loads(content) == {"error": "boom"}
+
+        content, _, _ = encode_tool_result("create_workflow", {"success": True})
+        assert content == '{"success":true}'
+
+
+def test_invalid_pagination_is_a_tool_error():
+    handler = ChatHandler(
+        connector=SimulatedConnector(latency=0.0), client=SimulatedAnthropic(latency=0.0)
+    )
+
+    page = handler.execute_tool("list_datasets", {"offset": 1, "limit": 1})
+    assert [d["name"] for d in page["datasets"]] == ["customers"]
+
+    for bad in ({"offset": -1}, {"limit": 0}, {"limit": -5}, {"max_columns": "10"}):
+        assert "doit être un entier" in handler.execute_tool("list_datasets", bad)["error"]
+    error = handler.execute_tool("get_dataset_info", {"dataset_name": "sales", "column_offset": -2})
+    assert "column_offset" in error["error"]
+
+
+def test_profile_max_rows_is_validated_and_clamped():
+    handler = ChatHandler(
+        connector=SimulatedConnector(latency=0.0), client=SimulatedAnthropic(latency=0.0)
+    )
+
+    with patch.object(handler.connector, "profile_dataset", return_value={}) as profile:
+        handler.execute_tool("profile_dataset", {"dataset_name": "sales", "max_rows": 10**9})
+        for bad in (0, -1, "100", True):
+            error = handler.execute_tool("profile_dataset", {"dataset_name": "sales", "max_rows": bad})
+            assert "max_rows" in error["error"]
+
+    assert profile.call_count == 1
+    assert profile.call_args.kwargs["max_rows"] == PROFILE_MAX_ROWS
+
+
+def test_preview_max_rows_is_validated_and_clamped():
+    handler = ChatHandler(
+        connector=SimulatedConnector(latency=0.0), client=SimulatedAnthropic(latency=0.0)
+    )
+
+    with patch.object(handler.connector, "preview_dataset", return_value={}) as preview:
+        handler.execute_tool("preview_dataset", {"dataset_name": "sales", "max_rows": 10_000})
+        for bad in (0, -3, "20", None):
+            error = handler.execute_tool("preview_dataset", {"dataset_name": "sales", "max_rows": bad})
+            assert "max_rows" in error["error"]
+
+    assert preview.call_count == 1
+    assert preview.call_args.kwargs["max_rows"] == DATASET_PREVIEW_MAX_ROWS
@@ -0,0 +1,187 @@
+"""
+test_workflow_dag.py - Tests du DAG de recettes, de la création parallèle et du plan/apply
+"""
+
+import sys
+import time
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "chatbot" / "src"))
+
+from simulation import SimulatedConnector  # noqa: E402
+from workflow_builder import WorkflowBuilder  # noqa: E402
+from workflow_dag import WorkflowDAG, WorkflowSpecError  # noqa: E402
+from workflow_plan import CONFLICT, CREATE, UNCHANGED, UPDATE, spec_tag  # noqa: E402
+
+
+def python_recipe(name, inputs, output):
+    return {"type": "python", "name": name, "inputs": inputs, "output": output, "code": "#"}
+
+
+class TestWorkflowDAG:
+    """Tests de validation et de niveaux topologiques."""
+
+    def test_levels_follow_dependencies(self):
+        recipes = [
+            python_recipe("final", ["a_out", "b_out"], "final_out"),
+            python_recipe("a", ["src"], "a_out"),
+            python_recipe("b", ["src"], "b_out"),
+        ]
+        dag = WorkflowDAG(recipes, "final_out", ["src"])
+
+        assert dag.levels == [["a", "b"], ["final"]]
+        assert dag.dependencies["final"] == {"a", "b"}
+
+    def test_missing_input_is_rejected(self):
+        with pytest.raises(WorkflowSpecError, match="introuvable.*unknown"):
+            WorkflowDAG([python_recipe("a", ["unknown"], "out")], "out", ["src"])
+
+    def test_cycle_is_rejected(self):
+        recipes = [
+            python_recipe("a", ["b_out"], "a_out"),
+            python_recipe("b", ["a_out"], "b_out"),
+        ]
+        with pytest.raises(WorkflowSpecError, match="Cycle"):
+            WorkflowDAG(recipes, "a_out", [])
+
+    def test_duplicate_output_is_rejected(self):
+        recipes = [python_recipe("a", ["src"], "out"), python_recipe("b", ["src"], "out")]
+        with pytest.raises(WorkflowSpecError, match="produit par"):
+            WorkflowDAG(recipes, "out", ["src"])
+
+
+class TestParallelCreation:
+    """Tests de create_workflow() avec un projet simulé."""
+
+    def make_builder(self, latency):
+        connector = SimulatedConnector(latency=0.0)
+        connector.project.recipe_latency = latency
+        return WorkflowBuilder(connector, max_workers=8)
+
+    def test_wide_workflow_runs_branches_concurrently(self):
+        builder = self.make_builder(latency=0.1)
+        recipes = [python_recipe(f"branch_{i}", ["sales"], f"out_{i}") for i in range(8)]
+        recipes.append(python_recipe("merge", [f"out_{i}" for i in range(8)], "final"))
+
+        start = time.perf_counter()
+        result = builder.create_workflow("wide", ["sales"], recipes, "final")
+        elapsed = time.perf_counter() - start
+
+        assert result["success"], result.get("error")
+        assert result["created_recipes"][-1] == "merge"
+        assert set(result["timings"]["recipes"]) == {r["name"] for r in recipes}
+        # 9 recettes en série prendraient ≥ 0.9 s ; 2 niveaux en parallèle ≈ 0.2 s
+        assert elapsed < 0.6
+
+    def test_failed_dataset_creation_is_not_marked_existing(self):
+        builder = self.make_builder(latency=0.0)
+        connector = builder.connector
+        recipes = [python_recipe("a", ["sales"], "a_out"), python_recipe("b", ["a_out"], "final")]
+        plan = builder.plan_workflow("wf", ["sales"], recipes, "final")
+        create_dataset = connector.create_dataset
+
+        def failing_create(name, **kwargs):
+            raise ConnectionError("DSS injoignable")
+
+        connector.create_dataset = failing_create
+        existing = set()
+        with pytest.raises(ConnectionError):
+            builder._create_recipe_task(plan, "a", existing, threading.Lock())
+        assert existing == set()
+
+        connector.create_dataset = create_dataset
+        created, _ = builder._create_recipe_task(plan, "a", existing, threading.Lock())
+        assert created and existing == {"a_out"}
+
+    def test_invalid_spec_creates_nothing(self):
+        builder = self.make_builder(latency=0.0)
+        result = builder.create_workflow(
+            "bad", ["sales"], [python_recipe("a", ["missing"], "out")], "out"
+        )
+
+        assert result["success"] is False
+        assert result["created_datasets"] == []
+        assert builder.project.built_recipes == []
+
+
+class TestPlanApply:
+    """Tests du mode plan/apply idempotent."""
+
+    def make_builder(self):
+        connector = SimulatedConnector(latency=0.0)
+        return connector, WorkflowBuilder(connector, max_workers=4)
+
+    def deploy(self, connector, recipes):
+        """Simule un déploiement précédent : recettes taguées avec leur empreinte."""
+        for r in recipes:
+            connector.datasets.setdefault(r["output"], [])
+            connector.recipes[r["name"]] = {
+                "type": r["type"], "tags": [spec_tag(r, r["output"])]
+            }
+
+    def test_rerun_with_same_spec_changes_nothing(self):
+        connector, builder = self.make_builder()
+        recipes = [python_recipe("a", ["sales"], "a_out"), python_recipe("b", ["a_out"], "final")]
+        self.deploy(connector, recipes)
+
+        result = builder.create_workflow("wf", ["sales"], recipes, "final")
+
+        assert result["success"], result.get("error")
+        assert result["created_recipes"] == result["updated_recipes"] == []
+        assert result["unchanged_recipes"] == ["a", "b"]
+        assert builder.project.built_recipes == []
+
+    def test_changed_recipe_is_recreated_alone(self):
+        connector, builder = self.make_builder()
+        recipes = [python_recipe("a", ["sales"], "a_out"), python_recipe("b", ["a_out"], "final")]
+        self.deploy(connector, recipes)
+        connector.recipes["b"]["tags"].append("équipe:finance")
+        recipes[1] = {**recipes[1], "code": "# v2"}
+        recipes.append(python_recipe("c", ["a_out"], "c_out"))
+
+        plan = builder.plan_workflow("wf", ["sales"], recipes, "final")
+        actions = {a.name: a.action for a in plan.actions if a.kind == "recipe"}
+        assert actions == {"a": UNCHANGED, "b": UPDATE, "c": CREATE}
+
+        result = builder.create_workflow("wf", ["sales"], recipes, "final")
+        assert result["updated_recipes"] == ["b"]
+        assert result["created_recipes"] == ["c"]
+        assert result["created_datasets"] == ["c_out"]
+        # Mise à jour sur place : la recette en service n'est jamais supprimée
+        assert builder.project.deleted_recipes == []
+        [updated] = builder.project.fetched_recipes
+        assert updated.name == "b" and updated.settings.code == "# v2"
+        assert updated.settings.definition["outputs"]["main"]["items"][0]["ref"] == "final"
+        assert updated.settings.saves == 1
+        # Seul l'ancien tag d'empreinte est remplacé
+        assert updated.settings.tags == ["équipe:finance", spec_tag(recipes[1], "final")]
+
+    def test_missing_output_or_type_change_is_planned(self):
+        connector, builder = self.make_builder()
+        recipes = [python_recipe("a", ["sales"], "a_out"), python_recipe("b", ["a_out"], "final")]
+        self.deploy(connector, recipes)
+        del connector.datasets["a_out"]
+        connector.recipes["b"]["type"] = "grouping"
+
+        plan = builder.plan_workflow("wf", ["sales"], recipes, "final")
+        actions = {a.name: (a.action, a.reason) for a in plan.actions if a.kind == "recipe"}
+        assert actions["a"] == (UPDATE, "dataset de sortie absent")
+        assert actions["b"][0] == CONFLICT and "python" in actions["b"][1]
+
+    def test_dry_run_and_conflicts_apply_nothing(self):
+        connector, builder = self.make_builder()
+        connector.recipes["a"] = {"type": "python", "tags": []}
+        recipes = [python_recipe("a", ["sales"], "a_out"), python_recipe("b", ["sales"], "final")]
+
+        dry = builder.create_workflow("wf", ["sales"], recipes[1:], "final", dry_run=True)
+        assert dry["success"] and dry["dry_run"]
+        assert "+ recipe b" in dry["plan_text"]
+
+        result = builder.create_workflow("wf", ["sales"], recipes, "final")
+        assert result["success"] is False
+        assert "non gérées" in result["error"] and "a" in result["error"]
+        assert result["created_datasets"] == []
+        assert builder.project.built_recipes == []
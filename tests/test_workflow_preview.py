@@ -0,0 +1,138 @@
+"""
+test_workflow_preview.py - Tests de l'aperçu local des workflows
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "chatbot" / "src"))
+
+from simulation import SimulatedConnector  # noqa: E402
+from workflow_preview import WorkflowPreview  # noqa: E402
+
+
+def make_preview():
+    return WorkflowPreview(SimulatedConnector(latency=0.0), python_timeout=20)
+
+
+JOIN = {
+    "type": "join", "name": "join_customers", "left": "sales", "right": "customers",
+    "join_keys": [["region", "region"]], "join_type": "INNER", "output": "joined",
+}
+GROUPING = {
+    "type": "grouping", "name": "by_region", "input": "joined", "output": "by_region",
+    "group_by": ["left_region"],
+    "aggregations": [{"column": "left_amount", "function": "sum", "output": "total"}],
+}
+
+
+class TestWorkflowPreview:
+    """Tests de l'exécution locale des recettes."""
+
+    def test_join_then_grouping(self):
+        result = make_preview().preview_workflow([GROUPING, JOIN], "by_region")
+
+        assert result.success, result.error
+        assert result.row_counts["join_customers"]["input_rows"] == {"sales": 12, "customers": 12}
+        by_region = result.frames["by_region"]
+        assert list(by_region.columns) == ["left_region", "total"]
+        assert len(by_region) == 3
+        assert by_region["total"].sum() == result.frames["joined"]["left_amount"].sum()
+
+    def test_samples_are_read_once(self):
+        preview = make_preview()
+        calls = []
+        get_sample = preview.connector.get_sample
+        preview.connector.get_sample = lambda ds, limit: calls.append(ds) or get_sample(ds, limit)
+
+        preview.preview_workflow([JOIN], "joined")
+        preview.preview_workflow([JOIN, GROUPING], "by_region")
+
+        assert sorted(calls) == ["customers", "sales"]
+
+    def test_samples_reloaded_when_stale_and_bounded(self):
+        preview = WorkflowPreview(SimulatedConnector(latency=0.0), max_samples=1)
+        calls = []
+        get_sample = preview.connector.get_sample
+        preview.connector.get_sample = lambda ds, limit: calls.append(ds) or get_sample(ds, limit)
+
+        preview.preview_workflow([GROUPING | {"input": "sales", "group_by": ["region"],
+                                              "aggregations": []}], "by_region")
+        preview.connector.versions["sales"] = 1
+        preview.preview_workflow([JOIN], "joined")
+
+        assert calls == ["sales", "customers", "sales"]
+        assert len(preview._samples) == 1
+
+    def test_python_recipe_runs_in_sandbox(self, monkeypatch):
+        monkeypatch.setenv("DSS_API_KEY", "secret")
+        code = (
+            "import os\n"
+            "import dataiku\n"
+            "df = dataiku.Dataset('sales').get_dataframe()\n"
+            "df['leak'] = os.environ.get('DSS_API_KEY', '')\n"
+            "dataiku.Dataset('big_sales').write_with_schema(df[df['amount'] > 50])\n"
+        )
+        recipe = {"type": "python", "name": "filter", "inputs": ["sales"],
+                  "output": "big_sales", "code": code}
+
+        result = make_preview().preview_workflow([recipe], "big_sales")
+
+        assert result.success, result.error
+        assert result.row_counts["filter"]["output_rows"] == 6
+        assert set(result.frames["big_sales"]["leak"]) == {""}
+        assert result.to_dict()["datasets"]["big_sales"]["rows"] == 6
+
+    def test_python_recipe_cannot_read_outside_its_workdir(self):
+        env_file = Path(__file__).resolve().parents[1] / ".env.example"
+        code = f"open({str(env_file)!r}).read()\n"
+        recipe = {"type": "python", "name": "leak", "inputs": ["sales"],
+                  "output": "out", "code": code}
+
+        result = make_preview().preview_workflow([recipe], "out")
+
+        assert not result.success
+        assert "Accès refusé" in result.error
+
+    def test_python_recipe_cannot_bypass_the_hook(self):
+        env_file = Path(__file__).resolve().parents[1] / ".env.example"
+        bypasses = [
+            # Fonctions utilisées par le hook remplacées avant la lecture
+            "import os\nos.path.realpath = lambda p: os.getcwd()\n"
+            "os.path.join = lambda *p: os.getcwd()\nos.fsdecode = lambda p: os.getcwd()\n",
+            "import builtins\nbuiltins.any = lambda it: True\n"
+            "builtins.isinstance = lambda *a: True\n",
+            "import sys\nsys.modules['__main__'].WRITE_FLAGS = 0\n"
+            "sys.modules['__main__'].DENIED_EVENTS = ()\n",
+            # Lien symbolique vers l'extérieur du répertoire de travail
+            f"import os\nos.symlink({str(env_file.parent)!r}, 'repo')\n",
+        ]
+        for setup in bypasses:
+            code = setup + f"open({str(env_file)!r}).read()\n"
+            recipe = {"type": "python", "name": "leak", "inputs": ["sales"],
+                      "output": "out", "code": code}
+
+            result = make_preview().preview_workflow([recipe], "out")
+
+            assert not result.success, setup
+            assert "refusé" in result.error or "interdite" in result.error, result.error
+
+    def test_python_recipe_has_no_network(self):
+        code = "import socket\nsocket.create_connection(('example.com', 80), timeout=1)\n"
+        recipe = {"type": "python", "name": "net", "inputs": ["sales"],
+                  "output": "out", "code": code}
+
+        result = make_preview().preview_workflow([recipe], "out")
+
+        assert not result.success
+        assert "interdite" in result.error
+
+    def test_python_errors_are_reported(self):
+        code = "import dataiku\ndataiku.Dataset('customers').get_dataframe()\n"
+        recipe = {"type": "python", "name": "bad", "inputs": ["sales"],
+                  "output": "out", "code": code}
+
+        result = make_preview().preview_workflow([recipe], "out")
+
+        assert not result.success
+        assert "non déclaré" in result.error